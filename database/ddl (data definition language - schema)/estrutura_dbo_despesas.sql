@@ -22,7 +22,23 @@ CREATE TABLE [dbo].[despesas](
 	[data_debito_convenio] [date] NULL,
 	[valor] [decimal](18, 2) NULL,
 	[id_termo_rubrica] [varchar](70) NULL,
+	[id_codigo_sit] [varchar](50) NULL,
+	[id_termo]  AS (case when charindex('-',[id_termo_rubrica])>(1) then TRY_CONVERT([int],left([id_termo_rubrica],charindex('-',[id_termo_rubrica])-(1)))  end) PERSISTED,
+ CONSTRAINT [PK_despesas] PRIMARY KEY CLUSTERED 
+(
+	[id] ASC
+)
 ) ON [PRIMARY]
 GO
 
+-- Índices criados pelas migrações (database/migrations)
+CREATE UNIQUE NONCLUSTERED INDEX [UX_despesas_id_codigo_sit] ON [dbo].[despesas] ([id_codigo_sit]) WHERE [id_codigo_sit] IS NOT NULL
+GO
+
+CREATE NONCLUSTERED INDEX [IX_despesas_id_termo_rubrica] ON [dbo].[despesas] ([id_termo_rubrica]) INCLUDE ([valor], [data_pagamento])
+GO
+
+CREATE NONCLUSTERED INDEX [IX_despesas_id_termo] ON [dbo].[despesas] ([id_termo]) INCLUDE ([valor], [data_pagamento])
+GO
+
 
@@ -0,0 +1,33 @@
+USE [ETL_Convenios]
+GO
+
+/****** Object:  Table [dbo].[etl_load_journal]    Controle de lotes commitados pela carga de despesas ******/
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- Cada linha é gravada na MESMA transação do lote de despesas que ela descreve.
+-- lote_id = SHA-256 da origem da carga (run_id; sem manifesto, SHA-256 e data
+-- do arquivo de upload) + partição + faixa de linhas + conteúdo: a retomada
+-- da mesma carga e loaders concorrentes pulam lotes já aplicados com uma
+-- única busca pela chave primária, e cargas novas com o mesmo conteúdo não.
+-- hash_conteudo = SHA-256 só do conteúdo do lote (auditoria).
+-- status: 'commitado' (lote aplicado por inteiro) ou 'dividido' (o lote falhou
+-- e foi carregado em metades, cada uma com sua própria entrada).
+CREATE TABLE [dbo].[etl_load_journal](
+	[lote_id] [char](64) NOT NULL,
+	[run_id] [varchar](40) NULL,
+	[particao] [varchar](100) NULL,
+	[linha_inicio] [int] NOT NULL,
+	[linha_fim] [int] NOT NULL,
+	[qtd_linhas] [int] NOT NULL,
+	[qtd_insert] [int] NOT NULL,
+	[qtd_update] [int] NOT NULL,
+	[status] [varchar](12) NOT NULL,
+	[data_commit] [datetime2](0) NOT NULL CONSTRAINT [DF_etl_load_journal_data_commit] DEFAULT (SYSDATETIME()),
+	[hash_conteudo] [char](64) NULL,
+	CONSTRAINT [PK_etl_load_journal] PRIMARY KEY CLUSTERED ([lote_id])
+) ON [PRIMARY]
+GO
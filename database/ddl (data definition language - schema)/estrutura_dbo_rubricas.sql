@@ -25,8 +25,16 @@ CREATE TABLE [dbo].[rubricas](
 	[descricao_rubrica] [varchar](255) NULL,
 	[valor_estornado] [decimal](10, 2) NULL,
 	[executado] [nvarchar](20) NULL,
-	[nro_sit] [int] NULL
+	[nro_sit] [int] NULL,
+	[id_termo]  AS (case when charindex('-',[id_termo_rubrica])>(1) then TRY_CONVERT([int],left([id_termo_rubrica],charindex('-',[id_termo_rubrica])-(1)))  end) PERSISTED
 ) ON [PRIMARY]
 GO
 
+-- Índices criados pelas migrações (database/migrations)
+CREATE NONCLUSTERED INDEX [IX_rubricas_id_termo_rubrica] ON [dbo].[rubricas] ([id_termo_rubrica])
+GO
+
+CREATE NONCLUSTERED INDEX [IX_rubricas_id_termo] ON [dbo].[rubricas] ([id_termo]) INCLUDE ([data_fim_vigencia], [saldo_total_gasto], [saldo_atual])
+GO
+
 
@@ -0,0 +1,22 @@
+USE [ETL_Convenios]
+GO
+
+/****** Object:  Table [dbo].[schema_migrations]    Migrações de database/migrations já aplicadas ******/
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- Uma linha por script V<versao>__<descricao>.sql, gravada na mesma transação
+-- do script (python -m src.utils.migrations). checksum = SHA-256 do arquivo:
+-- um script alterado depois de aplicado interrompe as próximas migrações.
+CREATE TABLE [dbo].[schema_migrations](
+	[versao] [int] NOT NULL,
+	[descricao] [varchar](200) NOT NULL,
+	[checksum] [char](64) NOT NULL,
+	[duracao_ms] [int] NOT NULL,
+	[aplicada_em] [datetime2](0) NOT NULL CONSTRAINT [DF_schema_migrations_aplicada_em] DEFAULT (SYSDATETIME()),
+	CONSTRAINT [PK_schema_migrations] PRIMARY KEY CLUSTERED ([versao])
+) ON [PRIMARY]
+GO
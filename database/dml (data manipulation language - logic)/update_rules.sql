@@ -1,5 +1,6 @@
 /* ==========================================================================
    SCRIPT DE ATUALIZAÇÃO FINANCEIRA E VIGÊNCIA (RELATÓRIO COMPLETO)
+   Requer as migrações de database/migrations (coluna calculada id_termo)
    ========================================================================== */
 SET NOCOUNT ON; 
 PRINT '>>> INICIANDO PROCESSO DE ATUALIZAÇÃO COMPLETA...'
@@ -18,7 +19,7 @@ SELECT
     COALESCE(SUM(d.valor), 0) / NULLIF(DATEDIFF(MONTH, t.data_inicio_vigencia, MAX(d.data_pagamento)) + 1, 0) AS media_mensal_gastos
 FROM rubricas r
 INNER JOIN termos t 
-    ON t.id_termo = CAST(LEFT(r.id_termo_rubrica, CHARINDEX('-', r.id_termo_rubrica) - 1) AS INT)
+    ON t.id_termo = r.id_termo
 LEFT JOIN despesas d 
     ON d.id_termo_rubrica = r.id_termo_rubrica
 GROUP BY 
@@ -78,14 +79,15 @@ PRINT '3. Atualizando View vw_termos_calc...'
 GO
 CREATE OR ALTER VIEW vw_termos_calc AS
 SELECT
-    CAST(LEFT(r.id_termo_rubrica, CHARINDEX('-', r.id_termo_rubrica) - 1) AS INT) AS id_termo,
+    r.id_termo,
     MAX(r.data_fim_vigencia) AS data_fim_vigencia,
     GETDATE() AS data_atual,
     DATEDIFF(DAY, GETDATE(), MAX(r.data_fim_vigencia)) AS dias_restantes,
     SUM(COALESCE(r.saldo_total_gasto, 0)) AS saldo_total_gasto,
     SUM(COALESCE(r.saldo_atual, 0)) AS saldo_atual
 FROM rubricas r
-GROUP BY CAST(LEFT(r.id_termo_rubrica, CHARINDEX('-', r.id_termo_rubrica) - 1) AS INT);
+WHERE r.id_termo IS NOT NULL
+GROUP BY r.id_termo;
 GO
 
 /**********************************************************************************************************************************************************************************************
@@ -117,7 +119,7 @@ PRINT '5. Ajustando Rendimentos...'
 
 ;WITH cte_ajuste_rendimento AS (
     SELECT
-        CAST(LEFT(r.id_termo_rubrica, CHARINDEX('-', r.id_termo_rubrica) - 1) AS INT) AS id_termo,
+        r.id_termo,
         SUM(CASE 
                 WHEN r.saldo_atual < 0 
                      AND r.saldo_inicial_previsto > 0 
@@ -126,7 +128,7 @@ PRINT '5. Ajustando Rendimentos...'
                 ELSE 0
             END) AS valor_utilizado_rendimento
     FROM rubricas r
-    GROUP BY CAST(LEFT(r.id_termo_rubrica, CHARINDEX('-', r.id_termo_rubrica) - 1) AS INT)
+    GROUP BY r.id_termo
 )
 UPDATE t
 SET
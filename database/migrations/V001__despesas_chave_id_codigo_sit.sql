@@ -0,0 +1,40 @@
+/****** V001 - Chave das despesas: id_codigo_sit ******/
+-- A comparação lê o banco por id_codigo_sit (código do lançamento no SIT) e a
+-- carga faz UPDATE ... WHERE id_codigo_sit = ?: sem índice, cada UPDATE era
+-- uma varredura completa da tabela.
+--
+-- O índice único é filtrado (linhas antigas sem código continuam válidas) e
+-- exige ANSI_NULLS / QUOTED_IDENTIFIER ON nas sessões que gravam em despesas,
+-- que é o padrão do ODBC Driver for SQL Server.
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+IF COL_LENGTH('dbo.despesas', 'id_codigo_sit') IS NULL
+    ALTER TABLE [dbo].[despesas] ADD [id_codigo_sit] [varchar](50) NULL;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.key_constraints
+    WHERE parent_object_id = OBJECT_ID('dbo.despesas') AND type = 'PK'
+)
+    ALTER TABLE [dbo].[despesas] ADD CONSTRAINT [PK_despesas] PRIMARY KEY CLUSTERED ([id]);
+GO
+
+IF EXISTS (
+    SELECT id_codigo_sit FROM [dbo].[despesas]
+    WHERE id_codigo_sit IS NOT NULL
+    GROUP BY id_codigo_sit
+    HAVING COUNT(*) > 1
+)
+    THROW 50001, 'dbo.despesas tem id_codigo_sit duplicado: remova as duplicatas antes de criar o índice único.', 1;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_despesas_id_codigo_sit' AND object_id = OBJECT_ID('dbo.despesas'))
+    CREATE UNIQUE NONCLUSTERED INDEX [UX_despesas_id_codigo_sit]
+        ON [dbo].[despesas] ([id_codigo_sit])
+        WHERE [id_codigo_sit] IS NOT NULL;
+GO
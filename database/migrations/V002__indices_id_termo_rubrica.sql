@@ -0,0 +1,15 @@
+/****** V002 - Índices por id_termo_rubrica ******/
+-- vw_rubricas_calc soma o valor e pega a maior data_pagamento das despesas de
+-- cada rubrica: o INCLUDE cobre a agregação sem voltar à tabela.
+-- A carga atualiza rubricas com UPDATE ... WHERE id_termo_rubrica = ?.
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_despesas_id_termo_rubrica' AND object_id = OBJECT_ID('dbo.despesas'))
+    CREATE NONCLUSTERED INDEX [IX_despesas_id_termo_rubrica]
+        ON [dbo].[despesas] ([id_termo_rubrica])
+        INCLUDE ([valor], [data_pagamento]);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_rubricas_id_termo_rubrica' AND object_id = OBJECT_ID('dbo.rubricas'))
+    CREATE NONCLUSTERED INDEX [IX_rubricas_id_termo_rubrica]
+        ON [dbo].[rubricas] ([id_termo_rubrica]);
+GO
@@ -0,0 +1,36 @@
+/****** V003 - Coluna calculada id_termo (PERSISTED) em despesas e rubricas ******/
+-- As views juntavam termos com CAST(LEFT(id_termo_rubrica, CHARINDEX('-', ...)))
+-- e agrupavam pela mesma expressão, que nenhum índice consegue atender.
+-- Persistida, a coluna é calculada uma vez na gravação e pode ser indexada.
+--
+-- id_termo_rubrica sem '-' (ou com termo não numérico) resulta em NULL em vez
+-- de erro de conversão: a linha simplesmente não casa com nenhum termo.
+
+IF COL_LENGTH('dbo.despesas', 'id_termo') IS NULL
+    ALTER TABLE [dbo].[despesas] ADD [id_termo] AS (
+        CASE WHEN CHARINDEX('-', [id_termo_rubrica]) > 1
+             THEN TRY_CONVERT(INT, LEFT([id_termo_rubrica], CHARINDEX('-', [id_termo_rubrica]) - 1))
+        END
+    ) PERSISTED;
+GO
+
+IF COL_LENGTH('dbo.rubricas', 'id_termo') IS NULL
+    ALTER TABLE [dbo].[rubricas] ADD [id_termo] AS (
+        CASE WHEN CHARINDEX('-', [id_termo_rubrica]) > 1
+             THEN TRY_CONVERT(INT, LEFT([id_termo_rubrica], CHARINDEX('-', [id_termo_rubrica]) - 1))
+        END
+    ) PERSISTED;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_despesas_id_termo' AND object_id = OBJECT_ID('dbo.despesas'))
+    CREATE NONCLUSTERED INDEX [IX_despesas_id_termo]
+        ON [dbo].[despesas] ([id_termo])
+        INCLUDE ([valor], [data_pagamento]);
+GO
+
+-- vw_termos_calc agrupa rubricas por termo
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_rubricas_id_termo' AND object_id = OBJECT_ID('dbo.rubricas'))
+    CREATE NONCLUSTERED INDEX [IX_rubricas_id_termo]
+        ON [dbo].[rubricas] ([id_termo])
+        INCLUDE ([data_fim_vigencia], [saldo_total_gasto], [saldo_atual]);
+GO
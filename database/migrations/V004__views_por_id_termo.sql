@@ -0,0 +1,34 @@
+/****** V004 - Views juntando e agrupando pela coluna id_termo ******/
+-- Mesmas definições de database/dml (...)/update_rules.sql, que as recria a
+-- cada atualização financeira.
+
+CREATE OR ALTER VIEW vw_rubricas_calc AS
+SELECT
+    r.id_termo_rubrica,
+    GETDATE() AS data_atual,
+    DATEDIFF(DAY, GETDATE(), t.data_fim_vigencia) AS dias_restantes,
+    COALESCE(SUM(d.valor), 0) AS saldo_total_gasto,
+    COALESCE(SUM(d.valor), 0) / NULLIF(DATEDIFF(MONTH, t.data_inicio_vigencia, MAX(d.data_pagamento)) + 1, 0) AS media_mensal_gastos
+FROM rubricas r
+INNER JOIN termos t 
+    ON t.id_termo = r.id_termo
+LEFT JOIN despesas d 
+    ON d.id_termo_rubrica = r.id_termo_rubrica
+GROUP BY 
+    r.id_termo_rubrica, 
+    t.data_inicio_vigencia,
+    t.data_fim_vigencia;
+GO
+
+CREATE OR ALTER VIEW vw_termos_calc AS
+SELECT
+    r.id_termo,
+    MAX(r.data_fim_vigencia) AS data_fim_vigencia,
+    GETDATE() AS data_atual,
+    DATEDIFF(DAY, GETDATE(), MAX(r.data_fim_vigencia)) AS dias_restantes,
+    SUM(COALESCE(r.saldo_total_gasto, 0)) AS saldo_total_gasto,
+    SUM(COALESCE(r.saldo_atual, 0)) AS saldo_atual
+FROM rubricas r
+WHERE r.id_termo IS NOT NULL
+GROUP BY r.id_termo;
+GO
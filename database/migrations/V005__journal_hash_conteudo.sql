@@ -0,0 +1,11 @@
+/****** V005 - Chave do journal de carga por execução e coluna hash_conteudo ******/
+-- O lote_id passou a identificar o lote dentro da carga (run_id, ou o upload
+-- quando não há manifesto, + partição + faixa de linhas + conteúdo), e não só
+-- o conteúdo: lotes idênticos de cargas diferentes (A→B→A, re-sincronizações,
+-- retentativas do dead letter) não são mais pulados. O SHA-256 do conteúdo
+-- continua registrado, para auditoria, em hash_conteudo.
+
+IF OBJECT_ID('dbo.etl_load_journal', 'U') IS NOT NULL
+   AND COL_LENGTH('dbo.etl_load_journal', 'hash_conteudo') IS NULL
+    ALTER TABLE [dbo].[etl_load_journal] ADD [hash_conteudo] [char](64) NULL;
+GO
@@ -0,0 +1,258 @@
+"""
+🧰 LINHA DE COMANDO DO PIPELINE
+Um subcomando por etapa; cada um só importa o que usa (pandas, pyodbc e os
+módulos das etapas ficam fora de comandos rápidos como `status`)
+
+Uso:
+    python -m src.cli run                  # pipeline completo (= python -m src.main)
+    python -m src.cli extract | transform | load
+    python -m src.cli export [--completo]  # dataset Parquet (DIR_ANALITICO)
+    python -m src.cli history ID_CODIGO_SIT [--em DATA] [--versoes] | --termo TERMO [--em DATA]
+    python -m src.cli status               # última execução, staging e pendentes
+    python -m src.cli pending [--aprovar RUN_ID | --rejeitar RUN_ID]
+    python -m src.cli daemon [--uma-vez]
+    python -m src.cli migrate [--status | --dry-run]
+"""
+
+import argparse
+import sys
+
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger("CLI")
+
+
+def _codigo(sucesso) -> int:
+    return 0 if sucesso else 1
+
+
+def cmd_run(args) -> int:
+    from src.main import main
+    return main() or 0
+
+
+def cmd_extract(args) -> int:
+    """Extração para a pasta da execução em andamento deste shard (ou de uma nova)"""
+    from src.extract.expenses import ExpensesExtractor
+    from src.utils.workspace import EspacoExecucao
+
+    Config.validate()
+    with EspacoExecucao.abrir() as espaco:
+        return _codigo(ExpensesExtractor(espaco.caminho).run())
+
+
+def cmd_transform(args) -> int:
+    from src.transform.transformer import ExpensesTransformer
+    from src.utils.workspace import EspacoExecucao
+
+    Config.validate()
+    with EspacoExecucao.abrir() as espaco:
+        return _codigo(ExpensesTransformer(espaco.caminho).run())
+
+
+def cmd_load(args) -> int:
+    """Revisão (terminal ou política) + carga do que estiver na pasta da execução"""
+    from src.load.analytics import AnalyticsExporter
+    from src.load.loader import ExpensesLoader
+    from src.main import revisar_carga
+    from src.utils.workspace import EspacoExecucao
+
+    Config.validate()
+    with EspacoExecucao.abrir() as espaco:
+        manifesto = espaco.manifesto
+        if not revisar_carga(manifesto):
+            return 0
+
+        loader = ExpensesLoader(manifesto=manifesto)
+        sucesso = loader.run()
+        if sucesso:
+            AnalyticsExporter(espaco.caminho).run()
+        if not loader.carga_pendente():
+            manifesto.finalizar()
+        return _codigo(sucesso)
+
+
+def cmd_export(args) -> int:
+    """Exportação analítica: partições tocadas pela última execução, ou todas (--completo)"""
+    from src.load.analytics import AnalyticsExporter
+    from src.utils.workspace import ultima_execucao
+
+    Config.validate()
+    if not Config.DIR_ANALITICO:
+        print("DIR_ANALITICO não definido")
+        return 1
+
+    ponteiro = None if args.completo else ultima_execucao(Config.DIR_STAGING)
+    exportador = AnalyticsExporter(ponteiro["caminho"] if ponteiro else None)
+    return _codigo(exportador.run(completo=args.completo))
+
+
+def cmd_history(args) -> int:
+    """Estado de uma despesa (ou das despesas de um termo) em um instante, pelo histórico"""
+    import pandas as pd
+
+    from src.load.history import COLUNAS, HistoricoDespesas
+
+    if not Config.DIR_HISTORICO:
+        print("DIR_HISTORICO não definido")
+        return 1
+
+    historico = HistoricoDespesas()
+    if args.termo:
+        df = historico.estado_termo(args.termo, args.em)
+        print(f"{len(df)} despesa(s) do termo {args.termo}")
+        if not df.empty:
+            print(df.to_string(index=False))
+        return 0
+
+    if args.versoes:
+        versoes = historico.versoes([args.id_codigo_sit], args.em).get(args.id_codigo_sit, [])
+        if not versoes:
+            print(f"{args.id_codigo_sit}: sem histórico")
+            return 1
+        print(pd.DataFrame(versoes).to_string(index=False, na_rep=""))
+        return 0
+
+    linha = historico.estado(args.id_codigo_sit, args.em)
+    if linha is None:
+        print(f"{args.id_codigo_sit}: sem histórico até {args.em or 'agora'}")
+        return 1
+    for coluna in COLUNAS:
+        print(f"{coluna:<24}{linha[coluna]}")
+    return 0
+
+
+def cmd_status(args) -> int:
+    """Resumo do estado atual, lendo apenas os JSON do staging"""
+    from pathlib import Path
+
+    from src.transform.diff_summary import ARQUIVOS_SECAO, ler_resumo
+    from src.utils.approval import listar_pendentes
+    from src.utils.run_manifest import ManifestoExecucao
+    from src.utils.workspace import em_uso, listar_execucoes, ultima_execucao
+
+    dir_base = Config.DIR_STAGING
+    if not dir_base:
+        print("DIR_STAGING não definido")
+        return 1
+
+    ativas = []
+    for pasta in listar_execucoes(dir_base):
+        dados = ManifestoExecucao.ler(pasta)
+        if dados and dados.get("status") == "em_andamento":
+            ativas.append((pasta.name, dados.get("escopo"), "rodando" if em_uso(pasta) else "interrompida"))
+    if ativas:
+        print("Execuções em andamento:")
+        for run_id, escopo, situacao in ativas:
+            print(f"   {run_id} ({escopo}, {situacao})")
+
+    ponteiro = ultima_execucao(dir_base)
+    dir_staging = Path(ponteiro["caminho"]) if ponteiro else None
+    manifesto = ManifestoExecucao.ler(dir_staging) if dir_staging else None
+    if manifesto:
+        etapas = ", ".join(manifesto.get("etapas", {})) or "nenhuma"
+        print(f"Última execução: {manifesto['run_id']} ({manifesto['status']}, iniciada {manifesto['criado_em']})")
+        print(f"   etapas concluídas: {etapas}")
+        lotes = manifesto.get("lotes", {}).values()
+        if lotes:
+            print(f"   lotes commitados: {len(lotes)} | INSERT {sum(l['qtd_insert'] for l in lotes)} | "
+                  f"UPDATE {sum(l['qtd_update'] for l in lotes)}")
+    else:
+        print("Nenhuma execução registrada")
+        dir_staging = Path(dir_base)
+
+    resumo = ler_resumo(dir_staging)
+    secoes = [s for s, nome in ARQUIVOS_SECAO.items() if (Path(dir_staging) / nome).exists()]
+    if secoes:
+        print("Carga em staging (última execução):")
+        for secao in secoes:
+            conteudo = resumo.get(secao)
+            if secao == "despesas" and conteudo:
+                print(f"   despesas: {conteudo['insert']} INSERT | {conteudo['update']} UPDATE")
+            elif conteudo:
+                print(f"   {secao}: {conteudo['total']} registro(s)")
+            else:
+                print(f"   {secao}: {ARQUIVOS_SECAO[secao]} (sem resumo)")
+    else:
+        print("Nenhuma carga em staging")
+
+    pendentes = listar_pendentes(dir_base)
+    print(f"Cargas pendentes de aprovação: {len(pendentes)}")
+    for p in pendentes:
+        print(f"   {p['run_id']}: {'; '.join(p['motivos'])}")
+    return 0
+
+
+def cmd_pending(args) -> int:
+    from src.utils import approval
+
+    if args.aprovar:
+        return approval.main(["--aprovar", args.aprovar])
+    if args.rejeitar:
+        return approval.main(["--rejeitar", args.rejeitar])
+    return approval.main(["--listar"])
+
+
+def cmd_daemon(args) -> int:
+    from src import daemon
+
+    return daemon.main(["--uma-vez"] if args.uma_vez else [])
+
+
+def cmd_migrate(args) -> int:
+    from src.utils import migrations
+
+    return migrations.main(["--status"] if args.status else ["--dry-run"] if args.dry_run else [])
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Pipeline ETL - Grants Management")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    sub.add_parser("run", help="Pipeline completo").set_defaults(funcao=cmd_run)
+    sub.add_parser("extract", help="Etapa 1: extração para o staging").set_defaults(funcao=cmd_extract)
+    sub.add_parser("transform", help="Etapa 2: comparação com o banco").set_defaults(funcao=cmd_transform)
+    sub.add_parser("load", help="Etapa 3: revisão e carga do staging").set_defaults(funcao=cmd_load)
+    exportar = sub.add_parser("export", help="Atualiza o dataset Parquet de DIR_ANALITICO")
+    exportar.add_argument("--completo", action="store_true", help="Regrava todas as partições")
+    exportar.set_defaults(funcao=cmd_export)
+    historico = sub.add_parser("history", help="Despesa ou termo em um instante, pelo histórico (DIR_HISTORICO)")
+    alvo = historico.add_mutually_exclusive_group(required=True)
+    alvo.add_argument("id_codigo_sit", nargs="?", help="Despesa a reconstruir")
+    alvo.add_argument("--termo", help="Todas as despesas do termo")
+    historico.add_argument("--em", metavar="DATA", help="Instante ISO (ex.: 2025-03-31T18:00; padrão: agora)")
+    historico.add_argument("--versoes", action="store_true", help="Lista as versões do id em vez do estado")
+    historico.set_defaults(funcao=cmd_history)
+    sub.add_parser("status", help="Última execução, staging e pendentes").set_defaults(funcao=cmd_status)
+
+    pendentes = sub.add_parser("pending", help="Cargas estacionadas pela política de aprovação")
+    grupo = pendentes.add_mutually_exclusive_group()
+    grupo.add_argument("--aprovar", metavar="RUN_ID", help="Carrega um pendente")
+    grupo.add_argument("--rejeitar", metavar="RUN_ID", help="Descarta um pendente")
+    pendentes.set_defaults(funcao=cmd_pending)
+
+    daemon = sub.add_parser("daemon", help="Ingestão contínua de DIR_DOWNLOADS")
+    daemon.add_argument("--uma-vez", action="store_true", help="Processa o lote atual e sai")
+    daemon.set_defaults(funcao=cmd_daemon)
+
+    migrar = sub.add_parser("migrate", help="Aplica as migrações pendentes do schema")
+    grupo = migrar.add_mutually_exclusive_group()
+    grupo.add_argument("--status", action="store_true", help="Lista migrações aplicadas e pendentes")
+    grupo.add_argument("--dry-run", action="store_true", help="Mostra o que seria aplicado, sem executar")
+    migrar.set_defaults(funcao=cmd_migrate)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = criar_parser().parse_args(argv)
+    try:
+        return args.funcao(args)
+    except ValueError as e:
+        logger.critical(f"❌ ERRO DE CONFIGURAÇÃO: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
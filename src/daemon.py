@@ -0,0 +1,317 @@
+"""
+👁️ MODO DAEMON - INGESTÃO CONTÍNUA
+Observa DIR_DOWNLOADS e leva cada exportação nova ou alterada por
+extração → comparação → carga assim que o arquivo termina de ser gravado
+
+Uso:
+    python -m src.daemon
+    python -m src.daemon --uma-vez      # processa o que houver e sai
+"""
+
+import argparse
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+import pandas as pd
+
+from src.extract.discovery import chave_base
+from src.extract.expenses import ExpensesExtractor
+from src.load.analytics import AnalyticsExporter
+from src.load.loader import ExpensesLoader
+from src.transform.transformer import ExpensesTransformer
+from src.utils.approval import aplicar_politica
+from src.utils.config import Config
+from src.utils.db_metrics import estatisticas_sql
+from src.utils.metrics import registrar_fim_execucao
+from src.utils.ingestor import copiar_downloads_para_raw
+from src.utils.logger import setup_logger
+from src.utils.workspace import EspacoExecucao
+
+logger = setup_logger("Daemon")
+
+EXTENSOES = (".xlsx", ".csv")
+
+# Arquivos ainda sendo baixados/gravados por navegadores e editores
+SUFIXOS_IGNORADOS = (".crdownload", ".part", ".partial", ".download", ".tmp")
+PREFIXOS_IGNORADOS = ("~$", ".")
+
+
+def arquivo_relevante(caminho: Path) -> bool:
+    """Indica se o arquivo é uma exportação completa que interessa ao pipeline"""
+    nome = caminho.name
+    if nome.startswith(PREFIXOS_IGNORADOS) or nome.lower().endswith(SUFIXOS_IGNORADOS):
+        return False
+    return caminho.suffix.lower() in EXTENSOES
+
+
+class VigiaPasta:
+    """
+    Detecta arquivos novos/alterados em uma pasta e só os entrega depois de
+    estáveis (mesmo tamanho e mtime por `debounce` segundos)
+
+    Usa watchdog (inotify/FSEvents/ReadDirectoryChangesW) se instalado; senão,
+    varre a pasta a cada `intervalo` segundos comparando tamanho e mtime.
+    """
+
+    def __init__(self, pasta, debounce: float, intervalo: float, incluir_existentes: bool = True):
+        self.pasta = Path(pasta)
+        self.debounce = debounce
+        self.intervalo = intervalo
+
+        self._eventos = queue.Queue()
+        self._observador = None
+        self._entregues = {}   # caminho -> (tamanho, mtime_ns) já entregue
+        self._pendentes = {}   # caminho -> ((tamanho, mtime_ns), visto_estavel_desde)
+
+        if not incluir_existentes:
+            self._entregues = {c: e for c, e in self._varrer().items()}
+
+    @staticmethod
+    def watchdog_disponivel() -> bool:
+        return find_spec("watchdog") is not None
+
+    def iniciar(self):
+        """Liga o observador de eventos do sistema operacional (se houver watchdog)"""
+        if not self.watchdog_disponivel():
+            logger.info(f"👁️  Observando {self.pasta} por varredura a cada {self.intervalo:g}s")
+            return
+
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        eventos = self._eventos
+
+        class _Encaminhador(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    eventos.put(Path(getattr(event, "dest_path", "") or event.src_path))
+
+        self._observador = Observer()
+        self._observador.schedule(_Encaminhador(), str(self.pasta), recursive=False)
+        self._observador.start()
+        logger.info(f"👁️  Observando {self.pasta} por eventos do sistema (watchdog)")
+
+    def parar(self):
+        if self._observador:
+            self._observador.stop()
+            self._observador.join()
+
+    def _varrer(self) -> dict:
+        """Estado (tamanho, mtime_ns) dos arquivos relevantes da pasta"""
+        estado = {}
+        try:
+            with os.scandir(self.pasta) as entradas:
+                for entrada in entradas:
+                    caminho = Path(entrada.path)
+                    if entrada.is_file() and arquivo_relevante(caminho):
+                        info = entrada.stat()
+                        estado[caminho] = (info.st_size, info.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        return estado
+
+    def _candidatos(self, espera: float, parar: threading.Event) -> dict:
+        """Estado atual dos arquivos que podem ter mudado"""
+        if self._observador is None:
+            parar.wait(espera)
+            return self._varrer()
+
+        # Com watchdog só os caminhos notificados (e os ainda pendentes) são checados
+        caminhos = set(self._pendentes)
+        try:
+            caminhos.add(self._eventos.get(timeout=espera))
+            while True:
+                caminhos.add(self._eventos.get_nowait())
+        except queue.Empty:
+            pass
+
+        estado = {}
+        for caminho in caminhos:
+            if caminho.parent == self.pasta and arquivo_relevante(caminho) and caminho.exists():
+                info = caminho.stat()
+                estado[caminho] = (info.st_size, info.st_mtime_ns)
+        return estado
+
+    def aguardar_lote(self, parar: threading.Event, uma_vez: bool = False) -> list:
+        """
+        Bloqueia até haver arquivos alterados e estáveis (ou até `parar`)
+
+        Args:
+            parar: Evento de encerramento
+            uma_vez: Retorna vazio se nada estiver pendente após a primeira verificação
+
+        Returns:
+            Caminhos prontos para processamento
+        """
+        primeira = True
+        while not parar.is_set():
+            estado = self._candidatos(0 if primeira else min(self.intervalo, self.debounce), parar)
+            agora = time.monotonic()
+
+            for caminho, assinatura in estado.items():
+                if self._entregues.get(caminho) == assinatura:
+                    self._pendentes.pop(caminho, None)
+                    continue
+                anterior = self._pendentes.get(caminho)
+                if anterior is None or anterior[0] != assinatura:
+                    self._pendentes[caminho] = (assinatura, agora)
+
+            prontos = [
+                caminho for caminho, (_, desde) in self._pendentes.items()
+                if agora - desde >= self.debounce
+            ]
+            if prontos:
+                for caminho in prontos:
+                    self._entregues[caminho] = self._pendentes.pop(caminho)[0]
+                return sorted(prontos)
+
+            if uma_vez and not self._pendentes:
+                break
+            primeira = False
+        return []
+
+
+class DaemonETL:
+    """
+    Executa ciclos curtos de ETL sobre os arquivos alterados, reaproveitando
+    entre ciclos o pool de conexões e o registro SIT
+    """
+
+    def __init__(self):
+        Config.validate()
+        self.manifesto = None
+        self.parar = threading.Event()
+        self.vigia = VigiaPasta(
+            Config.DIR_DOWNLOADS,
+            debounce=Config.DAEMON_DEBOUNCE_S,
+            intervalo=Config.DAEMON_INTERVALO_S,
+        )
+
+    # ===== FINGERPRINTS =====
+
+    @staticmethod
+    def _snapshot(transformador: ExpensesTransformer):
+        """
+        Fingerprints do banco só dos ids extraídos neste ciclo (busca pelo índice único)
+
+        Relidos a cada ciclo: cargas feitas pela CLI, por outros shards ou por
+        outra instância desde o ciclo anterior entram na comparação, e o custo
+        acompanha o tamanho dos arquivos alterados, não o da tabela.
+
+        Returns:
+            Dicionário id_codigo_sit -> (fingerprint, valor), ou None em caso de erro
+        """
+        extraidas = Path(transformador.dir_staging) / "despesas_geral.csv"
+        ids = pd.read_csv(extraidas, dtype=str, usecols=["id_codigo_sit"])["id_codigo_sit"]
+        return transformador.ler_snapshot_despesas(ids.dropna().unique().tolist())
+
+    # ===== CICLO =====
+
+    def processar(self, arquivos: list) -> bool:
+        """
+        Extração → comparação → carga só para os arquivos alterados
+
+        Returns:
+            True se algo foi carregado
+        """
+        inicio = time.time()
+        nomes = ", ".join(a.name for a in arquivos)
+        logger.info(f"⚡ {len(arquivos)} arquivo(s) alterado(s): {nomes}")
+
+        chaves_despesas = {chave_base(a) for a in arquivos if a.suffix.lower() == ".xlsx"}
+        nomes_csv = {a.name for a in arquivos if a.suffix.lower() == ".csv"}
+
+        with EspacoExecucao.abrir() as espaco:
+            manifesto = espaco.manifesto
+            self.manifesto = manifesto
+            extrator = ExpensesExtractor(espaco.caminho)
+            transformador = ExpensesTransformer(espaco.caminho)
+            houve_transformacao = False
+
+            if chaves_despesas and extrator.extrair_despesas_csv(chaves_despesas):
+                snapshot = self._snapshot(transformador)
+                if snapshot is not None:
+                    houve_transformacao |= transformador.transformar_despesas(snapshot=snapshot)
+
+            if nomes_csv and extrator.extrair_resumos(nomes_csv):
+                houve_transformacao |= transformador.validar_e_preparar()
+
+            if not houve_transformacao:
+                logger.info(f"✅ Nada a carregar ({time.time() - inicio:.2f}s)")
+                manifesto.finalizar()
+                return False
+
+            if not aplicar_politica(espaco.caminho, manifesto.run_id, escopo=espaco.escopo):
+                manifesto.finalizar("pendente_aprovacao")
+                return False
+
+            loader = ExpensesLoader(manifesto=manifesto)
+            carregou = loader.run()
+            if carregou:
+                AnalyticsExporter(espaco.caminho).run()
+            if not loader.carga_pendente():
+                manifesto.finalizar()
+
+        logger.info(f"🏁 Ciclo concluído em {time.time() - inicio:.2f}s")
+        return carregou
+
+    def executar(self, uma_vez: bool = False):
+        """Laço principal (encerra com SIGINT/SIGTERM)"""
+        logger.info("=" * 70)
+        logger.info("👁️  DAEMON ETL INICIADO")
+        logger.info("=" * 70)
+
+        self.vigia.iniciar()
+        try:
+            while not self.parar.is_set():
+                if Config.DAEMON_IMPORTAR_DOWNLOADS:
+                    copiar_downloads_para_raw(logger)
+
+                arquivos = self.vigia.aguardar_lote(self.parar, uma_vez)
+                if arquivos:
+                    inicio = time.time()
+                    self.manifesto = None
+                    try:
+                        self.processar(arquivos)
+                    except Exception as e:
+                        # Um ciclo com erro não derruba o daemon
+                        logger.error(f"💥 Erro no ciclo: {e}", exc_info=True)
+                    finally:
+                        estatisticas_sql.relatorio()
+                        status = self.manifesto.dados["status"] if self.manifesto else "erro"
+                        registrar_fim_execucao(time.time() - inicio, status)
+                        estatisticas_sql.zerar()
+
+                if uma_vez:
+                    break
+        finally:
+            self.vigia.parar()
+            logger.info("🛑 Daemon encerrado")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão contínua de DIR_DOWNLOADS")
+    parser.add_argument("--uma-vez", action="store_true", help="Processa o lote atual e sai")
+    args = parser.parse_args(argv)
+
+    daemon = DaemonETL()
+
+    def encerrar(signum, frame):
+        logger.info("⏹️  Sinal de parada recebido; finalizando após o ciclo atual")
+        daemon.parar.set()
+
+    signal.signal(signal.SIGINT, encerrar)
+    signal.signal(signal.SIGTERM, encerrar)
+
+    daemon.executar(uma_vez=args.uma_vez)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
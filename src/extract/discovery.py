@@ -0,0 +1,102 @@
+"""
+🔎 DESCOBERTA DE ARQUIVOS DE ORIGEM
+Encontra todas as versões de cada exportação (ex.: "arquivo (1).csv" de downloads
+repetidos), descarta cópias idênticas pelo hash do conteúdo e ordena da mais recente
+para a mais antiga, antes de qualquer parsing
+"""
+
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import List
+
+from src.utils.hashing import hash_arquivo
+from src.utils.logger import setup_logger
+from src.utils.raw_store import datas_arquivamento
+
+logger = setup_logger("SourceDiscovery")
+
+# Sufixo que navegadores e o sistema operacional acrescentam a downloads repetidos
+_RE_SUFIXO_VERSAO = re.compile(r"\s*\(\d+\)$")
+
+
+class ArquivoFonte:
+    """
+    Um arquivo de origem descoberto
+
+    Attributes:
+        caminho: Caminho do arquivo
+        chave: Nome base sem o sufixo de versão (ex.: "Despesas_SIT_57884")
+        data: Data que define qual versão prevalece: a de arquivamento no
+              armazém raw, ou a de modificação para arquivos de fora dele
+        tamanho: Tamanho em bytes
+        hash: SHA-256 do conteúdo (calculado só quando há outro arquivo do mesmo tamanho)
+    """
+
+    def __init__(self, caminho: Path, data_arquivamento: float = None):
+        estado = caminho.stat()
+        self.caminho = caminho
+        self.chave = chave_base(caminho)
+        self.data = data_arquivamento if data_arquivamento is not None else estado.st_mtime
+        self.tamanho = estado.st_size
+        self.hash = None
+
+    def __repr__(self):
+        return f"ArquivoFonte({self.caminho.name!r}, chave={self.chave!r})"
+
+
+def chave_base(caminho: Path) -> str:
+    """Nome do arquivo sem extensão e sem sufixo de versão " (n)" """
+    return _RE_SUFIXO_VERSAO.sub("", caminho.stem).strip()
+
+
+def descobrir_fontes(pasta, padrao: str) -> List[ArquivoFonte]:
+    """
+    Lista os arquivos da pasta que casam com o padrão, sem cópias idênticas
+
+    Arquivos só são hasheados quando outro arquivo tem exatamente o mesmo
+    tamanho (único caso em que podem ser iguais). De cada grupo de conteúdo
+    idêntico fica apenas o mais recente.
+
+    "Mais recente" é pela data de arquivamento registrada no índice do
+    armazém raw (ver raw_store.datas_arquivamento): os arquivos de trabalho
+    herdam o mtime do objeto, que para um conteúdo já visto é o da primeira
+    vez que ele chegou. Arquivos fora do índice usam o mtime.
+
+    Args:
+        pasta: Diretório de busca
+        padrao: Glob (ex.: "Despesas_SIT_*.xlsx")
+
+    Returns:
+        Arquivos distintos, do mais recente para o mais antigo
+    """
+    datas = datas_arquivamento(pasta)
+    fontes = [ArquivoFonte(c, datas.get(c.name)) for c in Path(pasta).glob(padrao) if c.is_file()]
+
+    por_tamanho = defaultdict(list)
+    for fonte in fontes:
+        por_tamanho[fonte.tamanho].append(fonte)
+
+    por_conteudo = {}
+    for grupo in por_tamanho.values():
+        if len(grupo) == 1:
+            por_conteudo[id(grupo[0])] = grupo
+            continue
+        for fonte in grupo:
+            fonte.hash = hash_arquivo(fonte.caminho)
+            por_conteudo.setdefault(fonte.hash, []).append(fonte)
+
+    distintos = []
+    descartados = 0
+    for grupo in por_conteudo.values():
+        grupo.sort(key=lambda f: f.data, reverse=True)
+        distintos.append(grupo[0])
+        for copia in grupo[1:]:
+            descartados += 1
+            logger.info(f"   ♊ {copia.caminho.name} idêntico a {grupo[0].caminho.name} (ignorado)")
+
+    if descartados:
+        logger.info(f"   🔎 {len(fontes)} arquivo(s) '{padrao}': {descartados} cópia(s) idêntica(s) descartada(s)")
+
+    distintos.sort(key=lambda f: (f.data, f.caminho.name), reverse=True)
+    return distintos
@@ -4,29 +4,38 @@ Encapsula os scripts 1_extract_csv.py e 1_extract_resumo.py
 """
 
 import os
+import shutil
 import pandas as pd
 import logging
 from pathlib import Path
-from dotenv import load_dotenv
 
 from src.utils.config import Config
 from src.utils.logger import setup_logger
+from src.utils.metrics import metricas
+from src.utils.progress import Progresso
 from src.utils.ingestor import (
     classificar_tipo_despesa, limpar_cpf_cnpj, extrair_rubrica, 
     parse_brl, limpar_string_numero
 )
+from src.utils.date_parser import ParserDatas
+from src.utils.sit_registry import registro_sit
+from src.utils.workspace import gravar_csv_atomico
+from src.extract.xlsx_reader import iterar_chunks_xlsx
+from src.extract.discovery import descobrir_fontes
 
 logger = setup_logger("ExpensesExtractor")
-load_dotenv()
 
 
 class ExpensesExtractor:
     """Extrator centralizado para todas as fontes de dados"""
     
-    def __init__(self):
+    def __init__(self, dir_staging=None):
+        """
+        Args:
+            dir_staging: Pasta da execução (padrão: Config.DIR_STAGING)
+        """
         self.dir_downloads = Config.DIR_DOWNLOADS
-        self.dir_staging = Config.DIR_STAGING
-        self.sit_termo_map = Config.SIT_TERMO_MAP
+        self.dir_staging = str(dir_staging) if dir_staging else Config.DIR_STAGING
         
         # Validar diretórios
         if not self.dir_downloads or not self.dir_staging:
@@ -64,112 +73,267 @@ class ExpensesExtractor:
             logger.error(f"💥 ERRO NA EXTRAÇÃO: {e}", exc_info=True)
             return False
     
-    def extrair_despesas_csv(self) -> bool:
+    def extrair_despesas_csv(self, chaves: set = None) -> bool:
         """
         Extrai e processa despesas de arquivos XLSX
         Baseado em 1_extract_csv.py
+        
+        Lê cada planilha em chunks de Config.TAMANHO_CHUNK_XLSX linhas (backend
+        escolhido por Config.LEITOR_XLSX) e grava cada chunk normalizado direto
+        no staging, mantendo a memória constante mesmo para exportações gigantes do SIT
+        
+        Várias versões do mesmo SIT (ex.: "Despesas_SIT_X (1).xlsx") são lidas da
+        mais recente para a mais antiga; cada id_codigo_sit entra uma única vez,
+        com os dados da versão mais recente.
+        
+        Args:
+            chaves: Restringe a extração a estes nomes base (ex.: {"Despesas_SIT_57884"});
+                    todas as versões de cada chave são lidas. None = todos os arquivos
         """
         logger.info("➡️ Etapa 1a: Consolidação de Arquivos de Despesas")
         
-        dados_consolidados = []
+        saida = os.path.join(self.dir_staging, "despesas_geral.csv")
+        saida_tmp = saida + ".tmp"
+        saida_parcial = saida + ".parcial"
+        
         arquivos_processados = 0
+        total_linhas = 0
+        ids_vistos = set()
+        arquivos = self._arquivos_despesas_do_shard(chaves)
+        progresso = Progresso("Extração de despesas", total=len(arquivos), unidade="arquivos")
         
-        for sit, termo in self.sit_termo_map.items():
-            caminho_arquivo = os.path.join(self.dir_downloads, f"Despesas_SIT_{sit}.xlsx")
+        try:
+            for sit, termo, caminho_arquivo in arquivos:
+                nome_arquivo = Path(caminho_arquivo).name
+                try:
+                    # Os ids só entram em ids_vistos quando o arquivo é aceito por inteiro
+                    ids_arquivo = set()
+                    linhas_arquivo = self._extrair_arquivo_despesas(
+                        caminho_arquivo, termo, saida_parcial, ids_vistos, ids_arquivo, progresso
+                    )
+                    if linhas_arquivo is None:
+                        continue
+                    
+                    # Só incorpora o arquivo ao consolidado depois de lido por inteiro
+                    self._anexar_csv(saida_parcial, saida_tmp, com_cabecalho=arquivos_processados == 0)
+                    ids_vistos.update(ids_arquivo)
+                    
+                    total_linhas += linhas_arquivo
+                    arquivos_processados += 1
+                    metricas.incrementar("linhas_extraidas", linhas_arquivo, "Linhas de despesa extraídas por SIT", sit=sit)
+                    metricas.incrementar("bytes_lidos", os.path.getsize(caminho_arquivo), "Bytes de arquivos de origem lidos", origem="despesas")
+                    logger.info(f"   ✅ SIT {sit} (arquivo {nome_arquivo}) - {linhas_arquivo} linhas extraídas")
+                    
+                except Exception as e:
+                    logger.error(f"   ❌ Erro ao processar {nome_arquivo}: {e}")
+                    continue
+                finally:
+                    progresso.avancar()
+            
+            progresso.concluir()
             
-            if not os.path.exists(caminho_arquivo):
-                logger.warning(f"   ⚠️  Arquivo não encontrado: {caminho_arquivo}")
+            # Salva consolidado (publicação atômica)
+            if arquivos_processados > 0:
+                os.replace(saida_tmp, saida)
+                logger.info(f"   💾 Total: {total_linhas} registros salvos em despesas_geral.csv")
+                return True
+            else:
+                logger.warning("   ⚠️  Nenhum arquivo de despesas foi processado")
+                return False
+        
+        finally:
+            for temporario in (saida_tmp, saida_parcial):
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+    
+    def _arquivos_despesas_do_shard(self, chaves: set = None) -> list:
+        """
+        Descobre os arquivos Despesas_SIT_*.xlsx (todas as versões, sem cópias
+        idênticas) e resolve o termo de cada um pelo registro SIT, mantendo
+        apenas os SITs do shard deste worker
+        
+        Returns:
+            Lista de tuplas (sit, termo, caminho), da versão mais recente para a mais antiga
+        """
+        mapa = registro_sit.mapa()
+        arquivos = []
+        
+        for fonte in descobrir_fontes(self.dir_downloads, "Despesas_SIT_*.xlsx"):
+            if chaves is not None and fonte.chave not in chaves:
                 continue
+            caminho = fonte.caminho
+            sit = fonte.chave.replace("Despesas_SIT_", "").strip()
             
-            try:
-                # Lê tudo como string para evitar problemas de tipagem
-                df = pd.read_excel(caminho_arquivo, dtype=str)
-                
-                if "Data do Pagamento" not in df.columns:
-                    logger.warning(f"   ⚠️  Coluna 'Data do Pagamento' ausente em {caminho_arquivo}")
-                    continue
-                
-                # Tratamento de datas
-                df["data_pagto_temp"] = pd.to_datetime(
-                    df["Data do Pagamento"], dayfirst=True, errors="coerce"
-                )
-                
-                # Verifica coluna de débito (com variações de grafia)
-                col_debito = None
-                if "Data Débito Conta Convêvio" in df.columns:
-                    col_debito = "Data Débito Conta Convêvio"
-                elif "Data Débito Conta Convênio" in df.columns:
-                    col_debito = "Data Débito Conta Convênio"
-                
-                if col_debito:
-                    df["data_debito_temp"] = pd.to_datetime(
-                        df[col_debito], dayfirst=True, errors="coerce"
-                    )
-                else:
-                    df["data_debito_temp"] = pd.NaT
-                
-                # Remove linhas sem data de pagamento
-                df = df.dropna(subset=["data_pagto_temp"])
-                
-                # Constrói DataFrame limpo
-                novo = pd.DataFrame(index=df.index)
-                
-                novo["id_codigo_sit"] = df.get("Código", "").fillna("").str.strip()
-                novo["termo"] = termo
-                novo["rubrica"] = df["Tipo de Despesa"].apply(extrair_rubrica)
-                novo["tipo_despesa"] = df["Tipo de Despesa"].apply(classificar_tipo_despesa)
-                novo["cpf_cnpj"] = df["CPF/CNPJ"].apply(limpar_cpf_cnpj)
-                novo["favorecido"] = df["Favorecido"].fillna("").str.strip()
-                novo["tipo_doc_despesa"] = df.get("Tipo Documento Despesa", "").fillna("").str.strip()
-                novo["descricao_despesa"] = df["Descrição da Despesa"].fillna("").str.strip()
-                novo["tipo_doc_pagamento"] = df.get("Tipo Documento Pagamento", "").fillna("").str.strip()
-                novo["data_pagamento"] = df["data_pagto_temp"].dt.strftime("%Y-%m-%d")
-                novo["data_debito_convenio"] = df["data_debito_temp"].dt.strftime("%Y-%m-%d")
-                novo["valor"] = pd.to_numeric(df.get("Valor", 0), errors="coerce").fillna(0.0)
-                novo["id_termo_rubrica"] = novo["termo"] + "-" + novo["rubrica"]
-                
-                # Remove linhas com rubrica ou termo vazio
-                novo = novo[novo["rubrica"].str.len() > 0]
-                novo = novo[novo["termo"].str.len() > 0]
-                
-                dados_consolidados.append(novo)
-                arquivos_processados += 1
-                logger.info(f"   ✅ SIT {sit} (arquivo {sit}.xlsx) - {len(novo)} linhas extraídas")
-                
-            except Exception as e:
-                logger.error(f"   ❌ Erro ao processar {sit}.xlsx: {e}")
+            if not registro_sit.pertence_ao_shard(sit):
+                continue
+            
+            termo = mapa.get(sit)
+            if not termo:
+                logger.warning(f"   ⚠️  SIT {sit} sem termo cadastrado (arquivo {caminho.name} ignorado)")
                 continue
+            
+            arquivos.append((sit, termo, str(caminho)))
+        
+        if not arquivos:
+            logger.warning(f"   ⚠️  Nenhum arquivo Despesas_SIT_*.xlsx do shard encontrado em {self.dir_downloads}")
+        
+        return arquivos
+    
+    def _extrair_arquivo_despesas(self, caminho_arquivo: str, termo: str, saida_parcial: str,
+                                  ids_vistos: set = None, ids_arquivo: set = None,
+                                  progresso: Progresso = None):
+        """
+        Normaliza um XLSX de despesas chunk a chunk, gravando em um CSV parcial
         
-        # Salva consolida
-        if dados_consolidados:
-            df_final = pd.concat(dados_consolidados, ignore_index=True)
+        Args:
+            caminho_arquivo: XLSX do SIT
+            termo: Termo correspondente ao SIT
+            saida_parcial: CSV parcial (sobrescrito) que recebe os chunks
+            ids_vistos: id_codigo_sit já extraídos de versões mais recentes (descartados aqui)
+            ids_arquivo: Recebe os id_codigo_sit gravados por este arquivo
+            progresso: Progresso da extração (recebe as linhas lidas a cada chunk)
             
-            # Reordena colunas
-            colunas_ordem = Config.COLUNAS_DESPESAS
-            df_final = df_final[colunas_ordem]
+        Returns:
+            Número de linhas gravadas, ou None se o layout for inválido
+        """
+        ids_vistos = ids_vistos if ids_vistos is not None else set()
+        ids_arquivo = ids_arquivo if ids_arquivo is not None else set()
+        linhas_arquivo = 0
+        duplicados = 0
+        parser_datas = ParserDatas()
+        
+        # Cabeçalho sempre presente, mesmo se o arquivo não tiver linhas válidas
+        pd.DataFrame(columns=Config.COLUNAS_DESPESAS).to_csv(
+            saida_parcial, index=False, encoding="utf-8"
+        )
+        
+        chunks = iterar_chunks_xlsx(
+            caminho_arquivo,
+            tamanho_chunk=Config.TAMANHO_CHUNK_XLSX,
+            backend=Config.LEITOR_XLSX,
+            limite_streaming_mb=Config.LIMITE_STREAMING_MB
+        )
+        
+        for chunk in chunks:
+            if progresso is not None:
+                progresso.avancar(0, linhas=len(chunk))
+            if "Data do Pagamento" not in chunk.columns:
+                logger.warning(f"   ⚠️  Coluna 'Data do Pagamento' ausente em {caminho_arquivo}")
+                return None
             
-            saida = os.path.join(self.dir_staging, "despesas_geral.csv")
-            df_final.to_csv(saida, index=False, encoding="utf-8")
+            novo = self._normalizar_chunk(chunk, termo, parser_datas)
             
-            logger.info(f"   💾 Total: {len(df_final)} registros salvos em despesas_geral.csv")
-            return True
-        else:
-            logger.warning("   ⚠️  Nenhum arquivo de despesas foi processado")
-            return False
+            # Latest-wins: ids já vistos (versão mais recente ou linha anterior) saem
+            ids = novo["id_codigo_sit"]
+            repetido = (ids != "") & (ids.isin(ids_vistos) | ids.isin(ids_arquivo) | ids.duplicated())
+            if repetido.any():
+                duplicados += int(repetido.sum())
+                novo = novo[~repetido]
+            ids_arquivo.update(novo["id_codigo_sit"][novo["id_codigo_sit"] != ""])
+            
+            if novo.empty:
+                continue
+            
+            novo[Config.COLUNAS_DESPESAS].to_csv(
+                saida_parcial, mode="a", header=False, index=False, encoding="utf-8"
+            )
+            linhas_arquivo += len(novo)
+        
+        if duplicados:
+            logger.info(f"   ♻️  {duplicados} despesa(s) de {Path(caminho_arquivo).name} já vista(s) em versão mais recente")
+        
+        return linhas_arquivo
+    
+    @staticmethod
+    def _anexar_csv(origem: str, destino: str, com_cabecalho: bool):
+        """Anexa um CSV a outro em streaming, descartando o cabeçalho se necessário"""
+        with open(origem, "r", encoding="utf-8", newline="") as f_in, \
+             open(destino, "w" if com_cabecalho else "a", encoding="utf-8", newline="") as f_out:
+            cabecalho = f_in.readline()
+            if com_cabecalho:
+                f_out.write(cabecalho)
+            shutil.copyfileobj(f_in, f_out)
     
-    def extrair_resumos(self) -> bool:
+    @staticmethod
+    def _normalizar_chunk(df: pd.DataFrame, termo: str, parser_datas: ParserDatas) -> pd.DataFrame:
+        """
+        Normaliza um chunk da planilha de despesas para o layout de COLUNAS_DESPESAS
+        
+        Args:
+            df: Chunk com as colunas originais do SIT (todas string)
+            termo: Termo correspondente ao SIT do arquivo
+            parser_datas: Conversor de datas compartilhado entre os chunks do arquivo
+            
+        Returns:
+            DataFrame limpo (sem linhas sem data, rubrica ou termo)
+        """
+        # O chunk pode ser uma fatia (iloc) da planilha lida: as colunas novas
+        # entram via assign, que devolve outro DataFrame, em vez de escrever na
+        # fatia (atribuição encadeada no pandas >= 2 / Copy-on-Write)
+        
+        # Colunas opcionais ausentes viram vazias
+        df = df.assign(**{
+            coluna: None
+            for coluna in ("Código", "Tipo Documento Despesa", "Tipo Documento Pagamento",
+                           "Data Débito Conta Convênio", "Valor")
+            if coluna not in df.columns
+        })
+        
+        # Tratamento de datas (formato detectado uma vez, só valores únicos convertidos)
+        data_pagto, data_pagto_iso = parser_datas.converter(df["Data do Pagamento"], "data_pagamento")
+        data_debito, data_debito_iso = parser_datas.converter(
+            df["Data Débito Conta Convênio"], "data_debito_convenio"
+        )
+        df = df.assign(
+            data_pagto_temp=data_pagto, data_pagto_iso=data_pagto_iso,
+            data_debito_temp=data_debito, data_debito_iso=data_debito_iso,
+        )
+        
+        # Remove linhas sem data de pagamento
+        df = df.dropna(subset=["data_pagto_temp"])
+        
+        # Constrói DataFrame limpo
+        novo = pd.DataFrame(index=df.index)
+        
+        novo["id_codigo_sit"] = df["Código"].fillna("").str.strip()
+        novo["termo"] = termo
+        novo["rubrica"] = df["Tipo de Despesa"].apply(extrair_rubrica)
+        novo["tipo_despesa"] = df["Tipo de Despesa"].apply(classificar_tipo_despesa)
+        novo["cpf_cnpj"] = df["CPF/CNPJ"].apply(limpar_cpf_cnpj)
+        novo["favorecido"] = df["Favorecido"].fillna("").str.strip()
+        novo["tipo_doc_despesa"] = df["Tipo Documento Despesa"].fillna("").str.strip()
+        novo["descricao_despesa"] = df["Descrição da Despesa"].fillna("").str.strip()
+        novo["tipo_doc_pagamento"] = df["Tipo Documento Pagamento"].fillna("").str.strip()
+        novo["data_pagamento"] = df["data_pagto_iso"]
+        novo["data_debito_convenio"] = df["data_debito_iso"]
+        novo["valor"] = pd.to_numeric(df["Valor"], errors="coerce").fillna(0.0)
+        novo["id_termo_rubrica"] = novo["termo"] + "-" + novo["rubrica"]
+        
+        # Remove linhas com rubrica ou termo vazio
+        novo = novo[novo["rubrica"].str.len() > 0]
+        novo = novo[novo["termo"].str.len() > 0]
+        
+        return novo
+    
+    def extrair_resumos(self, nomes_arquivos: set = None) -> bool:
         """
         Extrai resumos financeiros (termos e rubricas)
         Baseado em 1_extract_resumo.py
+        
+        Args:
+            nomes_arquivos: Restringe a extração a estes nomes de arquivo CSV (None = todos)
         """
         logger.info("➡️ Etapa 1b: Extração de Resumos Financeiros")
         
-        pasta_downloads = Path(self.dir_downloads)
         lista_termos = []
         lista_rubricas = []
+        sits_vistos = set()
         
-        # Busca arquivos CSV
-        arquivos = list(pasta_downloads.glob("*.csv"))
+        # Busca arquivos CSV (sem cópias idênticas, do mais recente para o mais antigo)
+        arquivos = [
+            fonte.caminho for fonte in descobrir_fontes(self.dir_downloads, "*.csv")
+            if nomes_arquivos is None or fonte.caminho.name in nomes_arquivos
+        ]
         
         if not arquivos:
             logger.warning("   ⚠️  Nenhum arquivo CSV encontrado em downloads")
@@ -180,12 +344,22 @@ class ExpensesExtractor:
         for caminho in arquivos:
             try:
                 linhas = self._ler_arquivo_csv(caminho)
+                metricas.incrementar("bytes_lidos", caminho.stat().st_size, origem="resumos")
                 if not linhas:
                     continue
                 
                 sit, rendimento, rubricas = self._extrair_dados_csv(linhas)
                 
+                if sit and not registro_sit.pertence_ao_shard(sit):
+                    continue
+                
+                # Versão mais antiga de um SIT já lido: a mais recente prevalece
+                if sit in sits_vistos:
+                    logger.info(f"   ⏭️  SIT {sit} de '{caminho.name}' ignorado (versão mais recente já lida)")
+                    continue
+                
                 if sit:
+                    sits_vistos.add(sit)
                     lista_termos.append({
                         "nro_sit": sit,
                         "rendimento_financeiro_total": rendimento
@@ -210,16 +384,17 @@ class ExpensesExtractor:
         sucesso = False
         
         if lista_termos:
-            df_termos = pd.DataFrame(lista_termos)
+            df_termos = pd.DataFrame(lista_termos).drop_duplicates(subset=["nro_sit"], keep="first")
             saida_termos = os.path.join(self.dir_staging, "resumo_termos.csv")
-            df_termos.to_csv(saida_termos, index=False, encoding="utf-8")
+            gravar_csv_atomico(df_termos, saida_termos, encoding="utf-8")
             logger.info(f"   💾 Resumo termos: {len(df_termos)} registros salvos")
             sucesso = True
         
         if lista_rubricas:
-            df_rubs = pd.DataFrame(lista_rubricas)
+            # Rubrica repetida no mesmo arquivo: vale a última linha (como no 1_extract_resumo.py)
+            df_rubs = pd.DataFrame(lista_rubricas).drop_duplicates(subset=["id_termo_rubrica"], keep="last")
             saida_rubs = os.path.join(self.dir_staging, "resumo_rubricas.csv")
-            df_rubs.to_csv(saida_rubs, index=False, encoding="utf-8")
+            gravar_csv_atomico(df_rubs, saida_rubs, encoding="utf-8")
             logger.info(f"   💾 Resumo rubricas: {len(df_rubs)} registros salvos")
             sucesso = True
         
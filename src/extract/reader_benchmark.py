@@ -0,0 +1,124 @@
+"""
+⏱️ BENCHMARK DOS LEITORES DE XLSX
+Gera planilhas sintéticas no layout do SIT e mede linhas/segundo por backend
+
+Uso:
+    python -m src.extract.reader_benchmark --linhas 20000 --arquivos 3
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.extract.xlsx_reader import BACKENDS, backends_disponiveis
+
+
+CABECALHO_SIT = [
+    "Código", "Tipo de Despesa", "CPF/CNPJ", "Favorecido", "Tipo Documento Despesa",
+    "Descrição da Despesa", "Tipo Documento Pagamento", "Data do Pagamento",
+    "Data Débito Conta Convêvio", "Valor"
+]
+
+TIPOS_DESPESA = [
+    "319011 - PESSOAL CIVIL",
+    "319113 - OBRIGAÇÕES PATRONAIS",
+    "339030 - MATERIAIS DE CONSUMO",
+    "339039 - SERVIÇOS DE TERCEIROS",
+]
+
+
+def gerar_planilha_sit(caminho: Path, linhas: int, semente: int = 0):
+    """
+    Gera um XLSX sintético com o layout de exportação de despesas do SIT
+
+    Args:
+        caminho: Destino do arquivo
+        linhas: Quantidade de despesas
+        semente: Semente do gerador aleatório (resultados reprodutíveis)
+    """
+    from openpyxl import Workbook
+
+    rnd = random.Random(semente)
+    inicio = datetime(2024, 1, 1)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Despesas")
+    ws.append(CABECALHO_SIT)
+
+    for i in range(linhas):
+        data = inicio + timedelta(days=rnd.randint(0, 364))
+        data_str = data.strftime("%d/%m/%Y")
+        ws.append([
+            str(1_000_000 + semente * linhas + i),
+            rnd.choice(TIPOS_DESPESA),
+            f"{rnd.randint(0, 99999999999):011d}",
+            f"FAVORECIDO {rnd.randint(1, 500)}",
+            "NOTA FISCAL",
+            f"DESPESA SINTÉTICA {i}",
+            "TRANSFERÊNCIA",
+            data_str,
+            data_str,
+            round(rnd.uniform(10, 20000), 2),
+        ])
+
+    wb.save(caminho)
+
+
+def medir_backend(nome: str, arquivos: list, tamanho_chunk: int) -> dict:
+    """Lê todos os arquivos com um backend e retorna linhas, tempo e linhas/s"""
+    leitor = BACKENDS[nome]()
+    total_linhas = 0
+
+    inicio = time.perf_counter()
+    for caminho in arquivos:
+        for chunk in leitor.ler_chunks(str(caminho), tamanho_chunk):
+            total_linhas += len(chunk)
+    duracao = time.perf_counter() - inicio
+
+    return {
+        "backend": nome,
+        "linhas": total_linhas,
+        "segundos": duracao,
+        "linhas_por_segundo": total_linhas / duracao if duracao > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de leitura XLSX")
+    parser.add_argument("--linhas", type=int, default=20000, help="Linhas por planilha")
+    parser.add_argument("--arquivos", type=int, default=3, help="Quantidade de planilhas SIT")
+    parser.add_argument("--chunk", type=int, default=5000, help="Tamanho do chunk")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Execuções por backend (usa a melhor)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_xlsx_") as pasta:
+        arquivos = []
+        for i in range(args.arquivos):
+            caminho = Path(pasta) / f"Despesas_SIT_{90000 + i}.xlsx"
+            gerar_planilha_sit(caminho, args.linhas, semente=i)
+            arquivos.append(caminho)
+
+        tamanho_mb = sum(a.stat().st_size for a in arquivos) / (1024 * 1024)
+        print(f"📊 {args.arquivos} planilha(s) x {args.linhas} linhas ({tamanho_mb:.1f} MB)")
+        print(f"{'backend':<20}{'linhas':>10}{'segundos':>12}{'linhas/s':>14}")
+
+        for nome in BACKENDS:
+            if nome not in backends_disponiveis():
+                print(f"{nome:<20}{'(não instalado)':>36}")
+                continue
+
+            melhor = min(
+                (medir_backend(nome, arquivos, args.chunk) for _ in range(args.repeticoes)),
+                key=lambda r: r["segundos"]
+            )
+            print(
+                f"{melhor['backend']:<20}{melhor['linhas']:>10}"
+                f"{melhor['segundos']:>12.2f}{melhor['linhas_por_segundo']:>14,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+📖 LEITORES DE XLSX (BACKENDS PLUGÁVEIS)
+Abstrai a leitura das planilhas do SIT, entregando DataFrames em chunks
+
+Backends disponíveis:
+    - openpyxl           : pd.read_excel clássico (carrega a planilha inteira)
+    - openpyxl_readonly  : streaming em modo read-only (memória constante)
+    - calamine           : engine em Rust via python-calamine (opcional, mais rápido)
+"""
+
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+import pandas as pd
+
+
+# Grafias alternativas de cabeçalho -> nome canônico usado pelo extrator
+ALIASES_CABECALHO = {
+    "Data Débito Conta Convêvio": "Data Débito Conta Convênio",
+}
+
+TAMANHO_CHUNK_PADRAO = 5000
+
+# Acima deste tamanho a seleção automática sempre usa streaming
+LIMITE_STREAMING_MB_PADRAO = 50
+
+
+def normalizar_cabecalho(cabecalho) -> list:
+    """
+    Mapeia os nomes de coluna uma única vez (aplicando aliases)
+
+    Args:
+        cabecalho: Valores da primeira linha da planilha
+
+    Returns:
+        Lista com o nome canônico de cada coluna (None para colunas sem nome)
+    """
+    nomes = []
+    for valor in cabecalho:
+        if valor is None or str(valor).strip() == "" or str(valor).startswith("Unnamed:"):
+            nomes.append(None)
+            continue
+        nome = str(valor).strip()
+        nomes.append(ALIASES_CABECALHO.get(nome, nome))
+    return nomes
+
+
+def _celula_para_str(valor) -> Optional[str]:
+    """Converte o valor da célula para string, no mesmo formato de pd.read_excel(dtype=str)"""
+    if valor is None:
+        return None
+    return str(valor)
+
+
+class LeitorExcel(ABC):
+    """Interface comum dos backends de leitura (backends sem ler_chunks não podem ser instanciados)"""
+
+    nome = ""
+
+    @classmethod
+    def disponivel(cls) -> bool:
+        """Indica se as dependências do backend estão instaladas"""
+        return True
+
+    @abstractmethod
+    def ler_chunks(self, caminho: str, tamanho_chunk: int = TAMANHO_CHUNK_PADRAO) -> Iterator[pd.DataFrame]:
+        """
+        Lê a primeira planilha do arquivo
+
+        Args:
+            caminho: Caminho do arquivo XLSX
+            tamanho_chunk: Número de linhas por DataFrame
+
+        Yields:
+            pd.DataFrame com cabeçalho normalizado e valores string (ou nulos)
+        """
+
+
+class _LeitorPandas(LeitorExcel):
+    """Backends que materializam a planilha via pd.read_excel e depois fatiam"""
+
+    engine = ""
+
+    def ler_chunks(self, caminho: str, tamanho_chunk: int = TAMANHO_CHUNK_PADRAO) -> Iterator[pd.DataFrame]:
+        df = pd.read_excel(caminho, dtype=str, engine=self.engine)
+
+        nomes = normalizar_cabecalho(df.columns)
+        manter = [i for i, nome in enumerate(nomes) if nome is not None]
+        df = df.iloc[:, manter]
+        df.columns = [nomes[i] for i in manter]
+        df = df.dropna(how="all").reset_index(drop=True)
+
+        for inicio in range(0, len(df), tamanho_chunk):
+            yield df.iloc[inicio:inicio + tamanho_chunk]
+
+
+class LeitorOpenpyxl(_LeitorPandas):
+    """pd.read_excel com openpyxl (comportamento original do extrator)"""
+
+    nome = "openpyxl"
+    engine = "openpyxl"
+
+    @classmethod
+    def disponivel(cls) -> bool:
+        return importlib.util.find_spec("openpyxl") is not None
+
+
+class LeitorCalamine(_LeitorPandas):
+    """pd.read_excel com a engine calamine (requer python-calamine e pandas >= 2.2)"""
+
+    nome = "calamine"
+    engine = "calamine"
+
+    @classmethod
+    def disponivel(cls) -> bool:
+        return importlib.util.find_spec("python_calamine") is not None
+
+
+class LeitorOpenpyxlReadOnly(LeitorExcel):
+    """Streaming linha a linha em modo read-only: apenas o chunk corrente fica em memória"""
+
+    nome = "openpyxl_readonly"
+
+    @classmethod
+    def disponivel(cls) -> bool:
+        return importlib.util.find_spec("openpyxl") is not None
+
+    def ler_chunks(self, caminho: str, tamanho_chunk: int = TAMANHO_CHUNK_PADRAO) -> Iterator[pd.DataFrame]:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            linhas = ws.iter_rows(values_only=True)
+
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                return
+
+            nomes = normalizar_cabecalho(cabecalho)
+            indices = [i for i, nome in enumerate(nomes) if nome is not None]
+            colunas = [nomes[i] for i in indices]
+
+            buffer = []
+            for linha in linhas:
+                if linha is None or all(v is None for v in linha):
+                    continue
+                buffer.append([
+                    _celula_para_str(linha[i]) if i < len(linha) else None
+                    for i in indices
+                ])
+                if len(buffer) >= tamanho_chunk:
+                    yield pd.DataFrame(buffer, columns=colunas)
+                    buffer = []
+
+            if buffer:
+                yield pd.DataFrame(buffer, columns=colunas)
+        finally:
+            wb.close()
+
+
+BACKENDS = {
+    LeitorOpenpyxl.nome: LeitorOpenpyxl,
+    LeitorOpenpyxlReadOnly.nome: LeitorOpenpyxlReadOnly,
+    LeitorCalamine.nome: LeitorCalamine,
+}
+
+
+def backends_disponiveis() -> list:
+    """Lista os nomes dos backends cujas dependências estão instaladas"""
+    return [nome for nome, classe in BACKENDS.items() if classe.disponivel()]
+
+
+def selecionar_leitor(caminho: str, preferido: str = "auto",
+                      limite_streaming_mb: float = LIMITE_STREAMING_MB_PADRAO) -> LeitorExcel:
+    """
+    Escolhe o backend de leitura para um arquivo
+
+    Regras do modo "auto":
+        - Arquivos acima de limite_streaming_mb: openpyxl_readonly (memória constante)
+        - Demais: calamine se instalado, senão openpyxl_readonly
+
+    Args:
+        caminho: Arquivo a ser lido
+        preferido: Nome de um backend ou "auto"
+        limite_streaming_mb: Tamanho a partir do qual o streaming é obrigatório
+
+    Returns:
+        Instância do leitor escolhido
+    """
+    preferido = (preferido or "auto").lower()
+
+    if preferido != "auto":
+        if preferido not in BACKENDS:
+            raise ValueError(f"❌ Backend de leitura desconhecido: {preferido} (opções: {', '.join(BACKENDS)})")
+        if not BACKENDS[preferido].disponivel():
+            raise ValueError(f"❌ Backend de leitura '{preferido}' não está instalado")
+        return BACKENDS[preferido]()
+
+    tamanho_mb = os.path.getsize(caminho) / (1024 * 1024)
+    if tamanho_mb <= limite_streaming_mb and LeitorCalamine.disponivel():
+        return LeitorCalamine()
+    return LeitorOpenpyxlReadOnly()
+
+
+def iterar_chunks_xlsx(caminho: str, tamanho_chunk: int = TAMANHO_CHUNK_PADRAO,
+                       backend: str = "auto",
+                       limite_streaming_mb: float = LIMITE_STREAMING_MB_PADRAO) -> Iterator[pd.DataFrame]:
+    """
+    Atalho: seleciona o backend e itera os chunks do arquivo
+
+    Args:
+        caminho: Caminho do arquivo XLSX
+        tamanho_chunk: Número de linhas por DataFrame
+        backend: Nome do backend ou "auto"
+        limite_streaming_mb: Ver selecionar_leitor
+
+    Yields:
+        pd.DataFrame com todas as colunas como string (ou nulo)
+    """
+    leitor = selecionar_leitor(caminho, backend, limite_streaming_mb)
+    yield from leitor.ler_chunks(caminho, tamanho_chunk)
@@ -0,0 +1,336 @@
+"""
+📦 EXPORTAÇÃO ANALÍTICA (PARQUET)
+Mantém em DIR_ANALITICO uma cópia das tabelas em Parquet para relatórios e
+dashboards, que assim deixam de disputar o SQL Server com a carga:
+
+    despesas/id_termo=<termo>/ano=<aaaa>/mes=<m>/parte.parquet   (particionamento hive)
+    rubricas.parquet
+    termos.parquet
+
+Depois de cada carga só são regravadas as partições de despesas tocadas
+pelas linhas da execução (inclusive aquelas de onde linhas atualizadas
+saíram, ao mudar de data ou termo); rubricas e termos, pequenas, são
+regravadas inteiras. Leitores com filtro por id_termo/ano/mes (pyarrow.dataset,
+DuckDB, Spark, Power BI) só abrem os arquivos das partições pedidas.
+
+Cada arquivo é trocado de forma atômica e arquivos iniciados por "." ou "_"
+(temporários, trava, _exportacao.json) são ignorados pelos leitores. Se uma
+exportação falhar no meio, a próxima refaz o dataset inteiro.
+
+Requer pyarrow (opcional): sem ele a etapa é pulada com um aviso.
+"""
+
+import importlib.util
+import json
+import os
+import time
+import warnings
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.config import Config
+from src.utils.database import db_manager
+from src.utils.logger import setup_logger
+from src.utils.metrics import metricas
+from src.utils.progress import Progresso
+from src.utils.workspace import TravaArquivo
+
+logger = setup_logger("AnalyticsExporter")
+
+# Valor de partição para data_pagamento nula (convenção hive, lida como null)
+PARTICAO_NULA = "__HIVE_DEFAULT_PARTITION__"
+
+COLUNAS_DESPESAS = [
+    "id", "id_codigo_sit", "termo", "rubrica", "tipo_despesa", "cpf_cnpj", "favorecido",
+    "tipo_doc_despesa", "descricao_despesa", "tipo_doc_pagamento",
+    "data_pagamento", "data_debito_convenio", "valor", "id_termo_rubrica",
+]
+
+_CENTAVO = Decimal("0.01")
+
+
+def pyarrow_disponivel() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _esquema_despesas():
+    """Esquema fixo: todas as partições com os mesmos tipos, mesmo as só com nulos"""
+    import pyarrow as pa
+
+    tipos = {"id": pa.int64(), "data_pagamento": pa.date32(), "data_debito_convenio": pa.date32(),
+             "valor": pa.decimal128(18, 2)}
+    return pa.schema([(coluna, tipos.get(coluna, pa.string())) for coluna in COLUNAS_DESPESAS])
+
+
+def _decimal(valor):
+    if valor is None or pd.isna(valor):
+        return None
+    return Decimal(str(valor)).quantize(_CENTAVO)
+
+
+def _particao(id_termo, data) -> tuple:
+    """(id_termo, ano, mes) de uma despesa; ano/mes None para data nula"""
+    if data is None or pd.isna(data):
+        return (int(id_termo), None, None)
+    return (int(id_termo), data.year, data.month)
+
+
+def _id_termo(termo_rubrica: str):
+    """id_termo de 'termo-rubrica', como a coluna calculada do banco (None se malformado)"""
+    termo, separador, _ = str(termo_rubrica).partition("-")
+    return int(termo) if separador and termo.isdigit() else None
+
+
+def _ler_sql(sql: str, conn, **kwargs) -> pd.DataFrame:
+    """pd.read_sql na conexão do pool (pyodbc), sem o aviso do pandas sobre SQLAlchemy"""
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable", category=UserWarning)
+        return pd.read_sql(sql, conn, **kwargs)
+
+
+class AnalyticsExporter:
+    """Exportação incremental das tabelas para o dataset Parquet"""
+
+    ARQUIVO_ESTADO = "_exportacao.json"
+    ARQUIVO_TRAVA = ".trava"
+    PASTA_DESPESAS = "despesas"
+    ARQUIVO_PARTICAO = "parte.parquet"
+
+    SQL_PARTICAO = f"SELECT {', '.join(COLUNAS_DESPESAS)} FROM despesas WHERE id_termo = ?"
+    SQL_PARTICOES = "SELECT DISTINCT id_termo, data_pagamento FROM despesas WHERE id_termo IS NOT NULL"
+
+    def __init__(self, dir_staging=None, dir_destino=None):
+        """
+        Args:
+            dir_staging: Pasta da execução cujas linhas processadas definem as partições tocadas
+            dir_destino: Raiz do dataset (padrão: Config.DIR_ANALITICO)
+        """
+        self.dir_staging = Path(dir_staging) if dir_staging else None
+        destino = dir_destino or Config.DIR_ANALITICO
+        self.dir_destino = Path(destino) if destino else None
+
+    def run(self, completo: bool = False) -> bool:
+        """
+        Atualiza o dataset (nunca levanta: o banco continua sendo a fonte da verdade)
+
+        Args:
+            completo: Regrava todas as partições e remove as que não existem mais no banco
+
+        Returns:
+            True se o dataset foi atualizado
+        """
+        if self.dir_destino is None:
+            return False
+        if not pyarrow_disponivel():
+            logger.warning("⚠️  DIR_ANALITICO definido, mas pyarrow não está instalado: exportação pulada")
+            return False
+
+        logger.info("📦 Exportação analítica (Parquet)")
+        inicio = time.time()
+        try:
+            with TravaArquivo(self.dir_destino / self.ARQUIVO_TRAVA):
+                estado = self._ler_estado()
+                if not completo and estado.get("status") != "ok":
+                    logger.info("   ℹ️  Dataset inexistente ou exportação anterior incompleta: exportação completa")
+                    completo = True
+
+                self._gravar_estado({**estado, "status": "em_andamento"})
+                regravadas, removidas = self._exportar(completo)
+                self._gravar_estado({
+                    "status": "ok",
+                    "run_id": self.dir_staging.name if self.dir_staging else None,
+                    "completa": completo,
+                    "particoes_regravadas": regravadas,
+                    "particoes_removidas": removidas,
+                    "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+                })
+        except Exception as e:
+            logger.error(f"❌ Erro na exportação analítica (a próxima será completa): {e}", exc_info=True)
+            return False
+
+        duracao = time.time() - inicio
+        metricas.incrementar("analitico_particoes", regravadas, "Partições Parquet regravadas", operacao="regravada")
+        metricas.incrementar("analitico_particoes", removidas, operacao="removida")
+        metricas.definir("etapa_duracao_segundos", round(duracao, 3), etapa="exportacao")
+        logger.info(f"   ✅ {regravadas} partição(ões) regravada(s), {removidas} removida(s) em {duracao:.2f}s")
+        return True
+
+    # ===== ESTADO =====
+
+    def _ler_estado(self) -> dict:
+        try:
+            with open(self.dir_destino / self.ARQUIVO_ESTADO, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _gravar_estado(self, estado: dict):
+        destino = self.dir_destino / self.ARQUIVO_ESTADO
+        tmp = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+        self.dir_destino.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, destino)
+
+    # ===== PARTIÇÕES =====
+
+    def _caminho_particao(self, particao: tuple) -> Path:
+        id_termo, ano, mes = particao
+        return (self.dir_destino / self.PASTA_DESPESAS / f"id_termo={id_termo}"
+                / f"ano={PARTICAO_NULA if ano is None else ano}"
+                / f"mes={PARTICAO_NULA if mes is None else mes}" / self.ARQUIVO_PARTICAO)
+
+    def _particoes_existentes(self) -> set:
+        """Partições presentes no dataset, lidas dos nomes das pastas"""
+        pasta = self.dir_destino / self.PASTA_DESPESAS
+        existentes = set()
+        for arquivo in pasta.glob(f"id_termo=*/ano=*/mes=*/{self.ARQUIVO_PARTICAO}"):
+            valores = [p.split("=", 1)[1] for p in arquivo.relative_to(pasta).parts[:3]]
+            existentes.add(tuple(None if v == PARTICAO_NULA else int(v) for v in valores))
+        return existentes
+
+    def _particoes_tocadas(self) -> set:
+        """
+        Partições afetadas pelas linhas processadas na execução: a de destino
+        de cada linha e, para os UPDATEs, a partição onde a linha estava antes
+        """
+        if self.dir_staging is None:
+            return set()
+        # Upload + dead letter retentado (gravado pela carga); o upload fica com o nome original se a carga parou no meio
+        arquivos = [self.dir_staging / "despesas_upload.processado.csv", self.dir_staging / "despesas_upload.csv"]
+        partes = [pd.read_csv(a, dtype=str, keep_default_na=False) for a in arquivos if a.exists()]
+        if not partes:
+            return set()
+        df = pd.concat(partes, ignore_index=True)
+
+        tocadas = set()
+        id_termo = df["id_termo_rubrica"].map(_id_termo)
+        datas = pd.to_datetime(df["data_pagamento"], format="%Y-%m-%d", errors="coerce")
+        for termo, data in zip(id_termo, datas):
+            if termo is not None:
+                tocadas.add(_particao(termo, data))
+
+        atualizados = set(df.loc[df.get("acao", pd.Series("", index=df.index)) == "UPDATE", "id_codigo_sit"])
+        if atualizados:
+            tocadas |= self._particoes_com_ids(atualizados)
+        return tocadas
+
+    def _particoes_com_ids(self, ids: set) -> set:
+        """Partições do dataset que hoje contêm algum dos ids (lê só a coluna id_codigo_sit)"""
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        pasta = self.dir_destino / self.PASTA_DESPESAS
+        if not pasta.exists():
+            return set()
+
+        dataset = ds.dataset(pasta, format="parquet", partitioning="hive")
+        tabela = dataset.to_table(
+            columns=["id_termo", "ano", "mes"],
+            filter=pc.field("id_codigo_sit").isin(sorted(ids)),
+        )
+        return {
+            (int(termo), None if ano is None else int(ano), None if mes is None else int(mes))
+            for termo, ano, mes in set(zip(*(tabela[c].to_pylist() for c in ("id_termo", "ano", "mes"))))
+        }
+
+    def _exportar(self, completo: bool) -> tuple:
+        """
+        Regrava as partições necessárias e as tabelas pequenas
+
+        Returns:
+            (partições regravadas, partições removidas)
+        """
+        with db_manager.pool.conexao() as conn:
+            existentes = self._particoes_existentes()
+            if completo:
+                no_banco = _ler_sql(self.SQL_PARTICOES, conn)
+                datas = pd.to_datetime(no_banco["data_pagamento"], errors="coerce")
+                tocadas = {_particao(t, d) for t, d in zip(no_banco["id_termo"], datas)}
+                # Partições que sumiram do banco também são "tocadas": ficam vazias e são removidas
+                tocadas |= existentes
+            else:
+                tocadas = self._particoes_tocadas()
+
+            regravadas = removidas = 0
+            por_termo = {}
+            for particao in tocadas:
+                por_termo.setdefault(particao[0], []).append(particao)
+
+            with Progresso("Exportação Parquet", total=len(tocadas), unidade="partições") as progresso:
+                for id_termo, particoes in sorted(por_termo.items()):
+                    grupos = self._ler_despesas(conn, id_termo)
+                    for particao in particoes:
+                        if self._gravar_particao(particao, grupos.get(particao)):
+                            regravadas += 1
+                        elif particao in existentes:
+                            removidas += 1
+                        progresso.avancar()
+
+            for tabela in ("rubricas", "termos"):
+                self._gravar_tabela(_ler_sql(f"SELECT * FROM {tabela}", conn), self.dir_destino / f"{tabela}.parquet")
+
+        return regravadas, removidas
+
+    def _ler_despesas(self, conn, id_termo: int) -> dict:
+        """Despesas de um termo (busca pelo índice de id_termo), agrupadas por partição"""
+        df = _ler_sql(self.SQL_PARTICAO, conn, params=[id_termo])
+        for coluna in ("data_pagamento", "data_debito_convenio"):
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce").dt.date
+        df["valor"] = df["valor"].map(_decimal)
+        df["id"] = pd.to_numeric(df["id"], errors="coerce").astype("Int64")
+        for coluna in COLUNAS_DESPESAS:
+            if coluna not in ("id", "data_pagamento", "data_debito_convenio", "valor"):
+                df[coluna] = df[coluna].map(lambda v: None if v is None or pd.isna(v) else str(v))
+        particoes = pd.Series([_particao(id_termo, d) for d in df["data_pagamento"]], index=df.index, dtype=object)
+        return {particao: grupo for particao, grupo in df.groupby(particoes, sort=False)}
+
+    def _gravar_particao(self, particao: tuple, df: pd.DataFrame = None) -> bool:
+        """
+        Troca o arquivo da partição pelo conteúdo atual do banco (df = linhas da partição)
+
+        Returns:
+            False se a partição ficou vazia (arquivo e pastas vazias removidos)
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        caminho = self._caminho_particao(particao)
+        if df is None or df.empty:
+            if caminho.exists():
+                caminho.unlink()
+                for pasta in (caminho.parent, caminho.parent.parent, caminho.parent.parent.parent):
+                    if any(pasta.iterdir()):
+                        break
+                    pasta.rmdir()
+            return False
+
+        tabela = pa.Table.from_pandas(
+            df.sort_values("id_codigo_sit")[COLUNAS_DESPESAS], schema=_esquema_despesas(), preserve_index=False
+        )
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+        try:
+            pq.write_table(tabela, tmp, compression="zstd")
+            os.replace(tmp, caminho)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return True
+
+    @staticmethod
+    def _gravar_tabela(df: pd.DataFrame, caminho: Path):
+        """Grava uma tabela pequena em um único arquivo (troca atômica)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tmp = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+        try:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+            os.replace(tmp, caminho)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
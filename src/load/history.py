@@ -0,0 +1,566 @@
+"""
+🕰️ HISTÓRICO DE DESPESAS (DELTAS EM PARQUET)
+Guarda em DIR_HISTORICO cada INSERT/UPDATE aplicado pela carga, só com as
+colunas que mudaram, para auditoria e reconstrução do estado em qualquer data:
+
+    spool/<lote_id>.<pid>.pendente                           lote gravado antes do commit no banco
+    spool/<lote_id>.lote                                     lote commitado, ainda fora dos segmentos
+    segmentos/<aaaammddThhmmss>-<run_id>-<sufixo>.parquet   deltas (só acréscimo, zstd)
+    indice.sqlite                                            id_codigo_sit / termo -> (segmento, grupo, linha)
+
+Cada lote da carga é gravado (com fsync) no spool antes do commit da sua
+transação e confirmado (renomeado para .lote) depois dele; os lotes
+confirmados viram um segmento ao fim da carga ou a cada
+HISTORICO_SEGMENTO_LINHAS registros. Uma queda nunca perde o histórico de um
+lote commitado: um .pendente cujo processo morreu é confirmado ou descartado
+pela próxima carga conforme o journal de carga, e um .lote é levado ao
+próximo segmento. O índice guarda os lotes de cada segmento, então um lote
+nunca entra duas vezes no histórico.
+
+Cada registro leva o run_id, o instante do lote, a operação
+(I = INSERT, U = UPDATE, B = estado anterior ao primeiro UPDATE registrado do
+id) e a máscara `alteradas` das colunas preenchidas: colunas fora da máscara
+não mudaram; nulo dentro da máscara é um valor que passou a ser nulo. O estado
+anterior de um UPDATE é lido do próprio banco, na transação do lote.
+
+Os segmentos são ordenados por id_codigo_sit e gravados em grupos de linhas
+pequenos, e o índice aponta o grupo e a linha de cada registro: reconstruir
+um id ou um termo lê só os grupos que contêm os seus registros, sem varrer o
+histórico. Segmentos nunca são alterados; um segmento que não chegou ao
+índice (queda entre a gravação e a indexação) é indexado na próxima gravação.
+
+Requer pyarrow (opcional): sem ele o histórico fica desligado com um aviso.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import closing
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+from src.load.analytics import pyarrow_disponivel
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+from src.utils.metrics import metricas
+from src.utils.workspace import TravaArquivo
+
+logger = setup_logger("ExpensesHistory")
+
+# Na ordem dos parâmetros de ExpensesLoader.SQL_INSERT
+COLUNAS = [
+    "id_codigo_sit", "termo", "rubrica", "tipo_despesa", "cpf_cnpj", "favorecido",
+    "tipo_doc_despesa", "descricao_despesa", "tipo_doc_pagamento",
+    "data_pagamento", "data_debito_convenio", "valor", "id_termo_rubrica",
+]
+# Colunas versionadas (bit i da máscara = COLUNAS_VALORES[i])
+COLUNAS_VALORES = COLUNAS[1:]
+COLUNAS_DATA = ("data_pagamento", "data_debito_convenio")
+MASCARA_TODAS = (1 << len(COLUNAS_VALORES)) - 1
+
+OP_INSERT = "I"
+OP_UPDATE = "U"
+OP_BASE = "B"
+
+_CENTAVO = Decimal("0.01")
+
+# Parâmetros por consulta ao índice (limite de variáveis do SQLite)
+_LOTE_CONSULTA = 500
+
+# (pasta do spool, pid) -> trava que marca os .pendente do processo como em andamento
+_travas_spool = {}
+_travas_lock = threading.Lock()
+
+
+def _normalizar(coluna: str, valor):
+    """Forma canônica de um valor (banco ou upload) para comparar e gravar"""
+    if valor is None or (not isinstance(valor, (str, date)) and pd.isna(valor)):
+        return None
+    if coluna == "valor":
+        return Decimal(str(valor)).quantize(_CENTAVO)
+    if coluna in COLUNAS_DATA:
+        if isinstance(valor, datetime):
+            return valor.date()
+        if isinstance(valor, date):
+            return valor
+        data = pd.to_datetime(str(valor).strip(), errors="coerce")
+        return None if pd.isna(data) else data.date()
+    texto = str(valor)
+    return texto if texto.strip() else None
+
+
+def _linha(valores) -> tuple:
+    return tuple(_normalizar(coluna, valor) for coluna, valor in zip(COLUNAS, valores))
+
+
+def _instante(em) -> str:
+    """Instante como texto ISO comparável no índice (None = agora)"""
+    if em is None:
+        em = datetime.now()
+    elif not isinstance(em, datetime):
+        em = pd.Timestamp(str(em)).to_pydatetime()
+    return em.isoformat(sep="T", timespec="microseconds")
+
+
+def _esquema(lotes=()):
+    """Esquema dos segmentos; os lotes do spool que o segmento contém vão nos metadados"""
+    import pyarrow as pa
+
+    tipos = {"data_pagamento": pa.date32(), "data_debito_convenio": pa.date32(), "valor": pa.decimal128(18, 2)}
+    return pa.schema(
+        [("ts", pa.timestamp("us")), ("run_id", pa.string()), ("op", pa.string()),
+         ("alteradas", pa.int32()), ("termo_vigente", pa.string())]
+        + [(coluna, tipos.get(coluna, pa.string())) for coluna in COLUNAS],
+        metadata={"lotes": json.dumps(sorted(lotes))},
+    )
+
+
+class HistoricoDespesas:
+    """
+    Gravação (pela carga) e consulta do histórico de despesas
+
+    Args:
+        pasta: Raiz do histórico (padrão: Config.DIR_HISTORICO)
+    """
+
+    PASTA_SEGMENTOS = "segmentos"
+    PASTA_SPOOL = "spool"
+    ARQUIVO_INDICE = "indice.sqlite"
+    ARQUIVO_TRAVA = ".trava"
+    # Linhas por grupo do Parquet: uma consulta pontual lê um grupo deste tamanho
+    GRUPO_LINHAS = 2048
+
+    SQL_INDICE = """
+        CREATE TABLE IF NOT EXISTS segmentos (
+            id INTEGER PRIMARY KEY,
+            arquivo TEXT NOT NULL UNIQUE,
+            registros INTEGER NOT NULL,
+            indexado_em TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS registros (
+            id_codigo_sit TEXT NOT NULL,
+            termo TEXT,
+            ts TEXT,
+            op TEXT NOT NULL,
+            segmento INTEGER NOT NULL REFERENCES segmentos (id),
+            grupo INTEGER NOT NULL,
+            linha INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS lotes (
+            lote_id TEXT PRIMARY KEY,
+            segmento INTEGER NOT NULL REFERENCES segmentos (id)
+        );
+        CREATE INDEX IF NOT EXISTS ix_registros_id ON registros (id_codigo_sit, ts);
+        CREATE INDEX IF NOT EXISTS ix_registros_termo ON registros (termo, ts);
+    """
+
+    # Registros B (ts nulo) valem para qualquer instante: vêm antes de todos
+    SQL_REGISTROS = """
+        SELECT r.id_codigo_sit, s.arquivo, r.grupo, r.linha
+        FROM registros r JOIN segmentos s ON s.id = r.segmento
+        WHERE r.id_codigo_sit IN ({marcadores}) AND (r.ts IS NULL OR r.ts <= ?)
+        ORDER BY r.id_codigo_sit, r.ts IS NOT NULL, r.ts, r.segmento, r.grupo, r.linha
+    """
+
+    def __init__(self, pasta=None):
+        self.pasta = Path(pasta or Config.DIR_HISTORICO)
+        self.pasta_segmentos = self.pasta / self.PASTA_SEGMENTOS
+        self.pasta_spool = self.pasta / self.PASTA_SPOOL
+        self.caminho_indice = self.pasta / self.ARQUIVO_INDICE
+        self._lock = threading.Lock()
+        self._registros = {}  # lote_id -> registros de um .pendente deste processo
+        self._confirmados = 0  # registros confirmados desde o último segmento
+
+    @classmethod
+    def do_ambiente(cls):
+        """Instância para a carga, ou None se DIR_HISTORICO estiver vazio ou faltar o pyarrow"""
+        if not Config.DIR_HISTORICO:
+            return None
+        if not pyarrow_disponivel():
+            logger.warning("⚠️  DIR_HISTORICO definido, mas pyarrow não está instalado: histórico desligado")
+            return None
+        return cls(Config.DIR_HISTORICO)
+
+    # ===== GRAVAÇÃO =====
+
+    def preparar(self, lote_id: str, run_id, params_insert: list, params_update: list, anteriores: dict):
+        """
+        Grava no spool as linhas de um lote, antes do commit da sua transação (thread-safe)
+
+        O arquivo vai para o disco (fsync) antes de retornar; depois do commit o
+        lote é confirmado (confirmar) ou, se a transação foi desfeita, descartado.
+
+        Args:
+            lote_id: Id do lote no journal de carga
+            run_id: Execução que aplica o lote
+            params_insert: Parâmetros de ExpensesLoader.SQL_INSERT
+            params_update: Parâmetros de ExpensesLoader.SQL_UPDATE (id_codigo_sit por último)
+            anteriores: id_codigo_sit -> linha do banco antes do UPDATE (colunas de COLUNAS)
+        """
+        registros = [(_linha(p), None) for p in params_insert]
+        for p in params_update:
+            anterior = anteriores.get(p[-1])
+            # Sem linha anterior o UPDATE não afetou nada
+            if anterior is not None:
+                registros.append((_linha((p[-1],) + tuple(p[:-1])), _linha(anterior)))
+
+        self._travar_processo()
+        conteudo = {"lote_id": lote_id, "run_id": run_id, "ts": _instante(None), "registros": registros}
+        caminho = self._pendente(lote_id)
+        tmp = caminho.with_name(f".{caminho.name}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(conteudo, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, caminho)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        with self._lock:
+            self._registros[lote_id] = len(registros)
+
+    def confirmar(self, lote_id: str):
+        """Marca o lote preparado como commitado; grava um segmento se o spool encheu"""
+        os.replace(self._pendente(lote_id), self.pasta_spool / f"{lote_id}.lote")
+        with self._lock:
+            self._confirmados += self._registros.pop(lote_id, 0)
+            cheio = self._confirmados >= Config.HISTORICO_SEGMENTO_LINHAS
+        if cheio:
+            self.descarregar()
+
+    def descartar(self, lote_id: str):
+        """Remove o lote preparado cuja transação foi desfeita"""
+        with self._lock:
+            self._registros.pop(lote_id, None)
+        self._pendente(lote_id).unlink(missing_ok=True)
+
+    def recuperar(self, commitados) -> bool:
+        """
+        Resolve os .pendente de processos que morreram e grava o spool num segmento
+
+        Chamado pela carga antes de aplicar lotes. Os .pendente deste processo
+        também são resolvidos (nenhum lote dele está em andamento neste ponto).
+        A trava de cada processo morto é mantida enquanto os seus .pendente são
+        resolvidos e então apagada, então o spool não acumula uma trava por carga.
+
+        Args:
+            commitados: Função lista de lote_id -> conjunto dos commitados no journal
+
+        Returns:
+            False se a gravação do segmento falhou (ver descarregar)
+        """
+        pid_atual = str(os.getpid())
+        mortos = self._travar_encerrados(pid_atual)
+        try:
+            orfaos = {}
+            for caminho in sorted(self.pasta_spool.glob("*.pendente")):
+                lote_id, pid = caminho.name.split(".")[:2]
+                # Sem arquivo de trava o dono já morreu e a trava foi apagada
+                if pid == pid_atual or pid in mortos or not (self.pasta_spool / f"{pid}.trava").exists():
+                    orfaos[lote_id] = caminho
+            if orfaos:
+                confirmados = commitados(sorted(orfaos))
+                for lote_id, caminho in orfaos.items():
+                    if lote_id in confirmados:
+                        os.replace(caminho, self.pasta_spool / f"{lote_id}.lote")
+                    else:
+                        caminho.unlink(missing_ok=True)
+                logger.warning(
+                    f"   ⚠️  Histórico: {len(orfaos)} lote(s) pendente(s) de uma carga interrompida "
+                    f"({len(confirmados)} commitado(s), {len(orfaos) - len(confirmados)} descartado(s))"
+                )
+        finally:
+            for trava in mortos.values():
+                trava.caminho.unlink(missing_ok=True)
+                trava.liberar()
+        return self.descarregar()
+
+    def descarregar(self) -> bool:
+        """
+        Grava os lotes confirmados do spool em um novo segmento e os indexa
+
+        Nunca levanta: em caso de erro os lotes continuam no spool para a
+        próxima tentativa (a carga já está commitada no banco).
+
+        Returns:
+            False se a gravação falhou
+        """
+        if not self.pasta_spool.is_dir():
+            return True
+        with self._lock:
+            self._confirmados = 0
+
+        try:
+            with TravaArquivo(self.pasta / self.ARQUIVO_TRAVA), closing(self._conectar()) as conn:
+                self._indexar_orfaos(conn)
+                arquivos = sorted(self.pasta_spool.glob("*.lote"))
+                if not arquivos:
+                    return True
+                gravados = self._lotes_gravados(conn, [caminho.stem for caminho in arquivos])
+                lotes = [self._ler_spool(caminho) for caminho in arquivos if caminho.stem not in gravados]
+                pendentes = [
+                    (lote["ts"], lote["run_id"], novo, anterior)
+                    for lote in sorted(lotes, key=lambda l: l["ts"])
+                    for novo, anterior in lote["registros"]
+                ]
+                linhas = self._montar(pendentes, self._ids_com_historico(
+                    conn, {novo[0] for _, _, novo, anterior in pendentes if anterior is not None}
+                ))
+                if linhas:
+                    lote_ids = [lote["lote_id"] for lote in lotes]
+                    self._indexar(conn, self._gravar_segmento(linhas, pendentes[0][1], lote_ids))
+                for caminho in arquivos:
+                    caminho.unlink()
+        except Exception as e:
+            logger.error(f"❌ Erro ao gravar o histórico (lotes mantidos no spool): {e}")
+            return False
+
+        ajuda = "Registros gravados no histórico de despesas"
+        for op, nome in ((OP_INSERT, "insert"), (OP_UPDATE, "update"), (OP_BASE, "base")):
+            metricas.incrementar("historico_registros", sum(1 for linha in linhas if linha[2] == op), ajuda, op=nome)
+        if linhas:
+            logger.info(f"   🕰️  Histórico: {len(linhas)} registro(s) gravado(s)")
+        return True
+
+    # ===== SPOOL =====
+
+    def _pendente(self, lote_id: str) -> Path:
+        return self.pasta_spool / f"{lote_id}.{os.getpid()}.pendente"
+
+    def _travar_processo(self):
+        """Trava deste processo no spool (mantida até ele morrer): seus .pendente estão em andamento"""
+        chave = (self.pasta_spool, os.getpid())
+        with _travas_lock:
+            if chave not in _travas_spool:
+                caminho = self.pasta_spool / f"{os.getpid()}.trava"
+                while True:
+                    trava = TravaArquivo(caminho)
+                    trava.adquirir()
+                    # Apagada por recuperar enquanto esperávamos (pid reaproveitado): de novo
+                    if caminho.exists():
+                        break
+                    trava.liberar()
+                _travas_spool[chave] = trava
+
+    def _travar_encerrados(self, pid_atual: str) -> dict:
+        """Travas dos processos mortos (livres) no spool, adquiridas: pid -> TravaArquivo"""
+        mortos = {}
+        for caminho in sorted(self.pasta_spool.glob("*.trava")):
+            if caminho.stem == pid_atual:
+                continue
+            trava = TravaArquivo(caminho)
+            if trava.adquirir(bloquear=False):
+                mortos[caminho.stem] = trava
+        return mortos
+
+    @staticmethod
+    def _ler_spool(caminho: Path) -> dict:
+        with open(caminho, "r", encoding="utf-8") as f:
+            lote = json.load(f)
+        lote["ts"] = datetime.fromisoformat(lote["ts"])
+        lote["registros"] = [
+            (_linha(novo), None if anterior is None else _linha(anterior)) for novo, anterior in lote["registros"]
+        ]
+        return lote
+
+    @staticmethod
+    def _montar(pendentes: list, com_historico: set) -> list:
+        """
+        Registros do segmento: (ts, run_id, op, máscara, termo vigente, valores)
+
+        O primeiro UPDATE de um id sem histórico é precedido de um registro B
+        com a linha anterior inteira; UPDATEs que não mudaram nada são omitidos.
+        """
+        linhas = []
+        vistos = set(com_historico)
+        for ts, run_id, novo, anterior in pendentes:
+            if anterior is None:
+                linhas.append((ts, run_id, OP_INSERT, MASCARA_TODAS, novo[1], novo))
+                vistos.add(novo[0])
+                continue
+
+            mascara = 0
+            for i, (valor_novo, valor_anterior) in enumerate(zip(novo[1:], anterior[1:])):
+                if valor_novo != valor_anterior:
+                    mascara |= 1 << i
+            if not mascara:
+                continue
+            if novo[0] not in vistos:
+                linhas.append((None, run_id, OP_BASE, MASCARA_TODAS, anterior[1], anterior))
+                vistos.add(novo[0])
+            valores = (novo[0],) + tuple(v if mascara >> i & 1 else None for i, v in enumerate(novo[1:]))
+            linhas.append((ts, run_id, OP_UPDATE, mascara, novo[1], valores))
+
+        # Por id (B antes dos demais, depois em ordem de commit): os registros de
+        # um id ficam juntos, quase sempre em um único grupo de linhas
+        linhas.sort(key=lambda l: (l[5][0] or "", l[0] is not None, l[0] or datetime.min))
+        return linhas
+
+    def _gravar_segmento(self, linhas: list, run_id, lotes=()) -> Path:
+        """Grava o segmento (troca atômica) com os lotes do spool que ele contém e retorna o caminho"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        dados = {
+            "ts": [l[0] for l in linhas],
+            "run_id": [l[1] for l in linhas],
+            "op": [l[2] for l in linhas],
+            "alteradas": [l[3] for l in linhas],
+            "termo_vigente": [l[4] for l in linhas],
+        }
+        for i, coluna in enumerate(COLUNAS):
+            dados[coluna] = [l[5][i] for l in linhas]
+
+        self.pasta_segmentos.mkdir(parents=True, exist_ok=True)
+        nome = f"{datetime.now():%Y%m%dT%H%M%S}-{run_id or 'avulso'}-{uuid.uuid4().hex[:8]}.parquet"
+        caminho = self.pasta_segmentos / nome
+        tmp = caminho.with_name(f".{nome}.{os.getpid()}.tmp")
+        try:
+            pq.write_table(pa.Table.from_pydict(dados, schema=_esquema(lotes)), tmp,
+                           compression="zstd", row_group_size=self.GRUPO_LINHAS)
+            os.replace(tmp, caminho)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return caminho
+
+    # ===== ÍNDICE =====
+
+    def _conectar(self) -> sqlite3.Connection:
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.caminho_indice, timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SQL_INDICE)
+        return conn
+
+    def _indexar(self, conn: sqlite3.Connection, caminho: Path):
+        """Indexa um segmento e os seus lotes lendo só as colunas de chave, grupo a grupo (uma transação)"""
+        import pyarrow.parquet as pq
+
+        arquivo = pq.ParquetFile(caminho)
+        lotes = json.loads((arquivo.schema_arrow.metadata or {}).get(b"lotes", b"[]"))
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO segmentos (arquivo, registros, indexado_em) VALUES (?, ?, ?)",
+                (caminho.name, arquivo.metadata.num_rows, datetime.now().isoformat(timespec="seconds")),
+            )
+            segmento = cursor.lastrowid
+            conn.executemany("INSERT OR IGNORE INTO lotes (lote_id, segmento) VALUES (?, ?)",
+                             [(lote_id, segmento) for lote_id in lotes])
+            for grupo in range(arquivo.num_row_groups):
+                chaves = arquivo.read_row_group(grupo, columns=["id_codigo_sit", "termo_vigente", "ts", "op"])
+                conn.executemany(
+                    "INSERT INTO registros (id_codigo_sit, termo, ts, op, segmento, grupo, linha) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (id_codigo, termo, None if ts is None else _instante(ts), op, segmento, grupo, linha)
+                        for linha, (id_codigo, termo, ts, op) in enumerate(zip(
+                            *(chaves[c].to_pylist() for c in ("id_codigo_sit", "termo_vigente", "ts", "op"))
+                        ))
+                    ],
+                )
+
+    def _indexar_orfaos(self, conn: sqlite3.Connection):
+        """Indexa segmentos gravados que não chegaram ao índice"""
+        indexados = {nome for (nome,) in conn.execute("SELECT arquivo FROM segmentos")}
+        for caminho in sorted(self.pasta_segmentos.glob("*.parquet")):
+            if caminho.name not in indexados:
+                logger.warning(f"   ⚠️  Segmento {caminho.name} fora do índice: indexando")
+                self._indexar(conn, caminho)
+
+    @staticmethod
+    def _lotes_gravados(conn: sqlite3.Connection, lote_ids: list) -> set:
+        """Lotes do spool que já estão em um segmento (queda antes de apagar o spool)"""
+        gravados = set()
+        for inicio in range(0, len(lote_ids), _LOTE_CONSULTA):
+            parte = lote_ids[inicio:inicio + _LOTE_CONSULTA]
+            gravados.update(lote_id for (lote_id,) in conn.execute(
+                f"SELECT lote_id FROM lotes WHERE lote_id IN ({', '.join('?' * len(parte))})", parte,
+            ))
+        return gravados
+
+    @staticmethod
+    def _ids_com_historico(conn: sqlite3.Connection, ids: set) -> set:
+        ids = sorted(ids)
+        encontrados = set()
+        for inicio in range(0, len(ids), _LOTE_CONSULTA):
+            parte = ids[inicio:inicio + _LOTE_CONSULTA]
+            encontrados.update(id_codigo for (id_codigo,) in conn.execute(
+                f"SELECT DISTINCT id_codigo_sit FROM registros WHERE id_codigo_sit IN ({', '.join('?' * len(parte))})",
+                parte,
+            ))
+        return encontrados
+
+    # ===== CONSULTA =====
+
+    def versoes(self, ids, em=None) -> dict:
+        """
+        Registros de cada id até o instante `em` (padrão: agora), em ordem
+
+        Lê do Parquet só os grupos de linhas apontados pelo índice.
+
+        Returns:
+            id_codigo_sit -> lista de dicts (ts, run_id, op e as colunas alteradas)
+        """
+        import pyarrow.parquet as pq
+
+        if not self.caminho_indice.exists():
+            return {}
+        ids = sorted({str(i) for i in ids})
+        limite = _instante(em)
+        with closing(sqlite3.connect(self.caminho_indice, timeout=60)) as conn:
+            enderecos = []
+            for inicio in range(0, len(ids), _LOTE_CONSULTA):
+                parte = ids[inicio:inicio + _LOTE_CONSULTA]
+                enderecos.extend(conn.execute(
+                    self.SQL_REGISTROS.format(marcadores=", ".join("?" * len(parte))), parte + [limite]
+                ))
+
+        grupos = {}
+        resultado = {}
+        for id_codigo, arquivo, grupo, linha in enderecos:
+            if (arquivo, grupo) not in grupos:
+                grupos[(arquivo, grupo)] = pq.ParquetFile(self.pasta_segmentos / arquivo).read_row_group(grupo).to_pylist()
+            registro = grupos[(arquivo, grupo)][linha]
+            mascara = registro["alteradas"]
+            versao = {"ts": registro["ts"], "run_id": registro["run_id"], "op": registro["op"]}
+            versao.update({c: registro[c] for i, c in enumerate(COLUNAS_VALORES) if mascara >> i & 1})
+            resultado.setdefault(id_codigo, []).append(versao)
+        return resultado
+
+    def estado(self, id_codigo_sit, em=None):
+        """Linha do id no instante `em` (None se ainda não existia no histórico)"""
+        return self.estados([id_codigo_sit], em).get(str(id_codigo_sit))
+
+    def estados(self, ids, em=None) -> dict:
+        """id_codigo_sit -> linha (dict de COLUNAS) no instante `em`, aplicando os deltas em ordem"""
+        estados = {}
+        for id_codigo, versoes in self.versoes(ids, em).items():
+            linha = dict.fromkeys(COLUNAS)
+            linha["id_codigo_sit"] = id_codigo
+            for versao in versoes:
+                linha.update({c: v for c, v in versao.items() if c in COLUNAS_VALORES})
+            estados[id_codigo] = linha
+        return estados
+
+    def estado_termo(self, termo, em=None) -> pd.DataFrame:
+        """
+        Despesas do termo no instante `em`
+
+        O índice por termo dá os ids que já estiveram no termo; a linha de cada
+        um é reconstruída e só ficam as que estavam no termo naquele instante.
+        """
+        if not self.caminho_indice.exists():
+            return pd.DataFrame(columns=COLUNAS)
+        with closing(sqlite3.connect(self.caminho_indice, timeout=60)) as conn:
+            ids = [id_codigo for (id_codigo,) in conn.execute(
+                "SELECT DISTINCT id_codigo_sit FROM registros WHERE termo = ? AND (ts IS NULL OR ts <= ?)",
+                (str(termo), _instante(em)),
+            )]
+        linhas = [l for l in self.estados(ids, em).values() if l["termo"] == str(termo)]
+        return pd.DataFrame(linhas, columns=COLUNAS).sort_values("id_codigo_sit", ignore_index=True)
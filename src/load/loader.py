@@ -4,12 +4,20 @@ Encapsula os scripts 3_load_sql.py e 3_update_sql.py
 """
 
 import os
+import time
+import zlib
 import pandas as pd
-import pyodbc
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from src.load.history import COLUNAS as COLUNAS_HISTORICO, HistoricoDespesas
 from src.utils.config import Config
 from src.utils.logger import setup_logger
+from src.utils.metrics import metricas
+from src.utils.progress import Progresso
+from src.utils.workspace import TravaArquivo, gravar_csv_atomico
+from src.utils.database import db_manager
+from src.utils.hashing import hash_arquivo, hash_texto
 from src.utils.ingestor import limpar_string_numero
 
 logger = setup_logger("ExpensesLoader")
@@ -18,9 +26,21 @@ logger = setup_logger("ExpensesLoader")
 class ExpensesLoader:
     """Carregador centralizado para banco de dados"""
     
-    def __init__(self):
-        self.dir_staging = Config.DIR_STAGING
+    def __init__(self, manifesto=None, dir_staging=None):
+        """
+        Args:
+            manifesto: ManifestoExecucao opcional (o run_id é gravado no journal de carga
+                       e cada lote commitado é registrado no manifesto)
+            dir_staging: Pasta da execução (padrão: a do manifesto, ou Config.DIR_STAGING)
+        """
+        if dir_staging is None and manifesto is not None:
+            dir_staging = manifesto.dir_staging
+        self.dir_staging = str(dir_staging) if dir_staging else Config.DIR_STAGING
+        self.dir_compartilhado = Config.DIR_STAGING
         self.conn_str = Config.CONN_STR_SQLSERVER
+        self.manifesto = manifesto
+        self._journal_pronto = False
+        self.historico = HistoricoDespesas.do_ambiente()
         
         if not self.dir_staging:
             raise ValueError("❌ DIR_STAGING não definido")
@@ -56,103 +76,548 @@ class ExpensesLoader:
             logger.error(f"💥 ERRO NA CARGA: {e}", exc_info=True)
             return False
     
+    SQL_INSERT = """
+        INSERT INTO despesas (
+            id_codigo_sit, termo, rubrica, tipo_despesa, cpf_cnpj, favorecido,
+            tipo_doc_despesa, descricao_despesa, tipo_doc_pagamento,
+            data_pagamento, data_debito_convenio, valor, id_termo_rubrica
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    SQL_UPDATE = """
+        UPDATE despesas SET
+            termo = ?, rubrica = ?, tipo_despesa = ?, cpf_cnpj = ?, 
+            favorecido = ?, tipo_doc_despesa = ?, descricao_despesa = ?, 
+            tipo_doc_pagamento = ?, data_pagamento = ?, data_debito_convenio = ?, 
+            valor = ?, id_termo_rubrica = ?
+        WHERE id_codigo_sit = ?
+    """
+    
+    # Linhas atuais dos ids de um lote de UPDATE, para o histórico (UPDLOCK:
+    # ninguém as altera entre a leitura e o UPDATE da mesma transação)
+    SQL_ANTERIORES = f"""
+        SELECT {', '.join(COLUNAS_HISTORICO)} FROM despesas WITH (UPDLOCK)
+        WHERE id_codigo_sit IN ({{marcadores}})
+    """
+    # Parâmetros por consulta (o SQL Server aceita até 2100)
+    LOTE_ANTERIORES = 1000
+    
+    # Journal de carga: ver database/ddl (...)/estrutura_dbo_etl_load_journal.sql
+    SQL_JOURNAL_CRIAR = """
+        IF OBJECT_ID('dbo.etl_load_journal', 'U') IS NULL
+        CREATE TABLE dbo.etl_load_journal (
+            lote_id CHAR(64) NOT NULL CONSTRAINT PK_etl_load_journal PRIMARY KEY,
+            run_id VARCHAR(40) NULL,
+            particao VARCHAR(100) NULL,
+            linha_inicio INT NOT NULL,
+            linha_fim INT NOT NULL,
+            qtd_linhas INT NOT NULL,
+            qtd_insert INT NOT NULL,
+            qtd_update INT NOT NULL,
+            status VARCHAR(12) NOT NULL,
+            data_commit DATETIME2(0) NOT NULL CONSTRAINT DF_etl_load_journal_data_commit DEFAULT (SYSDATETIME()),
+            hash_conteudo CHAR(64) NULL
+        )
+        ELSE IF COL_LENGTH('dbo.etl_load_journal', 'hash_conteudo') IS NULL
+        ALTER TABLE dbo.etl_load_journal ADD hash_conteudo CHAR(64) NULL
+    """
+    
+    SQL_JOURNAL_STATUS = "SELECT status FROM etl_load_journal WHERE lote_id = ?"
+    
+    SQL_JOURNAL_INSERIR = """
+        INSERT INTO etl_load_journal (
+            lote_id, run_id, particao, linha_inicio, linha_fim,
+            qtd_linhas, qtd_insert, qtd_update, status, hash_conteudo
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    # Status no journal: lote aplicado por inteiro, ou dividido em sublotes
+    # (cada sublote commitado tem sua própria entrada)
+    JOURNAL_COMMITADO = "commitado"
+    JOURNAL_DIVIDIDO = "dividido"
+    
+    # Compartilhado entre execuções (em DIR_STAGING): cada carga retira as
+    # linhas para retentar e devolve as que falharem, sob a mesma trava
+    ARQUIVO_DEAD_LETTER = "despesas_dead_letter.csv"
+    TRAVA_DEAD_LETTER = ".dead_letter.trava"
+    
     def carregar_despesas(self) -> bool:
         """
         Carrega despesas (INSERT e UPDATE) no banco
+        
+        O upload é particionado (Config.LOAD_PARTICAO) e cada partição é
+        carregada em lotes transacionais de Config.LOAD_TAMANHO_LOTE linhas,
+        com até Config.LOAD_CONCORRENCIA partições em paralelo, cada uma em
+        uma conexão do pool. Cada lote é registrado no journal de carga na
+        mesma transação, então a retomada de uma carga interrompida não reaplica
+        lotes já commitados.
+        
+        Linhas rejeitadas pelo banco vão para despesas_dead_letter.csv, que é
+        carregado de novo (como uma partição extra) na próxima execução.
+        
+        Com DIR_HISTORICO definido, as linhas de cada lote (e o estado anterior
+        das atualizadas) vão para o spool do histórico antes do commit e são
+        gravadas no histórico depois dele (ver history.py).
         """
         logger.info("➡️ Etapa 3a: Carga de Despesas (INSERT/UPDATE)")
         
         arquivo_upload = os.path.join(self.dir_staging, "despesas_upload.csv")
         
-        if not os.path.exists(arquivo_upload):
+        df_dead_letter = self._ler_dead_letter()
+        
+        if not os.path.exists(arquivo_upload) and df_dead_letter.empty:
             logger.info("   ℹ️  Nenhum arquivo de upload (dados já sincronizados)")
             return False
         
-        df = pd.read_csv(arquivo_upload, dtype=str)
-        if df.empty:
+        if os.path.exists(arquivo_upload):
+            df = pd.read_csv(arquivo_upload, dtype=str)
+        else:
+            df = pd.DataFrame(columns=df_dead_letter.columns)
+        
+        if df.empty and df_dead_letter.empty:
             logger.info("   ℹ️  Arquivo vazio, nada para carregar")
             return False
         
         try:
-            conn = pyodbc.connect(self.conn_str)
+            self._garantir_journal()
+        except Exception as e:
+            logger.error(f"❌ Journal de carga indisponível: {e}")
+            if not df_dead_letter.empty:
+                self._gravar_dead_letter([], df_dead_letter)
+            return False
+        
+        # Histórico de lotes commitados por uma carga que caiu antes de gravá-lo
+        if self.historico is not None:
+            self.historico.recuperar(self._lotes_commitados)
+        
+        particoes = self._particionar(df)
+        origem = self._origem_carga(arquivo_upload)
+        
+        # Dead letter da execução anterior: só o que o upload atual não traz de novo
+        if not df_dead_letter.empty:
+            df_dead_letter = df_dead_letter[~df_dead_letter["id_codigo_sit"].isin(df["id_codigo_sit"])]
+            if not df_dead_letter.empty:
+                particoes["dead-letter"] = df_dead_letter
+                logger.info(f"   ♻️  {len(df_dead_letter)} linha(s) do dead letter anterior serão retentadas")
+        
+        concorrencia = max(1, min(Config.LOAD_CONCORRENCIA, len(particoes)))
+        logger.info(f"   🧩 {len(particoes)} partição(ões) por '{Config.LOAD_PARTICAO}' | concorrência: {concorrencia}")
+        
+        resumos = []
+        total_linhas = sum(len(df_particao) for df_particao in particoes.values())
+        with Progresso("Carga de despesas", total=total_linhas, unidade="linhas") as progresso, \
+                ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix="carga") as executor:
+            futuros = [
+                executor.submit(self._carregar_particao, nome, df_particao, origem, progresso)
+                for nome, df_particao in particoes.items()
+            ]
+            for futuro in as_completed(futuros):
+                resumos.append(futuro.result())
+        
+        # Lotes commitados entram no histórico mesmo se outra partição falhou
+        if self.historico is not None:
+            self.historico.descarregar()
+        
+        self._registrar_resumo_shards(resumos)
+        
+        erro_critico = any(r["erro_critico"] for r in resumos)
+        falhas = [f for r in resumos for f in r["falhas"]]
+        # Com erro crítico, partições podem não ter chegado ao dead letter antigo: preserva-o
+        self._gravar_dead_letter(falhas, df_dead_letter if erro_critico else None)
+        
+        if erro_critico:
+            logger.error("❌ Erro crítico de carga: arquivo de upload mantido para nova tentativa")
+            return False
+        
+        # Registro do que a carga processou (upload + dead letter retentado): base
+        # da atualização do snapshot do daemon e da exportação analítica
+        novo_nome = arquivo_upload.replace(".csv", ".processado.csv")
+        gravar_csv_atomico(pd.concat([df, df_dead_letter], ignore_index=True), novo_nome, encoding="utf-8")
+        if os.path.exists(arquivo_upload):
+            os.remove(arquivo_upload)
+            logger.info(f"   💾 Upload processado gravado em .processado.csv")
+        
+        return True
+    
+    @staticmethod
+    def _particionar(df: pd.DataFrame) -> dict:
+        """
+        Divide o upload em partições disjuntas
+        
+        Returns:
+            Dicionário nome_da_partição -> DataFrame
+        """
+        if Config.LOAD_PARTICAO == "hash":
+            total = max(1, Config.LOAD_CONCORRENCIA)
+            chaves = df["id_codigo_sit"].fillna("").map(
+                lambda v: f"hash-{zlib.crc32(str(v).encode('utf-8')) % total}"
+            )
+        else:
+            chaves = "termo-" + df["termo"].fillna("")
+        
+        return {nome: grupo for nome, grupo in df.groupby(chaves, sort=True)}
+    
+    def _origem_carga(self, arquivo_upload: str) -> str:
+        """
+        Identifica esta carga na chave dos lotes do journal
+        
+        Com manifesto, é o run_id: a retomada da execução reusa as chaves (e
+        pula o que já foi commitado), uma execução nova não, mesmo que traga
+        lotes idênticos (A→B→A, re-sincronização, retentativa do dead letter).
+        Sem manifesto, é o SHA-256 e a data de modificação do upload e do dead
+        letter retirado: o mesmo arquivo retomado reusa as chaves, um arquivo
+        gerado de novo não.
+        """
+        run_id = self._run_id()
+        if run_id:
+            return run_id
+        partes = []
+        for caminho in (arquivo_upload, os.path.join(self.dir_staging, self.ARQUIVO_DEAD_LETTER)):
+            if os.path.exists(caminho):
+                partes.append(f"{hash_arquivo(caminho)}:{os.stat(caminho).st_mtime_ns}")
+        return hash_texto("|".join(partes))
+    
+    def _garantir_journal(self):
+        """Cria a tabela etl_load_journal se ainda não existir (uma vez por loader)"""
+        if self._journal_pronto:
+            return
+        with db_manager.pool.conexao() as conn:
             cursor = conn.cursor()
+            cursor.execute(self.SQL_JOURNAL_CRIAR)
+            conn.commit()
+        self._journal_pronto = True
+    
+    @classmethod
+    def _status_no_journal(cls, cursor, lote_id: str):
+        """Busca pela chave primária do journal (None se o lote nunca foi visto)"""
+        cursor.execute(cls.SQL_JOURNAL_STATUS, lote_id)
+        linha = cursor.fetchone()
+        return linha[0] if linha else None
+    
+    def _lotes_commitados(self, lote_ids: list) -> set:
+        """Lotes commitados segundo o journal (resolução do spool do histórico)"""
+        with db_manager.pool.conexao() as conn:
+            cursor = conn.cursor()
+            return {l for l in lote_ids if self._status_no_journal(cursor, l) == self.JOURNAL_COMMITADO}
+    
+    def _carregar_particao(self, nome: str, df: pd.DataFrame, origem: str, progresso: Progresso = None) -> dict:
+        """
+        Carrega uma partição em lotes, cada lote em sua própria transação
+        
+        O id do lote é o SHA-256 da origem da carga, da partição, da faixa de
+        linhas e do conteúdo; lotes já presentes no journal (commitados antes
+        de uma interrupção desta mesma carga, ou por outro loader dela) são
+        pulados. Lotes que falham são divididos ao meio recursivamente (ver
+        _carregar_lote).
+        
+        Args:
+            origem: Identificação da carga (ver _origem_carga)
+            progresso: Progresso da carga (compartilhado pelas partições)
+        
+        Returns:
+            Resumo da partição (contagens, lotes, duração, erro crítico, falhas)
+        """
+        inicio = time.time()
+        resumo = {
+            "shard": nome, "linhas": len(df), "inserts": 0, "updates": 0,
+            "erros": 0, "lotes": 0, "lotes_pulados": 0, "divisoes": 0,
+            "segundos": 0.0, "erro_critico": None, "falhas": []
+        }
+        tamanho_lote = max(1, Config.LOAD_TAMANHO_LOTE)
+        
+        try:
+            with db_manager.pool.conexao() as conn:
+                cursor = conn.cursor()
+                cursor.fast_executemany = True
+                
+                for inicio_lote in range(0, len(df), tamanho_lote):
+                    lote = df.iloc[inicio_lote:inicio_lote + tamanho_lote]
+                    self._carregar_lote(conn, cursor, lote, origem, nome, inicio_lote, resumo)
+                    if progresso is not None:
+                        progresso.avancar(len(lote), lotes=1)
+        
+        except Exception as e:
+            resumo["erro_critico"] = str(e)
+            logger.error(f"   ❌ Erro crítico no shard {nome}: {e}")
+        
+        resumo["segundos"] = time.time() - inicio
+        return resumo
+    
+    def _carregar_lote(self, conn, cursor, lote: pd.DataFrame, origem: str, particao: str, inicio: int,
+                       resumo: dict, nivel: int = 0):
+        """
+        Aplica um lote com executemany e commit único (junto com o registro no journal)
+        
+        Se o lote falhar, ele é desfeito, marcado como "dividido" no journal e
+        carregado em duas metades, recursivamente. Com k linhas ruins em n, são
+        O(k log n) idas ao banco, e as partes sem erro continuam em executemany.
+        Uma linha isolada que ainda falha vai para o dead letter com o erro.
+        
+        Args:
+            origem: Identificação da carga (ver _origem_carga)
+            particao: Nome da partição (registrado no journal)
+            inicio: Posição da primeira linha do lote dentro da partição
+            resumo: Resumo da partição, atualizado in-place
+            nivel: Profundidade da divisão (0 = lote original)
+        """
+        hash_conteudo = hash_texto(lote.to_csv(index=False))
+        fim = inicio + len(lote) - 1
+        lote_id = hash_texto(f"{origem}|{particao}|{inicio}|{fim}|{hash_conteudo}")
+        status = self._status_no_journal(cursor, lote_id)
+        
+        if status == self.JOURNAL_COMMITADO:
+            resumo["lotes_pulados"] += 1
+            return
+        
+        # Lote já dividido numa execução anterior: vai direto para as metades,
+        # que têm entradas próprias no journal
+        if status != self.JOURNAL_DIVIDIDO:
+            params_insert, params_update = self._montar_parametros(lote)
+            anteriores = {}
+            try:
+                if params_update and self.historico is not None:
+                    anteriores = self._ler_anteriores(cursor, [p[-1] for p in params_update])
+                if params_insert:
+                    cursor.executemany(self.SQL_INSERT, params_insert)
+                if params_update:
+                    cursor.executemany(self.SQL_UPDATE, params_update)
+            except Exception as e:
+                conn.rollback()
+                erro = e
+            else:
+                # O histórico do lote vai para o disco antes do commit: uma queda logo
+                # depois dele não o perde (ver HistoricoDespesas.recuperar)
+                if self.historico is not None:
+                    try:
+                        self.historico.preparar(lote_id, self._run_id(), params_insert, params_update, anteriores)
+                    except Exception:
+                        conn.rollback()
+                        raise
+                journal = (lote_id, self._run_id(), particao, inicio, fim, len(lote),
+                           len(params_insert), len(params_update), self.JOURNAL_COMMITADO, hash_conteudo)
+                if self._commitar_journal(conn, cursor, journal):
+                    resumo["inserts"] += len(params_insert)
+                    resumo["updates"] += len(params_update)
+                    resumo["lotes"] += 1
+                    if self.manifesto is not None:
+                        self.manifesto.registrar_lote(lote_id, particao, inicio, fim,
+                                                      len(params_insert), len(params_update))
+                    if self.historico is not None:
+                        self.historico.confirmar(lote_id)
+                else:
+                    resumo["lotes_pulados"] += 1
+                    if self.historico is not None:
+                        self.historico.descartar(lote_id)
+                return
             
-            sql_insert = """
-                INSERT INTO despesas (
-                    id_codigo_sit, termo, rubrica, tipo_despesa, cpf_cnpj, favorecido,
-                    tipo_doc_despesa, descricao_despesa, tipo_doc_pagamento,
-                    data_pagamento, data_debito_convenio, valor, id_termo_rubrica
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            sql_update = """
-                UPDATE despesas SET
-                    termo = ?, rubrica = ?, tipo_despesa = ?, cpf_cnpj = ?, 
-                    favorecido = ?, tipo_doc_despesa = ?, descricao_despesa = ?, 
-                    tipo_doc_pagamento = ?, data_pagamento = ?, data_debito_convenio = ?, 
-                    valor = ?, id_termo_rubrica = ?
-                WHERE id_codigo_sit = ?
-            """
-            
-            cnt_insert = 0
-            cnt_update = 0
-            erros = 0
+            if len(lote) == 1:
+                id_codigo = lote["id_codigo_sit"].iloc[0]
+                logger.error(f"   ❌ Erro no ID {id_codigo} (linha {inicio} de {particao}): {erro}")
+                resumo["erros"] += 1
+                resumo["falhas"].append((lote, str(erro)))
+                return
             
-            for _, row in df.iterrows():
-                try:
-                    # Trata nulos
-                    data_debito = row['data_debito_convenio']
-                    if pd.isna(data_debito) or str(data_debito).strip() == "":
-                        data_debito = None
-                    
-                    val = float(row['valor'])
-                    acao = row.get('acao', 'INSERT')
-                    
-                    if acao == 'INSERT':
-                        params = (
-                            row['id_codigo_sit'], row['termo'], row['rubrica'],
-                            row['tipo_despesa'], row['cpf_cnpj'], row['favorecido'],
-                            row['tipo_doc_despesa'], row['descricao_despesa'],
-                            row['tipo_doc_pagamento'], row['data_pagamento'],
-                            data_debito, val, row['id_termo_rubrica']
-                        )
-                        cursor.execute(sql_insert, params)
-                        cnt_insert += 1
-                    
-                    elif acao == 'UPDATE':
-                        params = (
-                            row['termo'], row['rubrica'], row['tipo_despesa'],
-                            row['cpf_cnpj'], row['favorecido'], row['tipo_doc_despesa'],
-                            row['descricao_despesa'], row['tipo_doc_pagamento'],
-                            row['data_pagamento'], data_debito, val, row['id_termo_rubrica'],
-                            row['id_codigo_sit']
+            mensagem = f"   ⚠️  Lote {particao}[{inicio}:{fim + 1}] falhou ({erro}); dividindo ao meio"
+            if nivel == 0:
+                logger.warning(mensagem)
+            else:
+                logger.debug(mensagem)
+            journal = (lote_id, self._run_id(), particao, inicio, fim, len(lote), 0, 0, self.JOURNAL_DIVIDIDO,
+                       hash_conteudo)
+            if not self._commitar_journal(conn, cursor, journal):
+                if self._status_no_journal(cursor, lote_id) == self.JOURNAL_COMMITADO:
+                    resumo["lotes_pulados"] += 1
+                    return
+            resumo["divisoes"] += 1
+        
+        meio = len(lote) // 2
+        self._carregar_lote(conn, cursor, lote.iloc[:meio], origem, particao, inicio, resumo, nivel + 1)
+        self._carregar_lote(conn, cursor, lote.iloc[meio:], origem, particao, inicio + meio, resumo, nivel + 1)
+    
+    def _ler_anteriores(self, cursor, ids: list) -> dict:
+        """id_codigo_sit -> linha atual no banco (colunas do histórico), na transação do lote"""
+        anteriores = {}
+        for inicio in range(0, len(ids), self.LOTE_ANTERIORES):
+            parte = ids[inicio:inicio + self.LOTE_ANTERIORES]
+            cursor.execute(self.SQL_ANTERIORES.format(marcadores=", ".join("?" * len(parte))), parte)
+            anteriores.update((str(linha[0]), tuple(linha)) for linha in cursor.fetchall())
+        return anteriores
+    
+    def _run_id(self):
+        """run_id da execução corrente (se houver manifesto)"""
+        return self.manifesto.run_id if self.manifesto else None
+    
+    def _commitar_journal(self, conn, cursor, journal: tuple) -> bool:
+        """
+        Grava a entrada do journal e faz o commit da transação corrente
+        
+        Se a chave já existir (outro loader gravou o mesmo lote enquanto este
+        executava), a transação inteira é desfeita.
+        
+        Returns:
+            True se commitou, False se o lote já estava no journal
+        """
+        try:
+            cursor.execute(self.SQL_JOURNAL_INSERIR, journal)
+        except Exception:
+            conn.rollback()
+            if self._status_no_journal(cursor, journal[0]) is not None:
+                logger.info(f"   ⏭️  Lote {journal[0][:12]} já registrado por outro loader; desfeito")
+                return False
+            raise
+        
+        conn.commit()
+        return True
+    
+    def _trava_dead_letter(self) -> TravaArquivo:
+        return TravaArquivo(Path(self.dir_compartilhado) / self.TRAVA_DEAD_LETTER)
+    
+    def _ler_dead_letter(self) -> pd.DataFrame:
+        """
+        Retira do dead letter compartilhado as linhas rejeitadas anteriormente (sem a coluna de erro)
+        
+        As linhas passam para a pasta desta execução, então duas cargas
+        simultâneas nunca retentam as mesmas; se a carga for interrompida,
+        a retomada da execução as encontra lá.
+        """
+        compartilhado = Path(self.dir_compartilhado) / self.ARQUIVO_DEAD_LETTER
+        retirado = Path(self.dir_staging) / self.ARQUIVO_DEAD_LETTER
+        
+        if compartilhado != retirado:
+            with self._trava_dead_letter():
+                if compartilhado.exists():
+                    if retirado.exists():
+                        juntos = pd.concat([pd.read_csv(retirado, dtype=str), pd.read_csv(compartilhado, dtype=str)])
+                        juntos.drop_duplicates(subset=["id_codigo_sit"], keep="first").to_csv(
+                            retirado, index=False, encoding="utf-8-sig"
                         )
-                        cursor.execute(sql_update, params)
-                        cnt_update += 1
-                
-                except Exception as e:
-                    erros += 1
-                    logger.error(f"   ❌ Erro no ID {row.get('id_codigo_sit')}: {e}")
+                        compartilhado.unlink()
+                    else:
+                        os.replace(compartilhado, retirado)
+        
+        if not retirado.exists():
+            return pd.DataFrame()
+        df = pd.read_csv(retirado, dtype=str)
+        return df.drop(columns=["erro_db"], errors="ignore")
+    
+    def _gravar_dead_letter(self, falhas: list, anteriores: pd.DataFrame = None):
+        """
+        Devolve ao dead letter compartilhado as linhas que falharam nesta execução
+        
+        Linhas gravadas no meio tempo por outras execuções são preservadas
+        (em caso de id repetido, vale a desta execução).
+        
+        Args:
+            falhas: Lista de (DataFrame de 1 linha, mensagem de erro do banco)
+            anteriores: Linhas do dead letter anterior a preservar (ex.: após erro crítico)
+        """
+        compartilhado = Path(self.dir_compartilhado) / self.ARQUIVO_DEAD_LETTER
+        retirado = Path(self.dir_staging) / self.ARQUIVO_DEAD_LETTER
+        
+        partes = [linha.assign(erro_db=erro) for linha, erro in falhas]
+        if anteriores is not None and not anteriores.empty:
+            partes.append(anteriores.assign(erro_db=""))
+        
+        with self._trava_dead_letter():
+            havia = retirado.exists()
+            if compartilhado != retirado:
+                if compartilhado.exists():
+                    partes.append(pd.read_csv(compartilhado, dtype=str))
+                if havia:
+                    retirado.unlink()
             
-            conn.commit()
-            conn.close()
+            if not partes:
+                if compartilhado.exists():
+                    compartilhado.unlink()
+                if havia:
+                    logger.info("   🧹 Dead letter zerado (todas as linhas carregadas)")
+                return
             
-            logger.info(f"   🚀 INSERT: {cnt_insert} | UPDATE: {cnt_update}")
-            if erros > 0:
-                logger.warning(f"   ⚠️  {erros} erros durante processamento")
+            df = pd.concat(partes, ignore_index=True).drop_duplicates(subset=["id_codigo_sit"], keep="first")
+            tmp = compartilhado.with_suffix(".tmp")
+            df.to_csv(tmp, index=False, encoding="utf-8-sig")
+            os.replace(tmp, compartilhado)
+        
+        if falhas:
+            logger.warning(f"   📮 {len(falhas)} linha(s) rejeitada(s) gravada(s) em {self.ARQUIVO_DEAD_LETTER}")
+    
+    @staticmethod
+    def _montar_parametros(df: pd.DataFrame) -> tuple:
+        """
+        Converte linhas do upload em tuplas de parâmetros
+        
+        Returns:
+            (params de INSERT, params de UPDATE)
+        """
+        params_insert = []
+        params_update = []
+        
+        for row in df.itertuples(index=False):
+            # Trata nulos
+            data_debito = row.data_debito_convenio
+            if pd.isna(data_debito) or str(data_debito).strip() == "":
+                data_debito = None
             
-            # Renomeia para processado
-            novo_nome = arquivo_upload.replace(".csv", ".processado.csv")
-            if os.path.exists(novo_nome):
-                os.remove(novo_nome)
-            os.rename(arquivo_upload, novo_nome)
-            logger.info(f"   💾 Arquivo renomeado para .processado.csv")
+            val = float(row.valor)
+            acao = getattr(row, "acao", "INSERT")
+            if pd.isna(acao):
+                acao = "INSERT"
             
-            return True
+            if acao == "INSERT":
+                params_insert.append((
+                    row.id_codigo_sit, row.termo, row.rubrica,
+                    row.tipo_despesa, row.cpf_cnpj, row.favorecido,
+                    row.tipo_doc_despesa, row.descricao_despesa,
+                    row.tipo_doc_pagamento, row.data_pagamento,
+                    data_debito, val, row.id_termo_rubrica
+                ))
+            elif acao == "UPDATE":
+                params_update.append((
+                    row.termo, row.rubrica, row.tipo_despesa,
+                    row.cpf_cnpj, row.favorecido, row.tipo_doc_despesa,
+                    row.descricao_despesa, row.tipo_doc_pagamento,
+                    row.data_pagamento, data_debito, val, row.id_termo_rubrica,
+                    row.id_codigo_sit
+                ))
         
-        except Exception as e:
-            logger.error(f"❌ Erro crítico de carga: {e}")
-            return False
+        return params_insert, params_update
+    
+    @staticmethod
+    def _registrar_resumo_shards(resumos: list):
+        """Loga o resultado de cada shard e o total"""
+        for r in sorted(resumos, key=lambda r: r["shard"]):
+            status = "❌" if r["erro_critico"] else ("⚠️ " if r["erros"] else "✅")
+            pulados = f" | {r['lotes_pulados']} já commitado(s)" if r["lotes_pulados"] else ""
+            pulados += f" | {r['divisoes']} divisão(ões)" if r["divisoes"] else ""
+            logger.info(
+                f"   {status} {r['shard']}: {r['linhas']} linhas | INSERT {r['inserts']} | "
+                f"UPDATE {r['updates']} | erros {r['erros']} | {r['lotes']} lote(s) em {r['segundos']:.2f}s{pulados}"
+            )
+        
+        cnt_insert = sum(r["inserts"] for r in resumos)
+        cnt_update = sum(r["updates"] for r in resumos)
+        erros = sum(r["erros"] for r in resumos)
+        
+        ajuda = "Linhas de despesa gravadas no banco"
+        metricas.incrementar("linhas_carregadas", cnt_insert, ajuda, acao="insert")
+        metricas.incrementar("linhas_carregadas", cnt_update, ajuda, acao="update")
+        metricas.incrementar("linhas_rejeitadas", erros, "Linhas enviadas ao dead letter")
+        ajuda = "Lotes de carga por resultado"
+        metricas.incrementar("lotes", sum(r["lotes"] for r in resumos), ajuda, resultado="commitado")
+        metricas.incrementar("lotes", sum(r["lotes_pulados"] for r in resumos), ajuda, resultado="pulado")
+        metricas.incrementar("lotes", sum(r["divisoes"] for r in resumos), ajuda, resultado="dividido")
+        
+        logger.info(f"   🚀 INSERT: {cnt_insert} | UPDATE: {cnt_update}")
+        if erros > 0:
+            logger.warning(f"   ⚠️  {erros} erros durante processamento")
+    
+    def carga_pendente(self) -> bool:
+        """Indica se restou arquivo de upload/atualização não processado no staging"""
+        pasta_staging = Path(self.dir_staging)
+        return any(
+            (pasta_staging / nome).exists()
+            for nome in ("despesas_upload.csv", "update_termos.csv", "update_rubricas.csv")
+        )
     
     def atualizar_financeiro(self) -> bool:
         """
@@ -169,7 +634,7 @@ class ExpensesLoader:
             return False
         
         try:
-            conn = pyodbc.connect(self.conn_str)
+            conn = db_manager.get_connection()
             cursor = conn.cursor()
         except Exception as e:
             logger.error(f"❌ Erro de conexão: {e}")
@@ -5,15 +5,21 @@ Orquestra todo o fluxo de extração, transformação e carga de dados
 
 import sys
 import time
-import os
-import pandas as pd
 from pathlib import Path
 from src.extract.expenses import ExpensesExtractor
 from src.transform.transformer import ExpensesTransformer
+from src.transform.diff_summary import carregar_resumo
 from src.load.loader import ExpensesLoader
-from src.utils.logger import setup_logger
+from src.load.analytics import AnalyticsExporter
+from src.utils.logger import descarregar as descarregar_logs, setup_logger
 from src.utils.config import Config
+from src.utils.db_metrics import estatisticas_sql
+from src.utils.metrics import metricas, registrar_fim_execucao
+from src.utils.approval import aplicar_politica, modo_interativo
 from src.utils.ingestor import copiar_downloads_para_raw
+from src.utils.pipeline_dag import ExecutorDAG, Tarefa
+from src.utils.run_manifest import ManifestoExecucao
+from src.utils.workspace import EspacoExecucao
 
 logger = setup_logger("MainPipeline")
 
@@ -22,6 +28,9 @@ def validar_e_confirmar(dir_staging: str) -> bool:
     """
     Mostra os dados que serão carregados e pede confirmação do usuário
     
+    Lê apenas o resumo gerado pela transformação (resumo_diff.json), sem
+    recarregar os arquivos de staging.
+    
     Args:
         dir_staging: Caminho da pasta staging
         
@@ -33,60 +42,59 @@ def validar_e_confirmar(dir_staging: str) -> bool:
     logger.info("🔍 VALIDAÇÃO: Revise os dados antes de atualizar o banco")
     logger.info("=" * 70)
     
-    arquivo_upload = os.path.join(dir_staging, "despesas_upload.csv")
-    arquivo_update_termos = os.path.join(dir_staging, "update_termos.csv")
-    arquivo_update_rubs = os.path.join(dir_staging, "update_rubricas.csv")
-    
-    tem_dados = False
+    resumo = carregar_resumo(dir_staging)
     
     # ===== MOSTRA DESPESAS PARA UPLOAD =====
-    if os.path.exists(arquivo_upload):
-        tem_dados = True
-        df = pd.read_csv(arquivo_upload, dtype=str)
+    despesas = resumo.get("despesas")
+    if despesas:
+        logger.info("")
+        logger.info("📊 DESPESAS A ATUALIZAR:")
+        logger.info(f"   • INSERT (novos): {despesas['insert']} registros")
+        logger.info(f"   • UPDATE (alterados): {despesas['update']} registros")
+        logger.info(f"   • Total: {despesas['total']} registros")
         
-        inserts = len(df[df['acao'] == 'INSERT']) if 'acao' in df.columns else 0
-        updates = len(df[df['acao'] == 'UPDATE']) if 'acao' in df.columns else 0
+        logger.info("")
+        logger.info("   Variação de valor por termo:")
+        for termo, t in sorted(despesas["por_termo"].items(), key=lambda item: -abs(item[1]["delta"])):
+            logger.info(f"      Termo:{termo} | +{t['insert']} ~{t['update']} | Δ R${t['delta']:,.2f}")
         
         logger.info("")
-        logger.info("📊 DESPESAS A ATUALIZAR:")
-        logger.info(f"   • INSERT (novos): {inserts} registros")
-        logger.info(f"   • UPDATE (alterados): {updates} registros")
-        logger.info(f"   • Total: {len(df)} registros")
+        logger.info("   Maiores mudanças:")
+        for row in despesas["maiores_mudancas"][:3]:
+            logger.info(
+                f"      [{row['acao']}] ID:{row['id_codigo_sit']} | Termo:{row['termo']} | "
+                f"R${row['valor_anterior']:.2f} → R${row['valor']:.2f}"
+            )
         
         # Mostra primeiras 3 linhas
-        if len(df) > 0:
-            logger.info("")
-            logger.info("   Amostra (primeiros registros):")
-            for idx, row in df.head(3).iterrows():
-                acao = row.get('acao', 'INSERT')
-                logger.info(f"      [{acao}] ID:{row['id_codigo_sit']} | Termo:{row['termo']} | Valor:R${float(row['valor']):.2f}")
-            
-            if len(df) > 3:
-                logger.info(f"      ... +{len(df)-3} registros")
+        logger.info("")
+        logger.info("   Amostra (primeiros registros):")
+        for row in despesas["amostra"]:
+            logger.info(f"      [{row['acao']}] ID:{row['id_codigo_sit']} | Termo:{row['termo']} | Valor:R${row['valor']:.2f}")
+        if despesas["total"] > len(despesas["amostra"]):
+            logger.info(f"      ... +{despesas['total'] - len(despesas['amostra'])} registros")
     
     # ===== MOSTRA TERMOS PARA UPDATE =====
-    if os.path.exists(arquivo_update_termos):
-        tem_dados = True
-        df = pd.read_csv(arquivo_update_termos)
+    termos = resumo.get("termos")
+    if termos:
         logger.info("")
-        logger.info(f"💰 TERMOS A ATUALIZAR: {len(df)} registros")
-        for idx, row in df.head(2).iterrows():
+        logger.info(f"💰 TERMOS A ATUALIZAR: {termos['total']} registros")
+        for row in termos["amostra"][:2]:
             logger.info(f"      SIT:{row['nro_sit']} | Rendimento:R${float(row['rendimento_financeiro_total_csv']):.2f}")
-        if len(df) > 2:
-            logger.info(f"      ... +{len(df)-2} registros")
+        if termos["total"] > 2:
+            logger.info(f"      ... +{termos['total'] - 2} registros")
     
     # ===== MOSTRA RUBRICAS PARA UPDATE =====
-    if os.path.exists(arquivo_update_rubs):
-        tem_dados = True
-        df = pd.read_csv(arquivo_update_rubs)
+    rubricas = resumo.get("rubricas")
+    if rubricas:
         logger.info("")
-        logger.info(f"📋 RUBRICAS A ATUALIZAR: {len(df)} registros")
-        for idx, row in df.head(2).iterrows():
+        logger.info(f"📋 RUBRICAS A ATUALIZAR: {rubricas['total']} registros")
+        for row in rubricas["amostra"][:2]:
             logger.info(f"      {row['id_termo_rubrica']} | Estorno:R${float(row['valor_estornado']):.2f}")
-        if len(df) > 2:
-            logger.info(f"      ... +{len(df)-2} registros")
+        if rubricas["total"] > 2:
+            logger.info(f"      ... +{rubricas['total'] - 2} registros")
     
-    if not tem_dados:
+    if not resumo:
         logger.info("")
         logger.info("✅ Nenhum dado para atualizar (banco já está sincronizado)")
         return True
@@ -94,6 +102,7 @@ def validar_e_confirmar(dir_staging: str) -> bool:
     # ===== PEDE CONFIRMAÇÃO =====
     logger.info("")
     logger.info("=" * 70)
+    descarregar_logs()
     print("\n")
     resposta = input("❓ Os dados acima estão CORRETOS? Digite 'SIM' para continuar ou qualquer outra coisa para CANCELAR: ").strip().upper()
     print("\n")
@@ -107,9 +116,176 @@ def validar_e_confirmar(dir_staging: str) -> bool:
         return False
 
 
+def revisar_carga(manifesto: ManifestoExecucao) -> bool:
+    """
+    Aprovação da carga em staging: confirmação no terminal ou política automática
+    
+    Se não aprovada, o manifesto é finalizado como "cancelado" ou
+    "pendente_aprovacao" (carga estacionada para revisão posterior).
+    
+    Returns:
+        True se a carga pode seguir
+    """
+    dir_staging = manifesto.dir_staging
+    
+    # Ao retomar uma carga já aprovada (mesmos arquivos de staging), não pergunta de novo
+    arquivos_revisados = [
+        dir_staging / nome
+        for nome in ("despesas_upload.csv", "update_termos.csv", "update_rubricas.csv")
+    ]
+    if manifesto.etapa_concluida("aprovacao", arquivos_revisados):
+        logger.info("⏭️  Carga já aprovada nesta execução (checkpoint)")
+        return True
+    
+    if not modo_interativo():
+        # Sem terminal (agendador) ou APROVACAO_MODO=politica: nunca bloqueia em input()
+        if not aplicar_politica(dir_staging, manifesto.run_id, escopo=manifesto.dados.get("escopo")):
+            manifesto.finalizar("pendente_aprovacao")
+            logger.info("💡 Revise com: python -m src.cli pending")
+            return False
+    elif not validar_e_confirmar(dir_staging):
+        # Usuário cancelou
+        manifesto.finalizar("cancelado")
+        return False
+    
+    manifesto.registrar_etapa("aprovacao", arquivos_revisados, [], True)
+    return True
+
+
+def _etapas_rastreadas(dir_staging) -> dict:
+    """
+    Entradas e saídas de cada etapa checkpointada no manifesto
+    
+    Args:
+        dir_staging: Pasta da execução
+    
+    Returns:
+        Dicionário nome -> (função que lista as entradas, lista de saídas)
+    """
+    downloads = Path(Config.DIR_DOWNLOADS)
+    staging = Path(dir_staging)
+    
+    return {
+        "extrair_despesas": (
+            lambda: sorted(downloads.glob("Despesas_SIT_*.xlsx")),
+            [staging / "despesas_geral.csv"]
+        ),
+        "extrair_resumos": (
+            lambda: sorted(downloads.glob("*.csv")),
+            [staging / "resumo_termos.csv", staging / "resumo_rubricas.csv"]
+        ),
+        "transformar_despesas": (
+            lambda: [staging / "despesas_geral.csv"],
+            [staging / "despesas_upload.csv"]
+        ),
+        "validar_financeiro": (
+            lambda: [staging / "resumo_termos.csv", staging / "resumo_rubricas.csv"],
+            [staging / "update_termos.csv", staging / "update_rubricas.csv"]
+        ),
+    }
+
+
+def executar_extracao_e_transformacao(manifesto: ManifestoExecucao) -> tuple:
+    """
+    Executa as etapas 1 e 2 como um DAG de tarefas
+    
+    Ramos independentes rodam em paralelo: extração de despesas x resumos, e
+    as leituras do banco (snapshots) começam junto com a extração, em vez de
+    esperar o parsing terminar. Etapas já concluídas no manifesto (mesmas
+    entradas, saídas intactas) são puladas ao retomar uma execução.
+    
+    Args:
+        manifesto: Manifesto da execução corrente
+    
+    Returns:
+        (houve extração, houve transformação)
+    """
+    extractor = ExpensesExtractor(manifesto.dir_staging)
+    transformer = ExpensesTransformer(manifesto.dir_staging)
+    etapas = _etapas_rastreadas(manifesto.dir_staging)
+    
+    def concluida(nome):
+        listar_entradas, _ = etapas[nome]
+        return manifesto.etapa_concluida(nome, listar_entradas())
+    
+    # Uma transformação só pode ser pulada se a extração que a alimenta também for
+    pular = {"extrair_despesas": concluida("extrair_despesas"), "extrair_resumos": concluida("extrair_resumos")}
+    pular["transformar_despesas"] = pular["extrair_despesas"] and concluida("transformar_despesas")
+    pular["validar_financeiro"] = pular["extrair_resumos"] and concluida("validar_financeiro")
+    
+    def do_manifesto(nome):
+        def resultado_registrado(**_entradas):
+            logger.info(f"⏭️  Etapa '{nome}' já concluída nesta execução (checkpoint)")
+            return manifesto.resultado_etapa(nome)
+        return resultado_registrado
+    
+    def transformar(despesas_extraidas, snapshot_despesas):
+        if not despesas_extraidas:
+            return False
+        if Config.RECONCILIACAO_AGREGADOS:
+            return transformer.transformar_despesas(agregados=snapshot_despesas)
+        return transformer.transformar_despesas(snapshot_despesas)
+    
+    def validar(resumos_extraidos, snapshot_financeiro):
+        if not resumos_extraidos:
+            return False
+        return transformer.validar_e_preparar(snapshot_financeiro)
+    
+    def snapshot(consumidor, leitura):
+        return (lambda: None) if pular[consumidor] else leitura
+    
+    def etapa(nome, funcao):
+        return do_manifesto(nome) if pular[nome] else funcao
+    
+    def ao_concluir(nome, resultado):
+        if nome in etapas and not pular[nome]:
+            listar_entradas, saidas = etapas[nome]
+            manifesto.registrar_etapa(nome, listar_entradas(), saidas, bool(resultado))
+    
+    leitura_despesas = (
+        transformer.ler_agregados_despesas if Config.RECONCILIACAO_AGREGADOS else transformer.ler_snapshot_despesas
+    )
+    pool_extracao = Config.POOL_EXTRACAO
+    tarefas = [
+        Tarefa("extrair_despesas", etapa("extrair_despesas", extractor.extrair_despesas_csv),
+               saidas=["despesas_extraidas"],
+               pool="thread" if pular["extrair_despesas"] else pool_extracao),
+        Tarefa("extrair_resumos", etapa("extrair_resumos", extractor.extrair_resumos),
+               saidas=["resumos_extraidos"],
+               pool="thread" if pular["extrair_resumos"] else pool_extracao),
+        # Com a reconciliação, só os agregados são lidos junto com a extração; os
+        # fingerprints do banco, só dos termos divergentes, dentro da transformação
+        Tarefa("snapshot_despesas", snapshot("transformar_despesas", leitura_despesas),
+               saidas=["snapshot_despesas"]),
+        Tarefa("snapshot_financeiro", snapshot("validar_financeiro", transformer.ler_snapshot_financeiro),
+               saidas=["snapshot_financeiro"]),
+        Tarefa("transformar_despesas", etapa("transformar_despesas", transformar),
+               entradas=["despesas_extraidas", "snapshot_despesas"],
+               saidas=["despesas_transformadas"]),
+        Tarefa("validar_financeiro", etapa("validar_financeiro", validar),
+               entradas=["resumos_extraidos", "snapshot_financeiro"],
+               saidas=["financeiro_validado"]),
+    ]
+    
+    dag = ExecutorDAG(tarefas, max_threads=Config.DAG_MAX_THREADS, ao_concluir=ao_concluir)
+    try:
+        resultados = dag.executar()
+    finally:
+        dag.relatorio_tempos()
+        for nome, (inicio, fim) in dag.tempos.items():
+            metricas.definir("etapa_duracao_segundos", round(fim - inicio, 3), "Duração de cada etapa na última execução", etapa=nome)
+    
+    sucesso_extracao = resultados["despesas_extraidas"] or resultados["resumos_extraidos"]
+    sucesso_transformacao = resultados["despesas_transformadas"] or resultados["financeiro_validado"]
+    return sucesso_extracao, sucesso_transformacao
+
+
 def main():
     """Executa o pipeline ETL completo"""
     start_time = time.time()
+    espaco = None
+    manifesto = None
+    status = "erro"
     
     logger.info("=" * 70)
     logger.info("🏁 PIPELINE ETL - GRANTS MANAGEMENT - INICIANDO")
@@ -130,41 +306,37 @@ def main():
         else:
             logger.info("ℹ️  Nenhum arquivo novo em Downloads")
         
-        # ===== ETAPA 1: EXTRAÇÃO =====
+        # ===== ETAPAS 1 e 2: EXTRAÇÃO + TRANSFORMAÇÃO (DAG) =====
         logger.info("")
         logger.info("=" * 70)
-        logger.info("ETAPA 1/3: EXTRAÇÃO")
+        logger.info("ETAPAS 1-2/3: EXTRAÇÃO, TRANSFORMAÇÃO E VALIDAÇÃO")
         logger.info("=" * 70)
         
-        extractor = ExpensesExtractor()
-        sucesso_extracao = extractor.run()
+        # Pasta e manifesto da execução: retoma a anterior deste shard se ela
+        # foi interrompida (e não estiver em uso por outra instância)
+        espaco = EspacoExecucao.abrir()
+        manifesto = espaco.manifesto
+        
+        sucesso_extracao, sucesso_transformacao = executar_extracao_e_transformacao(manifesto)
         
         if not sucesso_extracao:
             logger.warning("⚠️  Nenhum dado foi extraído. Verificar fonte de dados.")
             logger.info("🏁 PIPELINE FINALIZADO (sem dados para processar)")
+            manifesto.finalizar()
             return
         
-        # ===== ETAPA 2: TRANSFORMAÇÃO =====
-        logger.info("")
-        logger.info("=" * 70)
-        logger.info("ETAPA 2/3: TRANSFORMAÇÃO E VALIDAÇÃO")
-        logger.info("=" * 70)
-        
-        transformer = ExpensesTransformer()
-        sucesso_transformacao = transformer.run()
-        
         if not sucesso_transformacao:
             logger.warning("⚠️  Nenhuma transformação foi necessária (dados já sincronizados)")
             logger.info("✅ Banco já estava atualizado!")
             tempo_total = time.time() - start_time
             logger.info(f"⏱️  Tempo total: {tempo_total:.2f}s")
+            manifesto.finalizar()
             return
         
         # ===== PAUSA PARA VALIDAÇÃO =====
-        if not validar_e_confirmar(Config.DIR_STAGING):
-            # Usuário cancelou
+        if not revisar_carga(manifesto):
             tempo_total = time.time() - start_time
-            logger.info(f"⏱️  Tempo até cancelamento: {tempo_total:.2f}s")
+            logger.info(f"⏱️  Tempo até a interrupção: {tempo_total:.2f}s")
             return
         
         # ===== ETAPA 3: CARGA =====
@@ -173,11 +345,21 @@ def main():
         logger.info("ETAPA 3/3: CARGA NO BANCO DE DADOS")
         logger.info("=" * 70)
         
-        loader = ExpensesLoader()
+        inicio_carga = time.time()
+        loader = ExpensesLoader(manifesto=manifesto)
         sucesso_carga = loader.run()
+        metricas.definir("etapa_duracao_segundos", round(time.time() - inicio_carga, 3), etapa="carga")
         
         if not sucesso_carga:
             logger.warning("⚠️  Nenhuma carga foi necessária")
+        else:
+            # Partições Parquet tocadas pela carga (DIR_ANALITICO; desligado se vazio)
+            AnalyticsExporter(manifesto.dir_staging).run()
+        
+        if loader.carga_pendente():
+            logger.warning("⚠️  Carga incompleta: a próxima execução retoma do primeiro lote não commitado")
+        else:
+            manifesto.finalizar()
         
         # ===== RESUMO FINAL =====
         tempo_total = time.time() - start_time
@@ -204,6 +386,15 @@ def main():
         logger.critical(f"💥 ERRO FATAL: {e}", exc_info=True)
         logger.info("📋 Verifique os logs para mais detalhes")
         return 1
+    
+    finally:
+        estatisticas_sql.relatorio()
+        if manifesto is not None:
+            # "em_andamento" = interrompida (erro ou carga incompleta); será retomada
+            status = manifesto.dados["status"]
+        if espaco is not None:
+            espaco.encerrar()
+        registrar_fim_execucao(time.time() - start_time, status)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""
+🧱 VALIDAÇÃO DE RESTRIÇÕES DO SCHEMA
+Lê os tipos das colunas direto do DDL (database/ddl*/estrutura_dbo_<tabela>.sql)
+e valida colunas inteiras de uma vez, antes da carga
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Tuple
+
+import pandas as pd
+
+DIR_DATABASE = Path(__file__).resolve().parents[2] / "database"
+
+# [coluna] [tipo](args) [IDENTITY(...)] NULL | NOT NULL
+_RE_COLUNA = re.compile(
+    r"^\s*\[(?P<nome>\w+)\]\s+\[(?P<tipo>\w+)\]\s*(?:\((?P<args>[^)]*)\))?"
+    r"(?P<resto>.*?),?\s*$",
+    re.IGNORECASE
+)
+
+_LIMITES_INT = {
+    "tinyint": (0, 255),
+    "smallint": (-2**15, 2**15 - 1),
+    "int": (-2**31, 2**31 - 1),
+    "bigint": (-2**63, 2**63 - 1),
+}
+
+
+class Restricao:
+    """Tipo e nulabilidade de uma coluna, como declarados no DDL"""
+
+    def __init__(self, nome: str, tipo: str, args: Tuple[int, ...], nulo: bool, identidade: bool):
+        self.nome = nome
+        self.tipo = tipo
+        self.args = args
+        self.nulo = nulo
+        self.identidade = identidade
+
+    def __repr__(self):
+        args = f"({', '.join(map(str, self.args))})" if self.args else ""
+        return f"{self.nome} {self.tipo}{args}{'' if self.nulo else ' NOT NULL'}"
+
+
+def localizar_ddl(tabela: str) -> Path:
+    """
+    Encontra o script DDL da tabela (a pasta ddl tem sufixo descritivo no nome)
+
+    Raises:
+        FileNotFoundError: Se nenhum script for encontrado
+    """
+    candidatos = sorted(DIR_DATABASE.glob(f"ddl*/estrutura_dbo_{tabela}.sql"))
+    if not candidatos:
+        raise FileNotFoundError(f"DDL da tabela '{tabela}' não encontrado em {DIR_DATABASE}")
+    return candidatos[0]
+
+
+@lru_cache(maxsize=None)
+def carregar_restricoes(tabela: str = "despesas") -> Dict[str, Restricao]:
+    """
+    Extrai as colunas do CREATE TABLE da tabela
+
+    Returns:
+        Dicionário coluna -> Restricao (na ordem do DDL)
+    """
+    texto = localizar_ddl(tabela).read_text(encoding="utf-8-sig")
+    inicio = re.search(rf"CREATE\s+TABLE\s+\[dbo\]\.\[{tabela}\]\s*\(", texto, re.IGNORECASE)
+    if not inicio:
+        raise ValueError(f"CREATE TABLE de '{tabela}' não encontrado no DDL")
+
+    restricoes = {}
+    for linha in texto[inicio.end():].splitlines():
+        if re.match(r"^\s*\)", linha):
+            break
+        m = _RE_COLUNA.match(linha)
+        if not m:
+            continue
+
+        args = m.group("args") or ""
+        if args.strip().lower() == "max":
+            args_num = ()
+        else:
+            args_num = tuple(int(a) for a in re.findall(r"\d+", args))
+
+        resto = m.group("resto").upper()
+        restricoes[m.group("nome")] = Restricao(
+            nome=m.group("nome"),
+            tipo=m.group("tipo").lower(),
+            args=args_num,
+            nulo="NOT NULL" not in resto,
+            identidade="IDENTITY" in resto,
+        )
+
+    return restricoes
+
+
+def _violacoes_coluna(serie: pd.Series, restricao: Restricao) -> pd.Series:
+    """
+    Avalia uma coluna inteira contra sua restrição
+
+    Returns:
+        Série com o motivo da violação (None quando a linha é válida)
+    """
+    texto = serie.astype("string").str.strip()
+    vazio = texto.isna() | (texto == "")
+    motivo = pd.Series(None, index=serie.index, dtype=object)
+
+    if not restricao.nulo:
+        motivo[vazio] = "NOT NULL"
+
+    tipo = restricao.tipo
+    if tipo in ("varchar", "nvarchar", "char", "nchar") and restricao.args:
+        limite = restricao.args[0]
+        excede = ~vazio & (serie.astype("string").str.len() > limite)
+        motivo[excede.fillna(False)] = f"{tipo}({limite})"
+
+    elif tipo in ("decimal", "numeric"):
+        precisao = restricao.args[0] if restricao.args else 18
+        escala = restricao.args[1] if len(restricao.args) > 1 else 0
+        numero = pd.to_numeric(texto, errors="coerce")
+        invalido = ~vazio & numero.isna()
+        excede = ~vazio & (numero.round(escala).abs() >= 10 ** (precisao - escala))
+        motivo[(invalido | excede).fillna(False)] = f"{tipo}({precisao},{escala})"
+
+    elif tipo in _LIMITES_INT:
+        minimo, maximo = _LIMITES_INT[tipo]
+        numero = pd.to_numeric(texto, errors="coerce")
+        invalido = ~vazio & (numero.isna() | (numero % 1 != 0) | (numero < minimo) | (numero > maximo))
+        motivo[invalido.fillna(False)] = tipo
+
+    elif tipo in ("date", "datetime", "datetime2", "smalldatetime"):
+        formato = "%Y-%m-%d" if tipo == "date" else "mixed"
+        datas = pd.to_datetime(texto, format=formato, errors="coerce")
+        motivo[(~vazio & datas.isna()).fillna(False)] = tipo
+
+    return motivo
+
+
+def validar_restricoes(df: pd.DataFrame, tabela: str = "despesas",
+                       coluna_id: str = "id_codigo_sit") -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Valida o DataFrame contra o DDL da tabela, coluna a coluna (vetorizado)
+
+    Colunas ausentes do DDL (ou do DataFrame) e colunas IDENTITY são ignoradas.
+
+    Args:
+        df: Linhas a carregar (strings)
+        tabela: Tabela de destino
+        coluna_id: Coluna usada para identificar a linha no relatório
+
+    Returns:
+        (máscara booleana das linhas válidas, relatório com uma linha por violação:
+         coluna_id, coluna, restricao, valor)
+    """
+    validas = pd.Series(True, index=df.index)
+    partes = []
+
+    for nome, restricao in carregar_restricoes(tabela).items():
+        if restricao.identidade or nome not in df.columns:
+            continue
+
+        motivo = _violacoes_coluna(df[nome], restricao)
+        falhas = motivo.notna()
+        if not falhas.any():
+            continue
+
+        validas &= ~falhas
+        partes.append(pd.DataFrame({
+            coluna_id: df.loc[falhas, coluna_id] if coluna_id in df.columns else df.index[falhas],
+            "coluna": nome,
+            "restricao": motivo[falhas],
+            "valor": df.loc[falhas, nome],
+        }))
+
+    relatorio = (
+        pd.concat(partes, ignore_index=True) if partes
+        else pd.DataFrame(columns=[coluna_id, "coluna", "restricao", "valor"])
+    )
+    return validas, relatorio
@@ -0,0 +1,190 @@
+"""
+🧾 RESUMO DA COMPARAÇÃO (resumo_diff.json)
+Gerado pela transformação junto com os arquivos de staging: contagens por ação,
+totais de valor por termo, maiores mudanças e amostras. A revisão (humana ou
+pela política de aprovação) lê só este arquivo, sem recarregar o staging.
+
+O pandas só é importado nas funções que o usam: ler o resumo (ex.: `cli status`)
+não paga esse custo.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+ARQUIVO_RESUMO = "resumo_diff.json"
+TOP_MUDANCAS = 10
+TAMANHO_AMOSTRA = 3
+
+# As seções são gravadas por tarefas paralelas do DAG (despesas x termos/rubricas)
+_lock = threading.Lock()
+
+
+def resumir_despesas(df, valores_anteriores: dict, ignorados: int = 0) -> dict:
+    """
+    Resume o upload de despesas
+
+    Args:
+        df: Linhas do upload (com a coluna 'acao')
+        valores_anteriores: id_codigo_sit -> valor atual no banco (para os UPDATEs)
+        ignorados: Linhas iguais ao banco
+
+    Returns:
+        Seção "despesas" do resumo
+    """
+    import pandas as pd
+
+    valor = pd.to_numeric(df["valor"], errors="coerce").fillna(0.0)
+    anterior = df["id_codigo_sit"].astype(str).map(valores_anteriores).astype(float).fillna(0.0)
+    anterior = anterior.where(df["acao"] == "UPDATE", 0.0)
+
+    base = pd.DataFrame({
+        "id_codigo_sit": df["id_codigo_sit"].astype(str),
+        "termo": df["termo"].astype(str),
+        "rubrica": df["rubrica"].astype(str),
+        "acao": df["acao"],
+        "valor_anterior": anterior.round(2),
+        "valor": valor.round(2),
+    })
+    base["delta"] = (base["valor"] - base["valor_anterior"]).round(2)
+
+    por_termo = base.assign(variacao=base["delta"].abs()).groupby("termo").agg(
+        insert=("acao", lambda a: int((a == "INSERT").sum())),
+        update=("acao", lambda a: int((a == "UPDATE").sum())),
+        valor_anterior=("valor_anterior", "sum"),
+        valor=("valor", "sum"),
+        delta=("delta", "sum"),
+        variacao=("variacao", "sum"),
+    ).round(2)
+
+    maiores = base.loc[base["delta"].abs().sort_values(ascending=False).index[:TOP_MUDANCAS]]
+
+    return {
+        "insert": int((base["acao"] == "INSERT").sum()),
+        "update": int((base["acao"] == "UPDATE").sum()),
+        "ignorado": int(ignorados),
+        "total": int(len(base)),
+        "rubricas": sorted(base["rubrica"].unique().tolist()),
+        "por_termo": por_termo.to_dict("index"),
+        "maiores_mudancas": maiores.to_dict("records"),
+        "amostra": base.head(TAMANHO_AMOSTRA).to_dict("records"),
+    }
+
+
+def resumir_tabela(df, termo=None, valor=None, valor_anterior=None, rubrica=None) -> dict:
+    """
+    Resume um arquivo de update pequeno (termos, rubricas)
+
+    Args:
+        df: Linhas do update (cada uma é um UPDATE)
+        termo: Termo de cada linha (habilita os totais por termo)
+        valor: Valor novo de cada linha
+        valor_anterior: Valor atual no banco (sem ele, o delta é o próprio valor novo)
+        rubrica: Código de rubrica de cada linha
+
+    Returns:
+        Seção "termos" ou "rubricas" do resumo
+    """
+    import pandas as pd
+
+    resumo = {"update": int(len(df)), "total": int(len(df))}
+
+    if termo is not None and valor is not None:
+        base = pd.DataFrame({
+            "termo": pd.Series(termo).astype(str).to_numpy(),
+            "valor": pd.to_numeric(pd.Series(valor), errors="coerce").fillna(0.0).round(2).to_numpy(),
+        })
+        base["valor_anterior"] = 0.0 if valor_anterior is None else (
+            pd.to_numeric(pd.Series(valor_anterior), errors="coerce").fillna(0.0).round(2).to_numpy()
+        )
+        base["delta"] = (base["valor"] - base["valor_anterior"]).round(2)
+        base["variacao"] = base["delta"].abs()
+        resumo["por_termo"] = base.groupby("termo").agg(
+            update=("valor", "size"),
+            valor_anterior=("valor_anterior", "sum"),
+            valor=("valor", "sum"),
+            delta=("delta", "sum"),
+            variacao=("variacao", "sum"),
+        ).round(2).to_dict("index")
+
+    if rubrica is not None:
+        resumo["rubricas"] = sorted(pd.Series(rubrica).astype(str).unique().tolist())
+
+    resumo["amostra"] = df.head(TAMANHO_AMOSTRA).to_dict("records")
+    return resumo
+
+
+def ler_resumo(dir_staging: str) -> dict:
+    """Resumo atual do staging ({} se não existir ou estiver corrompido)"""
+    try:
+        with open(Path(dir_staging) / ARQUIVO_RESUMO, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def gravar_secao(dir_staging: str, secao: str, conteudo):
+    """
+    Atualiza (ou remove, se `conteudo` for None) uma seção do resumo, de forma atômica
+
+    Args:
+        dir_staging: Pasta staging
+        secao: "despesas", "termos" ou "rubricas"
+        conteudo: Dicionário da seção
+    """
+    caminho = Path(dir_staging) / ARQUIVO_RESUMO
+    with _lock:
+        resumo = ler_resumo(dir_staging)
+        if conteudo is None:
+            if secao not in resumo:
+                return
+            resumo.pop(secao)
+        else:
+            resumo[secao] = conteudo
+        resumo["atualizado_em"] = datetime.now().isoformat(timespec="seconds")
+
+        tmp = caminho.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, caminho)
+
+
+# Seção do resumo -> arquivo de staging que ela descreve
+ARQUIVOS_SECAO = {
+    "despesas": "despesas_upload.csv",
+    "termos": "update_termos.csv",
+    "rubricas": "update_rubricas.csv",
+}
+
+
+def carregar_resumo(dir_staging: str) -> dict:
+    """
+    Resumo das cargas presentes no staging
+
+    Seções cujo arquivo já não existe (carga feita ou estacionada) são
+    omitidas. Se um arquivo existe sem seção (staging anterior a este resumo),
+    ela é calculada a partir dele; sem os valores do banco, o delta de um
+    UPDATE é o próprio valor novo.
+    """
+    import pandas as pd
+
+    resumo = ler_resumo(dir_staging)
+    atual = {}
+    for secao, nome in ARQUIVOS_SECAO.items():
+        arquivo = Path(dir_staging) / nome
+        if not arquivo.exists():
+            continue
+        if secao in resumo:
+            atual[secao] = resumo[secao]
+        elif secao == "despesas":
+            atual[secao] = resumir_despesas(pd.read_csv(arquivo, dtype=str), {})
+        elif secao == "rubricas":
+            df = pd.read_csv(arquivo, dtype=str)
+            partes = df["id_termo_rubrica"].str.split("-", n=1).str
+            atual[secao] = resumir_tabela(df, termo=partes[0], valor=df["valor_estornado"], rubrica=partes[1])
+        else:
+            # update_termos.csv só tem o SIT: sem totais por termo
+            atual[secao] = resumir_tabela(pd.read_csv(arquivo))
+    return atual
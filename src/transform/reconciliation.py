@@ -0,0 +1,117 @@
+"""
+⚖️ RECONCILIAÇÃO POR AGREGADOS
+Antes da comparação linha a linha, compara por (termo, rubrica) o staging e o
+banco em quatro agregados: quantidade de linhas, soma de valor em centavos,
+maior data_pagamento e a soma de um hash MD5 de cada linha (duas somas de 32
+bits, para 64 bits de verificação). Do lado do banco é uma única consulta
+agrupada; só os termos com algum agregado diferente seguem para o diff.
+
+O hash de linha é calculado igual nos dois lados: colunas unidas por "|",
+nulos como "", datas em AAAA-MM-DD, valor em centavos inteiros, e o texto em
+UTF-16LE (o que HASHBYTES recebe de um NVARCHAR).
+
+Agregados iguais implicam as mesmas linhas (a menos de colisão do hash),
+então nenhuma delas seria INSERT ou UPDATE. Linhas que só existem no banco
+não entram na comparação, como no diff.
+"""
+
+import hashlib
+
+import pandas as pd
+
+CHAVES = ["termo", "rubrica"]
+AGREGADOS = ["linhas", "centavos", "ultima_data", "hash_a", "hash_b"]
+
+# Ordem das colunas no hash de linha (a mesma de SQL_AGREGADOS)
+COLUNAS_HASH = [
+    "id_codigo_sit", "termo", "rubrica", "tipo_despesa", "cpf_cnpj", "favorecido",
+    "tipo_doc_despesa", "descricao_despesa", "tipo_doc_pagamento",
+    "data_pagamento", "data_debito_convenio", "valor", "id_termo_rubrica",
+]
+
+# CONVERT(BIGINT, <varbinary(4)>) lê os 4 bytes como inteiro sem sinal (big-endian)
+SQL_AGREGADOS = """
+    SELECT d.termo, d.rubrica,
+           COUNT(*) AS linhas,
+           SUM(CONVERT(BIGINT, ROUND(d.valor * 100, 0))) AS centavos,
+           MAX(d.data_pagamento) AS ultima_data,
+           SUM(CONVERT(BIGINT, SUBSTRING(h.md5, 1, 4))) AS hash_a,
+           SUM(CONVERT(BIGINT, SUBSTRING(h.md5, 5, 4))) AS hash_b
+    FROM despesas d
+    CROSS APPLY (SELECT HASHBYTES('MD5', CONCAT(
+        CAST(d.id_codigo_sit AS NVARCHAR(50)), N'|', d.termo, N'|', d.rubrica, N'|',
+        d.tipo_despesa, N'|', d.cpf_cnpj, N'|', d.favorecido, N'|',
+        d.tipo_doc_despesa, N'|', d.descricao_despesa, N'|', d.tipo_doc_pagamento, N'|',
+        CONVERT(CHAR(10), d.data_pagamento, 23), N'|', CONVERT(CHAR(10), d.data_debito_convenio, 23), N'|',
+        CONVERT(BIGINT, ROUND(d.valor * 100, 0)), N'|', d.id_termo_rubrica
+    )) AS md5) h
+    WHERE d.id_codigo_sit IS NOT NULL
+    GROUP BY d.termo, d.rubrica
+"""
+
+
+def _texto(valor) -> str:
+    return "" if valor is None or pd.isna(valor) else str(valor)
+
+
+def _data(valor) -> str:
+    return _texto(valor)[:10]
+
+
+def agregados_origem(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agregados por (termo, rubrica) das linhas do staging (colunas como lidas do CSV, dtype=str)
+
+    Returns:
+        DataFrame com CHAVES + AGREGADOS
+    """
+    centavos = (pd.to_numeric(df["valor"], errors="coerce") * 100).round().astype("Int64")
+    campos = [
+        centavos.map(_texto) if coluna == "valor" else df[coluna].map(_texto)
+        for coluna in COLUNAS_HASH
+    ]
+    digests = [hashlib.md5("|".join(linha).encode("utf-16-le")).digest() for linha in zip(*campos)]
+
+    base = pd.DataFrame({
+        "termo": df["termo"].map(_texto).values,
+        "rubrica": df["rubrica"].map(_texto).values,
+        "centavos": centavos.fillna(0).astype("int64").values,
+        "ultima_data": df["data_pagamento"].map(_data).values,
+        "hash_a": [int.from_bytes(d[:4], "big") for d in digests],
+        "hash_b": [int.from_bytes(d[4:8], "big") for d in digests],
+    })
+    return base.groupby(CHAVES, as_index=False, sort=False).agg(
+        linhas=("centavos", "size"), centavos=("centavos", "sum"), ultima_data=("ultima_data", "max"),
+        hash_a=("hash_a", "sum"), hash_b=("hash_b", "sum"),
+    )
+
+
+def normalizar_agregados_banco(df: pd.DataFrame) -> pd.DataFrame:
+    """Resultado de SQL_AGREGADOS nos tipos de agregados_origem (textos, inteiros, data ISO)"""
+    df = df.copy()
+    for coluna in CHAVES:
+        df[coluna] = df[coluna].map(_texto)
+    for coluna in ("linhas", "centavos", "hash_a", "hash_b"):
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce").fillna(0).astype("int64")
+    df["ultima_data"] = df["ultima_data"].map(_data)
+    return df[CHAVES + AGREGADOS]
+
+
+def comparar(origem: pd.DataFrame, banco: pd.DataFrame) -> pd.DataFrame:
+    """
+    Grupos do staging cujos agregados diferem dos do banco (ou que o banco não tem)
+
+    Returns:
+        DataFrame com CHAVES e a lista de agregados divergentes de cada grupo
+    """
+    juntos = origem.merge(banco, on=CHAVES, how="left", suffixes=("", "_banco"), indicator=True)
+    novos = juntos["_merge"] == "left_only"
+    diferencas = pd.DataFrame({a: juntos[a] != juntos[f"{a}_banco"] for a in AGREGADOS})
+    divergentes = novos | diferencas.any(axis=1)
+
+    resultado = juntos.loc[divergentes, CHAVES].copy()
+    resultado["divergencias"] = [
+        "ausente no banco" if novo else ", ".join(a for a in AGREGADOS if linha[a])
+        for novo, (_, linha) in zip(novos[divergentes], diferencas[divergentes].iterrows())
+    ]
+    return resultado.reset_index(drop=True)
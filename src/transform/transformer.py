@@ -4,15 +4,22 @@ Encapsula os scripts 2_transform_compare.py e 2_validate.py
 """
 
 import os
+import time
 import warnings
 import pandas as pd
-import pyodbc
 import hashlib
 from pathlib import Path
 
 from src.utils.config import Config
 from src.utils.logger import setup_logger
+from src.utils.metrics import metricas
+from src.utils.progress import Progresso
 from src.utils.database import db_manager
+from src.utils.sit_registry import registro_sit
+from src.utils.workspace import gravar_csv_atomico
+from src.transform.constraints import validar_restricoes
+from src.transform.diff_summary import gravar_secao, resumir_despesas, resumir_tabela
+from src.transform.reconciliation import SQL_AGREGADOS, agregados_origem, comparar, normalizar_agregados_banco
 from src.utils.ingestor import limpar_string_numero, parse_brl
 
 logger = setup_logger("ExpensesTransformer")
@@ -21,8 +28,21 @@ logger = setup_logger("ExpensesTransformer")
 class ExpensesTransformer:
     """Transformador centralizado com lógica de comparação e validação"""
     
-    def __init__(self):
-        self.dir_staging = Config.DIR_STAGING
+    # Linhas por bloco no cálculo de fingerprints (granularidade do progresso)
+    BLOCO_FINGERPRINT = 10000
+    
+    # Ids por consulta ao ler fingerprints só das linhas divergentes (limite de 2100 parâmetros)
+    LOTE_IDS_SNAPSHOT = 1000
+    # Ler por id custa algumas vezes mais por linha que varrer a tabela: acima de
+    # 1/FATOR das linhas do banco, a leitura completa sai mais barata
+    FATOR_LEITURA_POR_ID = 4
+    
+    def __init__(self, dir_staging=None):
+        """
+        Args:
+            dir_staging: Pasta da execução (padrão: Config.DIR_STAGING)
+        """
+        self.dir_staging = str(dir_staging) if dir_staging else Config.DIR_STAGING
         self.conn_str = Config.CONN_STR_SQLSERVER
         
         if not self.dir_staging:
@@ -59,10 +79,118 @@ class ExpensesTransformer:
             logger.error(f"💥 ERRO NA TRANSFORMAÇÃO: {e}", exc_info=True)
             return False
     
-    def transformar_despesas(self) -> bool:
+    SQL_SNAPSHOT_DESPESAS = """
+        SELECT 
+            id_codigo_sit, termo, rubrica, tipo_despesa, cpf_cnpj, favorecido,
+            tipo_doc_despesa, descricao_despesa, tipo_doc_pagamento,
+            data_pagamento, data_debito_convenio, valor, id_termo_rubrica
+        FROM despesas
+        WHERE id_codigo_sit IS NOT NULL
+    """
+    
+    def ler_snapshot_despesas(self, ids: list = None):
+        """
+        Lê as despesas do banco e gera o fingerprint de cada uma
+        
+        Pode rodar em paralelo à extração (não depende do staging).
+        
+        Args:
+            ids: Lê só estes id_codigo_sit (busca pelo índice único, em lotes);
+                 None lê a tabela inteira
+        
+        Returns:
+            Dicionário id_codigo_sit -> (fingerprint, valor), ou None em caso de erro
+        """
+        dict_banco = {}
+        try:
+            logger.info("🔍 Consultando banco de dados...")
+            conn = db_manager.get_connection()
+            cursor = conn.cursor()
+            
+            if ids is None:
+                consultas = [(self.SQL_SNAPSHOT_DESPESAS, [])]
+            else:
+                consultas = [
+                    (f"{self.SQL_SNAPSHOT_DESPESAS} AND id_codigo_sit IN ({', '.join('?' * len(parte))})", parte)
+                    for parte in (ids[i:i + self.LOTE_IDS_SNAPSHOT] for i in range(0, len(ids), self.LOTE_IDS_SNAPSHOT))
+                ]
+            progresso = Progresso("Fingerprints do banco", total=len(ids) if ids is not None else None, unidade="linhas")
+            
+            for query, params in consultas:
+                cursor.execute(query, *params)
+                col_names = [column[0] for column in cursor.description]
+                
+                for row in self._linhas_em_blocos(cursor, progresso):
+                    row_dict = dict(zip(col_names, row))
+                    
+                    # Limpa dados para comparação
+                    data_pagto = str(row_dict['data_pagamento']) if row_dict['data_pagamento'] else ""
+                    data_debito = str(row_dict['data_debito_convenio']) if row_dict['data_debito_convenio'] else ""
+                    
+                    row_limpa = {
+                        'termo': str(row_dict['termo']),
+                        'rubrica': str(row_dict['rubrica']),
+                        'tipo_despesa': str(row_dict['tipo_despesa']),
+                        'cpf_cnpj': str(row_dict['cpf_cnpj']),
+                        'favorecido': str(row_dict['favorecido']),
+                        'tipo_doc_despesa': str(row_dict['tipo_doc_despesa'] or "").strip(),
+                        'descricao_despesa': str(row_dict['descricao_despesa'] or "").strip(),
+                        'tipo_doc_pagamento': str(row_dict['tipo_doc_pagamento'] or "").strip(),
+                        'data_pagamento': data_pagto,
+                        'data_debito_convenio': data_debito,
+                        'valor': float(row_dict['valor'] or 0.0),
+                        'id_termo_rubrica': str(row_dict['id_termo_rubrica'])
+                    }
+                    
+                    h_banco = self._gerar_fingerprint(row_limpa)
+                    id_sit = str(row_dict['id_codigo_sit'])
+                    dict_banco[id_sit] = (h_banco, row_limpa['valor'])
+            
+            conn.close()
+            progresso.concluir()
+            logger.info(f"📦 {len(dict_banco)} registros do banco carregados")
+            return dict_banco
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler banco: {e}")
+            return None
+    
+    def ler_agregados_despesas(self):
+        """
+        Agregados por (termo, rubrica) das despesas do banco, em uma consulta agrupada
+        
+        Pode rodar em paralelo à extração (não depende do staging).
+        
+        Returns:
+            DataFrame (ver reconciliation.py), ou None em caso de erro
+        """
+        try:
+            logger.info("🔍 Consultando agregados do banco (reconciliação)...")
+            conn = db_manager.get_connection()
+            try:
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable", category=UserWarning)
+                    df = pd.read_sql(SQL_AGREGADOS, conn)
+            finally:
+                conn.close()
+            return normalizar_agregados_banco(df)
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler agregados do banco (comparação completa): {e}")
+            return None
+    
+    def transformar_despesas(self, snapshot: dict = None, agregados: pd.DataFrame = None) -> bool:
         """
         Compara despesas do CSV com banco de dados
         Classifica em INSERT, UPDATE, IGNORE
+        
+        Sem snapshot e com Config.RECONCILIACAO_AGREGADOS, os agregados por
+        (termo, rubrica) são comparados antes: só as linhas dos termos
+        divergentes têm fingerprint calculado e lido do banco.
+        
+        Args:
+            snapshot: Resultado de ler_snapshot_despesas() já carregado
+                      (se None, o banco é consultado aqui)
+            agregados: Resultado de ler_agregados_despesas() já carregado
         """
         logger.info("➡️ Etapa 2a: Comparação Inteligente (Despesas)")
         
@@ -71,75 +199,55 @@ class ExpensesTransformer:
         
         if not os.path.exists(arquivo_entrada):
             logger.error("❌ Arquivo de despesas não encontrado. Rode etapa 1.")
+            gravar_secao(self.dir_staging, "despesas", None)
             return False
         
         # Carrega CSV
         df_csv = pd.read_csv(arquivo_entrada, dtype=str)
         if df_csv.empty:
             logger.warning("⚠️  CSV de entrada está vazio")
+            gravar_secao(self.dir_staging, "despesas", None)
             return False
         
+        # Reconciliação: termos com agregados iguais aos do banco ficam fora do diff
+        reconciliados = 0
+        if snapshot is None and Config.RECONCILIACAO_AGREGADOS:
+            if agregados is None:
+                agregados = self.ler_agregados_despesas()
+            if agregados is not None:
+                df_csv, reconciliados = self._reconciliar(df_csv, agregados)
+                if df_csv.empty:
+                    logger.info("   ✅ Nada para atualizar (agregados iguais aos do banco em todos os termos)")
+                    metricas.incrementar("despesas_comparadas", reconciliados, "Despesas classificadas na comparação com o banco", acao="ignore")
+                    gravar_secao(self.dir_staging, "despesas", None)
+                    return False
+                
+                ids = df_csv["id_codigo_sit"].astype(str).unique().tolist()
+                if len(ids) * self.FATOR_LEITURA_POR_ID < int(agregados["linhas"].sum()):
+                    snapshot = self.ler_snapshot_despesas(ids)
+                    if snapshot is None:
+                        return False
+        
         # Prepara para hash
         df_csv["valor"] = pd.to_numeric(df_csv["valor"], errors="coerce").fillna(0.0)
-        df_csv["fingerprint_csv"] = df_csv.apply(self._gerar_fingerprint, axis=1)
+        with Progresso("Fingerprints do staging", total=len(df_csv), unidade="linhas") as progresso:
+            blocos = []
+            for inicio in range(0, len(df_csv), self.BLOCO_FINGERPRINT):
+                bloco = df_csv.iloc[inicio:inicio + self.BLOCO_FINGERPRINT]
+                blocos.append(bloco.apply(self._gerar_fingerprint, axis=1))
+                progresso.avancar(len(bloco))
+        df_csv["fingerprint_csv"] = pd.concat(blocos)
         
-        # Carrega dados do banco
-        dict_banco = {}
-        try:
-            logger.info("🔍 Consultando banco de dados...")
-            conn = pyodbc.connect(self.conn_str)
-            cursor = conn.cursor()
-            
-            query = """
-                SELECT 
-                    id_codigo_sit, termo, rubrica, tipo_despesa, cpf_cnpj, favorecido,
-                    tipo_doc_despesa, descricao_despesa, tipo_doc_pagamento,
-                    data_pagamento, data_debito_convenio, valor, id_termo_rubrica
-                FROM despesas
-                WHERE id_codigo_sit IS NOT NULL
-            """
-            cursor.execute(query)
-            
-            col_names = [column[0] for column in cursor.description]
-            
-            for row in cursor.fetchall():
-                row_dict = dict(zip(col_names, row))
-                
-                # Limpa dados para comparação
-                data_pagto = str(row_dict['data_pagamento']) if row_dict['data_pagamento'] else ""
-                data_debito = str(row_dict['data_debito_convenio']) if row_dict['data_debito_convenio'] else ""
-                
-                row_limpa = {
-                    'termo': str(row_dict['termo']),
-                    'rubrica': str(row_dict['rubrica']),
-                    'tipo_despesa': str(row_dict['tipo_despesa']),
-                    'cpf_cnpj': str(row_dict['cpf_cnpj']),
-                    'favorecido': str(row_dict['favorecido']),
-                    'tipo_doc_despesa': str(row_dict['tipo_doc_despesa'] or "").strip(),
-                    'descricao_despesa': str(row_dict['descricao_despesa'] or "").strip(),
-                    'tipo_doc_pagamento': str(row_dict['tipo_doc_pagamento'] or "").strip(),
-                    'data_pagamento': data_pagto,
-                    'data_debito_convenio': data_debito,
-                    'valor': float(row_dict['valor'] or 0.0),
-                    'id_termo_rubrica': str(row_dict['id_termo_rubrica'])
-                }
-                
-                h_banco = self._gerar_fingerprint(row_limpa)
-                id_sit = str(row_dict['id_codigo_sit'])
-                dict_banco[id_sit] = h_banco
-            
-            conn.close()
-            logger.info(f"📦 {len(dict_banco)} registros do banco carregados")
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao ler banco: {e}")
+        # Carrega dados do banco (ou usa o snapshot pré-carregado)
+        dict_banco = snapshot if snapshot is not None else self.ler_snapshot_despesas()
+        if dict_banco is None:
             return False
         
         # Classifica registros
         lista_final = []
         inserts = 0
         updates = 0
-        ignorados = 0
+        ignorados = reconciliados
         
         for _, row in df_csv.iterrows():
             id_atual = str(row['id_codigo_sit'])
@@ -150,7 +258,7 @@ class ExpensesTransformer:
                 lista_final.append(row)
                 inserts += 1
             else:
-                hash_banco = dict_banco[id_atual]
+                hash_banco = dict_banco[id_atual][0]
                 if hash_atual != hash_banco:
                     row['acao'] = 'UPDATE'
                     lista_final.append(row)
@@ -160,19 +268,135 @@ class ExpensesTransformer:
         
         # Salva resultado
         if lista_final:
-            df_final = pd.DataFrame(lista_final)
-            df_final[Config.COLUNAS_DESPESAS + ['acao']].to_csv(arquivo_saida, index=False, encoding="utf-8")
+            df_final = pd.DataFrame(lista_final)[Config.COLUNAS_DESPESAS + ['acao']]
             logger.info(f"   📊 INSERT: {inserts} | UPDATE: {updates} | IGNORE: {ignorados}")
-            logger.info(f"   💾 {len(lista_final)} registros salvos para upload")
+            for acao, qtd in (("insert", inserts), ("update", updates), ("ignore", ignorados)):
+                metricas.incrementar("despesas_comparadas", qtd, "Despesas classificadas na comparação com o banco", acao=acao)
+            
+            df_final = self._filtrar_violacoes(df_final)
+            if df_final.empty:
+                logger.warning("   ⚠️  Todas as linhas violam o schema; nada para carregar")
+                gravar_secao(self.dir_staging, "despesas", None)
+                return False
+            
+            gravar_csv_atomico(df_final, arquivo_saida, encoding="utf-8")
+            logger.info(f"   💾 {len(df_final)} registros salvos para upload")
+            
+            valores_banco = {
+                id_sit: dict_banco[id_sit][1]
+                for id_sit in df_final.loc[df_final['acao'] == 'UPDATE', 'id_codigo_sit'].astype(str)
+            }
+            gravar_secao(self.dir_staging, "despesas", resumir_despesas(df_final, valores_banco, ignorados))
             return True
         else:
             logger.info("   ✅ Nada para atualizar (banco sincronizado)")
+            metricas.incrementar("despesas_comparadas", ignorados, "Despesas classificadas na comparação com o banco", acao="ignore")
+            gravar_secao(self.dir_staging, "despesas", None)
             return False
     
-    def validar_e_preparar(self) -> bool:
+    @staticmethod
+    def _reconciliar(df_csv: pd.DataFrame, agregados: pd.DataFrame) -> tuple:
+        """
+        Retira do staging os termos cujos agregados batem com os do banco
+        
+        Returns:
+            (linhas dos termos divergentes, quantidade de linhas retiradas)
+        """
+        inicio = time.time()
+        divergentes = comparar(agregados_origem(df_csv), agregados)
+        termos = set(divergentes["termo"])
+        manter = df_csv["termo"].fillna("").isin(termos)
+        
+        qtd_termos = df_csv["termo"].fillna("").nunique()
+        logger.info(
+            f"   ⚖️  Reconciliação: {qtd_termos - len(termos)} de {qtd_termos} termo(s) iguais ao banco; "
+            f"{int(manter.sum())} de {len(df_csv)} linha(s) seguem para a comparação ({time.time() - inicio:.2f}s)"
+        )
+        for termo, grupo in divergentes.groupby("termo", sort=True):
+            rubricas = ", ".join(f"{r} ({d})" for r, d in zip(grupo["rubrica"], grupo["divergencias"]))
+            logger.debug(f"      • termo {termo}: {rubricas}")
+        
+        ajuda = "Termos na reconciliação por agregados"
+        metricas.incrementar("reconciliacao_termos", qtd_termos - len(termos), ajuda, resultado="igual")
+        metricas.incrementar("reconciliacao_termos", len(termos), ajuda, resultado="divergente")
+        return df_csv[manter].copy(), int((~manter).sum())
+    
+    def _filtrar_violacoes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Valida o upload contra o DDL de despesas e retira as linhas inválidas
+        
+        As violações vão para violacoes_despesas.csv (uma linha por coluna violada),
+        para que nunca cheguem ao banco e sejam corrigidas na origem.
+        """
+        arquivo_violacoes = Path(self.dir_staging) / "violacoes_despesas.csv"
+        
+        try:
+            validas, relatorio = validar_restricoes(df, "despesas")
+        except (OSError, ValueError) as e:
+            logger.warning(f"   ⚠️  Validação de schema indisponível ({e}); seguindo sem ela")
+            return df
+        
+        if relatorio.empty:
+            if arquivo_violacoes.exists():
+                os.remove(arquivo_violacoes)
+            return df
+        
+        relatorio.to_csv(arquivo_violacoes, index=False, encoding="utf-8-sig")
+        metricas.incrementar("linhas_violacao_schema", int((~validas).sum()), "Linhas retiradas do upload por violar o DDL")
+        resumo = relatorio.groupby(["coluna", "restricao"]).size()
+        logger.warning(
+            f"   🧱 {int((~validas).sum())} linha(s) violam o schema e ficaram fora do upload "
+            f"(detalhes em {arquivo_violacoes.name})"
+        )
+        for (coluna, restricao), qtd in resumo.items():
+            logger.warning(f"      • {coluna} {restricao}: {qtd}")
+        
+        return df[validas]
+    
+    def ler_snapshot_financeiro(self):
+        """
+        Lê do banco o mapa SIT -> ID_TERMO e os valores atuais de termos e rubricas
+        
+        Pode rodar em paralelo à extração (não depende do staging).
+        
+        Returns:
+            Dicionário com 'mapa_sit_para_id', 'termos' e 'rubricas', ou None em caso de erro
+        """
+        try:
+            conn = db_manager.get_connection()
+        except Exception as e:
+            logger.error(f"❌ Erro de conexão com banco: {e}")
+            return None
+        
+        try:
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable", category=UserWarning)
+                
+                df_termos_sql = pd.read_sql("SELECT id_termo, nro_sit, rendimento_financeiro_total FROM termos", conn)
+                df_termos_sql["nro_sit"] = df_termos_sql["nro_sit"].apply(limpar_string_numero)
+                
+                df_rubs_sql = pd.read_sql("SELECT id_termo_rubrica, valor_estornado FROM rubricas", conn)
+            
+            return {
+                # Mapa SIT -> ID_TERMO vem do registro compartilhado com a extração
+                "mapa_sit_para_id": registro_sit.mapa_shard(),
+                "termos": df_termos_sql,
+                "rubricas": df_rubs_sql
+            }
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler termos/rubricas do banco: {e}")
+            return None
+        finally:
+            conn.close()
+    
+    def validar_e_preparar(self, snapshot: dict = None) -> bool:
         """
         Valida termos e rubricas contra banco
         Prepara arquivos de update
+        
+        Args:
+            snapshot: Resultado de ler_snapshot_financeiro() já carregado
+                      (se None, o banco é consultado aqui)
         """
         logger.info("➡️ Etapa 2b: Validação de Termos e Rubricas")
         
@@ -186,28 +410,14 @@ class ExpensesTransformer:
             logger.warning("   ⚠️  Arquivo de resumo_termos não encontrado")
             return False
         
-        try:
-            conn = pyodbc.connect(self.conn_str)
-        except Exception as e:
-            logger.error(f"❌ Erro de conexão com banco: {e}")
+        if snapshot is None:
+            snapshot = self.ler_snapshot_financeiro()
+        if snapshot is None:
             return False
         
-        mapa_sit_para_id = {}
+        mapa_sit_para_id = snapshot["mapa_sit_para_id"]
         sucesso = False
         
-        # Cria mapa SIT -> ID_TERMO
-        try:
-            query_mapa = "SELECT id_termo, nro_sit FROM termos"
-            with warnings.catch_warnings():
-                warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable", category=UserWarning)
-                df_mapa = pd.read_sql(query_mapa, conn)
-            df_mapa["nro_sit"] = df_mapa["nro_sit"].apply(limpar_string_numero)
-            df_mapa["id_termo"] = df_mapa["id_termo"].apply(limpar_string_numero)
-            mapa_sit_para_id = df_mapa.set_index("nro_sit")["id_termo"].to_dict()
-        except Exception as e:
-            logger.error(f"❌ Erro ao criar mapa: {e}")
-            return False
-        
         # ===== VALIDAR TERMOS =====
         logger.info("1️⃣  Analisando Termos...")
         
@@ -218,11 +428,7 @@ class ExpensesTransformer:
         ).fillna(0.0)
         
         try:
-            query_termos = "SELECT nro_sit, rendimento_financeiro_total FROM termos"
-            with warnings.catch_warnings():
-                warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable", category=UserWarning)
-                df_termos_sql = pd.read_sql(query_termos, conn)
-            df_termos_sql["nro_sit"] = df_termos_sql["nro_sit"].apply(limpar_string_numero)
+            df_termos_sql = snapshot["termos"]
             
             merged_termos = df_termos_csv.merge(
                 df_termos_sql,
@@ -237,14 +443,20 @@ class ExpensesTransformer:
             ]
             
             if not diff_termos.empty:
-                diff_termos[["nro_sit", "rendimento_financeiro_total_csv"]].to_csv(
-                    saida_update_termos, index=False
-                )
+                df_update_termos = diff_termos[["nro_sit", "rendimento_financeiro_total_csv"]]
+                gravar_csv_atomico(df_update_termos, saida_update_termos)
+                gravar_secao(self.dir_staging, "termos", resumir_tabela(
+                    df_update_termos,
+                    termo=diff_termos["id_termo"],
+                    valor=diff_termos["rendimento_financeiro_total_csv"],
+                    valor_anterior=diff_termos["rendimento_financeiro_total_sql"],
+                ))
                 logger.info(f"   ⚠️  {len(diff_termos)} termos divergentes encontrados")
                 sucesso = True
             else:
                 if saida_update_termos.exists():
                     os.remove(saida_update_termos)
+                gravar_secao(self.dir_staging, "termos", None)
                 logger.info("   ✅ Termos sincronizados")
         
         except Exception as e:
@@ -272,10 +484,7 @@ class ExpensesTransformer:
                 )
                 
                 try:
-                    query_rubs = "SELECT id_termo_rubrica, valor_estornado FROM rubricas"
-                    with warnings.catch_warnings():
-                        warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable", category=UserWarning)
-                        df_rubs_sql = pd.read_sql(query_rubs, conn)
+                    df_rubs_sql = snapshot["rubricas"]
                     
                     merged_rubs = linhas_validas.merge(
                         df_rubs_sql,
@@ -291,22 +500,40 @@ class ExpensesTransformer:
                     ]
                     
                     if not diff_rubs.empty:
-                        diff_rubs[["id_termo_rubrica", "valor_estornado_csv"]].rename(
+                        df_update_rubs = diff_rubs[["id_termo_rubrica", "valor_estornado_csv"]].rename(
                             columns={"valor_estornado_csv": "valor_estornado"}
-                        ).to_csv(saida_update_rubricas, index=False)
+                        )
+                        gravar_csv_atomico(df_update_rubs, saida_update_rubricas)
+                        gravar_secao(self.dir_staging, "rubricas", resumir_tabela(
+                            df_update_rubs,
+                            termo=diff_rubs["id_termo_real"],
+                            valor=diff_rubs["valor_estornado_csv"],
+                            valor_anterior=diff_rubs["valor_estornado_sql"],
+                            rubrica=diff_rubs["rubrica"],
+                        ))
                         logger.info(f"   ⚠️  {len(diff_rubs)} rubricas divergentes encontradas")
                         sucesso = True
                     else:
                         if saida_update_rubricas.exists():
                             os.remove(saida_update_rubricas)
+                        gravar_secao(self.dir_staging, "rubricas", None)
                         logger.info("   ✅ Rubricas sincronizadas")
                 
                 except Exception as e:
                     logger.error(f"   ❌ Erro em rubricas: {e}")
         
-        conn.close()
         return sucesso
     
+    @classmethod
+    def _linhas_em_blocos(cls, cursor, progresso: Progresso):
+        """Percorre o resultado com fetchmany, avançando o progresso a cada bloco"""
+        while True:
+            bloco = cursor.fetchmany(cls.BLOCO_FINGERPRINT)
+            if not bloco:
+                return
+            yield from bloco
+            progresso.avancar(len(bloco))
+    
     @staticmethod
     def _gerar_fingerprint(row) -> str:
         """Gera hash único baseado no conteúdo"""
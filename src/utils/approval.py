@@ -0,0 +1,321 @@
+"""
+✅ POLÍTICA DE APROVAÇÃO AUTOMÁTICA
+Aprova sem intervenção humana as cargas dentro dos limites configurados e
+estaciona as demais em DIR_STAGING/pendentes/<run_id>/ para revisão posterior
+
+A pasta de pendentes é compartilhada pelas execuções (cada uma com sua pasta
+em DIR_STAGING/runs/) e alterada sempre sob a mesma trava.
+
+Uso (revisão dos pendentes):
+    python -m src.utils.approval --listar
+    python -m src.utils.approval --aprovar <run_id>
+    python -m src.utils.approval --rejeitar <run_id>
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from src.transform.diff_summary import ARQUIVO_RESUMO, carregar_resumo
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+from src.utils.run_manifest import ManifestoExecucao
+from src.utils.workspace import EspacoExecucao, TravaArquivo
+
+logger = setup_logger("Approval")
+
+# Arquivos de staging que compõem uma carga (change-set)
+ARQUIVOS_CARGA = ("despesas_upload.csv", "update_termos.csv", "update_rubricas.csv")
+PASTA_PENDENTES = "pendentes"
+ARQUIVO_MOTIVO = "motivo.json"
+TRAVA_PENDENTES = ".pendentes.trava"
+
+
+class PoliticaAprovacao:
+    """
+    Limites para aprovar uma carga automaticamente (0 / vazio = sem limite)
+
+    Valem para todas as seções da carga (despesas, termos e rubricas).
+
+    Args:
+        max_inserts: Máximo de despesas novas
+        max_updates: Máximo de linhas alteradas por seção
+        max_valor_termo: Máximo, por termo, da soma das variações absolutas de valor
+                         (despesas, rendimentos e estornos; aumentos e reduções não se anulam)
+        rubricas_permitidas: Códigos de rubrica aceitos
+    """
+
+    def __init__(self, max_inserts: int = 0, max_updates: int = 0,
+                 max_valor_termo: float = 0.0, rubricas_permitidas=None):
+        self.max_inserts = max_inserts
+        self.max_updates = max_updates
+        self.max_valor_termo = max_valor_termo
+        self.rubricas_permitidas = set(rubricas_permitidas or [])
+
+    @classmethod
+    def de_config(cls) -> "PoliticaAprovacao":
+        return cls(
+            max_inserts=Config.APROVACAO_MAX_INSERTS,
+            max_updates=Config.APROVACAO_MAX_UPDATES,
+            max_valor_termo=Config.APROVACAO_MAX_VALOR_TERMO,
+            rubricas_permitidas=Config.APROVACAO_RUBRICAS,
+        )
+
+    def avaliar(self, dir_staging: str) -> list:
+        """
+        Confere a carga em staging contra a política (a partir do resumo_diff.json)
+
+        Returns:
+            Motivos de reprovação (lista vazia = dentro da política)
+        """
+        resumo = carregar_resumo(dir_staging)
+        motivos = []
+
+        despesas = resumo.get("despesas")
+        if despesas and self.max_inserts and despesas["insert"] > self.max_inserts:
+            motivos.append(f"{despesas['insert']} INSERTs (limite {self.max_inserts})")
+        if self.max_updates:
+            for secao, conteudo in resumo.items():
+                # Em termos e rubricas toda linha é um UPDATE
+                updates = conteudo.get("update", conteudo["total"])
+                if updates > self.max_updates:
+                    motivos.append(f"{updates} UPDATEs em {secao} (limite {self.max_updates})")
+
+        if self.max_valor_termo:
+            variacao = {}
+            for conteudo in resumo.values():
+                for termo, totais in conteudo.get("por_termo", {}).items():
+                    # Resumos anteriores à coluna "variacao" só têm o delta líquido
+                    variacao[termo] = variacao.get(termo, 0.0) + totais.get("variacao", abs(totais["delta"]))
+            for termo, total in sorted(variacao.items()):
+                if total > self.max_valor_termo:
+                    motivos.append(
+                        f"termo {termo}: variação de R$ {total:,.2f} "
+                        f"(limite R$ {self.max_valor_termo:,.2f})"
+                    )
+
+        if self.rubricas_permitidas:
+            rubricas = set().union(*(conteudo.get("rubricas", []) for conteudo in resumo.values()))
+            fora = sorted(rubricas - self.rubricas_permitidas)
+            if fora:
+                motivos.append(f"rubricas fora da lista permitida: {', '.join(fora)}")
+
+        return motivos
+
+
+def modo_interativo() -> bool:
+    """Confirmação humana só quando configurada e com um terminal para responder"""
+    return Config.APROVACAO_MODO != "politica" and sys.stdin is not None and sys.stdin.isatty()
+
+
+def aplicar_politica(dir_staging: str, run_id: str, politica: PoliticaAprovacao = None,
+                     escopo: str = None) -> bool:
+    """
+    Aprova a carga em staging se estiver dentro da política; senão a estaciona
+
+    Args:
+        dir_staging: Pasta da execução com a carga
+        escopo: Escopo da execução (pendentes de outros escopos não são substituídos)
+
+    Returns:
+        True se aprovada (carga pode seguir), False se estacionada
+    """
+    politica = politica or PoliticaAprovacao.de_config()
+    motivos = politica.avaliar(dir_staging)
+    if not motivos:
+        logger.info("✅ Carga dentro da política de aprovação; aprovada automaticamente")
+        with _trava_pendentes():
+            _descartar_pendentes(run_id, escopo)
+        return True
+    estacionar_carga(dir_staging, run_id, motivos, escopo)
+    return False
+
+
+def _pasta_pendentes(dir_base: str = None) -> Path:
+    return Path(dir_base or Config.DIR_STAGING) / PASTA_PENDENTES
+
+
+def _trava_pendentes(dir_base: str = None) -> TravaArquivo:
+    return TravaArquivo(Path(dir_base or Config.DIR_STAGING) / TRAVA_PENDENTES)
+
+
+def _descartar_pendentes(run_id: str, escopo: str = None):
+    """
+    Remove os pendentes anteriores do mesmo escopo: a carga nova foi calculada
+    contra o mesmo banco (nenhum pendente foi carregado) e já contém tudo o que
+    eles continham. Aprovar um deles depois dela aplicaria as mesmas mudanças duas vezes.
+    """
+    for antigo in listar_pendentes():
+        if antigo["run_id"] != run_id and antigo.get("escopo") == escopo:
+            shutil.rmtree(_pasta_pendentes() / antigo["run_id"], ignore_errors=True)
+            logger.info(f"   🗑️  Pendente {antigo['run_id']} substituído por {run_id}")
+
+
+def estacionar_carga(dir_staging: str, run_id: str, motivos: list, escopo: str = None) -> Path:
+    """
+    Move a carga da pasta da execução para DIR_STAGING/pendentes/<run_id>/ com um motivo.json
+
+    Returns:
+        Pasta do pendente
+    """
+    with _trava_pendentes():
+        _descartar_pendentes(run_id, escopo)
+        destino = _mover_para_pendentes(dir_staging, run_id, motivos, escopo)
+
+    logger.warning(f"⏸️  Carga fora da política estacionada em {destino}")
+    for motivo in motivos:
+        logger.warning(f"   • {motivo}")
+    return destino
+
+
+def _mover_para_pendentes(dir_staging: str, run_id: str, motivos: list, escopo: str = None) -> Path:
+    destino = _pasta_pendentes() / run_id
+    destino.mkdir(parents=True, exist_ok=True)
+
+    arquivos = []
+    for nome in ARQUIVOS_CARGA:
+        origem = Path(dir_staging) / nome
+        if origem.exists():
+            shutil.move(str(origem), str(destino / nome))
+            arquivos.append(nome)
+    if (Path(dir_staging) / ARQUIVO_RESUMO).exists():
+        shutil.copy2(Path(dir_staging) / ARQUIVO_RESUMO, destino / ARQUIVO_RESUMO)
+
+    with open(destino / ARQUIVO_MOTIVO, "w", encoding="utf-8") as f:
+        json.dump({
+            "run_id": run_id,
+            "escopo": escopo,
+            "criado_em": datetime.now().isoformat(timespec="seconds"),
+            "motivos": motivos,
+            "arquivos": arquivos,
+        }, f, ensure_ascii=False, indent=2)
+    return destino
+
+
+def listar_pendentes(dir_base: str = None) -> list:
+    """Conteúdo de motivo.json de cada carga pendente (mais antiga primeiro)"""
+    pendentes = []
+    pasta = _pasta_pendentes(dir_base)
+    if not pasta.exists():
+        return pendentes
+    for arquivo in sorted(pasta.glob(f"*/{ARQUIVO_MOTIVO}")):
+        try:
+            with open(arquivo, "r", encoding="utf-8") as f:
+                pendentes.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return pendentes
+
+
+def restaurar_pendente(dir_base: str, run_id: str, destino: str = None):
+    """
+    Devolve os arquivos do pendente a uma pasta de staging (para a carga) e remove o pendente
+
+    Args:
+        dir_base: DIR_STAGING (onde fica a pasta de pendentes)
+        destino: Pasta que recebe a carga (padrão: dir_base)
+
+    Raises:
+        FileNotFoundError: Se o pendente não existir
+        FileExistsError: Se já houver uma carga no destino
+    """
+    destino = Path(destino or dir_base)
+    with _trava_pendentes(dir_base):
+        origem = _pasta_pendentes(dir_base) / run_id
+        if not (origem / ARQUIVO_MOTIVO).exists():
+            raise FileNotFoundError(f"Pendente {run_id} não encontrado")
+
+        conflitos = [n for n in ARQUIVOS_CARGA if (origem / n).exists() and (destino / n).exists()]
+        if conflitos:
+            raise FileExistsError(f"Já existe carga em staging: {', '.join(conflitos)}")
+
+        destino.mkdir(parents=True, exist_ok=True)
+        for nome in ARQUIVOS_CARGA + (ARQUIVO_RESUMO,):
+            if (origem / nome).exists():
+                shutil.move(str(origem / nome), str(destino / nome))
+        shutil.rmtree(origem, ignore_errors=True)
+
+
+def aprovar_pendente(dir_base: str, run_id: str) -> bool:
+    """
+    Aprova manualmente um pendente: devolve os arquivos à pasta da execução
+    de origem (DIR_STAGING/runs/<run_id>/), reabre o manifesto dela e executa
+    a carga (journal e histórico com o run_id de origem) e a exportação analítica
+
+    Raises:
+        FileNotFoundError: Se o pendente não existir
+        FileExistsError: Se a execução estiver em uso por outro processo
+    """
+    from src.load.analytics import AnalyticsExporter
+    from src.load.loader import ExpensesLoader
+
+    escopo = next((p.get("escopo") for p in listar_pendentes(dir_base) if p["run_id"] == run_id), None)
+    espaco = EspacoExecucao(dir_base, run_id, escopo)
+    if not espaco.adquirir():
+        raise FileExistsError(f"Execução {run_id} em uso por outro processo")
+    try:
+        restaurar_pendente(dir_base, run_id, espaco.caminho)
+    except Exception:
+        espaco.liberar()
+        raise
+
+    with espaco:
+        manifesto = ManifestoExecucao(espaco.caminho, run_id=run_id, escopo=escopo, reabrir=True)
+        espaco.manifesto = manifesto
+        # Uma retomada desta execução (após queda na carga) não pede a aprovação de novo
+        manifesto.registrar_etapa("aprovacao", [espaco.caminho / nome for nome in ARQUIVOS_CARGA], [], True)
+        logger.info(f"✅ Pendente {run_id} aprovado; iniciando carga")
+
+        loader = ExpensesLoader(manifesto=manifesto)
+        carregou = loader.run()
+        if carregou:
+            AnalyticsExporter(espaco.caminho).run()
+        if not loader.carga_pendente():
+            manifesto.finalizar()
+        return carregou
+
+
+def rejeitar_pendente(dir_base: str, run_id: str):
+    """Descarta um pendente"""
+    with _trava_pendentes(dir_base):
+        pasta = _pasta_pendentes(dir_base) / run_id
+        if not pasta.exists():
+            raise FileNotFoundError(f"Pendente {run_id} não encontrado")
+        shutil.rmtree(pasta)
+    logger.info(f"🗑️  Pendente {run_id} rejeitado")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revisão de cargas pendentes")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--listar", action="store_true", help="Lista as cargas pendentes")
+    grupo.add_argument("--aprovar", metavar="RUN_ID", help="Carrega um pendente")
+    grupo.add_argument("--rejeitar", metavar="RUN_ID", help="Descarta um pendente")
+    args = parser.parse_args(argv)
+
+    dir_staging = Config.DIR_STAGING
+    if args.listar:
+        pendentes = listar_pendentes(dir_staging)
+        if not pendentes:
+            print("Nenhuma carga pendente")
+        for p in pendentes:
+            print(f"{p['run_id']}  ({p['criado_em']})")
+            for motivo in p["motivos"]:
+                print(f"   • {motivo}")
+        return 0
+
+    try:
+        if args.aprovar:
+            return 0 if aprovar_pendente(dir_staging, args.aprovar) else 1
+        rejeitar_pendente(dir_staging, args.rejeitar)
+        return 0
+    except (FileNotFoundError, FileExistsError) as e:
+        logger.error(f"❌ {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,115 @@
 """
 ⚙️ MÓDULO DE CONFIGURAÇÃO CENTRALIZADA
 Carrega variáveis de ambiente e oferece constantes do projeto
+
+O .env e as variáveis de ambiente só são lidos no primeiro acesso a uma
+configuração (importar este módulo não tem efeitos colaterais).
 """
 
 import os
-from dotenv import load_dotenv
 
-# Carrega variáveis do .env
-load_dotenv()
+
+class _ConfigLazy(type):
+    """Metaclasse que carrega as configurações do ambiente no primeiro acesso"""
+    
+    def __getattr__(cls, nome):
+        if nome.startswith("_") or cls.__dict__.get("_carregada"):
+            raise AttributeError(f"Configuração inexistente: {nome}")
+        cls._carregar()
+        return getattr(cls, nome)
 
 
-class Config:
+class Config(metaclass=_ConfigLazy):
     """Classe para acessar configurações do projeto"""
     
-    # 🔹 DIRETÓRIOS
-    DIR_DOWNLOADS = os.getenv("DIR_DOWNLOADS")
-    DIR_STAGING = os.getenv("DIR_STAGING")
-    DIR_LOGS = os.getenv("DIR_LOGS", "logs")
+    _carregada = False
     
-    # 🔹 BANCO DE DADOS
-    CONN_STR_SQLSERVER = os.getenv("CONN_STR_SQLSERVER")
+    @classmethod
+    def _carregar(cls):
+        """Lê o .env e define as configurações vindas do ambiente"""
+        for nome, valor in cls._ler_ambiente().items():
+            setattr(cls, nome, valor)
+        cls._carregada = True
+    
+    @staticmethod
+    def _ler_ambiente() -> dict:
+        from dotenv import load_dotenv
+        
+        # Carrega variáveis do .env
+        load_dotenv()
+        
+        # 🔹 DIRETÓRIOS
+        DIR_DOWNLOADS = os.getenv("DIR_DOWNLOADS")
+        DIR_STAGING = os.getenv("DIR_STAGING")
+        EXECUCOES_MANTER = int(os.getenv("EXECUCOES_MANTER", "10"))  # pastas em DIR_STAGING/runs (0 = todas)
+        DIR_LOGS = os.getenv("DIR_LOGS", "logs")
+        
+        # 🔹 LOGGING (um arquivo por execução, gravado em segundo plano)
+        LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+        LOG_ROTACAO = os.getenv("LOG_ROTACAO", "tamanho")  # tamanho | diaria
+        LOG_MAX_MB = float(os.getenv("LOG_MAX_MB", "20"))
+        LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+        LOG_JSON = os.getenv("LOG_JSON", "true").lower() in ("1", "true", "sim")
+        LOG_REPETICOES = int(os.getenv("LOG_REPETICOES", "5"))
+        LOG_JANELA_S = float(os.getenv("LOG_JANELA_S", "60"))
+        
+        # 🔹 EXTRAÇÃO
+        TAMANHO_CHUNK_XLSX = int(os.getenv("TAMANHO_CHUNK_XLSX", "5000"))
+        LEITOR_XLSX = os.getenv("LEITOR_XLSX", "auto")
+        LIMITE_STREAMING_MB = float(os.getenv("LIMITE_STREAMING_MB", "50"))
+        RAW_THREADS = int(os.getenv("RAW_THREADS", "4"))
+        
+        # 🔹 ORQUESTRAÇÃO (DAG)
+        POOL_EXTRACAO = os.getenv("POOL_EXTRACAO", "thread")  # thread | processo
+        DAG_MAX_THREADS = int(os.getenv("DAG_MAX_THREADS", "4"))
+        
+        # 🔹 COMPARAÇÃO (agregados por termo/rubrica antes do diff linha a linha)
+        RECONCILIACAO_AGREGADOS = os.getenv("RECONCILIACAO_AGREGADOS", "true").lower() in ("1", "true", "sim")
+        
+        # 🔹 DAEMON (python -m src.daemon)
+        DAEMON_DEBOUNCE_S = float(os.getenv("DAEMON_DEBOUNCE_S", "5"))
+        DAEMON_INTERVALO_S = float(os.getenv("DAEMON_INTERVALO_S", "2"))
+        DAEMON_IMPORTAR_DOWNLOADS = os.getenv("DAEMON_IMPORTAR_DOWNLOADS", "true").lower() in ("1", "true", "sim")
+        
+        # 🔹 APROVAÇÃO (0 / vazio = sem limite)
+        APROVACAO_MODO = os.getenv("APROVACAO_MODO", "interativo")  # interativo | politica
+        APROVACAO_MAX_INSERTS = int(os.getenv("APROVACAO_MAX_INSERTS", "5000"))
+        APROVACAO_MAX_UPDATES = int(os.getenv("APROVACAO_MAX_UPDATES", "500"))
+        APROVACAO_MAX_VALOR_TERMO = float(os.getenv("APROVACAO_MAX_VALOR_TERMO", "100000"))
+        APROVACAO_RUBRICAS = [r.strip() for r in os.getenv("APROVACAO_RUBRICAS", "").split(",") if r.strip()]
+        
+        # 🔹 BANCO DE DADOS
+        CONN_STR_SQLSERVER = os.getenv("CONN_STR_SQLSERVER")
+        DB_POOL_TAMANHO = int(os.getenv("DB_POOL_TAMANHO", "4"))
+        DB_LENTO_MS = float(os.getenv("DB_LENTO_MS", "0"))  # 0 = não loga comandos lentos
+        
+        # 🔹 PROGRESSO DE ETAPAS LONGAS
+        PROGRESSO_MODO = os.getenv("PROGRESSO_MODO", "auto")  # auto | tty | log | off
+        PROGRESSO_INTERVALO_S = float(os.getenv("PROGRESSO_INTERVALO_S", "30"))  # entre eventos no log
+        
+        # 🔹 MÉTRICAS (arquivo .prom do textfile collector do node_exporter; vazio = desligado)
+        METRICAS_ARQUIVO = os.getenv("METRICAS_ARQUIVO", "")
+        
+        # 🔹 CARGA
+        LOAD_CONCORRENCIA = int(os.getenv("LOAD_CONCORRENCIA", "1"))
+        LOAD_PARTICAO = os.getenv("LOAD_PARTICAO", "termo")  # termo | hash
+        LOAD_TAMANHO_LOTE = int(os.getenv("LOAD_TAMANHO_LOTE", "1000"))
+        
+        # 🔹 EXPORTAÇÃO ANALÍTICA (dataset Parquet; vazio = desligado)
+        DIR_ANALITICO = os.getenv("DIR_ANALITICO", "")
+        
+        # 🔹 HISTÓRICO DE DESPESAS (segmentos Parquet de deltas; vazio = desligado)
+        DIR_HISTORICO = os.getenv("DIR_HISTORICO", "")
+        HISTORICO_SEGMENTO_LINHAS = int(os.getenv("HISTORICO_SEGMENTO_LINHAS", "50000"))
+        
+        # 🔹 REGISTRO SIT -> TERMO (lido da tabela termos)
+        SIT_REGISTRY_TTL = int(os.getenv("SIT_REGISTRY_TTL", "300"))
+        SHARD_INDICE = int(os.getenv("SHARD_INDICE", "0"))
+        SHARD_TOTAL = int(os.getenv("SHARD_TOTAL", "1"))
+        
+        return {nome: valor for nome, valor in locals().items() if nome.isupper()}
     
-    # 🔹 MAPEAMENTOS (Hardcoded para referência)
+    # 🔹 MAPEAMENTOS (Hardcoded para referência / fallback do registro SIT)
     SIT_TERMO_MAP = {
         "57884": "6373",
         "63377": "6729",
@@ -3,30 +3,102 @@
 Fornece conexões e utilitários para SQL Server
 """
 
+import queue
+import threading
+from contextlib import contextmanager
+
 import pyodbc
 import pandas as pd
 from src.utils.config import Config
+from src.utils.db_metrics import ConexaoInstrumentada
 from src.utils.logger import setup_logger
 
 
 logger = setup_logger("Database")
 
 
+class PoolConexoes:
+    """
+    Pool simples de conexões reutilizáveis (thread-safe)
+    
+    Cada thread pega uma conexão exclusiva; ao devolver, a conexão volta
+    para a fila e é reaproveitada, evitando um handshake por lote/shard.
+    """
+    
+    def __init__(self, fabrica, tamanho: int):
+        self._fabrica = fabrica
+        self._livres = queue.LifoQueue()
+        self._semaforo = threading.BoundedSemaphore(tamanho)
+        self.tamanho = tamanho
+    
+    @contextmanager
+    def conexao(self):
+        """
+        Empresta uma conexão do pool (bloqueia se todas estiverem em uso)
+        
+        Conexões que levantaram erro não voltam para o pool.
+        """
+        self._semaforo.acquire()
+        conn = None
+        try:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                conn = self._fabrica()
+            
+            yield conn
+            
+            self._livres.put(conn)
+            conn = None
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._semaforo.release()
+    
+    def fechar(self):
+        """Fecha todas as conexões ociosas"""
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+            except Exception:
+                continue
+
+
 class DatabaseManager:
     """Gerenciador de conexões e operações SQL Server"""
     
     def __init__(self):
-        self.conn_str = Config.CONN_STR_SQLSERVER
+        self._pool = None
+        self._pool_lock = threading.Lock()
+    
+    @property
+    def conn_str(self) -> str:
+        return Config.CONN_STR_SQLSERVER
+    
+    @property
+    def pool(self) -> PoolConexoes:
+        """Pool de conexões compartilhado (criado no primeiro uso)"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = PoolConexoes(self.get_connection, Config.DB_POOL_TAMANHO)
+            return self._pool
         
     def get_connection(self):
         """
         Obtém uma conexão ativa com SQL Server
         
+        Todos os comandos feitos por ela entram nas estatísticas SQL da execução.
+        
         Returns:
-            pyodbc.Connection
+            ConexaoInstrumentada (interface de pyodbc.Connection)
         """
         try:
-            conn = pyodbc.connect(self.conn_str)
+            conn = ConexaoInstrumentada(pyodbc.connect(self.conn_str))
             logger.info("✅ Conectado ao SQL Server")
             return conn
         except Exception as e:
@@ -97,5 +169,5 @@ class DatabaseManager:
             return False
 
 
-# Instância global
+# Instância global (não conecta nem lê configurações até o primeiro uso)
 db_manager = DatabaseManager()
@@ -0,0 +1,166 @@
+"""
+📅 NORMALIZAÇÃO DE DATAS COM CACHE
+Detecta o formato uma vez por coluna e converte apenas as strings únicas
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+
+
+# Formatos vistos nas exportações do SIT (texto BR e células data do Excel)
+FORMATOS_CANDIDATOS = [
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%y",
+]
+
+TAMANHO_AMOSTRA_PADRAO = 200
+LIMITE_CACHE_PADRAO = 200_000
+
+
+def detectar_formato_data(valores: Iterable[str], tamanho_amostra: int = TAMANHO_AMOSTRA_PADRAO) -> Optional[str]:
+    """
+    Detecta o formato dominante a partir de uma amostra de valores únicos
+
+    Args:
+        valores: Strings de data (nulos/vazios são ignorados)
+        tamanho_amostra: Máximo de valores testados
+
+    Returns:
+        Formato strftime que converte mais valores da amostra, ou None se nenhum converter
+    """
+    amostra = []
+    for valor in valores:
+        if valor is None or pd.isna(valor):
+            continue
+        texto = str(valor).strip()
+        if texto:
+            amostra.append(texto)
+        if len(amostra) >= tamanho_amostra:
+            break
+
+    if not amostra:
+        return None
+
+    melhor_formato = None
+    melhor_acertos = 0
+    serie = pd.Series(amostra, dtype=object)
+
+    for formato in FORMATOS_CANDIDATOS:
+        acertos = pd.to_datetime(serie, format=formato, errors="coerce").notna().sum()
+        if acertos > melhor_acertos:
+            melhor_formato, melhor_acertos = formato, acertos
+            if acertos == len(amostra):
+                break
+
+    return melhor_formato
+
+
+class ParserDatas:
+    """
+    Conversor de colunas de data com detecção de formato e cache de valores
+
+    O formato é detectado na primeira chamada para cada coluna e reutilizado
+    nos chunks seguintes. Cada string distinta é convertida uma única vez;
+    como muitos pagamentos caem no mesmo dia, o cache evita quase todo o parsing.
+    """
+
+    def __init__(self, limite_cache: int = LIMITE_CACHE_PADRAO):
+        self.limite_cache = limite_cache
+        self.formatos = {}
+        self._cache = {}
+
+    def converter(self, serie: pd.Series, coluna: str = None) -> Tuple[pd.Series, pd.Series]:
+        """
+        Converte uma coluna de strings de data
+
+        Args:
+            serie: Valores originais (string ou nulo)
+            coluna: Nome usado para guardar o formato detectado (padrão: serie.name)
+
+        Returns:
+            (série datetime64 com NaT nos inválidos, série de strings ISO YYYY-MM-DD)
+        """
+        coluna = coluna or serie.name
+        texto = serie.astype(object).where(serie.notna(), None)
+        texto = texto.map(lambda v: v.strip() if isinstance(v, str) else v)
+
+        unicos = [v for v in pd.unique(texto) if isinstance(v, str) and v]
+        pendentes = [v for v in unicos if v not in self._cache]
+
+        # Cache cheio: recomeça, mas mantém todos os valores deste lote
+        if len(self._cache) + len(pendentes) > self.limite_cache:
+            self._cache.clear()
+            pendentes = unicos
+
+        if pendentes:
+            if coluna not in self.formatos:
+                self.formatos[coluna] = detectar_formato_data(pendentes)
+            self._atualizar_cache(pendentes, self.formatos[coluna])
+
+        datas = pd.to_datetime(texto.map(self._cache), errors="coerce")
+        iso = datas.dt.strftime("%Y-%m-%d")
+        return datas, iso
+
+    def _atualizar_cache(self, valores: list, formato: Optional[str]):
+        """Converte os valores novos (formato detectado + inferência só para o resto)"""
+        serie = pd.Series(valores, dtype=object)
+
+        if formato:
+            convertidos = pd.to_datetime(serie, format=formato, errors="coerce")
+        else:
+            convertidos = pd.Series(pd.NaT, index=serie.index)
+
+        falhas = convertidos.isna()
+        if falhas.any():
+            for i in serie[falhas].index:
+                convertidos[i] = _converter_valor(serie[i])
+
+        self._cache.update(zip(valores, convertidos))
+
+
+def _converter_valor(texto: str):
+    """
+    Fallback para valores fora do formato detectado: testa os demais formatos
+    conhecidos e só então recorre à inferência do pandas (dia primeiro)
+    """
+    for formato in FORMATOS_CANDIDATOS:
+        try:
+            return pd.Timestamp(datetime.strptime(texto, formato))
+        except ValueError:
+            continue
+
+    try:
+        return pd.to_datetime(texto, dayfirst=True)
+    except (ValueError, TypeError, OverflowError):
+        return pd.NaT
+
+
+@lru_cache(maxsize=4096)
+def data_para_iso(data_str: str) -> Optional[str]:
+    """
+    Converte uma única data para YYYY-MM-DD, com cache por valor
+
+    Testa os formatos conhecidos com strptime antes de cair na inferência do pandas
+
+    Args:
+        data_str: Data em string
+
+    Returns:
+        Data ISO ou None se inválida
+    """
+    texto = data_str.strip()
+    if not texto:
+        return None
+
+    data = _converter_valor(texto)
+    if pd.isna(data):
+        return None
+    return data.strftime("%Y-%m-%d")
@@ -0,0 +1,211 @@
+"""
+⏱️ INSTRUMENTAÇÃO DO ACESSO AO BANCO
+Conexão/cursor que envolvem os do pyodbc e medem cada comando SQL: chamadas,
+linhas enviadas e recebidas e histograma de latência por modelo de comando
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger("DbMetrics")
+
+# Limites superiores (segundos) das faixas do histograma de latência
+FAIXAS_LATENCIA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+_RE_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_ESPACOS = re.compile(r"\s+")
+
+
+def normalizar_sql(sql: str) -> str:
+    """Modelo do comando: literais trocados por ?, espaços colapsados (agrupa execuções iguais)"""
+    modelo = _RE_TEXTO.sub("?", sql)
+    modelo = _RE_NUMERO.sub("?", modelo)
+    return _RE_ESPACOS.sub(" ", modelo).strip()[:200]
+
+
+class EstatisticasSQL:
+    """Acumulador thread-safe das medições, por modelo de comando"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modelos = {}
+
+    def registrar(self, modelo: str, segundos: float, linhas_entrada: int = 0, linhas_saida: int = 0,
+                  chamada: bool = True):
+        """
+        Soma uma medição ao modelo
+
+        Args:
+            chamada: False para tempo de leitura (fetch) de um comando já contado
+        """
+        with self._lock:
+            est = self._modelos.get(modelo)
+            if est is None:
+                est = self._modelos[modelo] = {
+                    "chamadas": 0, "linhas_entrada": 0, "linhas_saida": 0,
+                    "segundos": 0.0, "max_segundos": 0.0, "histograma": [0] * len(FAIXAS_LATENCIA),
+                }
+            est["linhas_entrada"] += linhas_entrada
+            est["linhas_saida"] += linhas_saida
+            est["segundos"] += segundos
+            if chamada:
+                est["chamadas"] += 1
+                est["max_segundos"] = max(est["max_segundos"], segundos)
+                est["histograma"][bisect_left(FAIXAS_LATENCIA, segundos)] += 1
+
+        limite_ms = Config.DB_LENTO_MS
+        if chamada and limite_ms and segundos * 1000 >= limite_ms:
+            logger.warning(f"🐢 Comando lento ({segundos * 1000:.0f} ms, {linhas_entrada} linha(s)): {modelo}")
+
+    def resumo(self) -> list:
+        """Medições por modelo, do mais custoso (tempo total) para o menos"""
+        with self._lock:
+            itens = [{"sql": modelo, **est, "histograma": list(est["histograma"])}
+                     for modelo, est in self._modelos.items()]
+        return sorted(itens, key=lambda item: item["segundos"], reverse=True)
+
+    def totais(self) -> dict:
+        """Idas ao banco, linhas e tempo somados de todos os modelos"""
+        itens = self.resumo()
+        return {
+            "chamadas": sum(i["chamadas"] for i in itens),
+            "linhas_entrada": sum(i["linhas_entrada"] for i in itens),
+            "linhas_saida": sum(i["linhas_saida"] for i in itens),
+            "segundos": sum(i["segundos"] for i in itens),
+        }
+
+    def exportar(self) -> dict:
+        """Cópia serializável das medições (para enviar de um processo filho ao pai)"""
+        with self._lock:
+            return {modelo: {**est, "histograma": list(est["histograma"])} for modelo, est in self._modelos.items()}
+
+    def mesclar(self, dados: dict):
+        """Incorpora medições exportadas: somas e histogramas somam, o máximo é o maior dos dois"""
+        with self._lock:
+            for modelo, medido in dados.items():
+                est = self._modelos.get(modelo)
+                if est is None:
+                    self._modelos[modelo] = {**medido, "histograma": list(medido["histograma"])}
+                    continue
+                for campo in ("chamadas", "linhas_entrada", "linhas_saida", "segundos"):
+                    est[campo] += medido[campo]
+                est["max_segundos"] = max(est["max_segundos"], medido["max_segundos"])
+                est["histograma"] = [a + b for a, b in zip(est["histograma"], medido["histograma"])]
+
+    def zerar(self):
+        with self._lock:
+            self._modelos.clear()
+
+    def relatorio(self, top: int = 10):
+        """Loga o resumo da execução (comandos mais custosos primeiro)"""
+        itens = self.resumo()
+        if not itens:
+            return
+        totais = self.totais()
+        logger.info(
+            f"🗄️  SQL: {totais['chamadas']} chamada(s) | {totais['linhas_entrada']} linha(s) enviada(s) | "
+            f"{totais['linhas_saida']} recebida(s) | {totais['segundos']:.2f}s"
+        )
+        for item in itens[:top]:
+            media_ms = item["segundos"] / item["chamadas"] * 1000 if item["chamadas"] else 0.0
+            logger.info(
+                f"   • {item['chamadas']}x | {item['segundos']:.3f}s (média {media_ms:.1f} ms, "
+                f"máx {item['max_segundos'] * 1000:.0f} ms) | in {item['linhas_entrada']} out {item['linhas_saida']} | "
+                f"{item['sql'][:90]}"
+            )
+
+
+class CursorInstrumentado:
+    """Cursor pyodbc medido; o restante da interface é repassado ao original"""
+
+    def __init__(self, cursor, estatisticas: EstatisticasSQL):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_estatisticas", estatisticas)
+        object.__setattr__(self, "_modelo", None)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __setattr__(self, nome, valor):
+        # Ex.: cursor.fast_executemany = True
+        setattr(self._cursor, nome, valor)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _medir(self, sql: str, funcao, linhas_entrada: int):
+        modelo = normalizar_sql(sql)
+        object.__setattr__(self, "_modelo", modelo)
+        inicio = time.perf_counter()
+        try:
+            return funcao()
+        finally:
+            self._estatisticas.registrar(modelo, time.perf_counter() - inicio, linhas_entrada)
+
+    def execute(self, sql, *params):
+        self._medir(sql, lambda: self._cursor.execute(sql, *params), 1 if params else 0)
+        return self
+
+    def executemany(self, sql, seq_params):
+        seq_params = seq_params if isinstance(seq_params, (list, tuple)) else list(seq_params)
+        return self._medir(sql, lambda: self._cursor.executemany(sql, seq_params), len(seq_params))
+
+    def _ler(self, funcao, *args, unica: bool = False):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        if self._modelo is not None:
+            linhas = (0 if resultado is None else 1) if unica else len(resultado)
+            self._estatisticas.registrar(self._modelo, time.perf_counter() - inicio, linhas_saida=linhas, chamada=False)
+        return resultado
+
+    def fetchone(self):
+        return self._ler(self._cursor.fetchone, unica=True)
+
+    def fetchall(self):
+        return self._ler(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._ler(self._cursor.fetchmany, *args)
+
+
+class ConexaoInstrumentada:
+    """Conexão pyodbc cujos cursores (e commits) são medidos"""
+
+    def __init__(self, conexao, estatisticas: EstatisticasSQL = None):
+        self._conexao = conexao
+        self._estatisticas = estatisticas or estatisticas_sql
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def cursor(self):
+        return CursorInstrumentado(self._conexao.cursor(), self._estatisticas)
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def _medir(self, modelo: str, funcao):
+        inicio = time.perf_counter()
+        try:
+            return funcao()
+        finally:
+            self._estatisticas.registrar(modelo, time.perf_counter() - inicio)
+
+    def commit(self):
+        return self._medir("COMMIT", self._conexao.commit)
+
+    def rollback(self):
+        return self._medir("ROLLBACK", self._conexao.rollback)
+
+    def close(self):
+        return self._conexao.close()
+
+
+# Instância global (acumula a execução corrente; o daemon zera a cada ciclo)
+estatisticas_sql = EstatisticasSQL()
@@ -0,0 +1,35 @@
+"""
+#️⃣ HASH DE CONTEÚDO
+Funções para identificar arquivos e lotes pelo conteúdo (streaming, sem carregar tudo em memória)
+"""
+
+import hashlib
+import os
+
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def hash_arquivo(caminho, algoritmo: str = "sha256") -> str:
+    """
+    Calcula o hash do conteúdo de um arquivo lendo em blocos
+
+    Args:
+        caminho: Arquivo a ser lido
+        algoritmo: Algoritmo do hashlib (padrão: sha256)
+
+    Returns:
+        Hash hexadecimal, ou None se o arquivo não existir
+    """
+    if not os.path.exists(caminho):
+        return None
+
+    h = hashlib.new(algoritmo)
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_texto(texto: str, algoritmo: str = "sha256") -> str:
+    """Hash hexadecimal de uma string (UTF-8)"""
+    return hashlib.new(algoritmo, texto.encode("utf-8")).hexdigest()
@@ -4,10 +4,12 @@ Funções sanitizadoras e de processamento de dados
 """
 
 import pandas as pd
-import shutil
 import os
 from pathlib import Path
 from src.utils.config import Config
+from src.utils.date_parser import data_para_iso
+from src.utils.raw_store import ArmazemRaw
+from src.utils.workspace import TravaArquivo
 
 
 def copiar_downloads_para_raw(logger=None, deletar_original=True) -> int:
@@ -15,12 +17,18 @@ def copiar_downloads_para_raw(logger=None, deletar_original=True) -> int:
     Copia arquivos XLSX e CSV da pasta Downloads do Windows para a pasta raw
     Útil para automatizar o fluxo de entrada de dados
     
+    Os arquivos passam pelo armazém endereçado por conteúdo (data/raw/.objetos):
+    conteúdo já arquivado não é copiado de novo, e o arquivo de trabalho em
+    data/raw é um clone (reflink, quando o disco permite) ou cópia somente
+    leitura do objeto.
+    Instâncias simultâneas do pipeline ingerem uma de cada vez (trava em data/raw).
+    
     Args:
         logger: Logger opcional para registrar operações
         deletar_original: Se True, deleta arquivo original após copiar (padrão: True)
         
     Returns:
-        Número de arquivos copiados
+        Número de arquivos novos ou alterados em data/raw
     """
     # Pasta de downloads padrão do Windows
     downloads_win = Path.home() / "Downloads"
@@ -32,44 +40,63 @@ def copiar_downloads_para_raw(logger=None, deletar_original=True) -> int:
     # Extensões de interesse
     extensoes = [".xlsx", ".xls", ".csv"]
     
-    arquivos_copiados = 0
-    
     if not downloads_win.exists():
         if logger:
             logger.warning(f"⚠️  Pasta Downloads não encontrada: {downloads_win}")
         return 0
     
+    with TravaArquivo(pasta_raw / ".ingestao.trava"):
+        return _arquivar_downloads(downloads_win, pasta_raw, extensoes, logger, deletar_original)
+
+
+def _arquivar_downloads(downloads_win: Path, pasta_raw: Path, extensoes: list, logger, deletar_original: bool) -> int:
+    """Arquiva os arquivos do Downloads no raw (chamada com a trava de ingestão)"""
     try:
-        for extensao in extensoes:
-            # Busca arquivos com a extensão
-            for arquivo in downloads_win.glob(f"*{extensao}"):
-                try:
-                    # Copia para pasta raw
-                    destino = pasta_raw / arquivo.name
-                    shutil.copy2(arquivo, destino)
-                    
-                    # Deleta original se parametrizado
-                    if deletar_original:
-                        try:
-                            arquivo.unlink()  # Remove arquivo original
-                            if logger:
-                                logger.info(f"   📥 Movido: {arquivo.name} (original deletado)")
-                        except Exception as e:
-                            if logger:
-                                logger.warning(f"   ⚠️  Erro ao deletar {arquivo.name}: {e}")
-                    else:
-                        if logger:
-                            logger.info(f"   📥 Copiado: {arquivo.name}")
-                    
-                    arquivos_copiados += 1
-                
-                except Exception as e:
-                    if logger:
-                        logger.warning(f"   ⚠️  Erro ao processar {arquivo.name}: {e}")
-    
+        arquivos = [
+            arquivo
+            for extensao in extensoes
+            for arquivo in downloads_win.glob(f"*{extensao}")
+        ]
+        if not arquivos:
+            return 0
+        
+        armazem = ArmazemRaw(pasta_raw)
+        resultados = armazem.arquivar_varios(
+            arquivos, max_threads=Config.RAW_THREADS, mover=deletar_original
+        )
     except Exception as e:
         if logger:
             logger.error(f"❌ Erro ao acessar Downloads: {e}")
+        return 0
+    
+    arquivos_copiados = 0
+    inalterados = 0
+    
+    for arquivo, hash_conteudo, situacao in resultados:
+        if hash_conteudo is None:
+            if logger:
+                logger.warning(f"   ⚠️  Erro ao processar {arquivo.name}: {situacao}")
+            continue
+        
+        if situacao == "inalterado":
+            inalterados += 1
+        else:
+            arquivos_copiados += 1
+        
+        # Deleta original se parametrizado
+        if deletar_original:
+            try:
+                arquivo.unlink()  # Remove arquivo original
+                if logger and situacao != "inalterado":
+                    logger.info(f"   📥 Movido: {arquivo.name} ({situacao}, original deletado)")
+            except Exception as e:
+                if logger:
+                    logger.warning(f"   ⚠️  Erro ao deletar {arquivo.name}: {e}")
+        elif logger and situacao != "inalterado":
+            logger.info(f"   📥 Copiado: {arquivo.name} ({situacao})")
+    
+    if inalterados and logger:
+        logger.info(f"   ♻️  {inalterados} arquivo(s) com conteúdo já arquivado (nada copiado)")
     
     return arquivos_copiados
 
@@ -175,11 +202,7 @@ def converter_data_para_sql(data_str: str) -> str:
     Returns:
         Data formatada para SQL ou None
     """
-    if not data_str or str(data_str).strip() == "":
+    if not data_str or pd.isna(data_str) or str(data_str).strip() == "":
         return None
     
-    try:
-        data = pd.to_datetime(data_str, dayfirst=True)
-        return data.strftime("%Y-%m-%d")
-    except:
-        return None
+    return data_para_iso(str(data_str))
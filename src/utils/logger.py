@@ -1,53 +1,295 @@
 """
 📋 MÓDULO DE LOGGING CENTRALIZADO
 Fornece um logger consistente para todo o pipeline ETL
+
+Todos os loggers escrevem em uma fila (QueueHandler); uma thread em segundo
+plano (QueueListener) grava no console, em um único arquivo por execução
+(com rotação) e, opcionalmente, em JSON Lines. Nada é criado no import: o
+arquivo, a thread e a leitura das configurações acontecem na primeira mensagem.
+
+Processos de um pool criado com `initializer=inicializar_filho` não abrem
+arquivos: seus registros seguem por uma fila entre processos até o processo
+principal (ver EncaminhadorFilhos), único dono do arquivo e da rotação.
 """
 
+import atexit
+import json
 import logging
+import multiprocessing
 import os
-from pathlib import Path
+import queue
+import re
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from pathlib import Path
+
+FORMATO = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Processos filhos (spawn) herdam o arquivo da execução por esta variável
+_VAR_ARQUIVO = "ETL_LOG_ARQUIVO"
+
+# Números variáveis (IDs, linhas, valores) não distinguem mensagens repetidas
+_RE_NUMEROS = re.compile(r"\d+")
+
+
+class AgregadorRepeticoes(logging.Filter):
+    """
+    Limita avisos/erros repetidos (ex.: um por linha com falha)
+
+    Mensagens WARNING+ que diferem só nos números são contadas por janela:
+    as `limite` primeiras passam, as demais são suprimidas e o total
+    suprimido é anexado à próxima ocorrência após a janela (ou ao encerramento).
+    """
+
+    def __init__(self, limite: int, janela: float):
+        super().__init__()
+        self.limite = limite
+        self.janela = janela
+        self._lock = threading.Lock()
+        self._contagem = {}  # chave -> [início da janela, ocorrências, suprimidas, exemplo]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limite <= 0 or record.levelno < logging.WARNING:
+            return True
+
+        mensagem = record.getMessage()
+        chave = (record.name, record.levelno, _RE_NUMEROS.sub("#", mensagem)[:200])
+        agora = time.monotonic()
+
+        with self._lock:
+            estado = self._contagem.get(chave)
+            if estado is None or agora - estado[0] > self.janela:
+                suprimidas = estado[2] if estado else 0
+                self._contagem[chave] = [agora, 1, 0, mensagem]
+                if suprimidas:
+                    record.msg = f"{mensagem} (+{suprimidas} ocorrência(s) semelhante(s) suprimida(s))"
+                    record.args = None
+                return True
+
+            estado[1] += 1
+            if estado[1] <= self.limite:
+                return True
+            estado[2] += 1
+            return False
+
+    def pendentes(self) -> list:
+        """Retira e retorna (nome, nível, exemplo, suprimidas) das janelas com supressões"""
+        with self._lock:
+            resumo = [
+                (nome, nivel, estado[3], estado[2])
+                for (nome, nivel, _), estado in self._contagem.items() if estado[2]
+            ]
+            self._contagem.clear()
+        return resumo
+
+
+class FormatoJSON(logging.Formatter):
+    """Uma linha JSON por mensagem (para ingestão em ferramentas de log)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "processo": record.process,
+            "thread": record.threadName,
+        }
+        progresso = getattr(record, "progresso", None)
+        if progresso is not None:
+            registro["progresso"] = progresso
+        if record.exc_info:
+            registro["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False)
+
+
+class _HandlerConsole(logging.StreamHandler):
+    """Console que, em um terminal, apaga a linha de progresso antes de cada mensagem"""
+
+    def __init__(self):
+        super().__init__()
+        self._tty = self.stream.isatty()
+
+    def format(self, record: logging.LogRecord) -> str:
+        texto = super().format(record)
+        return f"\r\033[K{texto}" if self._tty else texto
+
+
+class _HandlerFila(QueueHandler):
+    """QueueHandler que liga o listener na primeira mensagem"""
+
+    def handle(self, record: logging.LogRecord):
+        _iniciar()
+        # Mensagens emitidas antes de o nível configurado ser aplicado aos loggers
+        if record.levelno < self.level:
+            return False
+        return super().handle(record)
+
+
+_lock = threading.Lock()
+_fila = queue.Queue()
+_handler = _HandlerFila(_fila)
+_listener = None
+_agregador = None
+_pid = None
+_loggers = set()
+_encaminhando = False  # processo filho inicializado: registros vão para a fila do pai
+
+
+def _configuracao():
+    from src.utils.config import Config
+    return Config
+
 
+def _handler_arquivo(caminho: Path, config) -> logging.Handler:
+    if config.LOG_ROTACAO == "diaria":
+        return TimedRotatingFileHandler(caminho, when="midnight", backupCount=config.LOG_BACKUPS, encoding="utf-8")
+    return RotatingFileHandler(
+        caminho, maxBytes=int(config.LOG_MAX_MB * 1024 * 1024), backupCount=config.LOG_BACKUPS, encoding="utf-8"
+    )
 
-def setup_logger(name: str, log_dir: str = "logs") -> logging.Logger:
+
+def _iniciar():
+    """Cria o arquivo da execução e a thread gravadora (uma vez por processo)"""
+    global _listener, _agregador, _pid, _fila
+    if _pid == os.getpid():
+        return
+
+    with _lock:
+        if _pid == os.getpid():
+            return
+        if _pid is not None:
+            # Processo filho (fork): a thread do pai não existe aqui
+            _fila = queue.Queue()
+            _handler.queue = _fila
+
+        config = _configuracao()
+        caminho = os.environ.get(_VAR_ARQUIVO)
+        if not caminho:
+            # O pid separa instâncias simultâneas iniciadas no mesmo segundo
+            caminho = str(Path(config.DIR_LOGS) / f"etl_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.log")
+            os.environ[_VAR_ARQUIVO] = caminho
+        caminho = Path(caminho)
+        if _pid is not None or multiprocessing.parent_process() is not None:
+            # Filho sem inicializar_filho: arquivo próprio, pois dois
+            # RotatingFileHandler no mesmo arquivo se atropelam na rotação
+            caminho = caminho.with_name(f"{caminho.stem}.{os.getpid()}{caminho.suffix}")
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        formato = logging.Formatter(FORMATO)
+        handlers = [_HandlerConsole(), _handler_arquivo(caminho, config)]
+        if config.LOG_JSON:
+            handlers.append(_handler_arquivo(caminho.with_suffix(".jsonl"), config))
+            handlers[-1].setFormatter(FormatoJSON())
+        for handler in handlers[:2]:
+            handler.setFormatter(formato)
+
+        if _agregador is None:
+            _agregador = AgregadorRepeticoes(config.LOG_REPETICOES, config.LOG_JANELA_S)
+            _handler.addFilter(_agregador)
+            _handler.setLevel(config.LOG_NIVEL)
+            for nome in _loggers:
+                logging.getLogger(nome).setLevel(config.LOG_NIVEL)
+
+        _listener = QueueListener(_fila, *handlers, respect_handler_level=True)
+        _listener.start()
+        _pid = os.getpid()
+
+
+def descarregar():
+    """Bloqueia até a thread gravadora escrever tudo o que está na fila (ex.: antes de um input())"""
+    if _pid == os.getpid() and not _encaminhando:
+        _fila.join()
+
+
+def inicializar_filho(fila):
+    """
+    Inicializador de pools de processos: liga o logging do filho à fila de um
+    EncaminhadorFilhos do processo principal, sem abrir arquivos nem thread
+
+    Uso:
+        ProcessPoolExecutor(initializer=inicializar_filho, initargs=(encaminhador.fila,))
+    """
+    global _fila, _listener, _pid, _encaminhando
+    with _lock:
+        _fila = fila
+        _handler.queue = fila
+        # Com fork, a thread gravadora e o agregador do pai vieram na cópia;
+        # a agregação de repetições é feita no pai, sobre todos os processos
+        _listener = None
+        if _agregador is not None:
+            _handler.removeFilter(_agregador)
+        _handler.setLevel(_configuracao().LOG_NIVEL)
+        _pid = os.getpid()
+        _encaminhando = True
+
+
+class EncaminhadorFilhos:
+    """
+    Repassa à fila de logging deste processo os registros recebidos de
+    processos filhos (pools criados com initializer=inicializar_filho)
+
+    Uso:
+        encaminhador = EncaminhadorFilhos()
+        encaminhador.iniciar()
+        pool = ProcessPoolExecutor(initializer=inicializar_filho, initargs=(encaminhador.fila,))
+        ...
+        pool.shutdown(wait=True)
+        encaminhador.parar()   # depois do pool: grava o que os filhos deixaram na fila
     """
-    Configura um logger com formatação padrão e salva em arquivo.
-    
+
+    def __init__(self):
+        self.fila = multiprocessing.Queue()
+        self._listener = QueueListener(self.fila, _handler)
+
+    def iniciar(self):
+        self._listener.start()
+
+    def parar(self):
+        self._listener.stop()
+        self.fila.close()
+
+
+def encerrar():
+    """Registra as supressões pendentes e para a thread gravadora (chamado no atexit)"""
+    global _listener, _pid
+    if _pid != os.getpid() or _listener is None:
+        return
+
+    for nome, nivel, exemplo, suprimidas in _agregador.pendentes():
+        logging.getLogger(nome).log(nivel, f"{exemplo} (+{suprimidas} ocorrência(s) semelhante(s) suprimida(s))")
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _pid = None
+
+
+atexit.register(encerrar)
+
+
+def setup_logger(name: str, log_dir: str = None) -> logging.Logger:
+    """
+    Retorna o logger do módulo, ligado à fila de logging da execução
+
     Args:
         name: Nome do logger (ex: "MainPipeline", "ExpensesExtractor")
-        log_dir: Diretório para salvar logs
-    
+        log_dir: Ignorado (mantido por compatibilidade); o destino é DIR_LOGS
+
     Returns:
         Logger configurado
     """
-    # Cria diretório de logs se não existir
-    Path(log_dir).mkdir(parents=True, exist_ok=True)
-    
-    # Timestamp para arquivo de log
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_dir, f"{name}_{timestamp}.log")
-    
-    # Formata mensagens com cores (no console)
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    log_formatter = logging.Formatter(log_format)
-    
-    # Logger
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # Handler de arquivo
-    file_handler = logging.FileHandler(log_file, encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(log_formatter)
-    
-    # Handler de console
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(log_formatter)
-    
+
     # Evita handlers duplicados
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-    
+    if _handler not in logger.handlers:
+        # O nível configurado (LOG_NIVEL) é aplicado quando o listener inicia
+        logger.setLevel(_handler.level if _agregador is not None else logging.DEBUG)
+        logger.addHandler(_handler)
+        logger.propagate = False
+        _loggers.add(name)
+
     return logger
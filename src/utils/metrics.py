@@ -0,0 +1,165 @@
+"""
+📈 MÉTRICAS DO PIPELINE (Prometheus)
+Contadores e medidores por execução e por etapa, gravados de forma atômica
+em um arquivo .prom (formato texto do Prometheus) lido pelo textfile
+collector do node_exporter
+
+No modo daemon o registro fica em memória entre ciclos (contadores
+acumulam) e o arquivo é regravado ao fim de cada ciclo.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Metrics")
+
+PREFIXO = "etl_"
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _escapar(valor, aspas: bool = True) -> str:
+    texto = str(valor).replace("\\", "\\\\").replace("\n", "\\n")
+    return texto.replace('"', '\\"') if aspas else texto
+
+
+def _numero(valor) -> str:
+    # Sem notação científica truncada (timestamps, bytes)
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class RegistroMetricas:
+    """
+    Séries em memória: (nome, rótulos) -> valor
+
+    Contadores só aumentam (somados ao mesclar); medidores guardam o último valor.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tipos = {}    # nome -> (tipo, ajuda)
+        self._series = {}   # (nome, ((rotulo, valor), ...)) -> número
+
+    def _declarar(self, nome: str, tipo: str, ajuda: str):
+        anterior = self._tipos.setdefault(nome, (tipo, ajuda))
+        if anterior[0] != tipo:
+            raise ValueError(f"❌ Métrica '{nome}' já declarada como {anterior[0]}")
+
+    def incrementar(self, nome: str, valor: float = 1, ajuda: str = "", **rotulos):
+        """Soma `valor` a um contador"""
+        chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+        with self._lock:
+            self._declarar(nome, "counter", ajuda)
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def definir(self, nome: str, valor: float, ajuda: str = "", **rotulos):
+        """Define o valor atual de um medidor"""
+        chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+        with self._lock:
+            self._declarar(nome, "gauge", ajuda)
+            self._series[chave] = valor
+
+    def exportar(self) -> dict:
+        """Cópia serializável do registro (para enviar de um processo filho ao pai)"""
+        with self._lock:
+            return {"tipos": dict(self._tipos), "series": dict(self._series)}
+
+    def mesclar(self, dados: dict):
+        """Incorpora um registro exportado: contadores somam, medidores sobrescrevem"""
+        with self._lock:
+            for nome, (tipo, ajuda) in dados["tipos"].items():
+                self._declarar(nome, tipo, ajuda)
+            for chave, valor in dados["series"].items():
+                if self._tipos[chave[0]][0] == "counter":
+                    self._series[chave] = self._series.get(chave, 0) + valor
+                else:
+                    self._series[chave] = valor
+
+    def zerar(self):
+        with self._lock:
+            self._tipos.clear()
+            self._series.clear()
+
+    def texto(self) -> str:
+        """Registro no formato de exposição texto do Prometheus (contadores com sufixo _total)"""
+        with self._lock:
+            tipos = dict(self._tipos)
+            series = sorted(self._series.items())
+
+        linhas = []
+        for nome, (tipo, ajuda) in sorted(tipos.items()):
+            completo = PREFIXO + nome + ("_total" if tipo == "counter" else "")
+            if ajuda:
+                linhas.append(f"# HELP {completo} {_escapar(ajuda, aspas=False)}")
+            linhas.append(f"# TYPE {completo} {tipo}")
+            for (nome_serie, rotulos), valor in series:
+                if nome_serie != nome:
+                    continue
+                texto_rotulos = ",".join(f'{k}="{_escapar(v)}"' for k, v in rotulos)
+                texto_rotulos = f"{{{texto_rotulos}}}" if texto_rotulos else ""
+                linhas.append(f"{completo}{texto_rotulos} {_numero(valor)}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, caminho):
+        """Grava o arquivo de forma atômica (o coletor nunca lê um arquivo pela metade)"""
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_name(f".{caminho.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.texto())
+            os.replace(tmp, caminho)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+
+def pico_memoria_bytes():
+    """Pico de memória residente (RSS) do processo, ou None se indisponível"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS em bytes
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def registrar_fim_execucao(duracao: float, status: str):
+    """
+    Fecha as métricas da execução (ou ciclo do daemon) e grava o arquivo, se configurado
+
+    Inclui os totais de SQL da execução (estatisticas_sql) e o pico de memória.
+    """
+    from src.utils.db_metrics import estatisticas_sql
+
+    totais = estatisticas_sql.totais()
+    metricas.incrementar("sql_chamadas", totais["chamadas"], "Idas ao banco (comandos, commits e rollbacks)")
+    metricas.incrementar("sql_linhas", totais["linhas_entrada"], "Linhas trafegadas com o banco", direcao="enviadas")
+    metricas.incrementar("sql_linhas", totais["linhas_saida"], "Linhas trafegadas com o banco", direcao="recebidas")
+    metricas.incrementar("sql_segundos", totais["segundos"], "Tempo gasto em comandos SQL")
+
+    metricas.incrementar("execucoes", 1, "Execuções do pipeline por status final", status=status)
+    metricas.definir("execucao_duracao_segundos", round(duracao, 3), "Duração da última execução")
+    metricas.definir("execucao_ultima_timestamp_segundos", int(time.time()), "Fim da última execução (epoch)")
+    pico = pico_memoria_bytes()
+    if pico is not None:
+        metricas.definir("memoria_pico_bytes", pico, "Pico de memória residente do processo")
+
+    if Config.METRICAS_ARQUIVO:
+        try:
+            metricas.gravar(Config.METRICAS_ARQUIVO)
+        except OSError as e:
+            logger.warning(f"⚠️  Não foi possível gravar as métricas em {Config.METRICAS_ARQUIVO}: {e}")
+
+
+# Instância global
+metricas = RegistroMetricas()
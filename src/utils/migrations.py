@@ -0,0 +1,242 @@
+"""
+🧬 MIGRAÇÕES VERSIONADAS DO SCHEMA
+Aplica, em ordem, os scripts database/migrations/V<versao>__<descricao>.sql
+que ainda não constam da tabela dbo.schema_migrations
+
+Cada script é dividido em lotes nas linhas "GO" (como no SSMS/sqlcmd) e
+aplicado em uma única transação junto com o seu registro: ou o script entra
+inteiro, ou nada muda. Um script já aplicado cujo conteúdo mudou (checksum)
+interrompe a migração. Instâncias simultâneas se excluem por sp_getapplock.
+
+Uso:
+    python -m src.utils.migrations              # aplica as pendentes
+    python -m src.utils.migrations --status     # aplicadas e pendentes
+    python -m src.utils.migrations --dry-run    # só lista o que seria aplicado
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+import time
+from pathlib import Path
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Migrations")
+
+DIR_MIGRACOES = Path(__file__).resolve().parents[2] / "database" / "migrations"
+
+_RE_ARQUIVO = re.compile(r"^V(?P<versao>\d+)__(?P<descricao>\w+)\.sql$", re.IGNORECASE)
+_RE_GO = re.compile(r"^[ \t]*GO[ \t]*(?:--.*)?$", re.IGNORECASE | re.MULTILINE)
+
+
+class Migracao:
+    """Um script de migração: versão, descrição, lotes e checksum do conteúdo"""
+
+    def __init__(self, caminho: Path):
+        m = _RE_ARQUIVO.match(caminho.name)
+        if not m:
+            raise ValueError(f"Nome de migração inválido: {caminho.name} (esperado V<versao>__<descricao>.sql)")
+        self.caminho = caminho
+        self.versao = int(m.group("versao"))
+        self.descricao = m.group("descricao").replace("_", " ")
+        # Quebras de linha normalizadas: o checkout no Windows (CRLF) não muda o checksum
+        self.texto = caminho.read_text(encoding="utf-8-sig").replace("\r\n", "\n")
+        self.checksum = hashlib.sha256(self.texto.encode("utf-8")).hexdigest()
+
+    def __repr__(self):
+        return f"V{self.versao:03d} {self.descricao}"
+
+    def lotes(self) -> list:
+        """Comandos do script separados pelas linhas GO (lotes vazios descartados)"""
+        return [lote.strip() for lote in _RE_GO.split(self.texto) if lote.strip()]
+
+
+def descobrir_migracoes(pasta=None) -> list:
+    """
+    Scripts da pasta de migrações, em ordem de versão
+
+    Raises:
+        ValueError: Nome fora do padrão ou versão repetida
+    """
+    pasta = Path(pasta or DIR_MIGRACOES)
+    migracoes = sorted((Migracao(p) for p in pasta.glob("*.sql")), key=lambda m: m.versao)
+    for anterior, atual in zip(migracoes, migracoes[1:]):
+        if anterior.versao == atual.versao:
+            raise ValueError(f"Versão {atual.versao} repetida: {anterior.caminho.name} e {atual.caminho.name}")
+    return migracoes
+
+
+class MigradorSchema:
+    """
+    Aplica as migrações pendentes em uma conexão pyodbc (autocommit desligado)
+
+    Args:
+        conn: Conexão com o banco (ex.: db_manager.get_connection())
+        pasta: Pasta dos scripts (padrão: database/migrations)
+    """
+
+    # Ver database/ddl (...)/estrutura_dbo_schema_migrations.sql
+    SQL_CRIAR = """
+        IF OBJECT_ID('dbo.schema_migrations', 'U') IS NULL
+        CREATE TABLE dbo.schema_migrations (
+            versao INT NOT NULL CONSTRAINT PK_schema_migrations PRIMARY KEY,
+            descricao VARCHAR(200) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            duracao_ms INT NOT NULL,
+            aplicada_em DATETIME2(0) NOT NULL CONSTRAINT DF_schema_migrations_aplicada_em DEFAULT (SYSDATETIME())
+        )
+    """
+
+    SQL_APLICADAS = "SELECT versao, checksum FROM schema_migrations"
+
+    # Trava liberada no commit/rollback da migração
+    SQL_TRAVA = """
+        DECLARE @resultado INT;
+        EXEC @resultado = sp_getapplock @Resource = 'etl_schema_migrations', @LockMode = 'Exclusive',
+                                        @LockOwner = 'Transaction', @LockTimeout = 600000;
+        IF @resultado < 0 THROW 50000, 'Trava das migrações não obtida (outra instância migrando?)', 1;
+    """
+
+    SQL_REGISTRAR = """
+        INSERT INTO schema_migrations (versao, descricao, checksum, duracao_ms)
+        VALUES (?, ?, ?, ?)
+    """
+
+    def __init__(self, conn, pasta=None):
+        self.conn = conn
+        self.migracoes = descobrir_migracoes(pasta)
+
+    def aplicadas(self) -> dict:
+        """versão -> checksum das migrações registradas (cria a tabela de controle se preciso)"""
+        cursor = self.conn.cursor()
+        cursor.execute(self.SQL_CRIAR)
+        self.conn.commit()
+        cursor.execute(self.SQL_APLICADAS)
+        return {int(versao): str(checksum).strip() for versao, checksum in cursor.fetchall()}
+
+    def verificar(self, aplicadas: dict) -> list:
+        """
+        Confere os scripts já aplicados e retorna os pendentes
+
+        Raises:
+            ValueError: Script aplicado foi alterado ou não existe mais na pasta
+        """
+        por_versao = {m.versao: m for m in self.migracoes}
+        for versao, checksum in sorted(aplicadas.items()):
+            migracao = por_versao.get(versao)
+            if migracao is None:
+                raise ValueError(f"Migração V{versao:03d} consta no banco mas não existe em {DIR_MIGRACOES}")
+            if migracao.checksum != checksum:
+                raise ValueError(
+                    f"{migracao.caminho.name} foi alterada depois de aplicada: "
+                    f"crie uma nova versão em vez de editar a antiga"
+                )
+        return [m for m in self.migracoes if m.versao not in aplicadas]
+
+    def pendentes(self) -> list:
+        return self.verificar(self.aplicadas())
+
+    def aplicar(self, migracao: Migracao) -> bool:
+        """
+        Executa os lotes e registra a migração na mesma transação
+
+        Returns:
+            False se outra instância já a aplicou enquanto esta esperava a trava
+
+        Raises:
+            Exception: Erro do banco (a transação é desfeita)
+        """
+        cursor = self.conn.cursor()
+        lotes = migracao.lotes()
+        inicio = time.perf_counter()
+        try:
+            cursor.execute(self.SQL_TRAVA)
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE versao = ?", migracao.versao)
+            if cursor.fetchone():
+                self.conn.rollback()
+                return False
+
+            for numero, lote in enumerate(lotes, 1):
+                try:
+                    cursor.execute(lote)
+                except Exception as e:
+                    raise RuntimeError(f"{migracao.caminho.name}, lote {numero}/{len(lotes)}: {e}") from e
+
+            duracao_ms = int((time.perf_counter() - inicio) * 1000)
+            cursor.execute(self.SQL_REGISTRAR, migracao.versao, migracao.descricao[:200], migracao.checksum, duracao_ms)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        logger.info(f"   ✅ {migracao} ({len(lotes)} lote(s), {duracao_ms} ms)")
+        return True
+
+    def migrar(self, simular: bool = False) -> list:
+        """
+        Aplica todas as pendentes em ordem (para na primeira falha)
+
+        Args:
+            simular: Só lista as pendentes, sem executar nada
+
+        Returns:
+            Migrações aplicadas (ou que seriam aplicadas, ao simular)
+        """
+        pendentes = self.pendentes()
+        if not pendentes:
+            logger.info("✅ Schema atualizado: nenhuma migração pendente")
+            return []
+
+        logger.info(f"🧬 {len(pendentes)} migração(ões) pendente(s)")
+        if simular:
+            for migracao in pendentes:
+                logger.info(f"   • {migracao} ({len(migracao.lotes())} lote(s))")
+            return pendentes
+
+        aplicadas = []
+        for migracao in pendentes:
+            if self.aplicar(migracao):
+                aplicadas.append(migracao)
+            else:
+                logger.info(f"   ⏭️  {migracao} já aplicada por outra instância")
+        return aplicadas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Migrações versionadas do schema (database/migrations)")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--status", action="store_true", help="Lista migrações aplicadas e pendentes")
+    grupo.add_argument("--dry-run", action="store_true", help="Mostra o que seria aplicado, sem executar")
+    args = parser.parse_args(argv)
+
+    from src.utils.config import Config
+    from src.utils.database import db_manager
+
+    Config.validate()
+    conn = db_manager.get_connection()
+    try:
+        migrador = MigradorSchema(conn)
+        if args.status:
+            aplicadas = migrador.aplicadas()
+            pendentes = migrador.verificar(aplicadas)
+            for migracao in migrador.migracoes:
+                situacao = "pendente" if migracao in pendentes else "aplicada"
+                print(f"{migracao!r:<50}{situacao}")
+            return 0
+
+        migrador.migrar(simular=args.dry_run)
+        return 0
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return 1
+    except Exception as e:
+        logger.error(f"💥 Migração interrompida: {e}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+🕸️ EXECUTOR DE PIPELINE EM DAG
+Executa tarefas com entradas/saídas declaradas, rodando em paralelo as que já estão prontas
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+
+from src.utils.db_metrics import estatisticas_sql
+from src.utils.logger import EncaminhadorFilhos, inicializar_filho, setup_logger
+from src.utils.metrics import metricas
+
+logger = setup_logger("PipelineDAG")
+
+
+class ErroDAG(Exception):
+    """Erro de definição ou de execução do DAG"""
+
+
+class Tarefa:
+    """
+    Nó do DAG
+
+    Args:
+        nome: Identificador único da tarefa
+        funcao: Callable que recebe as entradas como argumentos nomeados
+        entradas: Nomes das saídas de outras tarefas das quais esta depende
+        saidas: Nomes dos valores produzidos (uma saída = retorno direto,
+                várias saídas = tupla na mesma ordem)
+        pool: "thread" (padrão, I/O e banco) ou "processo" (CPU pesado)
+    """
+
+    def __init__(self, nome: str, funcao: Callable, entradas: List[str] = None,
+                 saidas: List[str] = None, pool: str = "thread"):
+        if pool not in ("thread", "processo"):
+            raise ErroDAG(f"❌ Pool inválido para '{nome}': {pool}")
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = list(entradas or [])
+        self.saidas = list(saidas or [])
+        self.pool = pool
+
+
+def _executar_cronometrado(funcao: Callable, argumentos: dict, pid_pai: int):
+    """
+    Executa a função registrando início e fim (nível de módulo para ser serializável)
+
+    Em um processo filho, devolve também as métricas e as medições de SQL
+    registradas pela tarefa, que o processo principal incorpora às suas.
+    """
+    filho = os.getpid() != pid_pai
+    if filho:
+        # Com fork, o filho herda as medições que o pai já tinha
+        metricas.zerar()
+        estatisticas_sql.zerar()
+
+    inicio = time.time()
+    resultado = funcao(**argumentos)
+    fim = time.time()
+
+    medicoes_filho = None
+    if filho:
+        medicoes_filho = (metricas.exportar(), estatisticas_sql.exportar())
+    return resultado, inicio, fim, medicoes_filho
+
+
+class ExecutorDAG:
+    """Escalonador que dispara cada tarefa assim que todas as suas entradas estão prontas"""
+
+    def __init__(self, tarefas: List[Tarefa], max_threads: int = 4, max_processos: int = 2,
+                 ao_concluir: Callable = None):
+        """
+        Args:
+            tarefas: Nós do DAG
+            max_threads: Tamanho do pool de threads
+            max_processos: Tamanho do pool de processos (criado só se alguma tarefa usar)
+            ao_concluir: Callback opcional (nome, resultado) chamado no processo principal
+                         assim que cada tarefa termina com sucesso
+        """
+        self.ao_concluir = ao_concluir
+        self.tarefas = {t.nome: t for t in tarefas}
+        if len(self.tarefas) != len(tarefas):
+            raise ErroDAG("❌ Nomes de tarefa duplicados no DAG")
+
+        self.max_threads = max_threads
+        self.max_processos = max_processos
+        self.produtor = self._mapear_produtores()
+        self.dependencias = {
+            t.nome: {self.produtor[e] for e in t.entradas} for t in tarefas
+        }
+        self._validar_aciclico()
+
+        self.resultados: Dict[str, object] = {}
+        self.tempos: Dict[str, tuple] = {}
+        self.inicio = None
+        self.fim = None
+
+    def _mapear_produtores(self) -> dict:
+        """Mapeia cada saída para a tarefa que a produz"""
+        produtor = {}
+        for tarefa in self.tarefas.values():
+            for saida in tarefa.saidas:
+                if saida in produtor:
+                    raise ErroDAG(f"❌ Saída '{saida}' produzida por mais de uma tarefa")
+                produtor[saida] = tarefa.nome
+
+        for tarefa in self.tarefas.values():
+            faltantes = [e for e in tarefa.entradas if e not in produtor]
+            if faltantes:
+                raise ErroDAG(f"❌ Tarefa '{tarefa.nome}' depende de saídas inexistentes: {faltantes}")
+        return produtor
+
+    def _validar_aciclico(self):
+        """Ordenação topológica (Kahn) apenas para detectar ciclos"""
+        pendentes = {nome: set(deps) for nome, deps in self.dependencias.items()}
+        while pendentes:
+            prontas = [nome for nome, deps in pendentes.items() if not deps]
+            if not prontas:
+                raise ErroDAG(f"❌ Ciclo detectado entre as tarefas: {sorted(pendentes)}")
+            for nome in prontas:
+                del pendentes[nome]
+            for deps in pendentes.values():
+                deps.difference_update(prontas)
+
+    def executar(self) -> Dict[str, object]:
+        """
+        Executa o DAG até o fim
+
+        Returns:
+            Dicionário saída -> valor produzido
+
+        Raises:
+            ErroDAG: Se alguma tarefa falhar (as demais em andamento terminam antes)
+        """
+        self.inicio = time.time()
+        concluidas = set()
+        em_andamento = {}
+        erro = None
+
+        threads = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="dag")
+        processos = None
+        encaminhador = None
+        if any(t.pool == "processo" for t in self.tarefas.values()):
+            # O log dos filhos é gravado por este processo (um único dono do arquivo)
+            encaminhador = EncaminhadorFilhos()
+            encaminhador.iniciar()
+            processos = ProcessPoolExecutor(
+                max_workers=self.max_processos, initializer=inicializar_filho, initargs=(encaminhador.fila,)
+            )
+
+        try:
+            while len(concluidas) < len(self.tarefas):
+                if erro is None:
+                    for nome, tarefa in self.tarefas.items():
+                        if nome in concluidas or nome in em_andamento.values():
+                            continue
+                        if not self.dependencias[nome] <= concluidas:
+                            continue
+
+                        argumentos = {e: self.resultados[e] for e in tarefa.entradas}
+                        pool = processos if tarefa.pool == "processo" else threads
+                        futuro = pool.submit(_executar_cronometrado, tarefa.funcao, argumentos, os.getpid())
+                        em_andamento[futuro] = nome
+
+                if not em_andamento:
+                    break
+
+                prontos, _ = wait(list(em_andamento), return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    nome = em_andamento.pop(futuro)
+                    # Saídas com aridade errada e falhas ao registrar a conclusão
+                    # contam como falha da tarefa
+                    try:
+                        resultado, inicio, fim, medicoes_filho = futuro.result()
+                        self.tempos[nome] = (inicio, fim)
+                        if medicoes_filho:
+                            metricas_filho, sql_filho = medicoes_filho
+                            metricas.mesclar(metricas_filho)
+                            estatisticas_sql.mesclar(sql_filho)
+                        self._registrar_saidas(self.tarefas[nome], resultado)
+                        if self.ao_concluir:
+                            self.ao_concluir(nome, resultado)
+                    except Exception as e:
+                        logger.error(f"   ❌ Tarefa '{nome}' falhou: {e}")
+                        erro = erro or ErroDAG(f"Tarefa '{nome}' falhou: {e}")
+                        continue
+                    concluidas.add(nome)
+        finally:
+            threads.shutdown(wait=True)
+            if processos:
+                processos.shutdown(wait=True)
+            if encaminhador:
+                encaminhador.parar()
+            self.fim = time.time()
+
+        if erro:
+            raise erro
+        return self.resultados
+
+    def _registrar_saidas(self, tarefa: Tarefa, resultado):
+        """Guarda o retorno da tarefa sob o(s) nome(s) de saída declarado(s)"""
+        if not tarefa.saidas:
+            return
+        if len(tarefa.saidas) == 1:
+            self.resultados[tarefa.saidas[0]] = resultado
+            return
+        if not isinstance(resultado, tuple) or len(resultado) != len(tarefa.saidas):
+            raise ErroDAG(f"deveria retornar {len(tarefa.saidas)} valores, retornou {resultado!r}")
+        self.resultados.update(zip(tarefa.saidas, resultado))
+
+    def caminho_critico(self) -> List[str]:
+        """
+        Reconstrói o caminho crítico: parte da última tarefa a terminar e volta
+        sempre pela dependência que terminou por último
+
+        Returns:
+            Lista de nomes de tarefa, da primeira à última
+        """
+        if not self.tempos:
+            return []
+
+        atual = max(self.tempos, key=lambda nome: self.tempos[nome][1])
+        caminho = [atual]
+        while self.dependencias[atual]:
+            atual = max(self.dependencias[atual], key=lambda nome: self.tempos[nome][1])
+            caminho.append(atual)
+        return list(reversed(caminho))
+
+    def relatorio_tempos(self):
+        """Registra no log a duração de cada tarefa e o caminho crítico"""
+        if not self.tempos:
+            return
+
+        logger.info("⏱️  Tempos por tarefa:")
+        for nome, (inicio, fim) in sorted(self.tempos.items(), key=lambda item: item[1][0]):
+            logger.info(
+                f"   • {nome}: {fim - inicio:.2f}s "
+                f"(início +{inicio - self.inicio:.2f}s, fim +{fim - self.inicio:.2f}s)"
+            )
+
+        caminho = self.caminho_critico()
+        trechos = [f"{nome} ({self.tempos[nome][1] - self.tempos[nome][0]:.2f}s)" for nome in caminho]
+        total = self.tempos[caminho[-1]][1] - self.inicio
+        logger.info(f"🧭 Caminho crítico: {' → '.join(trechos)} = {total:.2f}s")
@@ -0,0 +1,143 @@
+"""
+⏳ PROGRESSO DE ETAPAS LONGAS
+Contador de unidades processadas (linhas, arquivos, lotes) com taxa e ETA
+
+Em um terminal a linha de progresso é redesenhada no lugar (stderr); fora
+dele (cron, Docker, daemon) são emitidos eventos de log periódicos, com os
+números também em campos estruturados no JSON Lines. As atualizações são
+limitadas por tempo: avançar custa uma soma e uma leitura de relógio, e
+etapas mais curtas que o intervalo não geram nenhuma saída.
+"""
+
+import sys
+import threading
+import time
+
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Progresso")
+
+# Intervalo entre redesenhos da linha no terminal
+INTERVALO_TTY = 0.2
+
+
+def _duracao(segundos: float) -> str:
+    segundos = int(segundos)
+    return f"{segundos // 3600}:{segundos // 60 % 60:02d}:{segundos % 60:02d}"
+
+
+def _modo() -> str:
+    modo = Config.PROGRESSO_MODO
+    if modo == "auto":
+        return "tty" if sys.stderr.isatty() else "log"
+    return modo
+
+
+class Progresso:
+    """
+    Progresso de uma etapa (thread-safe: partições paralelas podem avançar o mesmo)
+
+    Uso:
+        with Progresso("Carga de despesas", total=len(df), unidade="linhas") as progresso:
+            for lote in lotes:
+                ...
+                progresso.avancar(len(lote))
+
+    Args:
+        descricao: Nome da etapa exibido
+        total: Unidades esperadas (None = desconhecido, sem percentual/ETA)
+        unidade: Nome da unidade contada
+    """
+
+    def __init__(self, descricao: str, total: int = None, unidade: str = "itens"):
+        self.descricao = descricao
+        self.total = total
+        self.unidade = unidade
+        self.feito = 0
+        self.detalhes = {}
+        self.modo = _modo()
+        self.intervalo = INTERVALO_TTY if self.modo == "tty" else Config.PROGRESSO_INTERVALO_S
+        self.inicio = time.monotonic()
+        self._proximo = self.inicio + self.intervalo
+        self._lock = threading.Lock()
+        self._concluido = False
+        self._emitidos = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        self.concluir()
+
+    def avancar(self, quantidade: int = 1, **detalhes):
+        """
+        Soma unidades processadas
+
+        Args:
+            quantidade: Unidades concluídas
+            **detalhes: Contadores secundários somados e exibidos (ex.: linhas=5000)
+        """
+        if self.modo == "off":
+            return
+        agora = time.monotonic()
+        with self._lock:
+            self.feito += quantidade
+            for nome, valor in detalhes.items():
+                self.detalhes[nome] = self.detalhes.get(nome, 0) + valor
+            if agora < self._proximo:
+                return
+            self._proximo = agora + self.intervalo
+            self._emitir(agora)
+
+    def concluir(self):
+        """Registra o estado final no log, se algum progresso chegou a ser exibido"""
+        if self.modo == "off":
+            return
+        with self._lock:
+            if self._concluido or not self._emitidos:
+                return
+            self._concluido = True
+            if self.modo == "tty":
+                sys.stderr.write("\r\033[K")
+                sys.stderr.flush()
+            estado = self.estado()
+            logger.info(f"   ✅ {self._texto(estado, final=True)}", extra={"progresso": estado})
+
+    def estado(self, agora: float = None) -> dict:
+        """Números atuais: feito, total, percentual, taxa (unidades/s) e ETA (s)"""
+        decorrido = max((agora or time.monotonic()) - self.inicio, 1e-9)
+        taxa = self.feito / decorrido
+        estado = {
+            "etapa": self.descricao, "unidade": self.unidade, "feito": self.feito,
+            "total": self.total, "decorrido_s": round(decorrido, 1), "taxa": round(taxa, 1),
+            "percentual": None, "eta_s": None, **self.detalhes,
+        }
+        if self.total:
+            estado["percentual"] = round(min(self.feito / self.total, 1.0) * 100, 1)
+            if taxa > 0:
+                estado["eta_s"] = round(max(self.total - self.feito, 0) / taxa, 1)
+        return estado
+
+    def _texto(self, estado: dict, final: bool) -> str:
+        if estado["total"]:
+            contagem = f"{estado['feito']}/{estado['total']} {self.unidade} ({estado['percentual']:.1f}%)"
+        else:
+            contagem = f"{estado['feito']} {self.unidade}"
+        partes = [f"{self.descricao}: {contagem}", f"{estado['taxa']:.1f} {self.unidade}/s"]
+        if final:
+            partes.append(f"em {_duracao(estado['decorrido_s'])}")
+        elif estado["eta_s"] is not None:
+            partes.append(f"ETA {_duracao(estado['eta_s'])}")
+        partes += [f"{nome} {valor}" for nome, valor in self.detalhes.items()]
+        return " | ".join(partes)
+
+    def _emitir(self, agora: float):
+        estado = self.estado(agora)
+        texto = self._texto(estado, final=False)
+        self._emitidos += 1
+        if self.modo == "tty":
+            sys.stderr.write(f"\r\033[K⏳ {texto}")
+            sys.stderr.flush()
+        else:
+            logger.info(f"   ⏳ {texto}", extra={"progresso": estado})
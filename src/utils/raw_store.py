@@ -0,0 +1,260 @@
+"""
+🗄️ ARMAZÉM RAW ENDEREÇADO POR CONTEÚDO
+Guarda cada exportação uma única vez (pelo SHA-256) e materializa os nomes de
+trabalho em data/raw como clones (reflink) ou cópias somente leitura: editar um
+arquivo de trabalho nunca altera o objeto guardado
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.utils.hashing import TAMANHO_BLOCO, hash_arquivo
+
+try:
+    import fcntl
+    _FICLONE = 0x40049409  # ioctl FICLONE (Linux: btrfs, xfs, ...)
+except ImportError:  # Windows
+    fcntl = None
+    _FICLONE = None
+
+
+def _reflink(origem: Path, destino: Path) -> bool:
+    """Tenta clonar o arquivo (copy-on-write); False se o sistema não suportar"""
+    if fcntl is None:
+        return False
+    try:
+        with open(origem, "rb") as f_in, open(destino, "wb") as f_out:
+            fcntl.ioctl(f_out.fileno(), _FICLONE, f_in.fileno())
+        return True
+    except OSError:
+        if destino.exists():
+            destino.unlink()
+        return False
+
+
+def _clonar(origem: Path, destino: Path) -> str:
+    """
+    Cria `destino` com o conteúdo de `origem` como um arquivo independente
+    (reflink quando o sistema permite, senão cópia) e somente leitura
+
+    Returns:
+        "reflink" ou "copia"
+    """
+    modo = "reflink" if _reflink(origem, destino) else "copia"
+    if modo == "copia":
+        shutil.copy2(origem, destino)
+    os.chmod(destino, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+    return modo
+
+
+def datas_arquivamento(pasta_raw) -> dict:
+    """
+    Data em que cada arquivo de trabalho de pasta_raw foi materializado pelo armazém
+
+    Só valem as entradas cujo arquivo continua como foi materializado (mesmo
+    tamanho e mtime): um arquivo trocado por fora do armazém fica de fora.
+
+    Returns:
+        Dicionário nome -> timestamp (vazio se a pasta não tiver armazém)
+    """
+    pasta_raw = Path(pasta_raw)
+    try:
+        with open(pasta_raw / ArmazemRaw.PASTA_OBJETOS / ArmazemRaw.ARQUIVO_INDICE, "r", encoding="utf-8") as f:
+            arquivados = json.load(f).get("arquivados", {})
+    except (OSError, ValueError):
+        return {}
+
+    datas = {}
+    for nome, registro in arquivados.items():
+        try:
+            estado = (pasta_raw / nome).stat()
+        except OSError:
+            continue
+        if (estado.st_size, estado.st_mtime_ns) == (registro["tamanho"], registro["mtime_ns"]):
+            datas[nome] = registro["arquivado_em"]
+    return datas
+
+
+class ArmazemRaw:
+    """
+    Armazém em <pasta_raw>/.objetos
+
+    Estrutura:
+        .objetos/ab/abcdef...   conteúdo (nome = SHA-256)
+        .objetos/indice.json    {"nomes": {nome: hash}, "stat": {chave_stat: hash},
+                                 "arquivados": {nome: {arquivado_em, tamanho, mtime_ns}}}
+
+    O cache "stat" (caminho, tamanho, mtime_ns, inode) evita re-hashear um
+    arquivo de origem que não mudou desde a última ingestão. "arquivados"
+    guarda quando cada nome de trabalho recebeu seu conteúdo atual: é essa
+    data, e não o mtime (que o clone/cópia herda do objeto), que define a
+    versão mais recente na descoberta de fontes (ver datas_arquivamento).
+    """
+
+    PASTA_OBJETOS = ".objetos"
+    ARQUIVO_INDICE = "indice.json"
+
+    def __init__(self, pasta_raw):
+        self.pasta_raw = Path(pasta_raw)
+        self.pasta_objetos = self.pasta_raw / self.PASTA_OBJETOS
+        self.pasta_tmp = self.pasta_objetos / "tmp"
+        self.caminho_indice = self.pasta_objetos / self.ARQUIVO_INDICE
+        self.pasta_tmp.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.indice = self._carregar_indice()
+
+    def _carregar_indice(self) -> dict:
+        try:
+            with open(self.caminho_indice, "r", encoding="utf-8") as f:
+                indice = json.load(f)
+            return {
+                "nomes": indice.get("nomes", {}),
+                "stat": indice.get("stat", {}),
+                "arquivados": indice.get("arquivados", {}),
+            }
+        except (OSError, ValueError):
+            return {"nomes": {}, "stat": {}, "arquivados": {}}
+
+    def salvar_indice(self):
+        """Grava o índice de forma atômica, descartando entradas de stat de arquivos que sumiram"""
+        with self._lock:
+            self.indice["stat"] = {
+                chave: h for chave, h in self.indice["stat"].items()
+                if os.path.exists(chave.rsplit("|", 3)[0])
+            }
+            tmp = self.caminho_indice.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.indice, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.caminho_indice)
+
+    def caminho_objeto(self, hash_conteudo: str) -> Path:
+        return self.pasta_objetos / hash_conteudo[:2] / hash_conteudo
+
+    @staticmethod
+    def _chave_stat(caminho: Path) -> str:
+        estado = caminho.stat()
+        return f"{caminho.resolve()}|{estado.st_size}|{estado.st_mtime_ns}|{estado.st_ino}"
+
+    def arquivar(self, origem, mover: bool = False) -> tuple:
+        """
+        Guarda o conteúdo de `origem` no armazém (se ainda não estiver lá)
+        e materializa pasta_raw/<nome> apontando para ele
+
+        Args:
+            origem: Arquivo a arquivar
+            mover: A origem será apagada em seguida; só então o objeto pode ser
+                   um hardlink dela (senão uma edição na origem alteraria o objeto)
+
+        Returns:
+            (hash, situação) com situação em "inalterado", "novo" ou "atualizado"
+        """
+        origem = Path(origem)
+        chave_stat = self._chave_stat(origem)
+        with self._lock:
+            hash_conteudo = self.indice["stat"].get(chave_stat)
+
+        if hash_conteudo is None or not self.caminho_objeto(hash_conteudo).exists():
+            hash_conteudo = self._importar(origem, mover)
+            with self._lock:
+                self.indice["stat"][chave_stat] = hash_conteudo
+
+        destino = self.pasta_raw / origem.name
+        with self._lock:
+            anterior = self.indice["nomes"].get(origem.name)
+
+        if anterior == hash_conteudo and destino.exists():
+            return hash_conteudo, "inalterado"
+
+        self._materializar(hash_conteudo, destino)
+        estado = destino.stat()
+        with self._lock:
+            self.indice["nomes"][origem.name] = hash_conteudo
+            self.indice["arquivados"][origem.name] = {
+                "arquivado_em": time.time(), "tamanho": estado.st_size, "mtime_ns": estado.st_mtime_ns,
+            }
+        return hash_conteudo, "novo" if anterior is None else "atualizado"
+
+    def _importar(self, origem: Path, mover: bool) -> str:
+        """
+        Coloca o arquivo no armazém lendo-o uma única vez
+
+        Com hardlink/reflink (mesmo disco) só o hash lê os bytes; sem eles,
+        a cópia e o hash acontecem na mesma passada.
+        """
+        tmp = self.pasta_tmp / uuid.uuid4().hex
+        try:
+            vinculado = False
+            if mover:
+                try:
+                    os.link(origem, tmp)
+                    vinculado = True
+                except OSError:
+                    pass
+            if vinculado or _reflink(origem, tmp):
+                hash_conteudo = hash_arquivo(tmp)
+            else:
+                hash_conteudo = self._copiar_com_hash(origem, tmp)
+
+            objeto = self.caminho_objeto(hash_conteudo)
+            if not objeto.exists():
+                objeto.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, objeto)
+            return hash_conteudo
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    @staticmethod
+    def _copiar_com_hash(origem: Path, destino: Path) -> str:
+        """Copia em blocos calculando o SHA-256 ao mesmo tempo"""
+        h = hashlib.sha256()
+        with open(origem, "rb") as f_in, open(destino, "wb") as f_out:
+            for bloco in iter(lambda: f_in.read(TAMANHO_BLOCO), b""):
+                h.update(bloco)
+                f_out.write(bloco)
+        shutil.copystat(origem, destino)
+        return h.hexdigest()
+
+    def _materializar(self, hash_conteudo: str, destino: Path):
+        """Troca atomicamente o arquivo de trabalho por um clone somente leitura do objeto"""
+        tmp = destino.with_name(f".{destino.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            _clonar(self.caminho_objeto(hash_conteudo), tmp)
+            if destino.exists():
+                # No Windows, os.replace não sobrescreve um arquivo somente leitura
+                os.chmod(destino, stat.S_IREAD | stat.S_IWRITE)
+            os.replace(tmp, destino)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def arquivar_varios(self, arquivos: list, max_threads: int = 4, mover: bool = False) -> list:
+        """
+        Arquiva vários arquivos em paralelo (hash/cópia são I/O e liberam o GIL)
+
+        Returns:
+            Lista de (arquivo, hash, situação) ou (arquivo, None, mensagem de erro), na ordem recebida
+        """
+        def tarefa(arquivo):
+            try:
+                return (arquivo, *self.arquivar(arquivo, mover))
+            except OSError as e:
+                return arquivo, None, str(e)
+
+        if len(arquivos) <= 1 or max_threads <= 1:
+            resultados = [tarefa(a) for a in arquivos]
+        else:
+            with ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="raw") as executor:
+                resultados = list(executor.map(tarefa, arquivos))
+
+        self.salvar_indice()
+        return resultados
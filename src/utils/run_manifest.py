@@ -0,0 +1,234 @@
+"""
+🧾 MANIFESTO DE EXECUÇÃO (CHECKPOINTS)
+Registra, por execução, as etapas concluídas (com hash de entradas e saídas),
+permitindo retomar uma execução interrompida
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.hashing import hash_arquivo
+from src.utils.logger import setup_logger
+
+logger = setup_logger("RunManifest")
+
+
+class ManifestoExecucao:
+    """
+    Manifesto JSON na pasta da execução (DIR_STAGING/runs/<run_id>/manifesto_execucao.json)
+
+    Estrutura:
+        run_id, escopo, status (em_andamento | concluido | cancelado), criado_em,
+        etapas: {nome: {entradas: {arquivo: hash}, saidas: {arquivo: hash}, resultado, concluida_em}},
+        lotes: {lote_id: {particao, linha_inicio, linha_fim, qtd_linhas, qtd_insert, qtd_update, commitado_em}}
+
+    Cada lote de carga commitado é registrado logo após o commit como uma linha
+    de lotes.jsonl, ao lado do manifesto (só acréscimo: o custo por lote não
+    cresce com a carga); as linhas são incorporadas a `lotes` na retomada e
+    ao finalizar.
+    Quem decide se um lote é pulado é a tabela etl_load_journal, gravada na
+    mesma transação do lote; aqui fica o registro da execução (um lote
+    commitado pouco antes de uma queda pode faltar no manifesto, nunca no journal).
+
+    Se o manifesto anterior ainda estiver "em_andamento", a execução é retomada;
+    caso contrário, uma nova execução é iniciada.
+
+    Args:
+        dir_staging: Pasta da execução
+        run_id: Identificador de uma execução nova (padrão: data e hora)
+        escopo: Escopo registrado (ver workspace.EspacoExecucao)
+        reabrir: Retoma também a execução `run_id` já finalizada (ex.: carga
+                 estacionada aprovada depois), mantendo etapas e lotes
+    """
+
+    ARQUIVO = "manifesto_execucao.json"
+    ARQUIVO_LOTES = "lotes.jsonl"
+
+    def __init__(self, dir_staging: str, run_id: str = None, escopo: str = None, reabrir: bool = False):
+        self.dir_staging = Path(dir_staging)
+        self.caminho = self.dir_staging / self.ARQUIVO
+        self.caminho_lotes = self.dir_staging / self.ARQUIVO_LOTES
+        self._run_id_novo = run_id
+        self._escopo = escopo
+        self._reabrir = reabrir
+        self._lock = threading.RLock()
+        self.dados = self._carregar()
+
+    @property
+    def run_id(self) -> str:
+        return self.dados["run_id"]
+
+    @property
+    def retomada(self) -> bool:
+        """Indica se esta execução continua uma anterior interrompida"""
+        return self.dados.get("retomadas", 0) > 0
+
+    @classmethod
+    def ler(cls, dir_staging: str):
+        """Conteúdo do último manifesto, sem retomá-lo nem criar um novo (None se não houver)"""
+        try:
+            with open(Path(dir_staging) / cls.ARQUIVO, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return None
+        dados.setdefault("lotes", {}).update(cls._ler_lotes(Path(dir_staging) / cls.ARQUIVO_LOTES))
+        return dados
+
+    @staticmethod
+    def _ler_lotes(caminho: Path) -> dict:
+        """Lotes de lotes.jsonl (lote_id -> registro); uma última linha incompleta é ignorada"""
+        lotes = {}
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue
+                    lotes[registro.pop("lote_id")] = registro
+        except OSError:
+            pass
+        return lotes
+
+    def _carregar(self) -> dict:
+        """Retoma o manifesto em andamento ou cria um novo"""
+        if self.caminho.exists():
+            try:
+                with open(self.caminho, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                reaberta = self._reabrir and dados.get("run_id") == self._run_id_novo
+                if dados.get("status") == "em_andamento" or reaberta:
+                    dados["status"] = "em_andamento"
+                    dados.pop("finalizado_em", None)
+                    dados["retomadas"] = dados.get("retomadas", 0) + 1
+                    dados.setdefault("lotes", {}).update(self._ler_lotes(self.caminho_lotes))
+                    logger.info(
+                        f"♻️  Retomando execução {dados['run_id']} "
+                        f"({len(dados.get('etapas', {}))} etapa(s) concluída(s))"
+                    )
+                    self._salvar(dados)
+                    return dados
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"⚠️  Manifesto anterior ilegível ({e}); iniciando nova execução")
+
+        dados = {
+            "run_id": self._run_id_novo or datetime.now().strftime("%Y%m%d_%H%M%S_%f"),
+            "escopo": self._escopo,
+            "status": "em_andamento",
+            "criado_em": datetime.now().isoformat(timespec="seconds"),
+            "retomadas": 0,
+            "etapas": {},
+            "lotes": {},
+        }
+        self._salvar(dados)
+        self.caminho_lotes.unlink(missing_ok=True)
+        return dados
+
+    def _salvar(self, dados: dict = None):
+        """Grava o manifesto de forma atômica (arquivo temporário + os.replace)"""
+        dados = dados if dados is not None else self.dados
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.caminho.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.caminho)
+
+    @staticmethod
+    def _hashes(arquivos) -> dict:
+        return {str(a): hash_arquivo(a) for a in sorted(map(str, arquivos))}
+
+    # ===== ETAPAS =====
+
+    def etapa_concluida(self, nome: str, entradas) -> bool:
+        """
+        Verifica se a etapa já foi concluída nesta execução com as mesmas entradas
+        e se as saídas registradas continuam intactas
+
+        Args:
+            nome: Nome da etapa
+            entradas: Arquivos consumidos pela etapa
+        """
+        with self._lock:
+            etapa = self.dados["etapas"].get(nome)
+        if not etapa:
+            return False
+        if etapa["entradas"] != self._hashes(entradas):
+            return False
+        return all(hash_arquivo(arquivo) == h for arquivo, h in etapa["saidas"].items())
+
+    def resultado_etapa(self, nome: str):
+        """Resultado registrado da etapa (ou None)"""
+        with self._lock:
+            return self.dados["etapas"].get(nome, {}).get("resultado")
+
+    def registrar_etapa(self, nome: str, entradas, saidas, resultado):
+        """
+        Registra a conclusão de uma etapa com os hashes das entradas e saídas
+
+        Args:
+            nome: Nome da etapa
+            entradas: Arquivos consumidos
+            saidas: Arquivos produzidos (ausentes ficam registrados como None)
+            resultado: Retorno da etapa (serializável em JSON)
+        """
+        registro = {
+            "entradas": self._hashes(entradas),
+            "saidas": self._hashes(saidas),
+            "resultado": resultado,
+            "concluida_em": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self.dados["etapas"][nome] = registro
+            self._salvar()
+
+    # ===== LOTES DE CARGA =====
+
+    def registrar_lote(self, lote_id: str, particao: str, linha_inicio: int, linha_fim: int,
+                       qtd_insert: int, qtd_update: int):
+        """
+        Registra um lote de carga commitado
+
+        Args:
+            lote_id: Chave do lote no journal de carga
+            particao: Partição do upload
+            linha_inicio: Primeira linha do lote na partição
+            linha_fim: Última linha do lote na partição
+            qtd_insert: Linhas inseridas
+            qtd_update: Linhas atualizadas
+        """
+        registro = {
+            "lote_id": lote_id,
+            "particao": particao,
+            "linha_inicio": linha_inicio,
+            "linha_fim": linha_fim,
+            "qtd_linhas": linha_fim - linha_inicio + 1,
+            "qtd_insert": qtd_insert,
+            "qtd_update": qtd_update,
+            "commitado_em": datetime.now().isoformat(timespec="seconds"),
+        }
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        registro.pop("lote_id")
+        with self._lock:
+            with open(self.caminho_lotes, "a", encoding="utf-8") as f:
+                f.write(linha)
+            self.dados.setdefault("lotes", {})[lote_id] = registro
+
+    def lotes(self) -> dict:
+        """Lotes de carga commitados nesta execução (lote_id -> registro)"""
+        with self._lock:
+            return dict(self.dados.get("lotes", {}))
+
+    # ===== CICLO DE VIDA =====
+
+    def finalizar(self, status: str = "concluido"):
+        """Encerra a execução (incorporando lotes.jsonl); a próxima começará um manifesto novo"""
+        with self._lock:
+            self.dados["status"] = status
+            self.dados["finalizado_em"] = datetime.now().isoformat(timespec="seconds")
+            self.dados.setdefault("lotes", {}).update(self._ler_lotes(self.caminho_lotes))
+            self._salvar()
+            self.caminho_lotes.unlink(missing_ok=True)
+        logger.info(f"🧾 Execução {self.run_id} finalizada ({status})")
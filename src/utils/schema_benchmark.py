@@ -0,0 +1,172 @@
+"""
+⏱️ BENCHMARK DOS ÍNDICES DO SCHEMA
+Mede, no SQLite embutido, os caminhos de acesso do ETL antes e depois dos
+equivalentes às migrações de database/migrations: UPDATE por id_codigo_sit,
+agregação de vw_rubricas_calc e consulta das rubricas de um termo
+
+O SQLite não é o SQL Server (otimizador e tipos diferentes), mas a diferença
+entre varredura e busca em índice aparece da mesma forma.
+
+Uso:
+    python -m src.utils.schema_benchmark --linhas 200000 --termos 400
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+# id_termo a partir de id_termo_rubrica ("<termo>-<rubrica>"), como nas views originais
+_EXPR_TERMO = "CAST(substr({col}, 1, instr({col}, '-') - 1) AS INTEGER)"
+
+SQL_TABELAS = """
+    CREATE TABLE termos (
+        id_termo INTEGER PRIMARY KEY, data_inicio_vigencia DATE, data_fim_vigencia DATE
+    );
+    CREATE TABLE rubricas (
+        id INTEGER PRIMARY KEY, id_termo_rubrica VARCHAR(70), data_fim_vigencia DATE,
+        saldo_total_gasto DECIMAL(18, 2), saldo_atual DECIMAL(18, 2)
+    );
+    CREATE TABLE despesas (
+        id INTEGER PRIMARY KEY, id_codigo_sit VARCHAR(50), termo VARCHAR(50), rubrica VARCHAR(20),
+        data_pagamento DATE, valor DECIMAL(18, 2), id_termo_rubrica VARCHAR(70)
+    );
+"""
+
+# Equivalentes SQLite de V001-V003 (coluna gerada VIRTUAL: o SQLite não
+# acrescenta colunas STORED com ALTER TABLE, mas indexa as virtuais)
+SQL_MIGRACOES = f"""
+    CREATE UNIQUE INDEX UX_despesas_id_codigo_sit ON despesas (id_codigo_sit) WHERE id_codigo_sit IS NOT NULL;
+    CREATE INDEX IX_despesas_id_termo_rubrica ON despesas (id_termo_rubrica, valor, data_pagamento);
+    CREATE INDEX IX_rubricas_id_termo_rubrica ON rubricas (id_termo_rubrica);
+    ALTER TABLE despesas ADD COLUMN id_termo INTEGER
+        GENERATED ALWAYS AS ({_EXPR_TERMO.format(col="id_termo_rubrica")}) VIRTUAL;
+    ALTER TABLE rubricas ADD COLUMN id_termo INTEGER
+        GENERATED ALWAYS AS ({_EXPR_TERMO.format(col="id_termo_rubrica")}) VIRTUAL;
+    CREATE INDEX IX_despesas_id_termo ON despesas (id_termo, valor, data_pagamento);
+    CREATE INDEX IX_rubricas_id_termo ON rubricas (id_termo);
+    ANALYZE;
+"""
+
+SQL_UPDATE = "UPDATE despesas SET valor = ? WHERE id_codigo_sit = ?"
+
+# vw_rubricas_calc (sem as colunas de data corrente)
+SQL_VIEW_ANTES = f"""
+    SELECT r.id_termo_rubrica, COALESCE(SUM(d.valor), 0), MAX(d.data_pagamento)
+    FROM rubricas r
+    JOIN termos t ON t.id_termo = {_EXPR_TERMO.format(col="r.id_termo_rubrica")}
+    LEFT JOIN despesas d ON d.id_termo_rubrica = r.id_termo_rubrica
+    GROUP BY r.id_termo_rubrica, t.data_inicio_vigencia, t.data_fim_vigencia
+"""
+SQL_VIEW_DEPOIS = """
+    SELECT r.id_termo_rubrica, COALESCE(SUM(d.valor), 0), MAX(d.data_pagamento)
+    FROM rubricas r
+    JOIN termos t ON t.id_termo = r.id_termo
+    LEFT JOIN despesas d ON d.id_termo_rubrica = r.id_termo_rubrica
+    GROUP BY r.id_termo_rubrica, t.data_inicio_vigencia, t.data_fim_vigencia
+"""
+
+# Gasto das rubricas de um termo (ex.: revisão ou reconciliação por termo)
+SQL_TERMO_ANTES = f"""
+    SELECT id_termo_rubrica, SUM(valor) FROM despesas
+    WHERE {_EXPR_TERMO.format(col="id_termo_rubrica")} = ? GROUP BY id_termo_rubrica
+"""
+SQL_TERMO_DEPOIS = "SELECT id_termo_rubrica, SUM(valor) FROM despesas WHERE id_termo = ? GROUP BY id_termo_rubrica"
+
+
+def popular(conn, linhas: int, termos: int, rubricas_por_termo: int, semente: int = 0):
+    """Gera termos, rubricas e despesas sintéticos (ids no formato do SIT)"""
+    rnd = random.Random(semente)
+    inicio = date(2023, 1, 1)
+    ids_termo = [6000 + i for i in range(termos)]
+
+    conn.executemany(
+        "INSERT INTO termos VALUES (?, ?, ?)",
+        [(t, inicio.isoformat(), (inicio + timedelta(days=1095)).isoformat()) for t in ids_termo]
+    )
+    chaves = [f"{t}-{r}" for t in ids_termo for r in range(1, rubricas_por_termo + 1)]
+    conn.executemany(
+        "INSERT INTO rubricas (id_termo_rubrica, data_fim_vigencia) VALUES (?, ?)",
+        [(c, (inicio + timedelta(days=1095)).isoformat()) for c in chaves]
+    )
+
+    def despesa(i):
+        chave = rnd.choice(chaves)
+        termo, rubrica = chave.split("-")
+        data = (inicio + timedelta(days=rnd.randint(0, 1000))).isoformat()
+        return (str(1_000_000 + i), termo, rubrica, data, round(rnd.uniform(10, 20000), 2), chave)
+
+    conn.executemany(
+        "INSERT INTO despesas (id_codigo_sit, termo, rubrica, data_pagamento, valor, id_termo_rubrica) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (despesa(i) for i in range(linhas))
+    )
+    conn.commit()
+    return ids_termo
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Melhor tempo (segundos) entre as repetições"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def executar(conn, linhas: int, ids_termo: list, consultas: int, repeticoes: int, sql: dict) -> dict:
+    """Tempos de cada caminho de acesso com o conjunto de SQL informado"""
+    rnd = random.Random(1)
+    atualizacoes = [(round(rnd.uniform(10, 20000), 2), str(1_000_000 + rnd.randrange(linhas))) for _ in range(consultas)]
+    termos = [rnd.choice(ids_termo) for _ in range(consultas)]
+
+    def atualizar():
+        conn.executemany(SQL_UPDATE, atualizacoes)
+        conn.rollback()
+
+    def por_termo():
+        for termo in termos:
+            conn.execute(sql["termo"], (termo,)).fetchall()
+
+    return {
+        "update": medir(atualizar, repeticoes),
+        "view": medir(lambda: conn.execute(sql["view"]).fetchall(), repeticoes),
+        "termo": medir(por_termo, repeticoes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos índices do schema (SQLite embutido)")
+    parser.add_argument("--linhas", type=int, default=200000, help="Despesas geradas")
+    parser.add_argument("--termos", type=int, default=400, help="Termos gerados")
+    parser.add_argument("--rubricas", type=int, default=8, help="Rubricas por termo")
+    parser.add_argument("--consultas", type=int, default=200, help="UPDATEs / consultas por termo medidos")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções de cada medida (usa a melhor)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SQL_TABELAS)
+    ids_termo = popular(conn, args.linhas, args.termos, args.rubricas)
+
+    print(f"📊 {args.linhas} despesas | {args.termos} termos x {args.rubricas} rubricas | sqlite {sqlite3.sqlite_version}")
+    antes = executar(conn, args.linhas, ids_termo, args.consultas, args.repeticoes,
+                     {"view": SQL_VIEW_ANTES, "termo": SQL_TERMO_ANTES})
+    conn.executescript(SQL_MIGRACOES)
+    depois = executar(conn, args.linhas, ids_termo, args.consultas, args.repeticoes,
+                      {"view": SQL_VIEW_DEPOIS, "termo": SQL_TERMO_DEPOIS})
+
+    nomes = {
+        "update": f"{args.consultas} UPDATE por id_codigo_sit",
+        "view": "vw_rubricas_calc (agregação completa)",
+        "termo": f"{args.consultas} consultas por id_termo",
+    }
+    print(f"{'caminho de acesso':<42}{'antes (s)':>12}{'depois (s)':>12}{'ganho':>10}")
+    for chave, nome in nomes.items():
+        ganho = antes[chave] / depois[chave] if depois[chave] > 0 else float("inf")
+        print(f"{nome:<42}{antes[chave]:>12.3f}{depois[chave]:>12.3f}{ganho:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+🗂️ REGISTRO DINÂMICO SIT -> TERMO
+Mapa nro_sit -> id_termo lido da tabela termos, com cache por TTL e sharding por SIT
+"""
+
+import threading
+import time
+import zlib
+
+from src.utils.config import Config
+from src.utils.database import db_manager
+from src.utils.ingestor import limpar_string_numero
+from src.utils.logger import setup_logger
+
+logger = setup_logger("SitRegistry")
+
+
+class RegistroSIT:
+    """
+    Cache do mapa SIT -> termo compartilhado por extração e validação
+
+    O mapa é recarregado quando o TTL expira e a assinatura da tabela termos
+    (contagem + checksum) mudou; se não mudou, apenas renova o TTL. Se o banco
+    estiver indisponível, usa Config.SIT_TERMO_MAP como fallback.
+
+    O sharding divide os SITs em `shard_total` subconjuntos disjuntos (hash
+    estável do nro_sit), para que vários workers processem SITs diferentes.
+    """
+
+    QUERY_MAPA = "SELECT nro_sit, id_termo FROM termos WHERE nro_sit IS NOT NULL"
+    QUERY_ASSINATURA = "SELECT COUNT(*) AS qtd, CHECKSUM_AGG(CHECKSUM(nro_sit, id_termo)) AS soma FROM termos"
+
+    def __init__(self, ttl_segundos: int = None, shard_indice: int = None, shard_total: int = None):
+        # Valores omitidos vêm de Config no primeiro uso (a instância global é criada no import)
+        self._ttl_segundos = ttl_segundos
+        self._shard_indice = shard_indice
+        self._shard_total = shard_total
+        if shard_indice is not None and shard_total is not None:
+            self._validar_shard()
+
+        self._mapa = None
+        self._assinatura = None
+        self._expira_em = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl_segundos(self) -> int:
+        return Config.SIT_REGISTRY_TTL if self._ttl_segundos is None else self._ttl_segundos
+
+    @property
+    def shard_indice(self) -> int:
+        return Config.SHARD_INDICE if self._shard_indice is None else self._shard_indice
+
+    @property
+    def shard_total(self) -> int:
+        return Config.SHARD_TOTAL if self._shard_total is None else self._shard_total
+
+    def _validar_shard(self):
+        if self.shard_total < 1 or not 0 <= self.shard_indice < self.shard_total:
+            raise ValueError(f"❌ Shard inválido: {self.shard_indice}/{self.shard_total}")
+
+    def mapa(self, forcar: bool = False) -> dict:
+        """
+        Retorna o mapa completo nro_sit -> id_termo (strings normalizadas)
+
+        Args:
+            forcar: Ignora o TTL e recarrega do banco
+        """
+        with self._lock:
+            agora = time.time()
+            if forcar or self._mapa is None:
+                self._validar_shard()
+                self._recarregar()
+            elif agora >= self._expira_em:
+                if self._assinatura is None or self._ler_assinatura() != self._assinatura:
+                    self._recarregar()
+                else:
+                    self._expira_em = agora + self.ttl_segundos
+            return self._mapa
+
+    def mapa_shard(self) -> dict:
+        """Retorna apenas os SITs pertencentes ao shard deste worker"""
+        return {sit: termo for sit, termo in self.mapa().items() if self.pertence_ao_shard(sit)}
+
+    def pertence_ao_shard(self, nro_sit) -> bool:
+        """Indica se o SIT é processado por este worker (hash estável, igual em todos os hosts)"""
+        if self.shard_total == 1:
+            return True
+        chave = limpar_string_numero(nro_sit).encode("utf-8")
+        return zlib.crc32(chave) % self.shard_total == self.shard_indice
+
+    def termo_do_sit(self, nro_sit):
+        """Retorna o id_termo do SIT (ou None se não cadastrado)"""
+        return self.mapa().get(limpar_string_numero(nro_sit))
+
+    def invalidar(self):
+        """Força recarga na próxima consulta (ex.: após cadastrar termos)"""
+        with self._lock:
+            self._expira_em = 0.0
+            self._assinatura = None
+
+    def _recarregar(self):
+        """Lê o mapa do banco (ou do fallback) e renova TTL e assinatura"""
+        try:
+            df = db_manager.execute_query(self.QUERY_MAPA)
+            self._mapa = {
+                limpar_string_numero(sit): limpar_string_numero(termo)
+                for sit, termo in zip(df["nro_sit"], df["id_termo"])
+            }
+            self._assinatura = self._ler_assinatura()
+            logger.info(f"🗂️  Registro SIT carregado do banco: {len(self._mapa)} termos")
+        except Exception as e:
+            logger.warning(f"⚠️  Registro SIT indisponível no banco ({e}); usando Config.SIT_TERMO_MAP")
+            self._mapa = dict(Config.SIT_TERMO_MAP)
+            self._assinatura = None
+
+        self._expira_em = time.time() + self.ttl_segundos
+
+    def _ler_assinatura(self):
+        """Assinatura barata da tabela termos para detectar mudanças"""
+        try:
+            df = db_manager.execute_query(self.QUERY_ASSINATURA)
+            return tuple(df.iloc[0].tolist())
+        except Exception:
+            return None
+
+
+# Instância global
+registro_sit = RegistroSIT()
@@ -0,0 +1,269 @@
+"""
+🗂️ ESPAÇOS DE TRABALHO POR EXECUÇÃO
+Cada execução grava seus arquivos intermediários em DIR_STAGING/runs/<run_id>/,
+então várias instâncias do pipeline (ex.: shards com SITs diferentes) podem
+rodar ao mesmo tempo no mesmo host sem sobrescrever umas às outras
+
+A pasta da execução fica travada (advisory lock) enquanto ela roda: uma
+execução interrompida é retomada pela próxima do mesmo escopo, mas nunca
+enquanto outro processo a estiver usando. Recursos compartilhados (ingestão
+do Downloads, dead letter, pendentes) usam travas próprias, e as saídas das
+etapas são publicadas de forma atômica (arquivo temporário + os.replace).
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.config import Config
+from src.utils.logger import setup_logger
+from src.utils.run_manifest import ManifestoExecucao
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = setup_logger("Workspace")
+
+PASTA_EXECUCOES = "runs"
+ARQUIVO_TRAVA = ".trava"
+ARQUIVO_ULTIMA = "ultima_execucao.json"
+
+
+class TravaArquivo:
+    """
+    Trava exclusiva entre processos sobre um arquivo (flock / msvcrt.locking)
+
+    A trava é liberada pelo sistema se o processo morrer. Também exclui outras
+    threads do mesmo processo (cada instância abre seu próprio descritor).
+
+    Uso:
+        with TravaArquivo(Path(dir_staging) / "dead_letter.trava"):
+            ...
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self._arquivo = None
+
+    def adquirir(self, bloquear: bool = True) -> bool:
+        """
+        Args:
+            bloquear: Espera a trava ficar livre (False = desiste na hora)
+
+        Returns:
+            True se a trava foi obtida
+        """
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        arquivo = open(self.caminho, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | (0 if bloquear else fcntl.LOCK_NB))
+            else:
+                while True:
+                    try:
+                        arquivo.seek(0)
+                        msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not bloquear:
+                            raise
+                        time.sleep(0.1)
+        except OSError:
+            arquivo.close()
+            return False
+        self._arquivo = arquivo
+        return True
+
+    def liberar(self):
+        if self._arquivo is None:
+            return
+        if fcntl is None:
+            self._arquivo.seek(0)
+            msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+        self._arquivo.close()
+        self._arquivo = None
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        self.liberar()
+
+
+def gravar_csv_atomico(df, caminho, **kwargs):
+    """Grava o CSV num temporário e o publica com os.replace (leitores nunca veem meio arquivo)"""
+    caminho = Path(caminho)
+    tmp = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+    try:
+        df.to_csv(tmp, index=False, **kwargs)
+        os.replace(tmp, caminho)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def escopo_padrao() -> str:
+    """Escopo das execuções deste processo: o shard de SITs que ele processa"""
+    return f"shard-{Config.SHARD_INDICE}-de-{Config.SHARD_TOTAL}"
+
+
+class EspacoExecucao:
+    """
+    Pasta isolada de uma execução: DIR_STAGING/runs/<run_id>/
+
+    Uso:
+        with EspacoExecucao.abrir() as espaco:
+            extrator = ExpensesExtractor(dir_staging=espaco.caminho)
+            ...
+            espaco.manifesto.finalizar()
+
+    Ao sair, o ponteiro DIR_STAGING/ultima_execucao.json passa a apontar para
+    esta execução, a trava é liberada e execuções antigas já encerradas além
+    de Config.EXECUCOES_MANTER são apagadas.
+
+    Args:
+        dir_base: DIR_STAGING
+        run_id: Identificador (nome da pasta)
+        escopo: Execuções só retomam outras do mesmo escopo
+    """
+
+    def __init__(self, dir_base, run_id: str, escopo: str = None):
+        self.dir_base = Path(dir_base)
+        self.run_id = run_id
+        self.escopo = escopo
+        self.caminho = self.dir_base / PASTA_EXECUCOES / run_id
+        self.manifesto = None
+        self._trava = TravaArquivo(self.caminho / ARQUIVO_TRAVA)
+
+    @classmethod
+    def abrir(cls, escopo: str = None, dir_base=None) -> "EspacoExecucao":
+        """
+        Retoma a execução interrompida mais recente do escopo que não esteja em
+        uso por outro processo, ou cria uma nova (já travada, com manifesto)
+        """
+        dir_base = Path(dir_base or Config.DIR_STAGING)
+        escopo = escopo or escopo_padrao()
+
+        for pasta in listar_execucoes(dir_base):
+            dados = ManifestoExecucao.ler(pasta)
+            if not dados or dados.get("status") != "em_andamento" or dados.get("escopo") != escopo:
+                continue
+            espaco = cls(dir_base, pasta.name, escopo)
+            if not espaco._trava.adquirir(bloquear=False):
+                continue
+            # Pode ter sido finalizada entre a leitura e a trava
+            dados = ManifestoExecucao.ler(pasta)
+            if dados and dados.get("status") == "em_andamento":
+                espaco.manifesto = ManifestoExecucao(pasta, run_id=espaco.run_id, escopo=escopo)
+                return espaco
+            espaco._trava.liberar()
+
+        while True:
+            run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            espaco = cls(dir_base, run_id, escopo)
+            try:
+                espaco.caminho.mkdir(parents=True)
+                break
+            except FileExistsError:
+                continue
+        espaco._trava.adquirir()
+        espaco.manifesto = ManifestoExecucao(espaco.caminho, run_id=run_id, escopo=escopo)
+        logger.info(f"🗂️  Execução {run_id} em {espaco.caminho}")
+        return espaco
+
+    def adquirir(self, bloquear: bool = False) -> bool:
+        """Trava a pasta para este processo (ex.: carga de um pendente aprovado)"""
+        self.caminho.mkdir(parents=True, exist_ok=True)
+        return self._trava.adquirir(bloquear)
+
+    def liberar(self):
+        self._trava.liberar()
+
+    def promover(self):
+        """Aponta DIR_STAGING/ultima_execucao.json para esta execução (troca atômica)"""
+        dados = ManifestoExecucao.ler(self.caminho) or {}
+        ponteiro = {
+            "run_id": self.run_id,
+            "escopo": self.escopo,
+            "status": dados.get("status"),
+            "caminho": str(self.caminho),
+            "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+        }
+        destino = self.dir_base / ARQUIVO_ULTIMA
+        tmp = destino.with_name(f".{ARQUIVO_ULTIMA}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(ponteiro, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, destino)
+
+    def encerrar(self):
+        """Promove o ponteiro da última execução, libera a trava e limpa execuções antigas"""
+        try:
+            self.promover()
+        finally:
+            self.liberar()
+        limpar_execucoes(self.dir_base, Config.EXECUCOES_MANTER)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        self.encerrar()
+
+
+def listar_execucoes(dir_base) -> list:
+    """Pastas de execução, da mais recente para a mais antiga"""
+    pasta = Path(dir_base) / PASTA_EXECUCOES
+    if not pasta.exists():
+        return []
+    return sorted((p for p in pasta.iterdir() if p.is_dir()), reverse=True)
+
+
+def em_uso(pasta) -> bool:
+    """Indica se algum processo está com a pasta da execução travada"""
+    trava = TravaArquivo(Path(pasta) / ARQUIVO_TRAVA)
+    if not trava.adquirir(bloquear=False):
+        return True
+    trava.liberar()
+    return False
+
+
+def ultima_execucao(dir_base):
+    """Ponteiro da última execução encerrada ou interrompida (None se não houver)"""
+    try:
+        with open(Path(dir_base) / ARQUIVO_ULTIMA, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def limpar_execucoes(dir_base, manter: int):
+    """
+    Apaga as pastas de execuções encerradas além das `manter` mais recentes
+
+    Execuções em andamento (serão retomadas) e pastas travadas são preservadas.
+    """
+    if manter <= 0:
+        return
+    encerradas = []
+    for pasta in listar_execucoes(dir_base):
+        dados = ManifestoExecucao.ler(pasta)
+        if dados and dados.get("status") == "em_andamento":
+            continue
+        encerradas.append(pasta)
+
+    for pasta in encerradas[manter:]:
+        trava = TravaArquivo(pasta / ARQUIVO_TRAVA)
+        if not trava.adquirir(bloquear=False):
+            continue
+        try:
+            shutil.rmtree(pasta, ignore_errors=True)
+        finally:
+            trava.liberar()
+        logger.debug(f"🧹 Execução antiga removida: {pasta.name}")
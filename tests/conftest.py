@@ -0,0 +1,235 @@
+"""
+Fixtures compartilhadas pelos testes
+
+- ambiente: cada teste roda com pastas temporárias e um Config recarregado
+- banco: SQLite no lugar do SQL Server, ligado ao db_manager real (pool,
+  instrumentação) para exercitar carga, transformação e exportação
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+from src.utils.config import Config  # noqa: E402
+
+# Constantes da classe (não vêm do ambiente): sobrevivem ao recarregamento
+_FIXAS = {nome for nome in vars(Config) if nome.isupper()}
+
+# Variáveis que o ambiente de quem roda os testes não pode influenciar
+_PREFIXOS = (
+    "DIR_", "LOG_", "LOAD_", "APROVACAO_", "DAEMON_", "HISTORICO_", "RECONCILIACAO_", "SHARD_",
+    "METRICAS_", "PROGRESSO_", "POOL_", "DAG_", "DB_", "LEITOR_", "RAW_", "EXECUCOES_", "ETL_",
+)
+
+
+def recarregar_config():
+    """Esquece as configurações lidas: o próximo acesso relê o ambiente"""
+    for nome in [n for n in vars(Config) if n.isupper() and n not in _FIXAS]:
+        delattr(Config, nome)
+    Config._carregada = False
+
+
+@pytest.fixture(scope="session")
+def pasta_logs(tmp_path_factory):
+    return tmp_path_factory.mktemp("logs")
+
+
+@pytest.fixture(autouse=True)
+def ambiente(tmp_path, monkeypatch, pasta_logs):
+    """Pastas do pipeline em tmp_path, sem métricas em arquivo nem progresso no terminal"""
+    for nome in list(os.environ):
+        if nome.startswith(_PREFIXOS) or nome == "CONN_STR_SQLSERVER":
+            monkeypatch.delenv(nome)
+    # O arquivo de log da execução é um só por processo
+    monkeypatch.setenv("ETL_LOG_ARQUIVO", str(pasta_logs / "testes.log"))
+    valores = {
+        "DIR_DOWNLOADS": tmp_path / "downloads",
+        "DIR_STAGING": tmp_path / "staging",
+        "DIR_LOGS": pasta_logs,
+        "CONN_STR_SQLSERVER": "sqlite-de-teste",
+        "PROGRESSO_MODO": "off",
+        "LOG_JSON": "false",
+    }
+    for nome, valor in valores.items():
+        monkeypatch.setenv(nome, str(valor))
+    (tmp_path / "downloads").mkdir()
+    (tmp_path / "staging").mkdir()
+
+    recarregar_config()
+    yield tmp_path
+    recarregar_config()
+
+
+@pytest.fixture
+def configurar(monkeypatch):
+    """Define variáveis de ambiente e recarrega o Config: configurar(LOAD_TAMANHO_LOTE=2)"""
+    def _configurar(**valores):
+        for nome, valor in valores.items():
+            monkeypatch.setenv(nome, str(valor))
+        recarregar_config()
+        return Config
+    return _configurar
+
+
+# ===== ARQUIVOS DE STAGING =====
+
+def despesa(id_codigo_sit, termo="6373", rubrica="1", valor="10.00", acao="INSERT", **campos) -> dict:
+    """Linha de despesas_upload.csv (colunas como as grava a transformação)"""
+    linha = {
+        "id_codigo_sit": str(id_codigo_sit), "termo": termo, "rubrica": rubrica,
+        "tipo_despesa": "Material", "cpf_cnpj": "12345678000190", "favorecido": f"Fornecedor {id_codigo_sit}",
+        "tipo_doc_despesa": "NF", "descricao_despesa": "Compra", "tipo_doc_pagamento": "TED",
+        "data_pagamento": "2024-03-15", "data_debito_convenio": "2024-03-16", "valor": valor,
+        "id_termo_rubrica": f"{termo}-{rubrica}", "acao": acao,
+    }
+    linha.update(campos)
+    return linha
+
+
+@pytest.fixture
+def gravar_upload():
+    """Grava despesas_upload.csv na pasta: gravar_upload(pasta, [despesa(1), ...])"""
+    import pandas as pd
+
+    def _gravar(pasta, linhas):
+        caminho = Path(pasta) / "despesas_upload.csv"
+        pd.DataFrame(linhas).to_csv(caminho, index=False, encoding="utf-8")
+        return caminho
+    return _gravar
+
+
+# ===== BANCO SQLITE =====
+
+SQL_SCHEMA = """
+    CREATE TABLE despesas (
+        id INTEGER PRIMARY KEY, id_codigo_sit VARCHAR(50), termo VARCHAR(50), rubrica VARCHAR(20),
+        tipo_despesa VARCHAR(50), cpf_cnpj VARCHAR(14) CHECK (length(cpf_cnpj) <= 14), favorecido VARCHAR(255),
+        tipo_doc_despesa VARCHAR(100), descricao_despesa VARCHAR(255), tipo_doc_pagamento VARCHAR(100),
+        data_pagamento DATE, data_debito_convenio DATE, valor DECIMAL(18, 2), id_termo_rubrica VARCHAR(70),
+        id_termo INTEGER GENERATED ALWAYS AS (
+            CASE WHEN instr(id_termo_rubrica, '-') > 1
+                 THEN CAST(substr(id_termo_rubrica, 1, instr(id_termo_rubrica, '-') - 1) AS INTEGER) END
+        ) VIRTUAL
+    );
+    CREATE UNIQUE INDEX UX_despesas_id_codigo_sit ON despesas (id_codigo_sit) WHERE id_codigo_sit IS NOT NULL;
+    CREATE TABLE etl_load_journal (
+        lote_id CHAR(64) PRIMARY KEY, run_id VARCHAR(40), particao VARCHAR(100), linha_inicio INT,
+        linha_fim INT, qtd_linhas INT, qtd_insert INT, qtd_update INT, status VARCHAR(12),
+        data_commit DATETIME DEFAULT CURRENT_TIMESTAMP, hash_conteudo CHAR(64)
+    );
+    CREATE TABLE termos (id_termo INT PRIMARY KEY, nro_sit INT, rendimento_financeiro_total DECIMAL(14, 2));
+    CREATE TABLE rubricas (id INTEGER PRIMARY KEY, id_termo_rubrica VARCHAR(70), valor_estornado DECIMAL(10, 2), nro_sit INT);
+    INSERT INTO termos VALUES (6373, 57884, 0), (6729, 63377, 0);
+"""
+
+# Equivalente SQLite de reconciliation.SQL_AGREGADOS (HASHBYTES/CONVERT não existem no SQLite)
+_CENTAVOS = "CAST(CAST(ROUND(valor * 100) AS INTEGER) AS TEXT)"
+_LINHA = " || '|' || ".join(
+    f"coalesce({c}, '')" for c in (
+        "id_codigo_sit", "termo", "rubrica", "tipo_despesa", "cpf_cnpj", "favorecido", "tipo_doc_despesa",
+        "descricao_despesa", "tipo_doc_pagamento", "data_pagamento", "data_debito_convenio", _CENTAVOS,
+        "id_termo_rubrica",
+    )
+)
+SQL_AGREGADOS_SQLITE = f"""
+    SELECT termo, rubrica, COUNT(*) AS linhas, SUM(CAST(ROUND(valor * 100) AS INTEGER)) AS centavos,
+           MAX(data_pagamento) AS ultima_data, SUM(md5_a({_LINHA})) AS hash_a, SUM(md5_b({_LINHA})) AS hash_b
+    FROM despesas WHERE id_codigo_sit IS NOT NULL GROUP BY termo, rubrica
+"""
+
+
+def _md5_parte(inicio):
+    import hashlib
+
+    def parte(texto):
+        digest = hashlib.md5(texto.encode("utf-16-le")).digest()
+        return int.from_bytes(digest[inicio:inicio + 4], "big")
+    return parte
+
+
+class CursorSqlite:
+    """Cursor com a interface usada do pyodbc (parâmetros posicionais, fast_executemany)"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.fast_executemany = False
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    @staticmethod
+    def _traduzir(sql: str):
+        if sql.strip().startswith("IF OBJECT_ID"):
+            return None  # tabelas criadas pelo SQL_SCHEMA
+        if "HASHBYTES" in sql:
+            return SQL_AGREGADOS_SQLITE
+        return re.sub(r"WITH \(UPDLOCK\)", "", sql)
+
+    def execute(self, sql, *params):
+        sql = self._traduzir(sql)
+        if sql is None:
+            return self
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        self._cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(self._traduzir(sql), seq_params)
+        return self
+
+
+class ConexaoSqlite:
+    def __init__(self, caminho):
+        self._conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._conn.create_function("md5_a", 1, _md5_parte(0))
+        self._conn.create_function("md5_b", 1, _md5_parte(4))
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def cursor(self):
+        return CursorSqlite(self._conn.cursor())
+
+
+class BancoSqlite:
+    """Banco de teste: conexões novas a cada pedido, como o pyodbc"""
+
+    def __init__(self, caminho: Path):
+        self.caminho = caminho
+        with sqlite3.connect(caminho) as conn:
+            conn.executescript(SQL_SCHEMA)
+
+    def conectar(self):
+        return ConexaoSqlite(self.caminho)
+
+    def consultar(self, sql, *params):
+        with sqlite3.connect(self.caminho) as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """db_manager ligado a um SQLite novo (pool e instrumentação reais)"""
+    try:
+        from src.utils import database
+    except ImportError as e:  # pyodbc sem o driver ODBC (libodbc) instalado
+        pytest.skip(f"src.utils.database indisponível: {e}")
+    from src.utils.db_metrics import ConexaoInstrumentada
+
+    sqlite = BancoSqlite(tmp_path / "banco.sqlite")
+    monkeypatch.setattr(database.db_manager, "get_connection", lambda: ConexaoInstrumentada(sqlite.conectar()))
+    monkeypatch.setattr(database.db_manager, "_pool", None)
+    yield sqlite
+    if database.db_manager._pool is not None:
+        database.db_manager._pool.fechar()
+    database.db_manager._pool = None
+
@@ -0,0 +1,95 @@
+"""
+Testes da exportação analítica: dataset Parquet particionado e atualização
+só das partições tocadas pela execução
+"""
+
+import json
+
+import pytest
+
+from conftest import despesa
+
+analytics = pytest.importorskip("src.load.analytics", exc_type=ImportError)
+
+
+def test_particao_de_cada_despesa():
+    assert analytics._id_termo("6373-12") == 6373
+    assert analytics._id_termo("sem-termo") is None
+    assert analytics._id_termo("6373") is None
+    assert analytics._particao("6373", None) == (6373, None, None)
+
+
+def test_sem_pyarrow_a_exportacao_e_pulada(ambiente, configurar, monkeypatch):
+    configurar(DIR_ANALITICO=ambiente / "analitico")
+    monkeypatch.setattr(analytics, "pyarrow_disponivel", lambda: False)
+
+    assert analytics.AnalyticsExporter().run() is False
+    assert not (ambiente / "analitico").exists()
+
+
+@pytest.fixture
+def destino(banco, ambiente, configurar):
+    pytest.importorskip("pyarrow")
+    configurar(DIR_ANALITICO=ambiente / "analitico")
+    for i, (termo, data) in enumerate([("6373", "2024-01-10"), ("6373", "2024-02-05"), ("6729", None)]):
+        banco.consultar(
+            "INSERT INTO despesas (id_codigo_sit, termo, rubrica, data_pagamento, valor, id_termo_rubrica) "
+            "VALUES (?, ?, '1', ?, ?, ?)", str(i), termo, data, 10.5 + i, f"{termo}-1",
+        )
+    return ambiente / "analitico"
+
+
+def _dataset(destino):
+    import pyarrow.dataset as ds
+
+    tabela = ds.dataset(destino / "despesas", format="parquet", partitioning="hive").to_table()
+    return sorted(zip(*(tabela[c].to_pylist() for c in ("id_codigo_sit", "id_termo", "ano", "mes"))))
+
+
+def test_exportacao_completa_particiona_por_termo_ano_e_mes(destino):
+    assert analytics.AnalyticsExporter().run(completo=True)
+
+    pastas = sorted(str(p.parent.relative_to(destino)) for p in destino.glob("despesas/**/parte.parquet"))
+    assert pastas == [
+        "despesas/id_termo=6373/ano=2024/mes=1",
+        "despesas/id_termo=6373/ano=2024/mes=2",
+        f"despesas/id_termo=6729/ano={analytics.PARTICAO_NULA}/mes={analytics.PARTICAO_NULA}",
+    ]
+    assert {p.name for p in destino.iterdir()} >= {"rubricas.parquet", "termos.parquet", "_exportacao.json"}
+    estado = json.loads((destino / "_exportacao.json").read_text())
+    assert (estado["status"], estado["completa"], estado["particoes_regravadas"]) == ("ok", True, 3)
+
+
+def test_exportacao_incremental_regrava_so_as_particoes_tocadas(destino, banco, ambiente, gravar_upload):
+    import pandas as pd
+
+    assert analytics.AnalyticsExporter().run(completo=True)
+    intocada = destino / "despesas/id_termo=6729" / f"ano={analytics.PARTICAO_NULA}" / \
+        f"mes={analytics.PARTICAO_NULA}" / "parte.parquet"
+    mtime = intocada.stat().st_mtime_ns
+
+    # A execução moveu a despesa 1 de fevereiro para março e inseriu outra em janeiro
+    banco.consultar("UPDATE despesas SET data_pagamento = '2024-03-01' WHERE id_codigo_sit = '1'")
+    banco.consultar(
+        "INSERT INTO despesas (id_codigo_sit, termo, rubrica, data_pagamento, valor, id_termo_rubrica) "
+        "VALUES ('9', '6373', '1', '2024-01-20', 1, '6373-1')"
+    )
+    execucao = ambiente / "staging" / "runs" / "20240301_000000_000000"
+    execucao.mkdir(parents=True)
+    upload = gravar_upload(execucao, [
+        despesa(1, data_pagamento="2024-03-01", acao="UPDATE"),
+        despesa(9, data_pagamento="2024-01-20"),
+    ])
+    upload.rename(execucao / "despesas_upload.processado.csv")
+
+    assert analytics.AnalyticsExporter(execucao).run()
+
+    estado = json.loads((destino / "_exportacao.json").read_text())
+    assert (estado["run_id"], estado["completa"]) == (execucao.name, False)
+    assert (estado["particoes_regravadas"], estado["particoes_removidas"]) == (2, 1)
+    assert not (destino / "despesas/id_termo=6373/ano=2024/mes=2").exists()
+    assert intocada.stat().st_mtime_ns == mtime
+    assert _dataset(destino) == [
+        ("0", 6373, 2024, 1), ("1", 6373, 2024, 3), ("2", 6729, None, None), ("9", 6373, 2024, 1),
+    ]
+    assert pd.read_parquet(destino / "termos.parquet")["id_termo"].tolist() == [6373, 6729]
@@ -0,0 +1,119 @@
+"""
+Testes da política de aprovação: limites em todas as seções do change-set e
+aprovação manual de um pendente na execução de origem
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import despesa
+from src.transform.diff_summary import gravar_secao, resumir_despesas, resumir_tabela
+from src.utils.approval import PoliticaAprovacao, aplicar_politica, listar_pendentes
+
+
+def _despesas(pasta, linhas, anteriores=None):
+    df = pd.DataFrame(linhas)
+    df.to_csv(pasta / "despesas_upload.csv", index=False)
+    gravar_secao(pasta, "despesas", resumir_despesas(df, anteriores or {}))
+
+
+def _rubricas(pasta, linhas):
+    """linhas: (id_termo_rubrica, valor_anterior, valor)"""
+    df = pd.DataFrame({"id_termo_rubrica": [l[0] for l in linhas], "valor_estornado": [l[2] for l in linhas]})
+    df.to_csv(pasta / "update_rubricas.csv", index=False)
+    partes = df["id_termo_rubrica"].str.split("-", n=1).str
+    gravar_secao(pasta, "rubricas", resumir_tabela(
+        df, termo=partes[0], valor=df["valor_estornado"],
+        valor_anterior=pd.Series([l[1] for l in linhas]), rubrica=partes[1],
+    ))
+
+
+def test_variacoes_de_sinais_opostos_no_mesmo_termo_nao_se_anulam(ambiente):
+    pasta = ambiente / "staging"
+    _despesas(pasta, [
+        despesa(1, valor="900.00"),
+        despesa(2, valor="100.00", acao="UPDATE"),
+    ], anteriores={"2": 1000.0})
+
+    motivos = PoliticaAprovacao(max_valor_termo=1000).avaliar(pasta)
+
+    assert motivos == ["termo 6373: variação de R$ 1,800.00 (limite R$ 1,000.00)"]
+    assert PoliticaAprovacao(max_valor_termo=1800).avaliar(pasta) == []
+
+
+def test_limites_valem_para_termos_e_rubricas(ambiente):
+    pasta = ambiente / "staging"
+    _despesas(pasta, [despesa(1, valor="50.00")])
+    _rubricas(pasta, [("6373-1", 0.0, 60.0), ("6373-9", 10.0, 0.0), ("6729-1", 0.0, 5.0)])
+    df_termos = pd.DataFrame({"nro_sit": ["57884"], "rendimento_financeiro_total_csv": [30.0]})
+    df_termos.to_csv(pasta / "update_termos.csv", index=False)
+    gravar_secao(pasta, "termos", resumir_tabela(
+        df_termos, termo=pd.Series(["6373"]), valor=df_termos["rendimento_financeiro_total_csv"],
+        valor_anterior=pd.Series([50.0]),
+    ))
+
+    politica = PoliticaAprovacao(max_updates=2, max_valor_termo=100, rubricas_permitidas=["1"])
+
+    assert politica.avaliar(pasta) == [
+        "3 UPDATEs em rubricas (limite 2)",
+        # 50 (despesa) + 60 e 10 (estornos) + 20 (rendimento)
+        "termo 6373: variação de R$ 140.00 (limite R$ 100.00)",
+        "rubricas fora da lista permitida: 9",
+    ]
+
+
+def test_secao_sem_resumo_e_calculada_do_arquivo(ambiente):
+    pasta = ambiente / "staging"
+    pd.DataFrame({"id_termo_rubrica": ["6373-2"], "valor_estornado": ["70.5"]}).to_csv(
+        pasta / "update_rubricas.csv", index=False)
+
+    assert PoliticaAprovacao(max_valor_termo=50, rubricas_permitidas=["1"]).avaliar(pasta) == [
+        "termo 6373: variação de R$ 70.50 (limite R$ 50.00)",
+        "rubricas fora da lista permitida: 2",
+    ]
+
+
+def test_aprovar_pendente_carrega_na_execucao_de_origem(banco, ambiente, monkeypatch):
+    from src.load import analytics
+    from src.utils.approval import aprovar_pendente
+    from src.utils.run_manifest import ManifestoExecucao
+    from src.utils.workspace import EspacoExecucao
+
+    exportados = []
+
+    def exportar(exportador, completo=False):
+        exportados.append(exportador.dir_staging.name)
+        return True
+
+    monkeypatch.setattr(analytics.AnalyticsExporter, "run", exportar)
+    dir_base = ambiente / "staging"
+
+    with EspacoExecucao.abrir() as espaco:
+        run_id = espaco.run_id
+        _despesas(espaco.caminho, [despesa(i) for i in range(3)])
+        assert not aplicar_politica(espaco.caminho, run_id, PoliticaAprovacao(max_inserts=2), espaco.escopo)
+        espaco.manifesto.finalizar("pendente_aprovacao")
+
+    assert [p["run_id"] for p in listar_pendentes(dir_base)] == [run_id]
+    assert not (espaco.caminho / "despesas_upload.csv").exists()
+
+    assert aprovar_pendente(dir_base, run_id)
+
+    assert banco.consultar("SELECT COUNT(*) FROM despesas") == [(3,)]
+    assert banco.consultar("SELECT DISTINCT run_id FROM etl_load_journal") == [(run_id,)]
+    manifesto = ManifestoExecucao.ler(espaco.caminho)
+    assert (manifesto["run_id"], manifesto["status"], len(manifesto["lotes"])) == (run_id, "concluido", 1)
+    assert manifesto["etapas"]["aprovacao"]["resultado"] is True
+    assert exportados == [run_id]
+    assert listar_pendentes(dir_base) == []
+    assert json.loads((dir_base / "ultima_execucao.json").read_text())["run_id"] == run_id
+
+
+def test_aprovar_pendente_inexistente(ambiente):
+    pytest.importorskip("src.load.loader", exc_type=ImportError)
+    from src.utils.approval import aprovar_pendente
+
+    with pytest.raises(FileNotFoundError):
+        aprovar_pendente(ambiente / "staging", "20240101_000000_000000")
@@ -0,0 +1,69 @@
+"""
+Testes da divisão de lotes com falha e do dead letter compartilhado
+"""
+
+import pandas as pd
+
+from conftest import despesa
+from src.utils.run_manifest import ManifestoExecucao
+
+CPF_INVALIDO = "123456789012345678"  # viola o CHECK de tamanho (14)
+
+
+def _loader(pasta, run_id):
+    from src.load.loader import ExpensesLoader
+
+    return ExpensesLoader(manifesto=ManifestoExecucao(pasta, run_id=run_id), dir_staging=pasta)
+
+
+def test_lote_com_linha_ruim_e_dividido_e_so_ela_vai_para_o_dead_letter(banco, ambiente, configurar, gravar_upload):
+    configurar(LOAD_TAMANHO_LOTE=8)
+    pasta = ambiente / "staging"
+    linhas = [despesa(i) for i in range(1, 9)]
+    linhas[4]["cpf_cnpj"] = CPF_INVALIDO
+    gravar_upload(pasta, linhas)
+
+    assert _loader(pasta, "r1").carregar_despesas()
+
+    carregados = {linha[0] for linha in banco.consultar("SELECT id_codigo_sit FROM despesas")}
+    assert carregados == {str(i) for i in range(1, 9)} - {"5"}
+
+    journal = banco.consultar("SELECT linha_inicio, linha_fim, status FROM etl_load_journal")
+    divididos = sorted((inicio, fim) for inicio, fim, status in journal if status == "dividido")
+    # 8 → 4 → 2 → 1: só o caminho até a linha ruim é dividido
+    assert divididos == [(0, 7), (4, 5), (4, 7)]
+    assert sum(fim - inicio + 1 for inicio, fim, status in journal if status == "commitado") == 7
+
+    dead_letter = pd.read_csv(ambiente / "staging" / "despesas_dead_letter.csv", dtype=str)
+    assert dead_letter["id_codigo_sit"].tolist() == ["5"]
+    assert dead_letter["erro_db"].str.len().iloc[0] > 0
+
+
+def test_dead_letter_e_retentado_na_carga_seguinte_e_zerado_quando_entra(banco, ambiente, configurar, gravar_upload):
+    configurar(LOAD_TAMANHO_LOTE=4)
+    staging = ambiente / "staging"
+    primeira = staging / "runs" / "r1"
+    segunda = staging / "runs" / "r2"
+    primeira.mkdir(parents=True)
+    segunda.mkdir(parents=True)
+
+    ruins = [despesa(1, cpf_cnpj=CPF_INVALIDO), despesa(2, cpf_cnpj=CPF_INVALIDO)]
+    gravar_upload(primeira, ruins + [despesa(3)])
+    _loader(primeira, "r1").carregar_despesas()
+    compartilhado = staging / "despesas_dead_letter.csv"
+    assert sorted(pd.read_csv(compartilhado, dtype=str)["id_codigo_sit"]) == ["1", "2"]
+
+    # A linha 2 é corrigida no dead letter; a 1 volta corrigida no próprio upload
+    dead_letter = pd.read_csv(compartilhado, dtype=str)
+    dead_letter.loc[dead_letter["id_codigo_sit"] == "2", "cpf_cnpj"] = "12345678000190"
+    dead_letter.to_csv(compartilhado, index=False)
+    gravar_upload(segunda, [despesa(1, favorecido="Corrigido")])
+
+    assert _loader(segunda, "r2").carregar_despesas()
+
+    favorecidos = dict(banco.consultar("SELECT id_codigo_sit, favorecido FROM despesas"))
+    assert favorecidos == {"1": "Corrigido", "2": "Fornecedor 2", "3": "Fornecedor 3"}
+    assert not compartilhado.exists()
+    assert not (segunda / "despesas_dead_letter.csv").exists()
+    processado = pd.read_csv(segunda / "despesas_upload.processado.csv", dtype=str)
+    assert sorted(processado["id_codigo_sit"]) == ["1", "2"]
@@ -0,0 +1,95 @@
+"""
+Testes do journal de carga: lotes pulados só na retomada da mesma carga,
+nunca entre cargas diferentes com o mesmo conteúdo
+"""
+
+import os
+
+from conftest import despesa
+from src.utils.run_manifest import ManifestoExecucao
+
+
+def _carregar(pasta, run_id=None):
+    from src.load.loader import ExpensesLoader
+
+    manifesto = ManifestoExecucao(pasta, run_id=run_id) if run_id else None
+    loader = ExpensesLoader(manifesto=manifesto, dir_staging=pasta)
+    assert loader.carregar_despesas()
+    if manifesto is not None:
+        manifesto.finalizar()
+    return loader
+
+
+def _valores(banco):
+    return dict(banco.consultar("SELECT id_codigo_sit, valor FROM despesas ORDER BY id_codigo_sit"))
+
+
+def test_lotes_sao_commitados_com_journal_e_registrados_no_manifesto(banco, ambiente, configurar, gravar_upload):
+    configurar(LOAD_TAMANHO_LOTE=2)
+    pasta = ambiente / "staging"
+    gravar_upload(pasta, [despesa(i) for i in range(1, 6)])
+
+    _carregar(pasta, run_id="r1")
+
+    assert len(_valores(banco)) == 5
+    journal = banco.consultar("SELECT run_id, linha_inicio, linha_fim, status, hash_conteudo FROM etl_load_journal")
+    assert sorted((inicio, fim) for _, inicio, fim, _, _ in journal) == [(0, 1), (2, 3), (4, 4)]
+    assert {(run_id, status) for run_id, _, _, status, _ in journal} == {("r1", "commitado")}
+    assert all(len(h) == 64 for *_, h in journal)
+
+    lotes = ManifestoExecucao.ler(pasta)["lotes"]
+    assert sum(lote["qtd_insert"] for lote in lotes.values()) == 5
+    assert not (pasta / "despesas_upload.csv").exists()
+
+
+def test_retomada_da_mesma_execucao_pula_lotes_ja_commitados(banco, ambiente, configurar, gravar_upload):
+    configurar(LOAD_TAMANHO_LOTE=2)
+    pasta = ambiente / "staging"
+    linhas = [despesa(i) for i in range(1, 5)]
+    gravar_upload(pasta, linhas)
+
+    from src.load.loader import ExpensesLoader
+
+    manifesto = ManifestoExecucao(pasta, run_id="r1")
+    ExpensesLoader(manifesto=manifesto, dir_staging=pasta).carregar_despesas()
+    # Interrompida depois dos commits: a retomada encontra o mesmo upload
+    gravar_upload(pasta, linhas)
+    banco.consultar("DELETE FROM despesas WHERE id_codigo_sit = '1'")
+
+    loader = ExpensesLoader(manifesto=ManifestoExecucao(pasta), dir_staging=pasta)
+    loader.carregar_despesas()
+
+    assert "1" not in _valores(banco)  # o lote do id 1 não foi reaplicado
+    assert banco.consultar("SELECT COUNT(*) FROM etl_load_journal") == [(2,)]
+
+
+def test_conteudo_identico_em_execucoes_diferentes_e_aplicado_de_novo(banco, ambiente, gravar_upload):
+    """A→B→A: a terceira carga tem o mesmo conteúdo da primeira e não pode ser pulada"""
+    pasta = ambiente / "staging"
+    gravar_upload(pasta, [despesa(1, valor="10.00")])
+    _carregar(pasta, run_id="r1")
+    gravar_upload(pasta, [despesa(1, valor="20.00", acao="UPDATE")])
+    _carregar(pasta, run_id="r2")
+    gravar_upload(pasta, [despesa(1, valor="10.00", acao="UPDATE")])
+    _carregar(pasta, run_id="r3")
+    gravar_upload(pasta, [despesa(1, valor="20.00", acao="UPDATE")])
+    _carregar(pasta, run_id="r4")
+
+    assert _valores(banco) == {"1": 20.0}
+    hashes = banco.consultar("SELECT run_id, hash_conteudo FROM etl_load_journal ORDER BY run_id")
+    assert hashes[1][1] == hashes[3][1]  # mesmo conteúdo, chaves diferentes
+
+
+def test_sem_manifesto_upload_gerado_de_novo_nao_e_pulado(banco, ambiente, gravar_upload):
+    pasta = ambiente / "staging"
+    gravar_upload(pasta, [despesa(1, valor="10.00", acao="UPDATE")])
+    banco.consultar("INSERT INTO despesas (id_codigo_sit, termo, rubrica, valor) VALUES ('1', '6373', '1', 5)")
+    _carregar(pasta)
+    banco.consultar("UPDATE despesas SET valor = 7")
+
+    caminho = gravar_upload(pasta, [despesa(1, valor="10.00", acao="UPDATE")])
+    os.utime(caminho, ns=(1, 1))  # arquivo novo, mesmo conteúdo
+    _carregar(pasta)
+
+    assert _valores(banco) == {"1": 10.0}
+    assert banco.consultar("SELECT COUNT(DISTINCT lote_id), COUNT(DISTINCT hash_conteudo) FROM etl_load_journal") == [(2, 1)]
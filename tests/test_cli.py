@@ -0,0 +1,83 @@
+"""
+Testes da CLI: comandos rápidos sem imports pesados nem efeitos no import
+"""
+
+import os
+import subprocess
+import sys
+
+from conftest import RAIZ, despesa
+from src.cli import main
+from src.utils.approval import estacionar_carga
+from src.utils.workspace import EspacoExecucao
+
+
+def _python(codigo, **env):
+    ambiente = {**os.environ, **env}
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, env=ambiente, capture_output=True, text=True, timeout=120,
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return resultado.stdout
+
+
+def test_status_nao_importa_pandas_nem_o_driver(ambiente):
+    saida = _python(
+        "import sys\n"
+        "from src.cli import main\n"
+        "main(['status'])\n"
+        "print('pesados:', sorted(m for m in ('pandas', 'pyodbc', 'src.utils.database') if m in sys.modules))\n"
+    )
+
+    assert "Nenhuma execução registrada" in saida
+    assert "pesados: []" in saida
+
+
+def test_importar_a_cli_e_o_pipeline_nao_cria_arquivos(ambiente):
+    logs = ambiente / "logs_import"
+    _python(
+        "import src.cli\n"
+        "try:\n"
+        "    import src.main\n"
+        "except ImportError:  # pyodbc sem o driver ODBC\n"
+        "    pass\n",
+        ETL_LOG_ARQUIVO="", DIR_LOGS=str(logs),
+    )
+
+    assert not logs.exists()
+
+
+def test_status_mostra_execucao_staging_e_pendentes(ambiente, capsys):
+    import pandas as pd
+
+    with EspacoExecucao.abrir() as espaco:
+        pd.DataFrame([despesa(1)]).to_csv(espaco.caminho / "despesas_upload.csv", index=False)
+        espaco.manifesto.registrar_etapa("extrair_despesas", [], [], True)
+        espaco.manifesto.registrar_lote("a" * 64, "unica", 0, 10, 8, 2)
+    with EspacoExecucao.abrir(escopo="shard-1-de-2") as outra:
+        (outra.caminho / "update_termos.csv").write_text("nro_sit,rendimento_financeiro_total_csv\n1,2\n")
+        estacionar_carga(outra.caminho, outra.run_id, ["10 UPDATEs em termos (limite 5)"], outra.escopo)
+        outra.manifesto.finalizar("pendente_aprovacao")
+
+    assert main(["status"]) == 0
+
+    saida = capsys.readouterr().out
+    assert f"Execuções em andamento:\n   {espaco.run_id} (shard-0-de-1, interrompida)" in saida
+    assert f"Última execução: {outra.run_id} (pendente_aprovacao" in saida
+    assert "Nenhuma carga em staging" in saida
+    assert f"   {outra.run_id}: 10 UPDATEs em termos (limite 5)" in saida
+
+
+def test_status_da_execucao_com_carga_e_lotes(ambiente, capsys):
+    import pandas as pd
+
+    with EspacoExecucao.abrir() as espaco:
+        pd.DataFrame([despesa(1)]).to_csv(espaco.caminho / "despesas_upload.csv", index=False)
+        espaco.manifesto.registrar_lote("a" * 64, "unica", 0, 10, 8, 2)
+
+    assert main(["status"]) == 0
+
+    saida = capsys.readouterr().out
+    assert "lotes commitados: 1 | INSERT 8 | UPDATE 2" in saida
+    assert "   despesas: despesas_upload.csv (sem resumo)" in saida
+    assert "Cargas pendentes de aprovação: 0" in saida
@@ -0,0 +1,58 @@
+"""
+Testes da validação de restrições lida do DDL
+"""
+
+import pandas as pd
+
+from conftest import despesa
+from src.transform.constraints import carregar_restricoes, validar_restricoes
+
+
+def test_restricoes_vem_do_create_table():
+    restricoes = carregar_restricoes("despesas")
+
+    assert restricoes["id"].identidade and not restricoes["id"].nulo
+    assert (restricoes["cpf_cnpj"].tipo, restricoes["cpf_cnpj"].args) == ("varchar", (14,))
+    assert (restricoes["valor"].tipo, restricoes["valor"].args) == ("decimal", (18, 2))
+    assert restricoes["data_pagamento"].tipo == "date"
+    assert "id_termo" not in restricoes  # coluna calculada não é carregada
+
+    journal = carregar_restricoes("etl_load_journal")
+    assert not journal["linha_inicio"].nulo
+    assert journal["hash_conteudo"].nulo
+
+
+def test_linhas_invalidas_sao_marcadas_com_uma_linha_de_relatorio_por_violacao():
+    df = pd.DataFrame([
+        despesa(1),
+        despesa(2, cpf_cnpj="1" * 15),
+        despesa(3, valor="1e17", data_pagamento="31/12/2024"),
+        despesa(4, valor="abc"),
+        despesa(5, valor="", data_debito_convenio=None),
+    ])
+
+    validas, relatorio = validar_restricoes(df)
+
+    assert validas.tolist() == [True, False, False, False, True]
+    violacoes = sorted(zip(relatorio["id_codigo_sit"], relatorio["coluna"], relatorio["restricao"]))
+    assert violacoes == [
+        ("2", "cpf_cnpj", "varchar(14)"),
+        ("3", "data_pagamento", "date"),
+        ("3", "valor", "decimal(18,2)"),
+        ("4", "valor", "decimal(18,2)"),
+    ]
+
+
+def test_not_null_e_inteiros():
+    df = pd.DataFrame({
+        "lote_id": ["a" * 64, None, "b" * 64],
+        "linha_inicio": ["0", "1", "2.5"],
+        "linha_fim": ["3", "99999999999", "4"],
+    })
+
+    validas, relatorio = validar_restricoes(df, tabela="etl_load_journal", coluna_id="lote_id")
+
+    assert validas.tolist() == [True, False, False]
+    assert sorted(zip(relatorio["coluna"], relatorio["restricao"])) == [
+        ("linha_fim", "int"), ("linha_inicio", "int"), ("lote_id", "NOT NULL"),
+    ]
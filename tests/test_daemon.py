@@ -0,0 +1,111 @@
+"""
+Testes do daemon: entrega de arquivos estáveis e fingerprints relidos a cada ciclo
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.utils.config import Config
+
+daemon_etl = pytest.importorskip("src.daemon", exc_type=ImportError)
+
+
+def test_vigia_so_entrega_arquivos_estaveis_e_relevantes(ambiente):
+    downloads = ambiente / "downloads"
+    (downloads / "Despesas_SIT_1.xlsx").write_bytes(b"planilha")
+    (downloads / "Despesas_SIT_2.xlsx.crdownload").write_bytes(b"baixando")
+    (downloads / "~$Despesas_SIT_1.xlsx").write_bytes(b"trava do Excel")
+    (downloads / "notas.txt").write_bytes(b"texto")
+    parar = threading.Event()
+
+    vigia = daemon_etl.VigiaPasta(downloads, debounce=0, intervalo=0)
+    assert [p.name for p in vigia.aguardar_lote(parar, uma_vez=True)] == ["Despesas_SIT_1.xlsx"]
+    assert vigia.aguardar_lote(parar, uma_vez=True) == []
+
+    # Alterado depois de entregue: entra de novo
+    os.utime(downloads / "Despesas_SIT_1.xlsx", (1000, 1000))
+    assert [p.name for p in vigia.aguardar_lote(parar, uma_vez=True)] == ["Despesas_SIT_1.xlsx"]
+
+
+def test_vigia_espera_o_debounce_antes_de_entregar(ambiente, monkeypatch):
+    class Relogio:
+        """Evento de parada cuja espera avança o relógio do vigia"""
+        agora = 100.0
+
+        def is_set(self):
+            return False
+
+        def wait(self, segundos):
+            Relogio.agora += segundos
+
+    monkeypatch.setattr(daemon_etl.time, "monotonic", lambda: Relogio.agora)
+    (ambiente / "downloads" / "Despesas_SIT_1.xlsx").write_bytes(b"planilha")
+
+    vigia = daemon_etl.VigiaPasta(ambiente / "downloads", debounce=5, intervalo=1)
+    assert [p.name for p in vigia.aguardar_lote(Relogio())] == ["Despesas_SIT_1.xlsx"]
+    assert Relogio.agora == 105.0
+
+
+@pytest.fixture
+def daemon(banco, ambiente, configurar, monkeypatch):
+    openpyxl = pytest.importorskip("openpyxl")
+    from src.extract import expenses
+
+    configurar(APROVACAO_MODO="politica", DAEMON_IMPORTAR_DOWNLOADS="false")
+    monkeypatch.setattr(expenses.registro_sit, "mapa", lambda *a, **k: {"57884": "6373"})
+    monkeypatch.setattr(expenses.registro_sit, "pertence_ao_shard", lambda sit: True)
+
+    def planilha(linhas):
+        wb = openpyxl.Workbook()
+        wb.active.append(["Código", "Tipo de Despesa", "CPF/CNPJ", "Favorecido", "Descrição da Despesa",
+                          "Data do Pagamento", "Valor"])
+        for codigo, valor in linhas:
+            wb.active.append([codigo, "339036 - SERVIÇOS", "123", "Fav", "desc", "05/02/2024", valor])
+        caminho = ambiente / "downloads" / "Despesas_SIT_57884.xlsx"
+        wb.save(caminho)
+        return caminho
+
+    instancia = daemon_etl.DaemonETL()
+    instancia.planilha = planilha
+    return instancia
+
+
+def test_ciclo_le_so_os_fingerprints_dos_ids_extraidos(daemon, banco, monkeypatch):
+    from src.transform.transformer import ExpensesTransformer
+
+    banco.consultar("INSERT INTO despesas (id_codigo_sit, termo, rubrica, valor) VALUES ('99', '6373', '1', 5)")
+    lidos = []
+    original = ExpensesTransformer.ler_snapshot_despesas
+
+    def ler_contado(transformador, ids=None):
+        lidos.append(ids)
+        return original(transformador, ids)
+
+    monkeypatch.setattr(ExpensesTransformer, "ler_snapshot_despesas", ler_contado)
+
+    assert daemon.processar([daemon.planilha([("1", "10"), ("2", "20")])])
+
+    assert [sorted(ids) for ids in lidos] == [["1", "2"]]
+    assert banco.consultar("SELECT id_codigo_sit, valor FROM despesas ORDER BY id_codigo_sit") == [
+        ("1", 10), ("2", 20), ("99", 5),
+    ]
+
+
+def test_carga_feita_fora_do_daemon_entra_na_comparacao_do_ciclo_seguinte(daemon, banco):
+    from src.load.loader import ExpensesLoader
+
+    arquivo = daemon.planilha([("1", "10"), ("2", "20")])
+    assert daemon.processar([arquivo])
+
+    # Outra carga (CLI, outro shard) altera o banco entre os ciclos
+    banco.consultar("UPDATE despesas SET valor = 999 WHERE id_codigo_sit = '1'")
+
+    assert daemon.processar([daemon.planilha([("1", "10"), ("2", "20"), ("3", "30")])])
+
+    assert banco.consultar("SELECT id_codigo_sit, valor FROM despesas ORDER BY id_codigo_sit") == [
+        ("1", 10), ("2", 20), ("3", 30),
+    ]
+    assert not list(Path(Config.DIR_STAGING).rglob(ExpensesLoader.ARQUIVO_DEAD_LETTER))
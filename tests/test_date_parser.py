@@ -0,0 +1,62 @@
+"""
+Testes da conversão de datas: detecção de formato, cache e fallback
+"""
+
+import pandas as pd
+import pytest
+
+from src.utils.date_parser import ParserDatas, data_para_iso, detectar_formato_data
+
+
+@pytest.mark.parametrize("valores, formato", [
+    (["15/03/2024", "01/04/2024", None, ""], "%d/%m/%Y"),
+    (["2024-03-15 00:00:00", "2024-04-01 00:00:00"], "%Y-%m-%d %H:%M:%S"),
+    (["15.03.2024"], "%d.%m.%Y"),
+    (["sem data", None], None),
+])
+def test_formato_dominante_da_amostra(valores, formato):
+    assert detectar_formato_data(valores) == formato
+
+
+def test_dia_primeiro_mesmo_quando_o_mes_e_ambiguo():
+    datas, iso = ParserDatas().converter(pd.Series(["02/03/2024", "13/03/2024"]), "data_pagamento")
+    assert iso.tolist() == ["2024-03-02", "2024-03-13"]
+
+
+def test_valores_fora_do_formato_detectado_caem_no_fallback_e_invalidos_viram_nat():
+    parser = ParserDatas()
+    serie = pd.Series(["15/03/2024", "16/03/2024", "2024-03-17", "31/02/2024", None, "  "])
+
+    datas, iso = parser.converter(serie, "data_pagamento")
+
+    assert parser.formatos["data_pagamento"] == "%d/%m/%Y"
+    assert iso.tolist()[:3] == ["2024-03-15", "2024-03-16", "2024-03-17"]
+    assert datas.iloc[3:].isna().all()
+    assert iso.iloc[3:].isna().all()
+
+
+def test_cada_string_distinta_e_convertida_uma_vez_e_o_cache_tem_limite(monkeypatch):
+    parser = ParserDatas(limite_cache=3)
+    convertidos = []
+    original = parser._atualizar_cache
+
+    def contar(valores, formato):
+        convertidos.extend(valores)
+        original(valores, formato)
+
+    monkeypatch.setattr(parser, "_atualizar_cache", contar)
+
+    parser.converter(pd.Series(["01/01/2024"] * 1000 + ["02/01/2024"]), "data")
+    parser.converter(pd.Series(["02/01/2024", "01/01/2024"]), "data")
+    assert sorted(convertidos) == ["01/01/2024", "02/01/2024"]
+
+    _, iso = parser.converter(pd.Series(["03/01/2024", "04/01/2024"]), "data")
+    assert iso.tolist() == ["2024-01-03", "2024-01-04"]
+    assert len(parser._cache) <= 3
+
+
+def test_data_para_iso():
+    assert data_para_iso("15/03/2024") == "2024-03-15"
+    assert data_para_iso("2024-03-15 10:30:00") == "2024-03-15"
+    assert data_para_iso("  ") is None
+    assert data_para_iso("ontem") is None
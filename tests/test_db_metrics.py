@@ -0,0 +1,78 @@
+"""
+Testes da instrumentação do acesso ao banco (por modelo de comando)
+"""
+
+import pytest
+
+from conftest import BancoSqlite
+from src.utils.db_metrics import FAIXAS_LATENCIA, ConexaoInstrumentada, EstatisticasSQL, normalizar_sql
+
+
+@pytest.fixture
+def conexao(tmp_path):
+    estatisticas = EstatisticasSQL()
+    conn = ConexaoInstrumentada(BancoSqlite(tmp_path / "banco.sqlite").conectar(), estatisticas)
+    yield conn, estatisticas
+    conn.close()
+
+
+def test_literais_nao_separam_modelos():
+    assert normalizar_sql("SELECT *  FROM despesas\n WHERE id = 10 AND nome = 'O''Neil'") == (
+        "SELECT * FROM despesas WHERE id = ? AND nome = ?"
+    )
+    assert normalizar_sql("SELECT 1.5") == normalizar_sql("SELECT 2")
+
+
+def test_chamadas_linhas_e_commit_por_modelo(conexao):
+    conn, estatisticas = conexao
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO despesas (id_codigo_sit, valor) VALUES (?, ?)", ((str(i), i) for i in range(5)),
+    )
+    for termo in ("6373", "6729"):
+        cursor.execute(f"SELECT nro_sit FROM termos WHERE id_termo = {termo}")
+        cursor.fetchall()
+    cursor.execute("SELECT id_codigo_sit FROM despesas WHERE valor > ?", 1)
+    assert len(list(cursor)) == 3
+    conn.commit()
+
+    por_modelo = {item["sql"]: item for item in estatisticas.resumo()}
+
+    insert = por_modelo["INSERT INTO despesas (id_codigo_sit, valor) VALUES (?, ?)"]
+    assert (insert["chamadas"], insert["linhas_entrada"]) == (1, 5)
+    termos = por_modelo["SELECT nro_sit FROM termos WHERE id_termo = ?"]
+    assert (termos["chamadas"], termos["linhas_saida"], sum(termos["histograma"])) == (2, 2, 2)
+    filtro = por_modelo["SELECT id_codigo_sit FROM despesas WHERE valor > ?"]
+    assert (filtro["linhas_entrada"], filtro["linhas_saida"]) == (1, 3)
+    assert por_modelo["COMMIT"]["chamadas"] == 1
+    assert estatisticas.totais()["chamadas"] == 5
+
+
+def test_mesclar_soma_contagens_e_mantem_o_maior_tempo():
+    pai, filho = EstatisticasSQL(), EstatisticasSQL()
+    pai.registrar("SELECT ?", 0.002, linhas_saida=1)
+    filho.registrar("SELECT ?", 2.0, linhas_saida=4)
+    filho.registrar("COMMIT", 0.01)
+
+    pai.mesclar(filho.exportar())
+
+    [select] = [item for item in pai.resumo() if item["sql"] == "SELECT ?"]
+    assert (select["chamadas"], select["linhas_saida"], select["max_segundos"]) == (2, 5, 2.0)
+    assert select["histograma"][FAIXAS_LATENCIA.index(0.005)] == 1
+    assert select["histograma"][FAIXAS_LATENCIA.index(5.0)] == 1
+    assert {item["sql"] for item in pai.resumo()} == {"SELECT ?", "COMMIT"}
+
+
+def test_comando_lento_e_logado_acima_do_limite(configurar, monkeypatch):
+    from src.utils import db_metrics
+
+    avisos = []
+    monkeypatch.setattr(db_metrics.logger, "warning", avisos.append)
+    configurar(DB_LENTO_MS=100)
+    estatisticas = EstatisticasSQL()
+
+    estatisticas.registrar("UPDATE despesas SET valor = ?", 0.05)
+    estatisticas.registrar("UPDATE despesas SET valor = ?", 0.25, linhas_entrada=500)
+    estatisticas.registrar("UPDATE despesas SET valor = ?", 0.5, chamada=False)
+
+    assert avisos == ["🐢 Comando lento (250 ms, 500 linha(s)): UPDATE despesas SET valor = ?"]
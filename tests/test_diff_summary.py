@@ -0,0 +1,76 @@
+"""
+Testes do resumo da comparação (resumo_diff.json)
+"""
+
+import threading
+
+import pandas as pd
+
+from conftest import despesa
+from src.transform.diff_summary import (
+    ARQUIVO_RESUMO, carregar_resumo, gravar_secao, ler_resumo, resumir_despesas, resumir_tabela,
+)
+
+
+def test_resumo_de_despesas_conta_acoes_e_totaliza_por_termo():
+    df = pd.DataFrame([
+        despesa(1, valor="100.00"),
+        despesa(2, valor="30.00", acao="UPDATE"),
+        despesa(3, termo="6729", rubrica="2", valor="5.00", acao="UPDATE"),
+        despesa(4, valor="abc"),
+    ])
+
+    resumo = resumir_despesas(df, {"2": 80.0, "3": 5.5}, ignorados=7)
+
+    assert {k: resumo[k] for k in ("insert", "update", "ignorado", "total", "rubricas")} == {
+        "insert": 2, "update": 2, "ignorado": 7, "total": 4, "rubricas": ["1", "2"],
+    }
+    assert resumo["por_termo"]["6373"] == {
+        "insert": 2, "update": 1, "valor_anterior": 80.0, "valor": 130.0, "delta": 50.0, "variacao": 150.0,
+    }
+    assert resumo["por_termo"]["6729"]["delta"] == -0.5
+    assert [m["id_codigo_sit"] for m in resumo["maiores_mudancas"]] == ["1", "2", "3", "4"]
+    assert len(resumo["amostra"]) == 3
+
+
+def test_tabela_com_valores_totaliza_por_termo():
+    df = pd.DataFrame({"id_termo_rubrica": ["6373-1", "6373-2"], "valor_estornado": [10.0, 0.0]})
+
+    resumo = resumir_tabela(df, termo=pd.Series(["6373", "6373"]), valor=df["valor_estornado"],
+                            valor_anterior=pd.Series([0.0, 4.0]), rubrica=pd.Series(["1", "2"]))
+
+    assert (resumo["update"], resumo["total"], resumo["rubricas"]) == (2, 2, ["1", "2"])
+    assert resumo["por_termo"] == {
+        "6373": {"update": 2, "valor_anterior": 4.0, "valor": 10.0, "delta": 6.0, "variacao": 14.0},
+    }
+    assert "por_termo" not in resumir_tabela(df)
+
+
+def test_secoes_gravadas_em_paralelo_nao_se_perdem(tmp_path):
+    tarefas = [
+        threading.Thread(target=gravar_secao, args=(tmp_path, secao, {"total": i}))
+        for i, secao in enumerate(["despesas", "termos", "rubricas"] * 5)
+    ]
+    for tarefa in tarefas:
+        tarefa.start()
+    for tarefa in tarefas:
+        tarefa.join()
+
+    assert {"despesas", "termos", "rubricas"} <= set(ler_resumo(tmp_path))
+
+    gravar_secao(tmp_path, "termos", None)
+    assert "termos" not in ler_resumo(tmp_path)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_carregar_resumo_so_traz_secoes_com_arquivo_no_staging(tmp_path):
+    pd.DataFrame([despesa(1), despesa(2, acao="UPDATE", valor="4.00")]).to_csv(
+        tmp_path / "despesas_upload.csv", index=False)
+    gravar_secao(tmp_path, "termos", {"update": 1, "total": 1, "amostra": []})  # update_termos.csv já carregado
+
+    resumo = carregar_resumo(tmp_path)
+
+    assert list(resumo) == ["despesas"]
+    # Sem resumo gravado, o delta do UPDATE é o próprio valor novo
+    assert resumo["despesas"]["por_termo"]["6373"]["delta"] == 14.0
+    assert (tmp_path / ARQUIVO_RESUMO).exists()
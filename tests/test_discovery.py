@@ -0,0 +1,77 @@
+"""
+Testes da descoberta de arquivos de origem e do latest-wins por id na extração
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from src.extract import discovery
+from src.extract.discovery import chave_base, descobrir_fontes
+
+
+def _arquivo(pasta, nome, conteudo, mtime):
+    caminho = pasta / nome
+    caminho.write_bytes(conteudo)
+    os.utime(caminho, (mtime, mtime))
+    return caminho
+
+
+def test_chave_base_ignora_sufixo_de_download_repetido(tmp_path):
+    assert chave_base(tmp_path / "Despesas_SIT_57884 (12).xlsx") == "Despesas_SIT_57884"
+    assert chave_base(tmp_path / "Despesas_SIT_57884.xlsx") == "Despesas_SIT_57884"
+
+
+def test_copias_identicas_saem_e_a_mais_recente_vem_primeiro(tmp_path, monkeypatch):
+    _arquivo(tmp_path, "Despesas_SIT_1.xlsx", b"versao A", 1000)
+    _arquivo(tmp_path, "Despesas_SIT_1 (1).xlsx", b"versao A", 3000)
+    _arquivo(tmp_path, "Despesas_SIT_1 (2).xlsx", b"versao B", 2000)
+    _arquivo(tmp_path, "Despesas_SIT_2.xlsx", b"outro tamanho", 1500)
+    _arquivo(tmp_path, "resumo.csv", b"versao A", 4000)
+
+    hasheados = []
+    original = discovery.hash_arquivo
+
+    def hash_contado(caminho):
+        hasheados.append(caminho.name)
+        return original(caminho)
+
+    monkeypatch.setattr(discovery, "hash_arquivo", hash_contado)
+
+    fontes = descobrir_fontes(tmp_path, "Despesas_SIT_*.xlsx")
+
+    assert [f.caminho.name for f in fontes] == [
+        "Despesas_SIT_1 (1).xlsx", "Despesas_SIT_1 (2).xlsx", "Despesas_SIT_2.xlsx",
+    ]
+    assert {f.chave for f in fontes} == {"Despesas_SIT_1", "Despesas_SIT_2"}
+    # Só arquivos com outro do mesmo tamanho são lidos
+    assert "Despesas_SIT_2.xlsx" not in hasheados
+
+
+def test_extracao_le_todas_as_versoes_e_a_mais_recente_prevalece_por_id(ambiente, monkeypatch):
+    openpyxl = pytest.importorskip("openpyxl")
+    expenses = pytest.importorskip("src.extract.expenses", exc_type=ImportError)
+    monkeypatch.setattr(expenses.registro_sit, "mapa", lambda *a, **k: {"57884": "6373"})
+    monkeypatch.setattr(expenses.registro_sit, "pertence_ao_shard", lambda sit: True)
+
+    cabecalho = ["Código", "Tipo de Despesa", "CPF/CNPJ", "Favorecido", "Descrição da Despesa",
+                 "Data do Pagamento", "Valor"]
+
+    def planilha(nome, linhas, mtime):
+        wb = openpyxl.Workbook()
+        wb.active.append(cabecalho)
+        for codigo, valor in linhas:
+            wb.active.append([codigo, "339036 - SERVIÇOS", "123", "Fav", "desc", "05/02/2024", valor])
+        caminho = ambiente / "downloads" / nome
+        wb.save(caminho)
+        os.utime(caminho, (mtime, mtime))
+
+    planilha("Despesas_SIT_57884.xlsx", [("1", "10"), ("2", "20")], 1000)
+    planilha("Despesas_SIT_57884 (1).xlsx", [("2", "25"), ("3", "30"), ("3", "31")], 2000)
+
+    extrator = expenses.ExpensesExtractor(dir_staging=ambiente / "staging")
+    assert extrator.extrair_despesas_csv()
+
+    df = pd.read_csv(ambiente / "staging" / "despesas_geral.csv", dtype=str)
+    assert dict(zip(df["id_codigo_sit"], df["valor"].astype(float))) == {"1": 10.0, "2": 25.0, "3": 30.0}
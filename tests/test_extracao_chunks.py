@@ -0,0 +1,52 @@
+"""Normalização em chunks da planilha de despesas (user-026)"""
+
+import warnings
+
+import pandas as pd
+import pytest
+
+expenses = pytest.importorskip("src.extract.expenses", exc_type=ImportError)
+from src.utils.date_parser import ParserDatas  # noqa: E402
+
+
+def _planilha(linhas: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Código": [str(100 + i) for i in range(linhas)],
+        "Tipo de Despesa": ["339036 - SERVIÇOS DE TERCEIROS"] * linhas,
+        "CPF/CNPJ": ["123.456.789-01"] * linhas,
+        "Favorecido": [f" Fav {i} " for i in range(linhas)],
+        "Descrição da Despesa": ["desc"] * linhas,
+        "Data do Pagamento": ["05/02/2024"] * (linhas - 1) + [None],
+        "Valor": ["10.5"] * linhas,
+    }, dtype=object)
+
+
+def test_chunk_fatiado_nao_altera_a_planilha_nem_gera_avisos():
+    planilha = _planilha(6)
+    colunas = list(planilha.columns)
+    chunk = planilha.iloc[2:6]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        novo = expenses.ExpensesExtractor._normalizar_chunk(chunk, "6373", ParserDatas())
+
+    assert list(planilha.columns) == colunas
+    assert list(chunk.columns) == colunas
+    # Última linha sem data de pagamento sai
+    assert novo["id_codigo_sit"].tolist() == ["102", "103", "104"]
+    assert novo["data_pagamento"].unique().tolist() == ["2024-02-05"]
+    assert novo["id_termo_rubrica"].unique().tolist() == ["6373-339036"]
+    assert novo["favorecido"].tolist() == ["Fav 2", "Fav 3", "Fav 4"]
+    assert novo["cpf_cnpj"].unique().tolist() == ["12345678901"]
+    assert novo["tipo_doc_despesa"].unique().tolist() == [""]
+
+
+def test_formato_de_data_detectado_vale_para_os_chunks_seguintes():
+    planilha = _planilha(4)
+    parser = ParserDatas()
+    primeiro = expenses.ExpensesExtractor._normalizar_chunk(planilha.iloc[:2], "6373", parser)
+    segundo = expenses.ExpensesExtractor._normalizar_chunk(planilha.iloc[2:], "6373", parser)
+
+    assert primeiro["data_pagamento"].tolist() == ["2024-02-05", "2024-02-05"]
+    assert segundo["data_pagamento"].tolist() == ["2024-02-05"]
+    assert parser.formatos["data_pagamento"] == "%d/%m/%Y"
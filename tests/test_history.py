@@ -0,0 +1,166 @@
+"""
+Testes do histórico de despesas: spool por lote resistente a quedas e
+reconstrução do estado de um id ou de um termo em qualquer instante
+"""
+
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from conftest import despesa
+
+pytest.importorskip("pyarrow")
+history = pytest.importorskip("src.load.history", exc_type=ImportError)
+
+
+def _insert(id_codigo, termo="6373", valor="10.00", data="2024-01-10"):
+    return (id_codigo, termo, "1", "Serviços", None, "Fornecedor", "NF", "Descrição", "TED", data, None, valor,
+            f"{termo}-1")
+
+
+def _update(linha):
+    """Parâmetros de SQL_UPDATE (id_codigo_sit por último)"""
+    return tuple(linha[1:]) + (linha[0],)
+
+
+def _aplicar(historico, lote_id, inserts=(), updates=(), anteriores=None):
+    historico.preparar(lote_id, "r1", list(inserts), [_update(l) for l in updates], anteriores or {})
+    historico.confirmar(lote_id)
+
+
+@pytest.fixture
+def historico(ambiente):
+    return history.HistoricoDespesas(ambiente / "historico")
+
+
+def test_reconstroi_id_e_termo_em_cada_instante(historico):
+    original = _insert("1")
+    _aplicar(historico, "a", inserts=[original, _insert("2", valor="5.00")])
+    historico.descarregar()
+    antes = datetime.now()
+
+    movida = _insert("1", termo="6729", valor="12.50")
+    _aplicar(historico, "b", updates=[movida, _insert("2", valor="5.00")],
+             anteriores={"1": original, "2": _insert("2", valor="5.00")})
+    historico.descarregar()
+
+    assert historico.estado("1", antes)["termo"] == "6373"
+    agora = historico.estado("1")
+    assert (agora["termo"], agora["valor"], agora["data_pagamento"]) == ("6729", Decimal("12.50"), date(2024, 1, 10))
+    assert historico.estado("3") is None
+
+    # UPDATE sem mudança (id 2) não gera registro; o do id 1 só leva as colunas alteradas
+    versoes = historico.versoes(["1", "2"])
+    assert [v["op"] for v in versoes["1"]] == ["I", "U"]
+    assert set(versoes["1"][1]) == {"ts", "run_id", "op", "termo", "valor", "id_termo_rubrica"}
+    assert [v["op"] for v in versoes["2"]] == ["I"]
+
+    assert historico.estado_termo("6373", antes)["id_codigo_sit"].tolist() == ["1", "2"]
+    assert historico.estado_termo("6373")["id_codigo_sit"].tolist() == ["2"]
+    assert historico.estado_termo("6729")["id_codigo_sit"].tolist() == ["1"]
+
+
+def test_update_de_id_sem_historico_grava_o_estado_anterior(historico):
+    anterior = _insert("7", valor="1.00")
+    _aplicar(historico, "a", updates=[_insert("7", valor="2.00")], anteriores={"7": anterior})
+    historico.descarregar()
+
+    versoes = historico.versoes(["7"])["7"]
+    assert [(v["op"], v["valor"]) for v in versoes] == [("B", Decimal("1.00")), ("U", Decimal("2.00"))]
+    assert historico.estado("7", datetime(2000, 1, 1))["valor"] == Decimal("1.00")
+
+
+def test_lote_confirmado_sobrevive_a_queda_antes_do_segmento(historico, ambiente):
+    _aplicar(historico, "a", inserts=[_insert("1")])
+
+    # Processo caiu sem descarregar: outra instância leva o spool ao segmento
+    assert history.HistoricoDespesas(ambiente / "historico").descarregar()
+
+    assert historico.estado("1")["valor"] == Decimal("10.00")
+    assert list(historico.pasta_spool.glob("*.lote")) == []
+
+
+def test_lote_ja_no_segmento_nao_e_gravado_de_novo(historico):
+    _aplicar(historico, "a", inserts=[_insert("1")])
+    spool = historico.pasta_spool / "a.lote"
+    conteudo = spool.read_bytes()
+    historico.descarregar()
+
+    # Queda depois de indexar o segmento e antes de apagar o spool
+    spool.write_bytes(conteudo)
+    assert historico.descarregar()
+
+    assert len(historico.versoes(["1"])["1"]) == 1
+    assert not spool.exists()
+
+
+def test_pendentes_de_processo_morto_seguem_o_journal(historico):
+    historico.preparar("commitado", "r1", [_insert("1")], [], {})
+    historico.preparar("desfeito", "r1", [_insert("2")], [], {})
+    historico.preparar("em_andamento", "r1", [_insert("3")], [], {})
+    spool = historico.pasta_spool
+    # 999999 morreu e deixou a trava; 777777 morreu e a trava já foi apagada; 888888 segue vivo
+    (spool / "999999.trava").touch()
+    historico._pendente("commitado").rename(spool / "commitado.999999.pendente")
+    historico._pendente("desfeito").rename(spool / "desfeito.777777.pendente")
+    vivo = history.TravaArquivo(spool / "888888.trava")
+    vivo.adquirir()
+    historico._pendente("em_andamento").rename(spool / "em_andamento.888888.pendente")
+    consultados = []
+
+    def commitados(lote_ids):
+        consultados.extend(lote_ids)
+        return {"commitado"}
+
+    try:
+        assert historico.recuperar(commitados)
+    finally:
+        vivo.liberar()
+
+    assert consultados == ["commitado", "desfeito"]
+    assert set(historico.estados(["1", "2", "3"])) == {"1"}
+    assert sorted(p.name for p in spool.iterdir()) == [
+        f"{os.getpid()}.trava", "888888.trava", "em_andamento.888888.pendente",
+    ]
+
+
+def test_travas_de_cargas_encerradas_sao_apagadas(historico):
+    _aplicar(historico, "a", inserts=[_insert("1")])
+    for pid in ("111111", "222222"):
+        (historico.pasta_spool / f"{pid}.trava").touch()
+
+    def commitados(lote_ids):
+        return set()
+
+    assert historico.recuperar(commitados)
+
+    assert os.listdir(historico.pasta_spool) == [f"{os.getpid()}.trava"]
+
+
+def test_carga_que_caiu_depois_do_commit_recupera_o_historico(banco, ambiente, configurar, gravar_upload,
+                                                             monkeypatch):
+    from src.load.loader import ExpensesLoader
+
+    configurar(DIR_HISTORICO=ambiente / "historico", LOAD_TAMANHO_LOTE=2)
+    pasta = ambiente / "staging"
+
+    # Queda entre o commit de cada lote e a confirmação no histórico
+    def cair(self, *args):
+        return True
+
+    with monkeypatch.context() as m:
+        m.setattr(history.HistoricoDespesas, "confirmar", cair)
+        m.setattr(history.HistoricoDespesas, "descarregar", cair)
+        gravar_upload(pasta, [despesa(i) for i in range(1, 4)])
+        assert ExpensesLoader(dir_staging=pasta).carregar_despesas()
+
+    assert len(list((ambiente / "historico" / "spool").glob("*.pendente"))) == 2
+
+    gravar_upload(pasta, [despesa(4)])
+    assert ExpensesLoader(dir_staging=pasta).carregar_despesas()
+
+    historico = history.HistoricoDespesas(ambiente / "historico")
+    assert sorted(historico.estados(["1", "2", "3", "4"])) == ["1", "2", "3", "4"]
+    assert os.listdir(historico.pasta_spool) == [f"{os.getpid()}.trava"]
@@ -0,0 +1,99 @@
+"""
+Testes do logging: agregação de repetições, JSON Lines e um único dono do
+arquivo da execução quando há processos filhos
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import uuid
+from pathlib import Path
+
+from src.utils import logger as modulo
+from src.utils.logger import AgregadorRepeticoes, FormatoJSON, descarregar, setup_logger
+from src.utils.pipeline_dag import ExecutorDAG, Tarefa
+
+
+def _registro(mensagem, nivel=logging.WARNING):
+    return logging.LogRecord("Loader", nivel, __file__, 1, mensagem, None, None)
+
+
+def _arquivo_log() -> Path:
+    return Path(os.environ["ETL_LOG_ARQUIVO"])
+
+
+def test_repeticoes_que_diferem_so_nos_numeros_sao_suprimidas_e_contadas():
+    agregador = AgregadorRepeticoes(limite=2, janela=60)
+
+    passaram = [agregador.filter(_registro(f"Linha {i}: valor inválido")) for i in range(5)]
+
+    assert passaram == [True, True, False, False, False]
+    assert agregador.filter(_registro("Outra mensagem 1"))
+    assert agregador.filter(_registro("Linha 9: valor inválido", logging.INFO))
+    assert agregador.pendentes() == [("Loader", logging.WARNING, "Linha 0: valor inválido", 3)]
+
+
+def test_janela_vencida_anexa_o_total_suprimido(monkeypatch):
+    relogio = [0.0]
+    monkeypatch.setattr(modulo.time, "monotonic", lambda: relogio[0])
+    agregador = AgregadorRepeticoes(limite=1, janela=10)
+    for i in range(3):
+        agregador.filter(_registro(f"Linha {i} rejeitada"))
+
+    relogio[0] = 11
+    registro = _registro("Linha 7 rejeitada")
+
+    assert agregador.filter(registro)
+    assert registro.getMessage() == "Linha 7 rejeitada (+2 ocorrência(s) semelhante(s) suprimida(s))"
+
+
+def test_formato_json_uma_linha_por_mensagem():
+    registro = _registro("Carga concluída")
+    registro.progresso = {"feito": 3}
+
+    dados = json.loads(FormatoJSON().format(registro))
+
+    assert (dados["nivel"], dados["logger"], dados["mensagem"], dados["progresso"]) == (
+        "WARNING", "Loader", "Carga concluída", {"feito": 3},
+    )
+
+
+def _tarefa_que_loga(marca):
+    """Tarefa de processo filho (nível de módulo: serializável)"""
+    setup_logger("TarefaFilho").warning(f"{marca} no filho")
+    return os.getpid(), modulo._listener is None
+
+
+def test_log_de_processos_do_pool_e_gravado_pelo_processo_principal():
+    setup_logger("Teste").info("logging iniciado no processo principal")
+    marca = uuid.uuid4().hex
+    tarefas = [Tarefa("filho", _tarefa_que_loga, entradas=["marca"], saidas=["filho"], pool="processo"),
+               Tarefa("marca", lambda: marca, saidas=["marca"])]
+
+    pid_filho, sem_gravador = ExecutorDAG(tarefas, max_processos=1).executar()["filho"]
+    descarregar()
+
+    assert pid_filho != os.getpid()
+    assert sem_gravador  # o filho não abriu arquivo nem thread gravadora
+    assert f"TarefaFilho - WARNING - {marca} no filho" in _arquivo_log().read_text(encoding="utf-8")
+    assert not list(_arquivo_log().parent.glob(f"{_arquivo_log().stem}.{pid_filho}.*"))
+
+
+def _filho_avulso(marca):
+    setup_logger("FilhoAvulso").warning(f"{marca} no filho avulso")
+    descarregar()
+
+
+def test_filho_sem_inicializador_grava_em_arquivo_proprio():
+    setup_logger("Teste").info("logging iniciado no processo principal")
+    marca = uuid.uuid4().hex
+    processo = multiprocessing.get_context("fork").Process(target=_filho_avulso, args=(marca,))
+    processo.start()
+    processo.join(timeout=30)
+    descarregar()
+
+    proprio = _arquivo_log().with_name(f"{_arquivo_log().stem}.{processo.pid}{_arquivo_log().suffix}")
+    assert processo.exitcode == 0
+    assert marca in proprio.read_text(encoding="utf-8")
+    assert marca not in _arquivo_log().read_text(encoding="utf-8")
@@ -0,0 +1,67 @@
+"""
+Testes das métricas Prometheus: formato texto, mesclagem e arquivo do textfile collector
+"""
+
+import pytest
+
+from src.utils.db_metrics import estatisticas_sql
+from src.utils.metrics import RegistroMetricas, metricas, registrar_fim_execucao
+
+
+def test_texto_no_formato_de_exposicao():
+    registro = RegistroMetricas()
+    registro.incrementar("linhas_lidas", 10, "Linhas lidas", etapa="extracao", arquivo='a"b.xlsx')
+    registro.incrementar("linhas_lidas", 5, "Linhas lidas", etapa="extracao", arquivo='a"b.xlsx')
+    registro.definir("execucao_ultima_timestamp_segundos", 1_700_000_000, "Fim\nda execução")
+    registro.definir("execucao_duracao_segundos", 1.25)
+
+    assert registro.texto() == (
+        "# TYPE etl_execucao_duracao_segundos gauge\n"
+        "etl_execucao_duracao_segundos 1.25\n"
+        "# HELP etl_execucao_ultima_timestamp_segundos Fim\\nda execução\n"
+        "# TYPE etl_execucao_ultima_timestamp_segundos gauge\n"
+        "etl_execucao_ultima_timestamp_segundos 1700000000\n"
+        "# HELP etl_linhas_lidas_total Linhas lidas\n"
+        "# TYPE etl_linhas_lidas_total counter\n"
+        'etl_linhas_lidas_total{arquivo="a\\"b.xlsx",etapa="extracao"} 15\n'
+    )
+
+
+def test_tipo_trocado_e_rejeitado():
+    registro = RegistroMetricas()
+    registro.incrementar("lotes")
+
+    with pytest.raises(ValueError, match="counter"):
+        registro.definir("lotes", 1)
+
+
+def test_mesclar_soma_contadores_e_sobrescreve_medidores():
+    pai, filho = RegistroMetricas(), RegistroMetricas()
+    pai.incrementar("lotes", 2, acao="insert")
+    pai.definir("fila", 7)
+    filho.incrementar("lotes", 3, acao="insert")
+    filho.definir("fila", 1)
+
+    pai.mesclar(filho.exportar())
+
+    assert 'etl_lotes_total{acao="insert"} 5' in pai.texto()
+    assert "etl_fila 1" in pai.texto()
+
+
+def test_fim_da_execucao_grava_o_arquivo_com_os_totais_de_sql(ambiente, configurar):
+    arquivo = ambiente / "metricas" / "etl.prom"
+    configurar(METRICAS_ARQUIVO=arquivo)
+    metricas.zerar()
+    estatisticas_sql.zerar()
+    estatisticas_sql.registrar("SELECT ?", 0.5, linhas_entrada=1, linhas_saida=40)
+
+    registrar_fim_execucao(12.3456, "concluido")
+
+    texto = arquivo.read_text(encoding="utf-8")
+    assert 'etl_execucoes_total{status="concluido"} 1' in texto
+    assert "etl_execucao_duracao_segundos 12.346" in texto
+    assert 'etl_sql_linhas_total{direcao="recebidas"} 40' in texto
+    assert "etl_sql_chamadas_total 1" in texto
+    assert [p.name for p in arquivo.parent.iterdir()] == ["etl.prom"]  # sem temporários
+    metricas.zerar()
+    estatisticas_sql.zerar()
@@ -0,0 +1,142 @@
+"""
+Testes das migrações versionadas: leitura dos scripts, ordem, atomicidade e checksum
+"""
+
+import sqlite3
+
+import pytest
+
+from src.utils.migrations import DIR_MIGRACOES, MigradorSchema, Migracao, descobrir_migracoes
+
+
+class CursorMigracao:
+    """Cursor SQLite com a interface do pyodbc; a trava e o DDL de controle viram SQLite"""
+
+    TRADUCOES = {
+        MigradorSchema.SQL_CRIAR: """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                versao INT PRIMARY KEY, descricao VARCHAR(200), checksum CHAR(64), duracao_ms INT
+            )
+        """,
+        MigradorSchema.SQL_TRAVA: None,
+    }
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursor = conn.cursor()
+
+    def execute(self, sql, *params):
+        sql = self.TRADUCOES.get(sql, sql)
+        if sql is None:
+            return self
+        if not self._conn.in_transaction:
+            self._cursor.execute("BEGIN")  # DDL também dentro da transação, como no SQL Server
+        self._cursor.execute(sql, params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+
+class ConexaoMigracao:
+    def __init__(self, caminho):
+        self._conn = sqlite3.connect(caminho, isolation_level=None)
+
+    def cursor(self):
+        return CursorMigracao(self._conn)
+
+    def commit(self):
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+
+    def rollback(self):
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+
+    def tabelas(self):
+        return {nome for (nome,) in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+@pytest.fixture
+def conexao(tmp_path):
+    return ConexaoMigracao(tmp_path / "banco.sqlite")
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    pasta = tmp_path / "migrations"
+    pasta.mkdir()
+    return pasta
+
+
+def _script(pasta, nome, texto):
+    (pasta / nome).write_bytes(texto.encode("utf-8"))
+
+
+def test_scripts_do_repositorio_seguem_o_padrao():
+    migracoes = descobrir_migracoes(DIR_MIGRACOES)
+
+    assert [m.versao for m in migracoes] == list(range(1, len(migracoes) + 1))
+    assert all(m.lotes() for m in migracoes)
+
+
+def test_lotes_separados_por_go_e_checksum_independente_de_crlf(pasta):
+    _script(pasta, "V010__criar_tabela.sql", "CREATE TABLE a (x INT)\nGO\n\n  go -- fim do lote\nGOTO_FIM\nGO\n")
+    _script(pasta, "V011__mesmo_texto.sql", "CREATE TABLE a (x INT)\r\nGO\r\n\r\n  go -- fim do lote\r\nGOTO_FIM\r\nGO\r\n")
+
+    crlf, lf = descobrir_migracoes(pasta)[::-1]
+
+    assert lf.lotes() == ["CREATE TABLE a (x INT)", "GOTO_FIM"]
+    assert (lf.versao, lf.descricao, repr(lf)) == (10, "criar tabela", "V010 criar tabela")
+    assert crlf.checksum == lf.checksum
+
+
+@pytest.mark.parametrize("nomes, mensagem", [
+    (["V1_sem_separador.sql"], "inválido"),
+    (["V2__a.sql", "V002__b.sql"], "repetida"),
+])
+def test_nomes_invalidos_ou_versoes_repetidas(pasta, nomes, mensagem):
+    for nome in nomes:
+        _script(pasta, nome, "SELECT 1")
+
+    with pytest.raises(ValueError, match=mensagem):
+        descobrir_migracoes(pasta)
+
+
+def test_aplica_as_pendentes_em_ordem_e_registra(pasta, conexao):
+    _script(pasta, "V2__indice.sql", "CREATE INDEX ix_a ON a (x)")
+    _script(pasta, "V1__tabela.sql", "CREATE TABLE a (x INT)\nGO\nINSERT INTO a VALUES (1)")
+
+    assert [m.versao for m in MigradorSchema(conexao, pasta).migrar(simular=True)] == [1, 2]
+    assert "a" not in conexao.tabelas()
+
+    assert [m.versao for m in MigradorSchema(conexao, pasta).migrar()] == [1, 2]
+    assert MigradorSchema(conexao, pasta).migrar() == []
+    assert set(MigradorSchema(conexao, pasta).aplicadas()) == {1, 2}
+
+
+def test_script_com_erro_nao_deixa_nada_pela_metade(pasta, conexao):
+    _script(pasta, "V1__tabela.sql", "CREATE TABLE a (x INT)")
+    _script(pasta, "V2__quebrada.sql", "CREATE TABLE b (y INT)\nGO\nINSERT INTO inexistente VALUES (1)")
+    _script(pasta, "V3__depois.sql", "CREATE TABLE c (z INT)")
+    migrador = MigradorSchema(conexao, pasta)
+
+    with pytest.raises(RuntimeError, match=r"V2__quebrada.sql, lote 2/2"):
+        migrador.migrar()
+
+    assert conexao.tabelas() == {"schema_migrations", "a"}
+    assert set(migrador.aplicadas()) == {1}
+
+
+def test_script_aplicado_e_alterado_interrompe(pasta, conexao):
+    _script(pasta, "V1__tabela.sql", "CREATE TABLE a (x INT)")
+    MigradorSchema(conexao, pasta).migrar()
+    _script(pasta, "V1__tabela.sql", "CREATE TABLE a (x BIGINT)")
+    _script(pasta, "V2__nova.sql", "CREATE TABLE b (y INT)")
+
+    with pytest.raises(ValueError, match="alterada depois de aplicada"):
+        MigradorSchema(conexao, pasta).migrar()
+    assert "b" not in conexao.tabelas()
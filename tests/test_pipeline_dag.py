@@ -0,0 +1,141 @@
+"""
+Testes do executor de DAG: ordem de disparo, erros de definição, caminho
+crítico e incorporação das medições de tarefas em processos filhos
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils.db_metrics import estatisticas_sql
+from src.utils.metrics import metricas
+from src.utils.pipeline_dag import ErroDAG, ExecutorDAG, Tarefa
+
+
+@pytest.fixture(autouse=True)
+def medicoes_zeradas():
+    metricas.zerar()
+    estatisticas_sql.zerar()
+    yield
+    metricas.zerar()
+    estatisticas_sql.zerar()
+
+
+def _tarefa_medida(valor):
+    """Tarefa de processo filho que registra métrica e medição de SQL (nível de módulo: serializável)"""
+    metricas.incrementar("linhas_lidas", valor, etapa="teste")
+    estatisticas_sql.registrar("SELECT ? FROM despesas", 0.002, linhas_entrada=1)
+    return valor * 2
+
+
+def test_tarefas_independentes_rodam_em_paralelo_e_dependentes_recebem_as_saidas():
+    barreira = threading.Barrier(2, timeout=5)
+
+    def ler(valor):
+        barreira.wait()  # só passa se as duas leituras estiverem em andamento juntas
+        return valor
+
+    tarefas = [
+        Tarefa("a", lambda: ler(1), saidas=["a"]),
+        Tarefa("b", lambda: ler(2), saidas=["b"]),
+        Tarefa("soma", lambda a, b: (a + b, a * b), entradas=["a", "b"], saidas=["soma", "produto"]),
+    ]
+    concluidas = []
+    dag = ExecutorDAG(tarefas, max_threads=2, ao_concluir=lambda nome, _: concluidas.append(nome))
+
+    resultados = dag.executar()
+
+    assert resultados == {"a": 1, "b": 2, "soma": 3, "produto": 2}
+    assert concluidas[-1] == "soma"
+    assert dag.caminho_critico()[-1] == "soma"
+
+
+@pytest.mark.parametrize("tarefas, mensagem", [
+    ([Tarefa("a", int, saidas=["x"]), Tarefa("b", int, saidas=["x"])], "mais de uma tarefa"),
+    ([Tarefa("a", int, entradas=["y"], saidas=["x"])], "inexistentes"),
+    ([Tarefa("a", int, entradas=["y"], saidas=["x"]), Tarefa("b", int, entradas=["x"], saidas=["y"])], "Ciclo"),
+    ([Tarefa("a", int), Tarefa("a", int)], "duplicados"),
+])
+def test_definicoes_invalidas_sao_rejeitadas(tarefas, mensagem):
+    with pytest.raises(ErroDAG, match=mensagem):
+        ExecutorDAG(tarefas)
+
+
+def test_falha_interrompe_o_disparo_mas_espera_as_tarefas_em_andamento():
+    terminou = threading.Event()
+
+    def lenta():
+        time.sleep(0.2)
+        terminou.set()
+        return 1
+
+    def falha():
+        raise ValueError("planilha corrompida")
+
+    tarefas = [
+        Tarefa("lenta", lenta, saidas=["lenta"]),
+        Tarefa("falha", falha, saidas=["falha"]),
+        Tarefa("depois", lambda falha: falha, entradas=["falha"], saidas=["depois"]),
+    ]
+    dag = ExecutorDAG(tarefas, max_threads=2)
+
+    with pytest.raises(ErroDAG, match="planilha corrompida"):
+        dag.executar()
+    assert terminou.is_set()
+    assert "depois" not in dag.tempos
+
+
+@pytest.mark.parametrize("resultado", [(1, 2, 3), 1])
+def test_tarefa_com_saidas_a_mais_ou_a_menos_falha_e_interrompe_o_disparo(resultado):
+    concluidas = []
+
+    def registrar(nome, valor):
+        concluidas.append(nome)
+
+    tarefas = [
+        Tarefa("par", lambda: resultado, saidas=["a", "b"]),
+        Tarefa("depois", lambda a: a, entradas=["a"], saidas=["c"]),
+    ]
+    dag = ExecutorDAG(tarefas, ao_concluir=registrar)
+
+    with pytest.raises(ErroDAG, match="Tarefa 'par' falhou: deveria retornar 2 valores"):
+        dag.executar()
+    assert concluidas == []
+    assert "depois" not in dag.tempos
+
+
+def test_falha_ao_registrar_a_conclusao_conta_como_falha_da_tarefa():
+    def registrar(nome, valor):
+        raise OSError("disco cheio")
+
+    dag = ExecutorDAG([Tarefa("a", lambda: 1, saidas=["a"]), Tarefa("b", lambda a: a, entradas=["a"])],
+                      ao_concluir=registrar)
+
+    with pytest.raises(ErroDAG, match="Tarefa 'a' falhou: disco cheio"):
+        dag.executar()
+    assert "b" not in dag.tempos
+
+
+def test_pool_invalido():
+    with pytest.raises(ErroDAG, match="Pool inválido"):
+        Tarefa("a", int, pool="gpu")
+
+
+def test_processo_filho_devolve_metricas_e_medicoes_de_sql_ao_pai():
+    estatisticas_sql.registrar("SELECT ? FROM despesas", 0.5, linhas_entrada=1)
+    tarefas = [
+        Tarefa("cpu_1", _tarefa_medida, entradas=["valor"], saidas=["dobro_1"], pool="processo"),
+        Tarefa("cpu_2", _tarefa_medida, entradas=["valor"], saidas=["dobro_2"], pool="processo"),
+        Tarefa("valor", lambda: 5, saidas=["valor"]),
+    ]
+
+    resultados = ExecutorDAG(tarefas, max_processos=2).executar()
+
+    assert resultados["dobro_1"] == resultados["dobro_2"] == 10
+    assert "etl_linhas_lidas_total{etapa=\"teste\"} 10" in metricas.texto()
+    [medicao] = estatisticas_sql.resumo()
+    assert medicao["chamadas"] == 3
+    assert medicao["linhas_entrada"] == 3
+    assert medicao["max_segundos"] == 0.5
+    assert sum(medicao["histograma"]) == 3
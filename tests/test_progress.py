@@ -0,0 +1,73 @@
+"""
+Testes do progresso de etapas longas: eventos limitados por tempo, taxa e ETA
+"""
+
+import pytest
+
+from src.utils import progress
+from src.utils.progress import Progresso
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(progress.time, "monotonic", lambda: agora[0])
+    return agora
+
+
+@pytest.fixture
+def eventos(monkeypatch):
+    registrados = []
+
+    def info(mensagem, extra=None):
+        registrados.append((mensagem, extra["progresso"]))
+
+    monkeypatch.setattr(progress.logger, "info", info)
+    return registrados
+
+
+def test_fora_do_terminal_emite_eventos_por_intervalo_com_taxa_e_eta(configurar, relogio, eventos):
+    configurar(PROGRESSO_MODO="log", PROGRESSO_INTERVALO_S=10)
+
+    with Progresso("Carga de despesas", total=1000, unidade="linhas") as progresso:
+        for _ in range(4):
+            relogio[0] += 5
+            progresso.avancar(100, lotes=1)
+
+    assert len(eventos) == 3  # aos 10 s, aos 20 s e o estado final
+    texto, estado = eventos[0]
+    assert texto == "   ⏳ Carga de despesas: 200/1000 linhas (20.0%) | 20.0 linhas/s | ETA 0:00:40 | lotes 2"
+    assert (estado["percentual"], estado["eta_s"], estado["lotes"]) == (20.0, 40.0, 2)
+    assert eventos[-1][0] == "   ✅ Carga de despesas: 400/1000 linhas (40.0%) | 20.0 linhas/s | em 0:00:20 | lotes 4"
+
+
+def test_etapa_curta_nao_gera_saida(configurar, relogio, eventos):
+    configurar(PROGRESSO_MODO="log", PROGRESSO_INTERVALO_S=30)
+
+    with Progresso("Fingerprints do banco") as progresso:
+        progresso.avancar(50)
+
+    assert eventos == []
+    assert progresso.estado()["total"] is None
+
+
+def test_modo_off_nao_conta(configurar, eventos):
+    configurar(PROGRESSO_MODO="off")
+
+    progresso = Progresso("Extração", total=3)
+    progresso.avancar(3)
+    progresso.concluir()
+
+    assert (progresso.feito, eventos) == (0, [])
+
+
+def test_no_terminal_redesenha_a_linha_e_limpa_ao_concluir(configurar, relogio, eventos, capsys):
+    configurar(PROGRESSO_MODO="tty")
+
+    with Progresso("Leitura", total=10, unidade="arquivos") as progresso:
+        relogio[0] += 1
+        progresso.avancar(5)
+
+    erro = capsys.readouterr().err
+    assert erro == "\r\033[K⏳ Leitura: 5/10 arquivos (50.0%) | 5.0 arquivos/s | ETA 0:00:01\r\033[K"
+    assert [texto for texto, _ in eventos] == ["   ✅ Leitura: 5/10 arquivos (50.0%) | 5.0 arquivos/s | em 0:00:01"]
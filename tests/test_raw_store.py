@@ -0,0 +1,98 @@
+"""
+Testes do armazém raw: deduplicação por conteúdo, arquivos de trabalho
+independentes dos objetos e data de arquivamento na descoberta
+"""
+
+import itertools
+import os
+import stat
+
+import pytest
+
+from src.extract.discovery import descobrir_fontes
+from src.utils import raw_store
+from src.utils.raw_store import ArmazemRaw, datas_arquivamento
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """time.time do armazém avançando 10 s a cada chamada"""
+    contador = itertools.count(1_700_000_000, 10)
+    monkeypatch.setattr(raw_store.time, "time", lambda: next(contador))
+
+
+def _download(pasta, nome, conteudo, mtime):
+    caminho = pasta / nome
+    caminho.write_bytes(conteudo)
+    os.utime(caminho, (mtime, mtime))
+    return caminho
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    downloads, raw = tmp_path / "Downloads", tmp_path / "raw"
+    downloads.mkdir()
+    return downloads, raw
+
+
+def test_conteudo_repetido_vira_um_objeto_e_reingestao_e_inalterada(pastas, relogio):
+    downloads, raw = pastas
+    armazem = ArmazemRaw(raw)
+    a = _download(downloads, "Despesas_SIT_1.xlsx", b"versao A", 1000)
+    b = _download(downloads, "Despesas_SIT_1 (1).xlsx", b"versao A", 1000)
+
+    resultados = armazem.arquivar_varios([a, b], max_threads=2)
+
+    assert [situacao for _, _, situacao in resultados] == ["novo", "novo"]
+    objetos = [p for p in (raw / ".objetos").glob("??/*") if p.is_file()]
+    assert len(objetos) == 1
+    assert ArmazemRaw(raw).arquivar(a) == (resultados[0][1], "inalterado")
+
+
+def test_arquivo_de_trabalho_e_somente_leitura_e_nao_compartilha_o_objeto(pastas, relogio):
+    downloads, raw = pastas
+    armazem = ArmazemRaw(raw)
+    hash_conteudo, _ = armazem.arquivar(_download(downloads, "resumo.csv", b"original", 1000), mover=True)
+    trabalho = raw / "resumo.csv"
+    objeto = armazem.caminho_objeto(hash_conteudo)
+
+    assert not trabalho.stat().st_mode & stat.S_IWUSR
+    assert not os.path.samefile(trabalho, objeto)
+
+    os.chmod(trabalho, stat.S_IREAD | stat.S_IWRITE)
+    trabalho.write_bytes(b"editado a mao")
+    assert objeto.read_bytes() == b"original"
+
+    # Nova versão com o mesmo nome substitui o arquivo de trabalho (mesmo somente leitura)
+    armazem.arquivar(_download(downloads, "resumo.csv", b"nova versao", 2000))
+    assert trabalho.read_bytes() == b"nova versao"
+
+
+def test_descoberta_ordena_pela_data_de_arquivamento_e_nao_pelo_mtime(pastas, relogio):
+    downloads, raw = pastas
+    armazem = ArmazemRaw(raw)
+    armazem.arquivar(_download(downloads, "Despesas_SIT_1.xlsx", b"versao A", 1000))
+    armazem.arquivar(_download(downloads, "Despesas_SIT_1 (1).xlsx", b"versao B", 2000))
+    # A volta depois de B: o clone herda o mtime antigo do objeto de A
+    armazem.arquivar(_download(downloads, "Despesas_SIT_1 (2).xlsx", b"versao A", 3000))
+    armazem.salvar_indice()
+    assert (raw / "Despesas_SIT_1 (2).xlsx").stat().st_mtime < (raw / "Despesas_SIT_1 (1).xlsx").stat().st_mtime
+
+    fontes = descobrir_fontes(raw, "Despesas_SIT_*.xlsx")
+
+    assert [f.caminho.name for f in fontes] == ["Despesas_SIT_1 (2).xlsx", "Despesas_SIT_1 (1).xlsx"]
+
+
+def test_arquivo_trocado_por_fora_do_armazem_usa_o_mtime(pastas, relogio):
+    downloads, raw = pastas
+    armazem = ArmazemRaw(raw)
+    armazem.arquivar(_download(downloads, "resumo.csv", b"arquivado", 1000))
+    armazem.salvar_indice()
+    assert set(datas_arquivamento(raw)) == {"resumo.csv"}
+
+    trabalho = raw / "resumo.csv"
+    os.chmod(trabalho, stat.S_IREAD | stat.S_IWRITE)
+    trabalho.write_bytes(b"copiado por fora")
+
+    assert datas_arquivamento(raw) == {}
+    assert datas_arquivamento(downloads) == {}
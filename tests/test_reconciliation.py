@@ -0,0 +1,104 @@
+"""
+Testes da reconciliação por agregados: o hash de linha do Python bate com o
+do banco, e qualquer divergência de um grupo é detectada
+"""
+
+import re
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+from conftest import SQL_AGREGADOS_SQLITE, BancoSqlite, despesa
+from src.transform.reconciliation import (
+    COLUNAS_HASH, SQL_AGREGADOS, agregados_origem, comparar, normalizar_agregados_banco,
+)
+
+
+def _staging(*linhas):
+    """Linhas como lidas de despesas_geral.csv (dtype=str)"""
+    return pd.DataFrame(linhas).drop(columns="acao").astype(object)
+
+
+def _gravar(banco, df):
+    for linha in df[COLUNAS_HASH].itertuples(index=False):
+        banco.consultar(
+            f"INSERT INTO despesas ({', '.join(COLUNAS_HASH)}) VALUES ({', '.join('?' * len(COLUNAS_HASH))})",
+            *(None if pd.isna(v) else v for v in linha),
+        )
+
+
+def _agregados_banco(banco):
+    with closing(banco.conectar()._conn) as conn:
+        return normalizar_agregados_banco(pd.read_sql(SQL_AGREGADOS_SQLITE, conn))
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    return BancoSqlite(tmp_path / "banco.sqlite")
+
+
+@pytest.fixture
+def staging():
+    return _staging(
+        despesa(1, valor="10.50"),
+        despesa(2, valor="0.1", favorecido="Fornecedor Ação Ltda"),
+        despesa(3, rubrica="2", valor="1234.5", cpf_cnpj=None, data_debito_convenio=None),
+        despesa(4, termo="6729", valor="-3.00", data_pagamento="2023-12-31"),
+    )
+
+
+def test_colunas_do_hash_na_mesma_ordem_do_sql():
+    concat = re.search(r"CONCAT\((.*?)\)\) AS md5", SQL_AGREGADOS, re.S).group(1)
+
+    assert re.findall(r"d\.(\w+)", concat) == COLUNAS_HASH
+
+
+def test_agregados_iguais_aos_do_banco(sqlite, staging):
+    _gravar(sqlite, staging)
+
+    origem = agregados_origem(staging)
+    banco = _agregados_banco(sqlite)
+
+    assert comparar(origem, banco).empty
+    assert origem.sort_values(["termo", "rubrica"], ignore_index=True).equals(
+        banco.sort_values(["termo", "rubrica"], ignore_index=True)
+    )
+    grupo = origem.set_index(["termo", "rubrica"]).loc[("6373", "1")]
+    assert (grupo["linhas"], grupo["centavos"], grupo["ultima_data"]) == (2, 1060, "2024-03-15")
+
+
+@pytest.mark.parametrize("sql, grupo, divergencias", [
+    ("UPDATE despesas SET favorecido = 'Outro' WHERE id_codigo_sit = '1'", ("6373", "1"), "hash_a, hash_b"),
+    ("UPDATE despesas SET valor = 10.51 WHERE id_codigo_sit = '1'", ("6373", "1"), "centavos, hash_a, hash_b"),
+    ("UPDATE despesas SET data_debito_convenio = '2024-03-17' WHERE id_codigo_sit = '3'", ("6373", "2"),
+     "hash_a, hash_b"),
+    ("DELETE FROM despesas WHERE id_codigo_sit = '4'", ("6729", "1"), "ausente no banco"),
+])
+def test_divergencia_de_um_grupo_e_detectada(sqlite, staging, sql, grupo, divergencias):
+    _gravar(sqlite, staging)
+    sqlite.consultar(sql)
+
+    resultado = comparar(agregados_origem(staging), _agregados_banco(sqlite))
+
+    assert list(resultado.itertuples(index=False, name=None)) == [(*grupo, divergencias)]
+
+
+def test_nulo_e_texto_vazio_tem_o_mesmo_hash(sqlite, staging):
+    staging.loc[staging["id_codigo_sit"] == "2", "cpf_cnpj"] = ""
+    _gravar(sqlite, staging)
+    sqlite.consultar("UPDATE despesas SET cpf_cnpj = NULL WHERE id_codigo_sit = '2'")
+
+    assert comparar(agregados_origem(staging), _agregados_banco(sqlite)).empty
+
+
+def test_transformacao_reconcilia_pelo_banco(banco, staging):
+    transformer = pytest.importorskip("src.transform.transformer", exc_type=ImportError)
+    _gravar(banco, staging)
+    banco.consultar("UPDATE despesas SET valor = 99 WHERE id_codigo_sit = '4'")
+
+    agregados = transformer.ExpensesTransformer().ler_agregados_despesas()
+    restantes, retiradas = transformer.ExpensesTransformer._reconciliar(staging, agregados)
+
+    assert restantes["id_codigo_sit"].tolist() == ["4"]
+    assert retiradas == 3
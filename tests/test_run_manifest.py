@@ -0,0 +1,76 @@
+"""
+Testes do manifesto de execução: retomada, checkpoints de etapa e lotes de carga
+"""
+
+import json
+
+from src.utils.run_manifest import ManifestoExecucao
+
+
+def test_execucao_em_andamento_e_retomada_e_concluida_inicia_outra(tmp_path):
+    primeiro = ManifestoExecucao(tmp_path, run_id="r1", escopo="completo")
+    assert not primeiro.retomada
+
+    retomado = ManifestoExecucao(tmp_path, run_id="r2")
+    assert retomado.run_id == "r1"
+    assert retomado.retomada
+
+    retomado.finalizar()
+    novo = ManifestoExecucao(tmp_path, run_id="r3")
+    assert novo.run_id == "r3"
+    assert not novo.retomada
+
+
+def test_etapa_so_conta_como_concluida_com_as_mesmas_entradas_e_saidas_intactas(tmp_path):
+    entrada = tmp_path / "despesas.csv"
+    saida = tmp_path / "despesas_upload.csv"
+    entrada.write_text("a\n1\n", encoding="utf-8")
+    saida.write_text("a\n1\n", encoding="utf-8")
+
+    manifesto = ManifestoExecucao(tmp_path)
+    manifesto.registrar_etapa("transformar_despesas", [entrada], [saida], True)
+    assert ManifestoExecucao(tmp_path).etapa_concluida("transformar_despesas", [entrada])
+    assert manifesto.resultado_etapa("transformar_despesas") is True
+
+    saida.write_text("a\n2\n", encoding="utf-8")
+    assert not manifesto.etapa_concluida("transformar_despesas", [entrada])
+
+    saida.write_text("a\n1\n", encoding="utf-8")
+    entrada.write_text("a\n3\n", encoding="utf-8")
+    assert not manifesto.etapa_concluida("transformar_despesas", [entrada])
+
+
+def test_lotes_commitados_ficam_no_arquivo_e_sobrevivem_a_retomada(tmp_path):
+    manifesto = ManifestoExecucao(tmp_path, run_id="r1")
+    manifesto.registrar_lote("abc", "termo-6373", 0, 499, qtd_insert=480, qtd_update=20)
+    manifesto.registrar_lote("def", "termo-6373", 500, 749, qtd_insert=250, qtd_update=0)
+
+    gravado = ManifestoExecucao.ler(tmp_path)
+    assert gravado["lotes"]["abc"]["qtd_linhas"] == 500
+    assert gravado["lotes"]["def"]["linha_inicio"] == 500
+
+    retomado = ManifestoExecucao(tmp_path)
+    assert set(retomado.lotes()) == {"abc", "def"}
+    assert retomado.lotes()["abc"]["qtd_update"] == 20
+
+
+def test_lotes_vao_para_o_arquivo_lateral_e_sao_incorporados_ao_finalizar(tmp_path):
+    manifesto = ManifestoExecucao(tmp_path, run_id="r1")
+    manifesto.registrar_lote("abc", "unica", 0, 9, qtd_insert=10, qtd_update=0)
+    manifesto.registrar_lote("def", "unica", 10, 19, qtd_insert=5, qtd_update=5)
+    # Queda no meio da gravação de uma linha
+    with open(tmp_path / ManifestoExecucao.ARQUIVO_LOTES, "a", encoding="utf-8") as f:
+        f.write('{"lote_id": "ghi", "part')
+
+    gravado = json.loads((tmp_path / ManifestoExecucao.ARQUIVO).read_text(encoding="utf-8"))
+    assert gravado["lotes"] == {}
+    assert set(ManifestoExecucao.ler(tmp_path)["lotes"]) == {"abc", "def"}
+
+    retomado = ManifestoExecucao(tmp_path)
+    assert retomado.lotes()["def"]["qtd_update"] == 5
+    retomado.registrar_lote("jkl", "unica", 20, 24, qtd_insert=5, qtd_update=0)
+    retomado.finalizar()
+
+    assert not (tmp_path / ManifestoExecucao.ARQUIVO_LOTES).exists()
+    assert set(ManifestoExecucao.ler(tmp_path)["lotes"]) == {"abc", "def", "jkl"}
+    assert ManifestoExecucao(tmp_path, run_id="r2").lotes() == {}
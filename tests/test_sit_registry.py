@@ -0,0 +1,70 @@
+"""
+Testes do registro SIT -> termo: cache por TTL, assinatura, fallback e shards
+"""
+
+import pandas as pd
+import pytest
+
+sit_registry = pytest.importorskip("src.utils.sit_registry", exc_type=ImportError)
+
+
+class BancoTermos:
+    """execute_query falso: tabela termos em memória, com contagem de leituras do mapa"""
+
+    def __init__(self, termos):
+        self.termos = dict(termos)
+        self.leituras = 0
+        self.fora_do_ar = False
+
+    def execute_query(self, sql):
+        if self.fora_do_ar:
+            raise ConnectionError("servidor indisponível")
+        if sql == sit_registry.RegistroSIT.QUERY_MAPA:
+            self.leituras += 1
+            return pd.DataFrame({"nro_sit": list(self.termos), "id_termo": list(self.termos.values())})
+        return pd.DataFrame({"qtd": [len(self.termos)], "soma": [hash(frozenset(self.termos.items()))]})
+
+
+@pytest.fixture
+def banco_termos(monkeypatch):
+    banco = BancoTermos({57884: 6373, 63377: 6729})
+    monkeypatch.setattr(sit_registry.db_manager, "execute_query", banco.execute_query)
+    return banco
+
+
+def test_mapa_vem_do_banco_e_so_e_relido_quando_a_tabela_muda(banco_termos, monkeypatch):
+    relogio = [1000.0]
+    monkeypatch.setattr(sit_registry.time, "time", lambda: relogio[0])
+    registro = sit_registry.RegistroSIT(ttl_segundos=60, shard_indice=0, shard_total=1)
+
+    assert registro.termo_do_sit(" 57884 ") == "6373"
+    relogio[0] += 61
+    assert registro.mapa() == {"57884": "6373", "63377": "6729"}
+    assert banco_termos.leituras == 1  # TTL vencido, mas assinatura igual
+
+    banco_termos.termos[70001] = 7001
+    assert registro.termo_do_sit(70001) is None  # ainda dentro do TTL renovado
+    relogio[0] += 61
+    assert registro.termo_do_sit(70001) == "7001"
+    assert banco_termos.leituras == 2
+
+
+def test_banco_indisponivel_usa_o_mapa_do_config(banco_termos):
+    from src.utils.config import Config
+
+    banco_termos.fora_do_ar = True
+    registro = sit_registry.RegistroSIT(ttl_segundos=60, shard_indice=0, shard_total=1)
+    assert registro.mapa() == dict(Config.SIT_TERMO_MAP)
+
+
+def test_shards_sao_disjuntos_e_cobrem_todos_os_sits(banco_termos):
+    banco_termos.termos = {sit: sit + 1 for sit in range(100)}
+    shards = [sit_registry.RegistroSIT(ttl_segundos=60, shard_indice=i, shard_total=3).mapa_shard() for i in range(3)]
+
+    assert sum(len(s) for s in shards) == 100
+    assert set().union(*shards) == {str(sit) for sit in range(100)}
+
+
+def test_shard_invalido():
+    with pytest.raises(ValueError, match="Shard inválido"):
+        sit_registry.RegistroSIT(shard_indice=3, shard_total=3)
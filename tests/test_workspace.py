@@ -0,0 +1,94 @@
+"""
+Testes dos espaços de trabalho por execução: travas, retomada por escopo e limpeza
+"""
+
+import multiprocessing
+
+import pandas as pd
+
+from src.utils.run_manifest import ManifestoExecucao
+from src.utils.workspace import (
+    ARQUIVO_TRAVA, EspacoExecucao, TravaArquivo, em_uso, gravar_csv_atomico, limpar_execucoes,
+    listar_execucoes, ultima_execucao,
+)
+
+
+def _segurar_trava(caminho, travada, soltar):
+    with TravaArquivo(caminho):
+        travada.set()
+        soltar.wait(30)
+
+
+def test_trava_exclui_outra_instancia_e_outro_processo(tmp_path):
+    caminho = tmp_path / "recurso.trava"
+    contexto = multiprocessing.get_context("spawn")
+    travada, soltar = contexto.Event(), contexto.Event()
+    processo = contexto.Process(target=_segurar_trava, args=(caminho, travada, soltar))
+    processo.start()
+    try:
+        assert travada.wait(30)
+        assert not TravaArquivo(caminho).adquirir(bloquear=False)
+    finally:
+        soltar.set()
+        processo.join(30)
+
+    primeira = TravaArquivo(caminho)
+    assert primeira.adquirir(bloquear=False)
+    assert not TravaArquivo(caminho).adquirir(bloquear=False)  # mesmo processo, outro descritor
+    primeira.liberar()
+    assert TravaArquivo(caminho).adquirir(bloquear=False)
+
+
+def test_execucao_interrompida_e_retomada_so_pelo_mesmo_escopo_e_se_livre(ambiente):
+    dir_base = ambiente / "staging"
+    interrompida = EspacoExecucao.abrir(escopo="shard-0-de-2")
+    interrompida.liberar()  # processo caiu: manifesto segue "em_andamento"
+
+    outro_escopo = EspacoExecucao.abrir(escopo="shard-1-de-2")
+    assert outro_escopo.run_id != interrompida.run_id
+
+    retomada = EspacoExecucao.abrir(escopo="shard-0-de-2")
+    assert retomada.run_id == interrompida.run_id
+    assert retomada.manifesto.retomada
+    assert em_uso(retomada.caminho)
+
+    # Em uso por outro processo: a próxima do escopo começa outra execução
+    concorrente = EspacoExecucao.abrir(escopo="shard-0-de-2")
+    assert concorrente.run_id not in (retomada.run_id, outro_escopo.run_id)
+
+    for espaco in (outro_escopo, retomada, concorrente):
+        espaco.manifesto.finalizar()
+        espaco.encerrar()
+    assert not em_uso(retomada.caminho)
+    assert ultima_execucao(dir_base)["run_id"] == concorrente.run_id
+    assert len(listar_execucoes(dir_base)) == 3
+
+
+def test_limpeza_preserva_em_andamento_travadas_e_as_mais_recentes(ambiente):
+    dir_base = ambiente / "staging"
+    pastas = []
+    for i in range(5):
+        pasta = dir_base / "runs" / f"20240101_00000{i}_000000"
+        manifesto = ManifestoExecucao(pasta, run_id=pasta.name)
+        if i != 1:
+            manifesto.finalizar()
+        pastas.append(pasta)
+    travada = TravaArquivo(pastas[0] / ARQUIVO_TRAVA)
+    travada.adquirir()
+
+    limpar_execucoes(dir_base, manter=2)
+
+    travada.liberar()
+    assert [p.name for p in listar_execucoes(dir_base)] == [
+        pastas[4].name, pastas[3].name, pastas[1].name, pastas[0].name,
+    ]
+
+
+def test_csv_atomico_nao_deixa_temporarios(ambiente):
+    destino = ambiente / "staging" / "despesas_upload.csv"
+    destino.write_text("versao antiga\n")
+
+    gravar_csv_atomico(pd.DataFrame({"id_codigo_sit": ["1", "2"]}), destino)
+
+    assert destino.read_text().splitlines() == ["id_codigo_sit", "1", "2"]
+    assert [p.name for p in destino.parent.iterdir()] == ["despesas_upload.csv"]
@@ -0,0 +1,66 @@
+"""
+Testes dos backends de leitura de XLSX: mesma saída em todos e seleção automática
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.extract import xlsx_reader
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+@pytest.fixture
+def planilha(tmp_path):
+    caminho = tmp_path / "despesas.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Código", "Termo", None, "Data Débito Conta Convêvio", "Valor"])
+    ws.append([101, "6373", None, datetime(2024, 3, 15), 10.5])
+    ws.append([None, None, None, None, None])
+    ws.append([102, "6729", None, None, 7])
+    ws.append([103, "6729", None, datetime(2024, 4, 1), 0.1])
+    wb.save(caminho)
+    return caminho
+
+
+@pytest.mark.parametrize("backend", ["openpyxl", "openpyxl_readonly"])
+def test_backends_entregam_cabecalho_normalizado_e_valores_texto_em_chunks(planilha, backend):
+    chunks = list(xlsx_reader.iterar_chunks_xlsx(str(planilha), tamanho_chunk=2, backend=backend))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    df = pd.concat(chunks, ignore_index=True)
+    assert list(df.columns) == ["Código", "Termo", "Data Débito Conta Convênio", "Valor"]
+    assert df["Código"].tolist() == ["101", "102", "103"]
+    assert df["Data Débito Conta Convênio"].iloc[0].startswith("2024-03-15")
+    assert pd.isna(df["Data Débito Conta Convênio"].iloc[1])
+    assert df["Valor"].tolist() == ["10.5", "7", "0.1"]
+
+
+def test_selecao_automatica_usa_streaming_acima_do_limite(planilha):
+    assert isinstance(xlsx_reader.selecionar_leitor(str(planilha), "auto", limite_streaming_mb=0),
+                      xlsx_reader.LeitorOpenpyxlReadOnly)
+
+    pequeno = xlsx_reader.selecionar_leitor(str(planilha), "auto")
+    esperado = xlsx_reader.LeitorCalamine if xlsx_reader.LeitorCalamine.disponivel() else xlsx_reader.LeitorOpenpyxlReadOnly
+    assert isinstance(pequeno, esperado)
+
+
+def test_backend_desconhecido_ou_nao_instalado(planilha, monkeypatch):
+    with pytest.raises(ValueError, match="desconhecido"):
+        xlsx_reader.selecionar_leitor(str(planilha), "xlrd")
+
+    monkeypatch.setattr(xlsx_reader.LeitorCalamine, "disponivel", classmethod(lambda cls: False))
+    with pytest.raises(ValueError, match="não está instalado"):
+        xlsx_reader.selecionar_leitor(str(planilha), "calamine")
+    assert "calamine" not in xlsx_reader.backends_disponiveis()
+
+
+def test_backend_sem_ler_chunks_falha_ao_instanciar():
+    class Incompleto(xlsx_reader.LeitorExcel):
+        nome = "incompleto"
+
+    with pytest.raises(TypeError, match="ler_chunks"):
+        Incompleto()